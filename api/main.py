@@ -7,12 +7,16 @@ import os
 import secrets
 from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI, HTTPException, Security
+from fastapi import Depends, FastAPI, HTTPException, Query, Response, Security
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
 
 from config.setting import get_settings
+from utils.db_metrics import PROMETHEUS_CONTENT_TYPE, query_metrics
+from utils.db_pool import pool_registry
 from utils.logging import setup_logging
+from utils.loop_monitor import loop_monitor
+from utils.message_pipeline import message_pipeline
 
 logger = setup_logging(__name__)
 settings = get_settings()
@@ -175,6 +179,66 @@ async def reload_cog(cog_name: str):
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+# ========== メトリクス ==========
+
+@app.get("/metrics/queries", dependencies=[Depends(verify_api_key)])
+async def get_query_metrics(
+    sort: str = Query(default="total", pattern="^(total|calls|mean|max|rows|pool_wait|errors)$"),
+    limit: int = Query(default=50, ge=1, le=500),
+    pool: str | None = None,
+):
+    """SQLフィンガープリントごとの実行統計"""
+    return {
+        "since": query_metrics.started_at,
+        "slow_query_ms": query_metrics.slow_query_seconds * 1000,
+        "statements": query_metrics.snapshot(sort=sort, limit=limit, pool=pool),
+        "pools": pool_registry.stats(),
+    }
+
+
+@app.post("/metrics/queries/reset", dependencies=[Depends(verify_api_key)])
+async def reset_query_metrics():
+    """SQL実行統計をリセット"""
+    query_metrics.reset()
+    return {"success": True}
+
+
+@app.get("/metrics/message-pipeline", dependencies=[Depends(verify_api_key)])
+async def get_message_pipeline_metrics():
+    """on_messageのステージごとの所要時間"""
+    return {
+        "since": message_pipeline.started_at,
+        "messages": message_pipeline.messages,
+        "stages": message_pipeline.snapshot(),
+    }
+
+
+@app.post("/metrics/message-pipeline/reset", dependencies=[Depends(verify_api_key)])
+async def reset_message_pipeline_metrics():
+    """on_messageの所要時間の集計をリセット"""
+    message_pipeline.reset()
+    return {"success": True}
+
+
+@app.get("/metrics/event-loop", dependencies=[Depends(verify_api_key)])
+async def get_event_loop_metrics(slow_limit: int = Query(default=10, ge=0, le=50)):
+    """イベントループのラグのパーセンタイルと遅いコールバックのスタック"""
+    return loop_monitor.snapshot(slow_limit=slow_limit)
+
+
+@app.post("/metrics/event-loop/reset", dependencies=[Depends(verify_api_key)])
+async def reset_event_loop_metrics():
+    """イベントループの集計をリセット"""
+    loop_monitor.reset()
+    return {"success": True}
+
+
+@app.get("/metrics", dependencies=[Depends(verify_api_key)])
+async def get_prometheus_metrics():
+    """Prometheus形式のメトリクス"""
+    return Response(content=query_metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # ========== ルーター登録 ==========
 
 from api.routers import (  # noqa: E402
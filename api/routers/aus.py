@@ -5,7 +5,7 @@ AUS (Art Unauthorized-repost Shield) API ルーター
 """
 from fastapi import APIRouter, Depends, HTTPException
 
-from api.main import verify_api_key
+from api.main import get_bot, verify_api_key
 
 router = APIRouter()
 
@@ -21,6 +21,23 @@ async def get_aus_status():
     return {"enabled": True}
 
 
+@router.get("/queue", dependencies=[Depends(verify_api_key)])
+async def get_aus_queue_metrics():
+    """画像チェックキューの深さ・待ち時間メトリクス"""
+    bot = get_bot()
+    aus_cog = bot.get_cog("ImageDetection")
+
+    if not aus_cog:
+        return {"enabled": False, "error": "ImageDetection not loaded"}
+
+    return {
+        "enabled": True,
+        "queue": aus_cog.job_queue.metrics(),
+        "saucenao_tokens": round(aus_cog.saucenao_bucket.available, 2),
+        "fingerprints": len(aus_cog.fingerprints),
+    }
+
+
 @router.get("/stats/{guild_id}", dependencies=[Depends(verify_api_key)])
 async def get_aus_stats(guild_id: str):
     """AUS統計を取得"""
@@ -13,6 +13,8 @@ from pydantic import BaseModel
 from api.main import verify_api_key
 from cogs.cp.db import checkpoint_db
 from utils.database import get_db_pool
+from utils.db_pool import pool_registry
+from utils.migrations import MigrationRunner
 
 router = APIRouter()
 
@@ -62,10 +64,9 @@ async def get_extra_pool(db_name: str) -> asyncpg.Pool | None:
         }
         url = os.getenv(env_map.get(db_name, ""))
         if url:
-            if url.startswith("postgres://"):
-                url = url.replace("postgres://", "postgresql://", 1)
+            # Bot側で同じDBのプールがあればそれを共有する
             try:
-                _extra_pools[db_name] = await asyncpg.create_pool(url, min_size=1, max_size=5)
+                _extra_pools[db_name] = await pool_registry.get(url, name=db_name, owner="api")
             except Exception:
                 return None
 
@@ -145,6 +146,18 @@ async def get_status():
     return {"databases": results}
 
 
+@router.get("/pools", dependencies=[Depends(verify_api_key)])
+async def get_pools():
+    """接続プールのゲージ（使用中接続数・取得待ち時間）を取得"""
+    return {"pools": pool_registry.stats()}
+
+
+@router.get("/migrations", dependencies=[Depends(verify_api_key)])
+async def get_migrations():
+    """メインDBのマイグレーション適用状況を取得"""
+    return {"migrations": await MigrationRunner(await get_db_pool()).status()}
+
+
 async def resolve_pool(db_name: str):
     """DB名からプールを解決"""
     if db_name == "main":
@@ -8,6 +8,7 @@ from typing import Any, Optional
 import asyncpg
 
 from config.setting import get_settings
+from utils.db_pool import pool_registry
 from utils.logging import setup_logging
 
 logger = setup_logging()
@@ -19,6 +20,8 @@ class DatabaseManager:
 
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        # 認証済み絵師IDのインメモリセット（画像検出の高速スキップ用）
+        self.verified_artist_ids: set[int] = set()
 
     async def initialize(self):
         """データベース接続プールを初期化"""
@@ -26,12 +29,10 @@ class DatabaseManager:
         if not database_url:
             raise ValueError("AUS_DATABASE_URL環境変数が設定されていません")
 
-        # Railway の postgres:// を postgresql:// に変換
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-
-        self.pool = await asyncpg.create_pool(
+        # Railway の postgres:// はレジストリ側で postgresql:// に正規化される
+        self.pool = await pool_registry.get(
             database_url,
+            name="aus",
             min_size=2,
             max_size=10,
             command_timeout=60
@@ -39,10 +40,51 @@ class DatabaseManager:
 
         logger.info("✅ AUS Database pool created successfully")
 
+        await self._setup_tables()
+        await self.refresh_verified_artists()
+
+    async def _setup_tables(self):
+        """画像フィンガープリント・画像チェックジョブのテーブルを作成"""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS aus_image_fingerprints (
+                    image_hash BIGINT PRIMARY KEY,
+                    result_type TEXT NOT NULL,
+                    source_url TEXT,
+                    similarity REAL,
+                    urls TEXT[],
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    last_seen_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                )
+                """
+            )
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS aus_image_jobs (
+                    job_id BIGSERIAL PRIMARY KEY,
+                    guild_id BIGINT NOT NULL,
+                    channel_id BIGINT NOT NULL,
+                    message_id BIGINT NOT NULL,
+                    author_id BIGINT NOT NULL,
+                    attachment_url TEXT NOT NULL UNIQUE,
+                    filename TEXT NOT NULL,
+                    enqueued_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # 失敗回数の列が無い既存テーブル向け
+            await conn.execute(
+                "ALTER TABLE aus_image_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0"
+            )
+
     async def close(self):
         """データベース接続プールをクローズ"""
         if self.pool:
-            await self.pool.close()
+            await pool_registry.release(self.pool, owner="aus")
+            self.pool = None
             logger.info("✅ AUS Database pool closed")
 
     # ==================== Verified Artists ====================
@@ -56,6 +98,17 @@ class DatabaseManager:
             )
             return result
 
+    def is_verified_artist_cached(self, user_id: int) -> bool:
+        """インメモリセットで認証済み絵師か確認（DBアクセスなし）"""
+        return user_id in self.verified_artist_ids
+
+    async def refresh_verified_artists(self) -> int:
+        """認証済み絵師IDセットをDBと同期"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT user_id FROM verified_artists")
+        self.verified_artist_ids = {row['user_id'] for row in rows}
+        return len(self.verified_artist_ids)
+
     async def get_verified_artist(self, user_id: int) -> Optional[dict[str, Any]]:
         """認証済み絵師情報を取得"""
         async with self.pool.acquire() as conn:
@@ -95,6 +148,7 @@ class DatabaseManager:
                     """,
                     user_id, twitter_handle, twitter_url, verified_by, notes
                 )
+                self.verified_artist_ids.add(user_id)
                 return True
             except Exception as e:
                 logger.error(f"❌ Failed to add verified artist: {e}")
@@ -108,6 +162,7 @@ class DatabaseManager:
                     "DELETE FROM verified_artists WHERE user_id = $1",
                     user_id
                 )
+                self.verified_artist_ids.discard(user_id)
                 return result != "DELETE 0"
             except Exception as e:
                 logger.error(f"❌ Failed to remove verified artist: {e}")
@@ -126,6 +181,115 @@ class DatabaseManager:
             )
             return [dict(row) for row in rows]
 
+    # ==================== Image Fingerprints ====================
+
+    async def get_all_fingerprints(self) -> list[dict[str, Any]]:
+        """全ての画像フィンガープリントを取得"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT image_hash, result_type, source_url, similarity, urls
+                FROM aus_image_fingerprints
+                """
+            )
+            return [dict(row) for row in rows]
+
+    async def save_fingerprint(
+        self,
+        image_hash: int,
+        result_type: str,
+        source_url: Optional[str] = None,
+        similarity: Optional[float] = None,
+        urls: Optional[list[str]] = None
+    ) -> bool:
+        """画像フィンガープリントと検出結果を保存（image_hashは符号付き64bit）"""
+        async with self.pool.acquire() as conn:
+            try:
+                await conn.execute(
+                    """
+                    INSERT INTO aus_image_fingerprints
+                        (image_hash, result_type, source_url, similarity, urls)
+                    VALUES ($1, $2, $3, $4, $5)
+                    ON CONFLICT (image_hash) DO UPDATE
+                    SET result_type = $2,
+                        source_url = $3,
+                        similarity = $4,
+                        urls = $5,
+                        last_seen_at = NOW()
+                    """,
+                    image_hash, result_type, source_url, similarity, urls
+                )
+                return True
+            except Exception as e:
+                logger.error(f"❌ Failed to save fingerprint: {e}")
+                return False
+
+    async def record_fingerprint_hit(self, image_hash: int):
+        """フィンガープリントのキャッシュヒットを記録"""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE aus_image_fingerprints
+                SET hit_count = hit_count + 1,
+                    last_seen_at = NOW()
+                WHERE image_hash = $1
+                """,
+                image_hash
+            )
+
+    # ==================== Image Jobs ====================
+
+    async def add_image_job(
+        self,
+        guild_id: int,
+        channel_id: int,
+        message_id: int,
+        author_id: int,
+        attachment_url: str,
+        filename: str
+    ) -> Optional[int]:
+        """画像チェックジョブを永続化（同じ添付URLが既にあればNone）"""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(
+                """
+                INSERT INTO aus_image_jobs
+                    (guild_id, channel_id, message_id, author_id, attachment_url, filename)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                ON CONFLICT (attachment_url) DO NOTHING
+                RETURNING job_id
+                """,
+                guild_id, channel_id, message_id, author_id, attachment_url, filename
+            )
+
+    async def delete_image_job(self, job_id: int):
+        """処理済みの画像チェックジョブを削除"""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                "DELETE FROM aus_image_jobs WHERE job_id = $1",
+                job_id
+            )
+
+    async def record_image_job_failure(self, job_id: int) -> Optional[int]:
+        """画像チェックジョブの失敗回数を1増やして返す"""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(
+                "UPDATE aus_image_jobs SET attempts = attempts + 1 WHERE job_id = $1 RETURNING attempts",
+                job_id
+            )
+
+    async def get_pending_image_jobs(self) -> list[dict[str, Any]]:
+        """未処理の画像チェックジョブを取得"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT job_id, guild_id, channel_id, message_id, author_id,
+                       attachment_url, filename, enqueued_at, attempts
+                FROM aus_image_jobs
+                ORDER BY job_id ASC
+                """
+            )
+            return [dict(row) for row in rows]
+
     # ==================== Verification Tickets ====================
 
     async def create_ticket(
@@ -224,12 +388,14 @@ class DatabaseManager:
                         """,
                         ticket['user_id'], twitter_handle, twitter_url, verified_by
                     )
-
-                    return True
                 except Exception as e:
                     logger.error(f"❌ Failed to approve ticket: {e}")
                     return False
 
+        # コミット後にインメモリセットへ反映
+        self.verified_artist_ids.add(ticket['user_id'])
+        return True
+
     async def reject_ticket(
         self,
         ticket_id: int,
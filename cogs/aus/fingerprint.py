@@ -0,0 +1,148 @@
+"""
+AUS Image Fingerprint
+画像の知覚ハッシュ（dHash）と近似重複検索インデックス
+"""
+
+import io
+from typing import Any, Optional
+
+from PIL import Image
+
+from utils.logging import setup_logging
+
+logger = setup_logging()
+
+# dHashのサイズ（8x8 = 64bit）
+HASH_SIZE = 8
+
+# 近似重複とみなすハミング距離の上限
+DEFAULT_MAX_DISTANCE = 6
+
+
+def dhash_from_image(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """デコード済み画像からdHash（差分ハッシュ）を計算"""
+    gray = image.convert('L').resize(
+        (hash_size + 1, hash_size),
+        Image.Resampling.LANCZOS
+    )
+    pixels = gray.tobytes()
+    width = hash_size + 1
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def dhash_from_bytes(image_bytes: bytes, hash_size: int = HASH_SIZE) -> int:
+    """画像バイト列からdHashを計算（同期処理・executor内で実行）"""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # JPEGはdraftモードで縮小デコードして高速化
+        image.draft('L', (hash_size * 8, hash_size * 8))
+        return dhash_from_image(image, hash_size)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """2つのハッシュのハミング距離"""
+    return (a ^ b).bit_count()
+
+
+def to_signed64(value: int) -> int:
+    """64bit符号なし整数をPostgreSQLのBIGINT用に符号付きへ変換"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned64(value: int) -> int:
+    """PostgreSQLのBIGINTから64bit符号なし整数へ変換"""
+    return value + (1 << 64) if value < 0 else value
+
+
+class BKTree:
+    """ハミング距離によるBK-tree（近似重複検索用）"""
+
+    def __init__(self):
+        # ノード: [hash, {距離: 子ノード}]
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int) -> bool:
+        """ハッシュを追加（既に存在する場合はFalse）"""
+        if self._root is None:
+            self._root = [value, {}]
+            self._size = 1
+            return True
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                return False
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [value, {}]
+                self._size += 1
+                return True
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, int]]:
+        """距離max_distance以内のハッシュを (距離, ハッシュ) で近い順に返す"""
+        if self._root is None:
+            return []
+
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                results.append((distance, node[0]))
+
+            low = distance - max_distance
+            high = distance + max_distance
+            for child_distance, child in node[1].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+
+        results.sort()
+        return results
+
+
+class FingerprintIndex:
+    """解決済み画像のフィンガープリント -> 検出結果のインメモリインデックス"""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._tree = BKTree()
+        self._results: dict[int, dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def add(self, image_hash: int, result: dict[str, Any]):
+        """フィンガープリントと検出結果を登録"""
+        self._tree.add(image_hash)
+        self._results[image_hash] = result
+
+    def lookup(self, image_hash: int) -> Optional[tuple[int, dict[str, Any]]]:
+        """近似重複の検出結果を (一致したハッシュ, 結果) で返す"""
+        matches = self._tree.search(image_hash, self.max_distance)
+        if not matches:
+            return None
+        _, matched_hash = matches[0]
+        return matched_hash, self._results[matched_hash]
+
+    def load(self, rows: list[dict[str, Any]]):
+        """DBの行からインデックスを構築"""
+        for row in rows:
+            self.add(to_unsigned64(row['image_hash']), {
+                'result_type': row['result_type'],
+                'source_url': row['source_url'],
+                'similarity': row['similarity'],
+                'urls': list(row['urls'] or []),
+            })
+        logger.info(f"✅ AUS fingerprint index loaded: {len(self)} entries")
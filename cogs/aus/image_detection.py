@@ -8,18 +8,26 @@ from typing import Optional
 
 import aiohttp
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from google.cloud import vision
 
 from config.setting import get_settings
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 from .database import DatabaseManager
+from .fingerprint import FingerprintIndex, to_signed64
+from .job_queue import ImageJob, ImageJobQueue, TokenBucket
+from .preprocess import PreparedImage, prepare_image
 from .views.notification_views import NoSourceNotificationView, WebSearchResultView
+from .vision import GoogleVisionBackend, VisionBatcher
 
 logger = setup_logging()
 settings = get_settings()
 
+# 画像チェックジョブはこの回数失敗したら諦めて削除する
+MAX_JOB_ATTEMPTS = 3
+
 
 class ImageDetection(commands.Cog):
     """画像検出・逆検索システム"""
@@ -40,19 +48,77 @@ class ImageDetection(commands.Cog):
         self.excluded_channel_ids = self._parse_ids(settings.aus_excluded_channel_ids)
         self.excluded_category_ids = self._parse_ids(settings.aus_excluded_category_ids)
 
-        # Google Cloud Vision クライアント
+        # Google Cloud Vision クライアント（専用executorでバッチ実行）
+        self.vision_batcher: Optional[VisionBatcher] = None
         if self.google_vision_enabled:
             try:
                 # 環境変数から認証情報を取得（Railway対応）
                 self.google_vision_client = self._initialize_vision_client()
+                self.vision_batcher = VisionBatcher(GoogleVisionBackend(self.google_vision_client))
                 logger.info("✅ Google Cloud Vision API initialized")
             except Exception as e:
                 logger.warning(f"⚠️ Google Cloud Vision API initialization failed: {e}")
                 self.google_vision_enabled = False
 
-        # レート制限管理
-        self.saucenao_requests = []  # タイムスタンプのリスト
-        self.saucenao_rate_limit = 20  # 20リクエスト/30秒
+        # レート制限管理（20リクエスト/30秒）
+        self.saucenao_bucket = TokenBucket(capacity=20, period=30)
+
+        # 共有HTTPセッション（cog_loadで作成）
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # 解決済み画像のフィンガープリントインデックス
+        self.fingerprints = FingerprintIndex()
+
+        # 画像チェックジョブキュー
+        self.job_queue = ImageJobQueue(
+            self._run_job,
+            workers=3,
+            persist=self._persist_job,
+            complete=self._complete_job,
+            fail=self._fail_job,
+            # 復元したジョブはチャンネルキャッシュが揃ってから処理する
+            wait_ready=self.bot.wait_until_ready
+        )
+
+    async def cog_load(self):
+        """Cogロード時にインデックス構築・未処理ジョブ復元・ワーカー起動"""
+        self.session = aiohttp.ClientSession()
+
+        try:
+            rows = await self.db.get_all_fingerprints()
+            self.fingerprints.load(rows)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load AUS fingerprint index: {e}")
+
+        try:
+            rows = await self.db.get_pending_image_jobs()
+            self.job_queue.restore([ImageJob.from_row(row) for row in rows])
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to restore AUS image jobs: {e}")
+
+        self.job_queue.start()
+        self.reconcile_verified_artists.start()
+        message_pipeline.attach(self.bot)
+        message_pipeline.register("aus_image_detection", self.detect_images)
+
+    async def cog_unload(self):
+        """ワーカー停止とHTTPセッションのクローズ"""
+        message_pipeline.unregister("aus_image_detection")
+        self.reconcile_verified_artists.cancel()
+        await self.job_queue.stop()
+        if self.session:
+            await self.session.close()
+        if self.vision_batcher:
+            self.vision_batcher.close()
+
+    @tasks.loop(minutes=10)
+    async def reconcile_verified_artists(self):
+        """認証済み絵師セットを定期的にDBと同期（他プロセスからの変更を反映）"""
+        try:
+            count = await self.db.refresh_verified_artists()
+            logger.debug(f"Verified artist set reconciled: {count} artists")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to reconcile verified artists: {e}")
 
     def _initialize_vision_client(self):
         """Google Cloud Vision APIクライアントを初期化"""
@@ -105,19 +171,12 @@ class ImageDetection(commands.Cog):
 
         return False
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """メッセージ送信時の画像検出"""
-        # Bot自身のメッセージは無視
-        if message.author.bot:
-            return
-
-        # DMは無視
-        if not message.guild:
-            return
+    async def detect_images(self, ctx: MessageContext):
+        """メッセージ送信時の画像検出（Bot・DMはパイプライン側で除外済み）"""
+        message = ctx.message
 
         # モデレーションチャンネルは除外
-        if message.channel.id == self.mod_channel_id:
+        if ctx.channel_id == self.mod_channel_id:
             return
 
         # 除外設定チェック
@@ -137,222 +196,313 @@ class ImageDetection(commands.Cog):
         if not image_attachments:
             return
 
-        # 認証済み絵師の場合はスキップ
-        is_verified = await self.db.is_verified_artist(message.author.id)
-        if is_verified:
+        # 認証済み絵師の場合はスキップ（インメモリセットで判定）
+        if self.db.is_verified_artist_cached(message.author.id):
             logger.info(f"✅ Skipping verified artist: {message.author} ({message.author.id})")
             return
 
-        # 各画像を検出
+        # 各画像をジョブキューに投入
         for attachment in image_attachments:
-            await self._process_image(message, attachment)
+            await self.job_queue.put(ImageJob(
+                guild_id=message.guild.id,
+                channel_id=message.channel.id,
+                message_id=message.id,
+                author_id=message.author.id,
+                attachment_url=self._attachment_key(attachment),
+                filename=attachment.filename,
+                message=message,
+            ))
+
+    @staticmethod
+    def _attachment_key(attachment: discord.Attachment) -> str:
+        """重複排除用の添付URL（署名クエリを除去）"""
+        return attachment.url.split('?', 1)[0]
+
+    async def _persist_job(self, job: ImageJob) -> Optional[int]:
+        """ジョブをDBに永続化"""
+        return await self.db.add_image_job(
+            job.guild_id,
+            job.channel_id,
+            job.message_id,
+            job.author_id,
+            job.attachment_url,
+            job.filename
+        )
+
+    async def _complete_job(self, job: ImageJob):
+        """処理済みジョブをDBから削除"""
+        if job.job_id is not None:
+            await self.db.delete_image_job(job.job_id)
+
+    async def _fail_job(self, job: ImageJob):
+        """失敗回数を記録し、上限に達したジョブはDBから削除（再起動のたびに再試行し続けないように）"""
+        if job.job_id is None:
+            return
+        attempts = await self.db.record_image_job_failure(job.job_id)
+        if attempts is not None and attempts >= MAX_JOB_ATTEMPTS:
+            logger.warning(f"⚠️ AUS job {job.job_id} failed {attempts} times, giving up: {job.filename}")
+            await self.db.delete_image_job(job.job_id)
+
+    async def _run_job(self, job: ImageJob):
+        """ワーカーから呼ばれるジョブ処理"""
+        message = job.message
+        if message is None:
+            # 再起動後に復元されたジョブはメッセージを再取得
+            channel = self.bot.get_channel(job.channel_id)
+            if channel is None:
+                try:
+                    channel = await self.bot.fetch_channel(job.channel_id)
+                except (discord.NotFound, discord.Forbidden):
+                    logger.info(f"ℹ️ Channel gone for AUS job {job.job_id}, skipping")
+                    return
+            try:
+                message = await channel.fetch_message(job.message_id)
+            except discord.NotFound:
+                logger.info(f"ℹ️ Message deleted for AUS job {job.job_id}, skipping")
+                return
+
+        attachment = next(
+            (att for att in message.attachments
+             if self._attachment_key(att) == job.attachment_url),
+            None
+        )
+        if attachment is None:
+            return
+
+        await self._process_image(message, attachment)
 
     async def _process_image(
         self,
         message: discord.Message,
         attachment: discord.Attachment
     ):
-        """画像を処理して検出"""
+        """画像を処理して検出（失敗はワーカーに伝え、ジョブを残して再試行させる）"""
         logger.info(f"🔍 Processing image: {attachment.filename} from {message.author}")
 
+        # 画像データをダウンロード
+        image_bytes = await attachment.read()
+
+        # ステップ0: 縮小JPEGとフィンガープリントを生成し、既知の画像か確認
+        prepared = await self._prepare_image(image_bytes)
+        if prepared:
+            image_hash = prepared.image_hash
+            search_bytes = prepared.search_bytes
+        else:
+            image_hash = None
+            search_bytes = image_bytes
+
+        if image_hash is not None:
+            cached = self.fingerprints.lookup(image_hash)
+            if cached:
+                matched_hash, cached_result = cached
+                logger.info(
+                    f"♻️ Fingerprint cache hit: {attachment.filename} "
+                    f"({cached_result['result_type']})"
+                )
+                await self._handle_cached_result(message, attachment, cached_result)
+                try:
+                    await self.db.record_fingerprint_hit(to_signed64(matched_hash))
+                except Exception as e:
+                    logger.debug(f"Failed to record fingerprint hit: {e}")
+                return
+
+        # ステップ1: SauceNAO検索
+        saucenao_result = await self._search_saucenao(search_bytes)
+
+        if saucenao_result:
+            # Twitter URLが検出された場合
+            twitter_url = saucenao_result.get('url')
+            similarity = saucenao_result.get('similarity', 0)
+
+            logger.info(f"✅ SauceNAO detected: {twitter_url} (similarity: {similarity}%)")
+
+            await self._remember_fingerprint(image_hash, {
+                'result_type': 'saucenao',
+                'source_url': twitter_url,
+                'similarity': similarity,
+                'urls': [twitter_url],
+            })
+
+            # メッセージ内容にURLが含まれているかチェック
+            if not self._has_source_url(message, twitter_url):
+                # 無断転載の可能性 - 運営に通知
+                await self._send_no_source_notification(
+                    message,
+                    attachment,
+                    twitter_url,
+                    f"SauceNAO (類似度: {similarity}%)"
+                )
+                return
+
+        # ステップ2: Google Cloud Vision検索（SauceNAOで検出されなかった場合）
+        if self.google_vision_enabled:
+            google_results = await self._search_google_vision(search_bytes)
+
+            if google_results:
+                logger.info(f"✅ Google Vision detected {len(google_results)} results")
+                await self._remember_fingerprint(image_hash, {
+                    'result_type': 'google_vision',
+                    'source_url': None,
+                    'similarity': None,
+                    'urls': google_results,
+                })
+                # Web検索結果通知
+                await self._send_web_search_notification(
+                    message,
+                    attachment,
+                    google_results
+                )
+                return
+
+        logger.info(f"ℹ️ No source detected for: {attachment.filename}")
+
+    async def _prepare_image(self, image_bytes: bytes) -> Optional[PreparedImage]:
+        """検索用の縮小JPEGとdHashを生成（デコードはexecutor内で実行）"""
         try:
-            # 画像データをダウンロード
-            image_bytes = await attachment.read()
-
-            # ステップ1: SauceNAO検索
-            saucenao_result = await self._search_saucenao(image_bytes)
-
-            if saucenao_result:
-                # Twitter URLが検出された場合
-                twitter_url = saucenao_result.get('url')
-                similarity = saucenao_result.get('similarity', 0)
-
-                logger.info(f"✅ SauceNAO detected: {twitter_url} (similarity: {similarity}%)")
-
-                # メッセージ内容にURLが含まれているかチェック
-                if not self._has_source_url(message, twitter_url):
-                    # 無断転載の可能性 - 運営に通知
-                    await self._send_no_source_notification(
-                        message,
-                        attachment,
-                        twitter_url,
-                        f"SauceNAO (類似度: {similarity}%)"
-                    )
-                    return
+            loop = asyncio.get_running_loop()
+            prepared = await loop.run_in_executor(None, prepare_image, image_bytes)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to preprocess image: {e}")
+            return None
 
-            # ステップ2: Google Cloud Vision検索（SauceNAOで検出されなかった場合）
-            if self.google_vision_enabled:
-                google_results = await self._search_google_vision(image_bytes)
-
-                if google_results:
-                    logger.info(f"✅ Google Vision detected {len(google_results)} results")
-                    # Web検索結果通知
-                    await self._send_web_search_notification(
-                        message,
-                        attachment,
-                        google_results
-                    )
-                    return
+        logger.debug(
+            f"Image preprocessed: {prepared.original_size} -> "
+            f"{len(prepared.search_bytes)} bytes ({prepared.width}x{prepared.height})"
+        )
+        return prepared
 
-            logger.info(f"ℹ️ No source detected for: {attachment.filename}")
+    async def _remember_fingerprint(self, image_hash: Optional[int], result: dict):
+        """検出結果をフィンガープリントインデックスとDBに登録"""
+        if image_hash is None:
+            return
 
-        except Exception as e:
-            logger.error(f"❌ Error processing image {attachment.filename}: {e}")
+        self.fingerprints.add(image_hash, result)
+        await self.db.save_fingerprint(
+            to_signed64(image_hash),
+            result['result_type'],
+            result['source_url'],
+            result['similarity'],
+            result['urls']
+        )
+
+    async def _handle_cached_result(
+        self,
+        message: discord.Message,
+        attachment: discord.Attachment,
+        result: dict
+    ):
+        """キャッシュされた検出結果から通知を送信"""
+        if result['result_type'] == 'saucenao':
+            source_url = result['source_url']
+            if not self._has_source_url(message, source_url):
+                await self._send_no_source_notification(
+                    message,
+                    attachment,
+                    source_url,
+                    f"SauceNAO キャッシュ (類似度: {result['similarity']}%)"
+                )
+        elif result['result_type'] == 'google_vision' and result['urls']:
+            await self._send_web_search_notification(
+                message,
+                attachment,
+                result['urls']
+            )
 
     async def _search_saucenao(self, image_bytes: bytes) -> Optional[dict]:
-        """SauceNAO APIで画像を検索"""
+        """SauceNAO APIで画像を検索（該当なしはNone、APIエラーは例外）"""
         if not self.saucenao_api_key:
             logger.warning("⚠️ SauceNAO API key not configured")
             return None
 
-        # レート制限チェック
-        await self._check_saucenao_rate_limit()
+        # レート制限（全ワーカーで共有するトークンバケット）
+        await self.saucenao_bucket.acquire()
 
         try:
-            async with aiohttp.ClientSession() as session:
-                # SauceNAO API URL
-                url = 'https://saucenao.com/search.php'
-
-                # ファイルデータを準備
-                data = aiohttp.FormData()
-                data.add_field('file', image_bytes, filename='image.jpg')
-                data.add_field('api_key', self.saucenao_api_key)
-                data.add_field('output_type', '2')  # JSON
-                data.add_field('numres', '10')  # 最大10件
-                data.add_field('db', '999')  # 全データベースを検索
-
-                async with session.post(url, data=data, timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                    if resp.status != 200:
-                        logger.warning(f"⚠️ SauceNAO API error: {resp.status}")
-                        return None
-
-                    result = await resp.json()
-
-                    # APIステータスチェック
-                    header = result.get('header', {})
-                    status = header.get('status', 0)
-                    if status != 0:
-                        logger.warning(f"⚠️ SauceNAO API status error: {status}")
-                        return None
-
-                    # レート制限情報をログ出力
-                    short_remaining = header.get('short_remaining', 'N/A')
-                    long_remaining = header.get('long_remaining', 'N/A')
-                    logger.debug(f"SauceNAO rate limit - Short: {short_remaining}, Long: {long_remaining}")
-
-                    # 結果を解析
-                    if 'results' not in result or not result['results']:
-                        logger.info("ℹ️ SauceNAO: No results found")
-                        return None
-
-                    # 最小類似度を取得（これより低い結果は信頼性が低い）
-                    minimum_similarity = float(header.get('minimum_similarity', 50.0))
-
-                    # 最も類似度の高い結果を取得
-                    for item in result['results']:
-                        item_header = item.get('header', {})
-                        similarity = float(item_header.get('similarity', 0))
-
-                        # 最小類似度チェック
-                        if similarity < minimum_similarity:
-                            logger.debug(f"⚠️ Result similarity {similarity}% < minimum {minimum_similarity}%")
-                            continue
-
-                        # Twitter URLを優先的に抽出
-                        data_section = item.get('data', {})
-                        urls = data_section.get('ext_urls', [])
-                        for url in urls:
-                            if 'twitter.com' in url or 'x.com' in url:
-                                logger.info(f"✅ Found Twitter URL: {url} (similarity: {similarity}%)")
-                                return {
-                                    'url': url,
-                                    'similarity': similarity,
-                                    'title': data_section.get('title', ''),
-                                    'author': data_section.get('member_name', ''),
-                                    'index_id': item_header.get('index_id', 0)
-                                }
-
-                    logger.info("ℹ️ SauceNAO: No Twitter URLs found in results")
+            # SauceNAO API URL
+            url = 'https://saucenao.com/search.php'
+
+            # ファイルデータを準備
+            data = aiohttp.FormData()
+            data.add_field('file', image_bytes, filename='image.jpg')
+            data.add_field('api_key', self.saucenao_api_key)
+            data.add_field('output_type', '2')  # JSON
+            data.add_field('numres', '10')  # 最大10件
+            data.add_field('db', '999')  # 全データベースを検索
+
+            async with self.session.post(url, data=data, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+                if resp.status != 200:
+                    raise RuntimeError(f"SauceNAO API error: {resp.status}")
+
+                result = await resp.json()
+
+                # APIステータスチェック
+                header = result.get('header', {})
+                status = header.get('status', 0)
+                if status != 0:
+                    raise RuntimeError(f"SauceNAO API status error: {status}")
+
+                # レート制限情報をログ出力
+                short_remaining = header.get('short_remaining', 'N/A')
+                long_remaining = header.get('long_remaining', 'N/A')
+                logger.debug(f"SauceNAO rate limit - Short: {short_remaining}, Long: {long_remaining}")
+
+                # 結果を解析
+                if 'results' not in result or not result['results']:
+                    logger.info("ℹ️ SauceNAO: No results found")
                     return None
 
-        except asyncio.TimeoutError:
-            logger.warning("⚠️ SauceNAO API timeout")
-            return None
-        except Exception as e:
-            logger.error(f"❌ SauceNAO API error: {e}")
-            return None
-
-    async def _check_saucenao_rate_limit(self):
-        """SauceNAOレート制限チェック（20リクエスト/30秒）"""
-        import time
-
-        now = time.time()
-
-        # 30秒以上前のリクエストを削除
-        self.saucenao_requests = [
-            req for req in self.saucenao_requests
-            if now - req < 30
-        ]
-
-        # レート制限超過の場合は待機
-        if len(self.saucenao_requests) >= self.saucenao_rate_limit:
-            wait_time = 30 - (now - self.saucenao_requests[0])
-            if wait_time > 0:
-                logger.info(f"⏳ SauceNAO rate limit - waiting {wait_time:.1f}s")
-                await asyncio.sleep(wait_time)
-                self.saucenao_requests = []
-
-        # リクエスト記録
-        self.saucenao_requests.append(now)
+                # 最小類似度を取得（これより低い結果は信頼性が低い）
+                minimum_similarity = float(header.get('minimum_similarity', 50.0))
+
+                # 最も類似度の高い結果を取得
+                for item in result['results']:
+                    item_header = item.get('header', {})
+                    similarity = float(item_header.get('similarity', 0))
+
+                    # 最小類似度チェック
+                    if similarity < minimum_similarity:
+                        logger.debug(f"⚠️ Result similarity {similarity}% < minimum {minimum_similarity}%")
+                        continue
+
+                    # Twitter URLを優先的に抽出
+                    data_section = item.get('data', {})
+                    urls = data_section.get('ext_urls', [])
+                    for url in urls:
+                        if 'twitter.com' in url or 'x.com' in url:
+                            logger.info(f"✅ Found Twitter URL: {url} (similarity: {similarity}%)")
+                            return {
+                                'url': url,
+                                'similarity': similarity,
+                                'title': data_section.get('title', ''),
+                                'author': data_section.get('member_name', ''),
+                                'index_id': item_header.get('index_id', 0)
+                            }
+
+                logger.info("ℹ️ SauceNAO: No Twitter URLs found in results")
+                return None
+
+        except asyncio.TimeoutError as e:
+            # タイムアウト・APIエラーはジョブの失敗としてワーカーに伝える
+            raise RuntimeError("SauceNAO API timeout") from e
 
     async def _search_google_vision(self, image_bytes: bytes) -> list[str]:
-        """Google Cloud Vision APIで画像を検索"""
-        if not self.google_vision_enabled:
+        """Google Cloud Vision APIで画像を検索（時間窓内の画像はまとめて1回のRPC）"""
+        if not self.google_vision_enabled or not self.vision_batcher:
             return []
 
-        try:
-            # Google Cloud Vision API（同期API）を非同期で実行
-            # run_in_executorを使ってブロッキングを回避
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self._call_vision_api,
-                image_bytes
-            )
-
-            if not response:
-                return []
-
-            if response.error.message:
-                logger.warning(f"⚠️ Google Vision API error: {response.error.message}")
-                return []
-
-            # Twitter URLを含むページを優先抽出
-            twitter_urls = []
-
-            if response.web_detection.pages_with_matching_images:
-                for page in response.web_detection.pages_with_matching_images[:10]:
-                    if 'twitter.com' in page.url or 'x.com' in page.url:
-                        twitter_urls.append(page.url)
-                        logger.debug(f"Found Twitter URL via Google Vision: {page.url}")
+        # APIエラーはジョブの失敗としてワーカーに伝える
+        page_urls = await self.vision_batcher.search(image_bytes)
 
-            if twitter_urls:
-                logger.info(f"✅ Google Vision found {len(twitter_urls)} Twitter URLs")
-
-            return twitter_urls
+        # Twitter URLを含むページを優先抽出
+        twitter_urls = [
+            url for url in page_urls
+            if 'twitter.com' in url or 'x.com' in url
+        ]
 
-        except Exception as e:
-            logger.error(f"❌ Google Vision API error: {e}")
-            return []
+        if twitter_urls:
+            logger.info(f"✅ Google Vision found {len(twitter_urls)} Twitter URLs")
 
-    def _call_vision_api(self, image_bytes: bytes):
-        """Vision APIを同期的に呼び出す（executor内で実行）"""
-        try:
-            image = vision.Image(content=image_bytes)
-            return self.google_vision_client.web_detection(image=image)
-        except Exception as e:
-            logger.error(f"❌ Vision API call failed: {e}")
-            return None
+        return twitter_urls
 
     def _has_source_url(self, message: discord.Message, source_url: str) -> bool:
         """メッセージ内容にソースURLが含まれているかチェック"""
@@ -0,0 +1,234 @@
+"""
+AUS Image Job Queue
+画像チェックの優先度付きジョブキュー（重複排除・トークンバケット・永続化）
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from utils.logging import setup_logging
+
+logger = setup_logging()
+
+# 優先度（小さいほど先に処理）
+PRIORITY_LIVE = 0
+PRIORITY_RESTORED = 1
+
+# 待ち時間メトリクスとして保持するサンプル数
+WAIT_SAMPLE_SIZE = 500
+
+
+class TokenBucket:
+    """非同期トークンバケット（複数ワーカーで共有）"""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """現在利用可能なトークン数"""
+        self._refill()
+        return self._tokens
+
+    async def acquire(self):
+        """トークンを1つ取得（不足時は補充まで待機）"""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait_time = (1 - self._tokens) / self.rate
+                logger.info(f"⏳ Rate limit - waiting {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+                self._refill()
+            self._tokens -= 1
+
+
+@dataclass
+class ImageJob:
+    """画像チェックジョブ"""
+
+    guild_id: int
+    channel_id: int
+    message_id: int
+    author_id: int
+    attachment_url: str
+    filename: str
+    priority: int = PRIORITY_LIVE
+    job_id: Optional[int] = None
+    enqueued_at: float = field(default_factory=time.time)
+    attempts: int = 0  # これまでに失敗した回数
+    # 同一プロセス内で投入された場合はメッセージを保持（再取得を省略）
+    message: Any = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "ImageJob":
+        """DB行からジョブを復元"""
+        return cls(
+            guild_id=row['guild_id'],
+            channel_id=row['channel_id'],
+            message_id=row['message_id'],
+            author_id=row['author_id'],
+            attachment_url=row['attachment_url'],
+            filename=row['filename'],
+            priority=PRIORITY_RESTORED,
+            job_id=row['job_id'],
+            enqueued_at=row['enqueued_at'].timestamp(),
+            attempts=row.get('attempts', 0),
+        )
+
+
+class ImageJobQueue:
+    """画像チェックジョブのワーカープール"""
+
+    def __init__(
+        self,
+        handler: Callable[[ImageJob], Awaitable[None]],
+        workers: int = 3,
+        persist: Optional[Callable[[ImageJob], Awaitable[Optional[int]]]] = None,
+        complete: Optional[Callable[[ImageJob], Awaitable[None]]] = None,
+        fail: Optional[Callable[[ImageJob], Awaitable[None]]] = None,
+        wait_ready: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self.handler = handler
+        self.worker_count = workers
+        self.persist = persist
+        self.complete = complete
+        self.fail = fail
+        # ワーカーが処理を始める前に待つもの（Botの準備完了など）
+        self.wait_ready = wait_ready
+
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._urls: set[str] = set()
+        self._workers: list[asyncio.Task] = []
+        self._in_flight = 0
+
+        # メトリクス
+        self._wait_times: deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.enqueued_total = 0
+        self.deduplicated_total = 0
+        self.processed_total = 0
+        self.failed_total = 0
+
+    def start(self):
+        """ワーカーを起動"""
+        for i in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker(i)))
+        logger.info(f"✅ AUS job queue started with {self.worker_count} workers")
+
+    async def stop(self):
+        """ワーカーを停止（未処理ジョブはDBに残り、次回起動時に復元される）"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def put(self, job: ImageJob) -> bool:
+        """ジョブを投入（同じ添付URLが処理待ち・処理中ならFalse）"""
+        if job.attachment_url in self._urls:
+            self.deduplicated_total += 1
+            return False
+        self._urls.add(job.attachment_url)
+
+        if self.persist and job.job_id is None:
+            try:
+                job.job_id = await self.persist(job)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to persist AUS job: {e}")
+
+        self._push(job)
+        return True
+
+    def restore(self, jobs: list[ImageJob]):
+        """永続化済みジョブを再投入"""
+        for job in jobs:
+            if job.attachment_url in self._urls:
+                continue
+            self._urls.add(job.attachment_url)
+            self._push(job)
+        if jobs:
+            logger.info(f"♻️ Restored {len(jobs)} pending AUS jobs")
+
+    def _push(self, job: ImageJob):
+        self.enqueued_total += 1
+        self._queue.put_nowait((job.priority, next(self._sequence), job))
+
+    async def _worker(self, worker_id: int):
+        if self.wait_ready:
+            await self.wait_ready()
+        while True:
+            _, _, job = await self._queue.get()
+            self._in_flight += 1
+            self._wait_times.append(max(0.0, time.time() - job.enqueued_at))
+            try:
+                await self.handler(job)
+                self.processed_total += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 失敗したジョブはDBに残し、次回起動時に再試行する
+                self.failed_total += 1
+                logger.error(f"❌ AUS worker {worker_id} failed on {job.filename}: {e}")
+                await self._fail(job)
+            else:
+                await self._complete(job)
+            finally:
+                self._in_flight -= 1
+                self._urls.discard(job.attachment_url)
+                self._queue.task_done()
+
+    async def _complete(self, job: ImageJob):
+        """処理できたジョブの後処理（永続化したジョブの削除）"""
+        if not self.complete:
+            return
+        try:
+            await self.complete(job)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to complete AUS job {job.job_id}: {e}")
+
+    async def _fail(self, job: ImageJob):
+        """失敗したジョブの後処理（失敗回数の記録）"""
+        job.attempts += 1
+        if not self.fail:
+            return
+        try:
+            await self.fail(job)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to record failure of AUS job {job.job_id}: {e}")
+
+    def metrics(self) -> dict[str, Any]:
+        """キューの深さと待ち時間メトリクス"""
+        waits = sorted(self._wait_times)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 3)
+
+        return {
+            "depth": self._queue.qsize(),
+            "in_flight": self._in_flight,
+            "workers": len(self._workers),
+            "enqueued_total": self.enqueued_total,
+            "deduplicated_total": self.deduplicated_total,
+            "processed_total": self.processed_total,
+            "failed_total": self.failed_total,
+            "wait_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(waits[-1], 3) if waits else 0.0,
+            },
+        }
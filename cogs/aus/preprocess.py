@@ -0,0 +1,68 @@
+"""
+AUS Image Preprocess
+逆検索前の画像縮小（1回のデコードで検索用JPEGとフィンガープリントを生成）
+"""
+
+import io
+from dataclasses import dataclass
+
+from PIL import Image
+
+from .fingerprint import dhash_from_image
+
+# 検索APIに送る画像の最大辺（SauceNAO / Google Visionともにこの程度で十分な精度）
+MAX_SIDE = 1024
+JPEG_QUALITY = 85
+
+
+@dataclass
+class PreparedImage:
+    """逆検索用に前処理した画像"""
+
+    search_bytes: bytes
+    image_hash: int
+    width: int
+    height: int
+    original_size: int
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """透過を白背景で合成してRGBに変換"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def prepare_image(
+    image_bytes: bytes,
+    max_side: int = MAX_SIDE,
+    quality: int = JPEG_QUALITY
+) -> PreparedImage:
+    """画像を1回だけデコードし、縮小JPEGとdHashを生成（同期処理・executor内で実行）"""
+    with Image.open(io.BytesIO(image_bytes)) as source:
+        original_format = source.format
+        # JPEGはdraftモードでDCTスケーリングし、フル解像度のデコードを避ける
+        source.draft('RGB', (max_side, max_side))
+        image = _to_rgb(source)
+
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    image_hash = dhash_from_image(image)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    search_bytes = buffer.getvalue()
+
+    # 元々小さいJPEGなら再エンコードせずそのまま使う
+    if original_format == 'JPEG' and len(image_bytes) <= len(search_bytes):
+        search_bytes = image_bytes
+
+    return PreparedImage(
+        search_bytes=search_bytes,
+        image_hash=image_hash,
+        width=image.width,
+        height=image.height,
+        original_size=len(image_bytes),
+    )
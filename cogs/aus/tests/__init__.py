@@ -0,0 +1 @@
+"""AUS テスト"""
@@ -0,0 +1,62 @@
+"""
+AUS DatabaseManager 認証済み絵師キャッシュ テスト
+"""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from cogs.aus.database import DatabaseManager
+
+
+def _manager_with_conn(conn) -> DatabaseManager:
+    @asynccontextmanager
+    async def acquire():
+        yield conn
+
+    db = DatabaseManager()
+    db.pool = MagicMock()
+    db.pool.acquire = acquire
+    return db
+
+
+class TestVerifiedArtistCache:
+    """認証済み絵師セットのテスト"""
+
+    def test_refresh_replaces_set(self):
+        """DBの内容でセットを置き換える"""
+        conn = MagicMock()
+        conn.fetch = AsyncMock(return_value=[{'user_id': 1}, {'user_id': 2}])
+        db = _manager_with_conn(conn)
+        db.verified_artist_ids = {99}
+
+        count = asyncio.run(db.refresh_verified_artists())
+
+        assert count == 2
+        assert db.is_verified_artist_cached(1)
+        assert not db.is_verified_artist_cached(99)
+
+    def test_add_and_remove_update_set(self):
+        """追加・削除でセットが更新される"""
+        conn = MagicMock()
+        conn.execute = AsyncMock(side_effect=["INSERT 0 1", "DELETE 1"])
+        db = _manager_with_conn(conn)
+
+        asyncio.run(db.add_verified_artist(5, "artist", "https://x.com/artist", 1))
+        assert db.is_verified_artist_cached(5)
+
+        asyncio.run(db.remove_verified_artist(5))
+        assert not db.is_verified_artist_cached(5)
+
+    def test_failed_add_does_not_update_set(self):
+        """DBエラー時はセットを変更しない"""
+        conn = MagicMock()
+        conn.execute = AsyncMock(side_effect=RuntimeError("db down"))
+        db = _manager_with_conn(conn)
+
+        assert asyncio.run(db.add_verified_artist(5, "artist", "https://x.com/artist", 1)) is False
+        assert not db.is_verified_artist_cached(5)
@@ -0,0 +1,118 @@
+"""
+AUS フィンガープリント テスト
+"""
+import io
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from cogs.aus.fingerprint import (
+    BKTree,
+    FingerprintIndex,
+    dhash_from_bytes,
+    hamming_distance,
+    to_signed64,
+    to_unsigned64,
+)
+
+
+def _gradient_png(width: int, height: int, invert: bool = False) -> bytes:
+    """横方向グラデーション画像を生成"""
+    image = Image.new('RGB', (width, height))
+    for x in range(width):
+        value = int(255 * x / (width - 1))
+        if invert:
+            value = 255 - value
+        for y in range(height):
+            image.putpixel((x, y), (value, value, value))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestDHash:
+    """dHashのテスト"""
+
+    def test_resized_image_is_near_duplicate(self):
+        """リサイズした画像は近いハッシュになる"""
+        original = dhash_from_bytes(_gradient_png(256, 128))
+        resized = dhash_from_bytes(_gradient_png(64, 32))
+
+        assert hamming_distance(original, resized) <= 4
+
+    def test_different_image_is_far(self):
+        """反転画像は遠いハッシュになる"""
+        original = dhash_from_bytes(_gradient_png(128, 128))
+        inverted = dhash_from_bytes(_gradient_png(128, 128, invert=True))
+
+        assert hamming_distance(original, inverted) > 32
+
+    def test_signed_roundtrip(self):
+        """BIGINT変換の往復テスト"""
+        value = (1 << 64) - 1
+        assert to_signed64(value) == -1
+        assert to_unsigned64(to_signed64(value)) == value
+        assert to_unsigned64(to_signed64(12345)) == 12345
+
+
+class TestBKTree:
+    """BKTreeのテスト"""
+
+    def test_search_within_distance(self):
+        """距離以内のハッシュのみ返す"""
+        tree = BKTree()
+        for value in (0b0000, 0b0001, 0b0011, 0b1111, 0b11110000):
+            tree.add(value)
+
+        results = tree.search(0b0000, 2)
+
+        assert [value for _, value in results] == [0b0000, 0b0001, 0b0011]
+
+    def test_duplicate_add(self):
+        """同一ハッシュは一度だけ登録"""
+        tree = BKTree()
+
+        assert tree.add(42) is True
+        assert tree.add(42) is False
+        assert len(tree) == 1
+
+
+class TestFingerprintIndex:
+    """FingerprintIndexのテスト"""
+
+    def test_lookup_returns_nearest(self):
+        """最も近い登録済みハッシュの結果を返す"""
+        index = FingerprintIndex(max_distance=3)
+        index.add(0b1010, {'result_type': 'saucenao', 'source_url': 'a'})
+        index.add(0b1011, {'result_type': 'saucenao', 'source_url': 'b'})
+
+        matched_hash, result = index.lookup(0b1011)
+
+        assert matched_hash == 0b1011
+        assert result['source_url'] == 'b'
+
+    def test_lookup_miss(self):
+        """距離外はNone"""
+        index = FingerprintIndex(max_distance=1)
+        index.add(0, {'result_type': 'saucenao'})
+
+        assert index.lookup(0b111) is None
+
+    def test_load_from_rows(self):
+        """DB行から符号付きハッシュを復元して登録"""
+        index = FingerprintIndex()
+        index.load([{
+            'image_hash': -1,
+            'result_type': 'google_vision',
+            'source_url': None,
+            'similarity': None,
+            'urls': ['https://x.com/a/status/1'],
+        }])
+
+        _, result = index.lookup((1 << 64) - 1)
+
+        assert result['urls'] == ['https://x.com/a/status/1']
@@ -0,0 +1,168 @@
+"""
+AUS ジョブキュー テスト
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from cogs.aus.job_queue import (
+    PRIORITY_LIVE,
+    PRIORITY_RESTORED,
+    ImageJob,
+    ImageJobQueue,
+    TokenBucket,
+)
+
+
+def _job(url: str, priority: int = PRIORITY_LIVE) -> ImageJob:
+    return ImageJob(
+        guild_id=1,
+        channel_id=2,
+        message_id=3,
+        author_id=4,
+        attachment_url=url,
+        filename="image.png",
+        priority=priority,
+    )
+
+
+class TestImageJobQueue:
+    """ImageJobQueueのテスト"""
+
+    def test_dedup_and_priority(self):
+        """同一URLは重複排除され、優先度順に処理される"""
+        async def scenario():
+            processed = []
+            completed = []
+
+            async def handler(job):
+                processed.append(job.attachment_url)
+
+            async def complete(job):
+                completed.append(job.attachment_url)
+
+            queue = ImageJobQueue(handler, workers=1, complete=complete)
+            queue.restore([_job("restored", PRIORITY_RESTORED)])
+            assert await queue.put(_job("live")) is True
+            assert await queue.put(_job("live")) is False
+
+            queue.start()
+            await queue._queue.join()
+            await asyncio.sleep(0)
+            await queue.stop()
+            return queue, processed, completed
+
+        queue, processed, completed = asyncio.run(scenario())
+
+        assert processed == ["live", "restored"]
+        assert completed == ["live", "restored"]
+        metrics = queue.metrics()
+        assert metrics["deduplicated_total"] == 1
+        assert metrics["processed_total"] == 2
+        assert metrics["depth"] == 0
+
+    def test_handler_failure_is_counted(self):
+        """ハンドラの例外は失敗数として記録される"""
+        async def scenario():
+            async def handler(job):
+                raise RuntimeError("boom")
+
+            queue = ImageJobQueue(handler, workers=1)
+            await queue.put(_job("a"))
+            queue.start()
+            await queue._queue.join()
+            await queue.stop()
+            return queue
+
+        queue = asyncio.run(scenario())
+
+        assert queue.failed_total == 1
+        assert "a" not in queue._urls
+
+    def test_failed_job_is_not_completed(self):
+        """失敗したジョブは完了扱いにせずDBに残す"""
+        async def scenario():
+            completed = []
+
+            async def handler(job):
+                if job.attachment_url == "bad":
+                    raise RuntimeError("boom")
+
+            async def complete(job):
+                completed.append(job.attachment_url)
+
+            queue = ImageJobQueue(handler, workers=1, complete=complete)
+            await queue.put(_job("bad"))
+            await queue.put(_job("good"))
+            queue.start()
+            await queue._queue.join()
+            await queue.stop()
+            return completed
+
+        assert asyncio.run(scenario()) == ["good"]
+
+    def test_failure_is_recorded(self):
+        """失敗したジョブは失敗回数を増やしてfailに渡す"""
+        async def scenario():
+            failed = []
+
+            async def handler(job):
+                raise RuntimeError("boom")
+
+            async def fail(job):
+                failed.append((job.attachment_url, job.attempts))
+
+            queue = ImageJobQueue(handler, workers=1, fail=fail)
+            job = _job("bad")
+            job.attempts = 1
+            queue.restore([job])
+            queue.start()
+            await queue._queue.join()
+            await queue.stop()
+            return failed
+
+        assert asyncio.run(scenario()) == [("bad", 2)]
+
+    def test_workers_wait_until_ready(self):
+        """準備完了までは復元ジョブを処理しない"""
+        async def scenario():
+            ready = asyncio.Event()
+            processed = []
+
+            async def handler(job):
+                processed.append(job.attachment_url)
+
+            queue = ImageJobQueue(handler, workers=2, wait_ready=ready.wait)
+            queue.restore([_job("restored", PRIORITY_RESTORED)])
+            queue.start()
+            await asyncio.sleep(0.01)
+            before = list(processed)
+
+            ready.set()
+            await queue._queue.join()
+            await queue.stop()
+            return before, processed
+
+        before, processed = asyncio.run(scenario())
+
+        assert before == []
+        assert processed == ["restored"]
+
+
+class TestTokenBucket:
+    """TokenBucketのテスト"""
+
+    def test_consumes_tokens(self):
+        """容量分は待機せずに取得できる"""
+        async def scenario():
+            bucket = TokenBucket(capacity=3, period=30)
+            for _ in range(3):
+                await bucket.acquire()
+            return bucket
+
+        bucket = asyncio.run(scenario())
+
+        assert bucket.available < 1
@@ -0,0 +1,69 @@
+"""
+AUS 画像前処理 テスト
+"""
+import io
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from cogs.aus.fingerprint import dhash_from_bytes, hamming_distance
+from cogs.aus.preprocess import prepare_image
+
+
+def _encode(image: Image.Image, fmt: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **params)
+    return buffer.getvalue()
+
+
+def _noise_image(width: int, height: int, mode: str = 'RGB') -> Image.Image:
+    """縮小で情報が落ちるランダム画像"""
+    import random
+
+    rng = random.Random(0)
+    data = rng.randbytes(width * height * len(mode))
+    return Image.frombytes(mode, (width, height), data)
+
+
+class TestPrepareImage:
+    """prepare_imageのテスト"""
+
+    def test_large_png_is_bounded(self):
+        """大きなPNGは最大辺以内のJPEGに縮小される"""
+        original = _encode(_noise_image(2000, 1000), 'PNG')
+
+        prepared = prepare_image(original, max_side=512)
+
+        assert (prepared.width, prepared.height) == (512, 256)
+        assert len(prepared.search_bytes) < len(original)
+        with Image.open(io.BytesIO(prepared.search_bytes)) as result:
+            assert result.format == 'JPEG'
+
+    def test_transparent_png(self):
+        """透過PNGもRGB JPEGとして処理できる"""
+        original = _encode(Image.new('RGBA', (300, 200), (255, 0, 0, 0)), 'PNG')
+
+        prepared = prepare_image(original)
+
+        assert (prepared.width, prepared.height) == (300, 200)
+
+    def test_small_jpeg_is_reused(self):
+        """元より大きくなる場合は元のJPEGをそのまま使う"""
+        original = _encode(_noise_image(64, 64), 'JPEG', quality=30)
+
+        prepared = prepare_image(original, quality=100)
+
+        assert prepared.search_bytes == original
+
+    def test_hash_matches_full_decode(self):
+        """縮小デコード時のハッシュはフル解像度のハッシュと近い"""
+        image = Image.linear_gradient('L').resize((1600, 1200)).convert('RGB')
+        original = _encode(image, 'JPEG')
+
+        prepared = prepare_image(original)
+
+        assert hamming_distance(prepared.image_hash, dhash_from_bytes(original)) <= 4
@@ -0,0 +1,75 @@
+"""
+AUS Visionバッチング テスト
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from cogs.aus.vision import StubVisionBackend, VisionBatcher
+
+
+class TestVisionBatcher:
+    """VisionBatcherのテスト"""
+
+    def test_images_in_window_share_one_call(self):
+        """時間窓内の画像は1回のRPCにまとめられ、結果は各画像に戻る"""
+        backend = StubVisionBackend({
+            b"a": ["https://x.com/a/status/1"],
+            b"b": ["https://example.com/b"],
+        })
+
+        async def scenario():
+            batcher = VisionBatcher(backend, window=0.05)
+            try:
+                return await asyncio.gather(
+                    batcher.search(b"a"),
+                    batcher.search(b"b"),
+                    batcher.search(b"c"),
+                )
+            finally:
+                batcher.close()
+
+        results = asyncio.run(scenario())
+
+        assert backend.calls == [3]
+        assert results == [["https://x.com/a/status/1"], ["https://example.com/b"], []]
+
+    def test_full_batch_flushes_immediately(self):
+        """最大バッチサイズに達したら窓を待たずに送信"""
+        backend = StubVisionBackend()
+
+        async def scenario():
+            batcher = VisionBatcher(backend, max_batch_size=2, window=10)
+            try:
+                return await asyncio.wait_for(
+                    asyncio.gather(*(batcher.search(bytes([i])) for i in range(4))),
+                    timeout=1
+                )
+            finally:
+                batcher.close()
+
+        asyncio.run(scenario())
+
+        assert backend.calls == [2, 2]
+
+    def test_backend_error_is_raised_to_every_caller(self):
+        """バックエンドの例外はバッチ内の全呼び出し元に伝わる（該当なしと区別する）"""
+        class FailingBackend:
+            def annotate(self, images):
+                raise RuntimeError("quota exceeded")
+
+        async def scenario():
+            batcher = VisionBatcher(FailingBackend(), window=0.01)
+            try:
+                return await asyncio.gather(
+                    batcher.search(b"a"), batcher.search(b"b"), return_exceptions=True
+                )
+            finally:
+                batcher.close()
+
+        results = asyncio.run(scenario())
+
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
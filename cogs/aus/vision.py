@@ -0,0 +1,142 @@
+"""
+AUS Vision Backend
+Google Cloud Vision Web検出のバッチ実行（専用executor + 時間窓バッチング）
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Protocol
+
+from utils.logging import setup_logging
+
+logger = setup_logging()
+
+# batch_annotate_imagesの1リクエストあたりの画像上限
+MAX_BATCH_SIZE = 16
+
+# 同じバッチにまとめる待ち時間（秒）
+BATCH_WINDOW = 0.5
+
+# 1画像あたりに見るページ数
+MAX_PAGES = 10
+
+
+class VisionBackend(Protocol):
+    """Web検出バックエンド（同期API・専用executor内で呼ばれる）"""
+
+    def annotate(self, images: list[bytes]) -> list[list[str]]:
+        """各画像について一致画像を含むページURLを返す"""
+        ...
+
+
+class GoogleVisionBackend:
+    """Google Cloud Vision batch_annotate_imagesによるバックエンド"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def annotate(self, images: list[bytes]) -> list[list[str]]:
+        from google.cloud import vision
+
+        requests = [
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=image_bytes),
+                features=[vision.Feature(type_=vision.Feature.Type.WEB_DETECTION)],
+            )
+            for image_bytes in images
+        ]
+        batch = self.client.batch_annotate_images(requests=requests)
+
+        results = []
+        for response in batch.responses:
+            if response.error.message:
+                logger.warning(f"⚠️ Google Vision API error: {response.error.message}")
+                results.append([])
+                continue
+            pages = response.web_detection.pages_with_matching_images[:MAX_PAGES]
+            results.append([page.url for page in pages])
+        return results
+
+
+class StubVisionBackend:
+    """テスト・ベンチマーク用のローカルバックエンド"""
+
+    def __init__(self, results: Optional[dict[bytes, list[str]]] = None):
+        self.results = results or {}
+        self.calls: list[int] = []
+
+    def annotate(self, images: list[bytes]) -> list[list[str]]:
+        self.calls.append(len(images))
+        return [list(self.results.get(image_bytes, [])) for image_bytes in images]
+
+
+class VisionBatcher:
+    """時間窓内の画像をまとめて1回のRPCで検索する"""
+
+    def __init__(
+        self,
+        backend: VisionBackend,
+        max_workers: int = 2,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        window: float = BATCH_WINDOW
+    ):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='aus-vision'
+        )
+        self._pending: list[tuple[bytes, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches: set[asyncio.Task] = set()  # 実行中のバッチ（GCで消えないよう参照を保持）
+
+    async def search(self, image_bytes: bytes) -> list[str]:
+        """画像をバッチに追加し、一致ページURLを待つ"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((image_bytes, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: list[tuple[bytes, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        images = [image_bytes for image_bytes, _ in batch]
+        try:
+            results = await loop.run_in_executor(self._executor, self.backend.annotate, images)
+            logger.debug(f"Vision batch of {len(images)} images completed")
+        except Exception as e:
+            # バッチ内の全画像の呼び出し元に失敗を伝える（該当なしと区別するため）
+            logger.error(f"❌ Vision API call failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), urls in zip(batch, results):
+            if not future.done():
+                future.set_result(urls)
+
+    def close(self):
+        """executorを停止"""
+        for _, future in self._pending:
+            if not future.done():
+                future.cancel()
+        self._pending = []
+        self._executor.shutdown(wait=False, cancel_futures=True)
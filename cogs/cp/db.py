@@ -10,6 +10,8 @@ from typing import Any
 import asyncpg
 
 from config.setting import get_settings
+from utils.db_pool import pool_registry
+from utils.db_statements import statements
 from utils.logging import setup_logging
 
 from .models import (
@@ -23,6 +25,49 @@ from .models import (
 
 logger = setup_logging(__name__)
 
+# ==================== ホットパスのステートメント ====================
+
+LOG_MESSAGE = statements.register("checkpoint", "cp.log_message", """
+    INSERT INTO cp_message_logs
+    (user_id, guild_id, channel_id, thread_id, forum_id, message_id,
+     content, word_count, char_count, has_attachments, has_embeds, created_at, created_year)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+    ON CONFLICT (message_id) DO NOTHING
+""")
+
+LOG_REACTION = statements.register("checkpoint", "cp.log_reaction", """
+    INSERT INTO cp_reaction_logs
+    (user_id, guild_id, message_id, emoji_name, emoji_id, emoji_animated, is_add, created_at)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+""")
+
+COUNT_REACTION = statements.register("checkpoint", "cp.count_reaction", """
+    INSERT INTO cp_reaction_counts
+    (user_id, guild_id, emoji_name, emoji_id, emoji_animated, use_count, last_used_at)
+    VALUES ($1, $2, $3, $4, $5, 1, $6)
+    ON CONFLICT (user_id, guild_id, emoji_name) DO UPDATE
+    SET use_count = cp_reaction_counts.use_count + 1, last_used_at = $6
+""")
+
+# 日別統計のカラムごとのインクリメント
+DAILY_STAT_FIELDS = (
+    "message_count",
+    "reaction_count",
+    "vc_seconds",
+    "mention_sent_count",
+    "mention_received_count",
+    "omikuji_count",
+)
+INCREMENT_DAILY_STAT = {
+    field: statements.register("checkpoint", f"cp.increment_daily_stat.{field}", f"""
+        INSERT INTO cp_daily_stats (user_id, guild_id, stat_date, {field})
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (user_id, guild_id, stat_date) DO UPDATE
+        SET {field} = cp_daily_stats.{field} + $4, updated_at = CURRENT_TIMESTAMP
+    """)
+    for field in DAILY_STAT_FIELDS
+}
+
 
 class CheckpointDB:
     """Checkpoint専用DBクライアント"""
@@ -42,8 +87,9 @@ class CheckpointDB:
             return False
 
         try:
-            self.pool = await asyncpg.create_pool(
+            self.pool = await pool_registry.get(
                 settings.cp_database_url,
+                name="checkpoint",
                 min_size=3,
                 max_size=15,
                 command_timeout=30,
@@ -58,7 +104,8 @@ class CheckpointDB:
     async def close(self):
         """接続プールを閉じる"""
         if self.pool:
-            await self.pool.close()
+            await pool_registry.release(self.pool, owner="checkpoint")
+            self.pool = None
             self._initialized = False
             logger.info("Checkpoint DB 接続プールを閉じました")
 
@@ -69,17 +116,10 @@ class CheckpointDB:
         if not self._initialized:
             return False
 
-        query = """
-            INSERT INTO cp_message_logs
-            (user_id, guild_id, channel_id, thread_id, forum_id, message_id,
-             content, word_count, char_count, has_attachments, has_embeds, created_at, created_year)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-            ON CONFLICT (message_id) DO NOTHING
-        """
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute(
-                    query,
+                await LOG_MESSAGE.execute(
+                    conn,
                     log.user_id,
                     log.guild_id,
                     log.channel_id,
@@ -110,24 +150,11 @@ class CheckpointDB:
         if not self._initialized:
             return False
 
-        # ログ記録
-        log_query = """
-            INSERT INTO cp_reaction_logs
-            (user_id, guild_id, message_id, emoji_name, emoji_id, emoji_animated, is_add, created_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-        """
-        # カウント更新
-        count_query = """
-            INSERT INTO cp_reaction_counts
-            (user_id, guild_id, emoji_name, emoji_id, emoji_animated, use_count, last_used_at)
-            VALUES ($1, $2, $3, $4, $5, 1, $6)
-            ON CONFLICT (user_id, guild_id, emoji_name) DO UPDATE
-            SET use_count = cp_reaction_counts.use_count + 1, last_used_at = $6
-        """
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute(
-                    log_query,
+                # ログ記録
+                await LOG_REACTION.execute(
+                    conn,
                     log.user_id,
                     log.guild_id,
                     log.message_id,
@@ -138,9 +165,10 @@ class CheckpointDB:
                     log.created_at,
                 )
 
+                # カウント更新
                 if log.is_add:
-                    await conn.execute(
-                        count_query,
+                    await COUNT_REACTION.execute(
+                        conn,
                         log.user_id,
                         log.guild_id,
                         log.emoji_name,
@@ -333,16 +361,15 @@ class CheckpointDB:
         if not self._initialized:
             return
 
+        statement = INCREMENT_DAILY_STAT.get(field)
+        if statement is None:
+            logger.error(f"未知の日別統計カラム: {field}")
+            return
+
         today = date.today()
-        query = f"""
-            INSERT INTO cp_daily_stats (user_id, guild_id, stat_date, {field})
-            VALUES ($1, $2, $3, $4)
-            ON CONFLICT (user_id, guild_id, stat_date) DO UPDATE
-            SET {field} = cp_daily_stats.{field} + $4, updated_at = CURRENT_TIMESTAMP
-        """
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute(query, user_id, guild_id, today, value)
+                await statement.execute(conn, user_id, guild_id, today, value)
         except Exception as e:
             logger.error(f"日別統計更新エラー: {e}")
 
@@ -6,8 +6,9 @@ Checkpoint エラーハンドラー
 import asyncio
 import functools
 from collections import deque
+from collections.abc import Callable
 from datetime import datetime, timezone
-from typing import Any, Callable, TypeVar
+from typing import Any, TypeVar
 
 from utils.logging import setup_logging
 
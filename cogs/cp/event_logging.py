@@ -9,6 +9,8 @@ import discord
 from discord.ext import commands
 
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
+from utils.voice_presence import VoiceEventType, VoicePresenceEvent, voice_presence
 
 from .db import checkpoint_db
 from .models import MentionLog, MessageLog, ReactionLog, VoiceLog
@@ -21,8 +23,6 @@ class CheckpointLogging(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # VC セッション追跡: {user_id: {guild_id: session_info}}
-        self._voice_sessions: dict[int, dict[int, dict]] = {}
         # 除外チャンネルキャッシュ: {guild_id: set[channel_id]}
         self._excluded_channels_cache: dict[int, set[int]] = {}
 
@@ -30,12 +30,21 @@ class CheckpointLogging(commands.Cog):
         """Cog読み込み時にDB初期化"""
         success = await checkpoint_db.initialize()
         if success:
+            # VC滞在はvoice_presenceのセッション表を使う（再起動後の復元も含む）
+            voice_presence.attach(self.bot)
+            voice_presence.subscribe(
+                self.on_vc_event, VoiceEventType.JOIN, VoiceEventType.LEAVE, VoiceEventType.MOVE
+            )
+            message_pipeline.attach(self.bot)
+            message_pipeline.register("checkpoint_logging", self.log_message)
             logger.info("✅ Checkpoint Logging Cog 読み込み完了")
         else:
             logger.warning("⚠️ Checkpoint DB 未接続（ログ収集は無効）")
 
     async def cog_unload(self):
         """Cog終了時にDB切断"""
+        voice_presence.unsubscribe(self.on_vc_event)
+        message_pipeline.unregister("checkpoint_logging")
         await checkpoint_db.close()
 
     def _is_excluded(self, guild_id: int, channel_id: int) -> bool:
@@ -45,15 +54,12 @@ class CheckpointLogging(commands.Cog):
 
     # ==================== メッセージログ ====================
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """メッセージ送信をログ"""
-        # Bot・DMは除外
-        if message.author.bot or not message.guild:
-            return
+    async def log_message(self, ctx: MessageContext):
+        """メッセージ送信をログ（Bot・DMはパイプライン側で除外済み）"""
+        message = ctx.message
 
         # 除外チャンネルチェック
-        if self._is_excluded(message.guild.id, message.channel.id):
+        if self._is_excluded(ctx.guild_id, ctx.channel_id):
             return
 
         content = message.content or ""
@@ -196,87 +202,30 @@ class CheckpointLogging(commands.Cog):
 
     # ==================== VCログ ====================
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
-        """VC参加・退出をログ"""
-        if member.bot:
+    async def on_vc_event(self, event: VoicePresenceEvent):
+        """VC参加・退出・移動をログ"""
+        if event.is_bot:
             return
 
-        guild_id = member.guild.id
-        user_id = member.id
-        now = datetime.now(timezone.utc)
-
-        # VC参加
-        if before.channel is None and after.channel is not None:
-            log = VoiceLog(
-                user_id=user_id,
-                guild_id=guild_id,
-                channel_id=after.channel.id,
-                joined_at=now,
-                was_self_muted=after.self_mute,
-                was_self_deafened=after.self_deaf,
-            )
-            session_id = await checkpoint_db.log_voice_join(log)
-
-            # セッション追跡
-            if user_id not in self._voice_sessions:
-                self._voice_sessions[user_id] = {}
-            self._voice_sessions[user_id][guild_id] = {
-                "session_id": session_id,
-                "channel_id": after.channel.id,
-                "joined_at": now,
-            }
-
-        # VC退出
-        elif before.channel is not None and after.channel is None:
+        # 退出・移動: 前のチャンネルのログを閉じる
+        if event.type in (VoiceEventType.LEAVE, VoiceEventType.MOVE):
             await checkpoint_db.log_voice_leave(
-                user_id=user_id,
-                guild_id=guild_id,
-                channel_id=before.channel.id,
-                left_at=now,
+                user_id=event.user_id,
+                guild_id=event.guild_id,
+                channel_id=event.previous_channel_id,
+                left_at=event.at,
             )
 
-            # セッション追跡クリア
-            if user_id in self._voice_sessions:
-                self._voice_sessions[user_id].pop(guild_id, None)
-
-        # チャンネル移動
-        elif (
-            before.channel is not None
-            and after.channel is not None
-            and before.channel.id != after.channel.id
-        ):
-            # 前のチャンネルを退出
-            await checkpoint_db.log_voice_leave(
-                user_id=user_id,
-                guild_id=guild_id,
-                channel_id=before.channel.id,
-                left_at=now,
-            )
-
-            # 新しいチャンネルに参加
-            log = VoiceLog(
-                user_id=user_id,
-                guild_id=guild_id,
-                channel_id=after.channel.id,
-                joined_at=now,
-                was_self_muted=after.self_mute,
-                was_self_deafened=after.self_deaf,
-            )
-            session_id = await checkpoint_db.log_voice_join(log)
-
-            if user_id not in self._voice_sessions:
-                self._voice_sessions[user_id] = {}
-            self._voice_sessions[user_id][guild_id] = {
-                "session_id": session_id,
-                "channel_id": after.channel.id,
-                "joined_at": now,
-            }
+        # 参加・移動: 新しいチャンネルのログを開始
+        if event.type in (VoiceEventType.JOIN, VoiceEventType.MOVE):
+            await checkpoint_db.log_voice_join(VoiceLog(
+                user_id=event.user_id,
+                guild_id=event.guild_id,
+                channel_id=event.channel_id,
+                joined_at=event.at,
+                was_self_muted=event.session.self_mute,
+                was_self_deafened=event.session.self_deaf,
+            ))
 
 
 async def setup(bot: commands.Bot):
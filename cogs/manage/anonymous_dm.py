@@ -31,6 +31,7 @@ from utils.cv2 import (
 )
 from utils.database import get_db_pool
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 logger = setup_logging(__name__)
 
@@ -184,6 +185,7 @@ class AnonymousDMv2(commands.Cog):
 
     async def cog_unload(self):
         """Cogアンロード時のクリーンアップ"""
+        message_pipeline.unregister("anonymous_dm")
         await self._http_client.aclose()
 
     async def _send_cv2(self, channel_id: int, cv2_msg: ComponentsV2Message) -> dict:
@@ -198,12 +200,14 @@ class AnonymousDMv2(commands.Cog):
         """Cog読み込み時の初期化"""
         # 永続ビューを登録
         self.bot.add_view(SessionControlView())
+        message_pipeline.attach(self.bot)
+        # 大きな添付ファイルの中継は時間がかかるため打ち切らない
+        message_pipeline.register("anonymous_dm", self.relay_message, include_dms=True, timeout=None)
         logger.info("AnonymousDMv2 Cogが読み込まれました")
 
     @commands.Cog.listener()
     async def on_ready(self):
-        """Bot準備完了時にDB初期化"""
-        await self._create_tables()
+        """Bot準備完了時にDBからデータを読み込み"""
         await self._load_data_from_db()
         await self._register_default_snippets()
         logger.info("AnonymousDMv2 DB初期化完了")
@@ -305,93 +309,6 @@ class AnonymousDMv2(commands.Cog):
 
         logger.info(f"Guild {guild_id}: デフォルトスニペット {len(self.snippets[guild_id])}件登録")
 
-    async def _create_tables(self):
-        """テーブル作成"""
-        try:
-            async with (await get_db_pool()).acquire() as conn:
-                # セッションテーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS anon_dm_sessions_v2 (
-                        id SERIAL PRIMARY KEY,
-                        guild_id BIGINT NOT NULL,
-                        channel_id BIGINT NOT NULL UNIQUE,
-                        target_user_id BIGINT NOT NULL,
-                        created_by BIGINT NOT NULL,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        closed_at TIMESTAMP WITH TIME ZONE,
-                        priority VARCHAR(20) DEFAULT 'medium',
-                        tags TEXT[],
-                        last_responder_id BIGINT,
-                        last_activity_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        is_active BOOLEAN DEFAULT TRUE
-                    )
-                """)
-
-                # 設定テーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS anon_dm_config_v2 (
-                        id SERIAL PRIMARY KEY,
-                        guild_id BIGINT NOT NULL UNIQUE,
-                        category_id BIGINT NOT NULL,
-                        log_channel_id BIGINT,
-                        updated_by BIGINT NOT NULL,
-                        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-                # メッセージマッピングテーブル（編集・削除同期用）
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS anon_dm_message_map (
-                        id SERIAL PRIMARY KEY,
-                        session_id INT,
-                        server_message_id BIGINT NOT NULL,
-                        dm_message_id BIGINT NOT NULL,
-                        direction VARCHAR(10) NOT NULL,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-                # メモテーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS anon_dm_memos (
-                        id SERIAL PRIMARY KEY,
-                        session_id INT NOT NULL,
-                        content TEXT NOT NULL,
-                        author_id BIGINT NOT NULL,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-                # スニペットテーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS anon_dm_snippets (
-                        id SERIAL PRIMARY KEY,
-                        guild_id BIGINT NOT NULL,
-                        name VARCHAR(50) NOT NULL,
-                        content TEXT NOT NULL,
-                        created_by BIGINT NOT NULL,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(guild_id, name)
-                    )
-                """)
-
-                # メッセージログテーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS anon_dm_messages_v2 (
-                        id SERIAL PRIMARY KEY,
-                        session_id INT,
-                        direction VARCHAR(10) NOT NULL,
-                        content TEXT,
-                        author_id BIGINT NOT NULL,
-                        has_attachment BOOLEAN DEFAULT FALSE,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-            logger.info("匿名DM v2 テーブル作成完了")
-        except Exception as e:
-            logger.error(f"テーブル作成エラー: {e}")
-
     async def _load_data_from_db(self):
         """データ読み込み"""
         try:
@@ -747,14 +664,12 @@ class AnonymousDMv2(commands.Cog):
 
     # ========== イベントリスナー ==========
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """メッセージ処理"""
-        if message.author.bot:
-            return
+    async def relay_message(self, ctx: MessageContext):
+        """メッセージ処理（Botはパイプライン側で除外済み）"""
+        message = ctx.message
 
         # サーバーチャンネル → DM
-        if message.guild and message.channel.id in self.active_sessions:
+        if not ctx.is_dm and ctx.channel_id in self.active_sessions:
             # 内部メモコマンド
             if message.content.startswith("!!"):
                 content = message.content[2:].strip()
@@ -768,9 +683,8 @@ class AnonymousDMv2(commands.Cog):
             return
 
         # DM → サーバーチャンネル
-        if isinstance(message.channel, discord.DMChannel):
-            if message.author.id in self.user_to_channel:
-                await self._forward_to_channel(message)
+        if ctx.is_dm and ctx.author_id in self.user_to_channel:
+            await self._forward_to_channel(message)
 
     @commands.Cog.listener()
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
@@ -112,36 +112,10 @@ class AutoPurge(commands.Cog):
         self.bot = bot
         self.auto_purge_task.start()
 
-    async def cog_load(self):
-        """Cogロード時にテーブルを作成"""
-        await self._setup_table()
-
     async def cog_unload(self):
         """Cogアンロード時にタスクを停止"""
         self.auto_purge_task.cancel()
 
-    async def _setup_table(self):
-        """AutoPurge設定テーブルを作成"""
-        await execute_query(
-            '''
-            CREATE TABLE IF NOT EXISTS auto_purge_settings (
-                id SERIAL PRIMARY KEY,
-                guild_id BIGINT NOT NULL,
-                channel_id BIGINT NOT NULL,
-                filter_type TEXT NOT NULL,
-                filter_value TEXT,
-                interval_hours INT NOT NULL DEFAULT 24,
-                max_age_hours INT NOT NULL DEFAULT 24,
-                last_run TIMESTAMP WITH TIME ZONE,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                UNIQUE(guild_id, channel_id, filter_type)
-            )
-            ''',
-            fetch_type='status'
-        )
-        logger.info("AutoPurge設定テーブルを確認・作成しました")
-
     @tasks.loop(minutes=30)
     async def auto_purge_task(self):
         """自動削除タスク"""
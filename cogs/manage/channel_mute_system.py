@@ -21,69 +21,9 @@ class ChannelMuteSystem(commands.Cog):
 
     async def cog_load(self):
         """Cog読み込み時の初期化"""
-        await self._create_tables()
         await self._load_data_from_db()
         logger.info("ChannelMuteSystem Cogが読み込まれました")
 
-    async def _create_tables(self):
-        """必要なテーブルを作成"""
-        try:
-            async with db.pool.acquire() as conn:
-                # ミュート対象ユーザーテーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_muted_users (
-                        id SERIAL PRIMARY KEY,
-                        guild_id BIGINT NOT NULL,
-                        user_id BIGINT NOT NULL,
-                        added_by BIGINT NOT NULL,
-                        added_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        reason TEXT,
-                        UNIQUE(guild_id, user_id)
-                    )
-                """)
-
-                # ユーザーごとの除外チャンネルテーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_mute_exclusions (
-                        id SERIAL PRIMARY KEY,
-                        guild_id BIGINT NOT NULL,
-                        user_id BIGINT NOT NULL,
-                        channel_id BIGINT NOT NULL,
-                        added_by BIGINT NOT NULL,
-                        added_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(guild_id, user_id, channel_id)
-                    )
-                """)
-
-                # ミュートシステム設定テーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_mute_config (
-                        id SERIAL PRIMARY KEY,
-                        guild_id BIGINT NOT NULL UNIQUE,
-                        log_channel_id BIGINT,
-                        is_enabled BOOLEAN DEFAULT TRUE,
-                        updated_by BIGINT NOT NULL,
-                        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-                # ミュートログテーブル
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS channel_mute_logs (
-                        id SERIAL PRIMARY KEY,
-                        guild_id BIGINT NOT NULL,
-                        user_id BIGINT NOT NULL,
-                        action TEXT NOT NULL,
-                        performed_by BIGINT NOT NULL,
-                        details TEXT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-            logger.info("ChannelMuteSystemのテーブル作成完了")
-        except Exception as e:
-            logger.error(f"テーブル作成エラー: {e}")
-
     async def _load_data_from_db(self):
         """データベースからデータを読み込み"""
         try:
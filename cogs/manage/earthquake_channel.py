@@ -17,7 +17,7 @@ import aiohttp
 import discord
 import pytz
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from config.setting import get_settings
 from utils.commands_help import is_guild_app, is_moderator_app
@@ -32,12 +32,16 @@ from utils.components_v2 import (
 )
 from utils.database import execute_query
 from utils.logging import setup_logging
+from utils.scheduler import JobKind, scheduler
 
 logger = setup_logging()
 settings = get_settings()
 # 日本時間
 JST = pytz.timezone('Asia/Tokyo')
 
+# スケジューラのジョブ種別名（自動クローズ）
+AUTO_CLOSE_JOB = "earthquake_auto_close"
+
 # 地震チャンネル閲覧ロール名
 EARTHQUAKE_ROLE_NAME = "地震ch閲覧"
 
@@ -142,10 +146,16 @@ class EarthquakeChannel(commands.Cog):
 
     async def cog_load(self):
         """Cogロード時の初期化"""
-        await self._setup_table()
         await self._load_settings()
         self._register_views()
-        self.auto_close_check.start()
+        scheduler.attach(self.bot)
+        await scheduler.register(JobKind(
+            name=AUTO_CLOSE_JOB,
+            load=self._load_close_times,
+            fetch=self._due_sessions,
+            run=self._auto_close,
+            key_of=lambda guild_id: guild_id,
+        ))
         # WebSocket接続を開始
         self._ws_task = asyncio.create_task(self._websocket_listener())
 
@@ -154,7 +164,7 @@ class EarthquakeChannel(commands.Cog):
 
     async def cog_unload(self):
         """Cogアンロード時のクリーンアップ"""
-        self.auto_close_check.cancel()
+        await scheduler.unregister(AUTO_CLOSE_JOB)
         # WebSocket接続を終了
         if self._ws_task:
             self._ws_task.cancel()
@@ -167,65 +177,6 @@ class EarthquakeChannel(commands.Cog):
         """永続的なViewを登録"""
         self.bot.add_view(EarthquakeRoleButton(0))
 
-    async def _setup_table(self):
-        """テーブルを作成"""
-        await execute_query(
-            '''
-            CREATE TABLE IF NOT EXISTS earthquake_channel_settings (
-                guild_id BIGINT PRIMARY KEY,
-                category_id BIGINT NOT NULL,
-                notification_channel_id BIGINT NOT NULL,
-                notification_role_id BIGINT NOT NULL,
-                earthquake_role_id BIGINT,
-                min_scale INTEGER DEFAULT 30,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            ''',
-            fetch_type='status'
-        )
-
-        await execute_query(
-            '''
-            CREATE TABLE IF NOT EXISTS earthquake_channel_sessions (
-                id SERIAL PRIMARY KEY,
-                guild_id BIGINT NOT NULL,
-                message_id BIGINT NOT NULL,
-                channel_id BIGINT NOT NULL,
-                talk_channel_id BIGINT,
-                info_channel_id BIGINT,
-                opened_at TIMESTAMP WITH TIME ZONE NOT NULL,
-                closes_at TIMESTAMP WITH TIME ZONE NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                closed_at TIMESTAMP WITH TIME ZONE,
-                earthquake_info JSONB,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            ''',
-            fetch_type='status'
-        )
-
-        # 既存テーブルにカラムを追加（存在しない場合）
-        await execute_query(
-            '''
-            ALTER TABLE earthquake_channel_sessions
-            ADD COLUMN IF NOT EXISTS talk_channel_id BIGINT,
-            ADD COLUMN IF NOT EXISTS info_channel_id BIGINT,
-            ADD COLUMN IF NOT EXISTS earthquake_info JSONB
-            ''',
-            fetch_type='status'
-        )
-
-        await execute_query(
-            '''
-            ALTER TABLE earthquake_channel_settings
-            ADD COLUMN IF NOT EXISTS min_scale INTEGER DEFAULT 30
-            ''',
-            fetch_type='status'
-        )
-
-        logger.info("地震チャンネル設定テーブルを確認・作成しました")
-
     async def _load_settings(self):
         """設定をメモリにロード"""
         settings_data = await execute_query(
@@ -510,6 +461,7 @@ class EarthquakeChannel(commands.Cog):
 
         # メモリ更新
         session['closes_at'] = new_closes_at
+        scheduler.schedule(AUTO_CLOSE_JOB, guild.id, new_closes_at)
 
         # DB更新
         await execute_query(
@@ -743,33 +695,40 @@ class EarthquakeChannel(commands.Cog):
             'info_channel_id': info_channel.id,
             'closes_at': closes_at,
         }
+        scheduler.schedule(AUTO_CLOSE_JOB, guild.id, closes_at)
 
         mode = "自動(テスト)" if self._use_sandbox else "自動"
         logger.info(f"地震チャンネルを{mode}オープン: {guild.name}")
         return True, "地震チャンネルをオープンしました。"
 
-    @tasks.loop(minutes=1)
-    async def auto_close_check(self):
-        """自動クローズチェック"""
+    @staticmethod
+    def _closes_at(session: dict) -> datetime:
+        closes_at = session['closes_at']
+        if closes_at.tzinfo is None:
+            closes_at = JST.localize(closes_at)
+        return closes_at
+
+    async def _load_close_times(self, guild_ids: Optional[list[int]]) -> list[tuple[int, datetime]]:
+        """アクティブなセッションの自動クローズ時刻（セッションはメモリ上にある）"""
+        return [
+            (guild_id, self._closes_at(session))
+            for guild_id, session in self._active_sessions.items()
+            if guild_ids is None or guild_id in guild_ids
+        ]
+
+    async def _due_sessions(self, guild_ids: list[int]) -> list[int]:
+        """自動クローズ時刻を過ぎたセッションのサーバー"""
         now = datetime.now(JST)
-        to_close = []
-
-        for guild_id, session in list(self._active_sessions.items()):
-            closes_at = session['closes_at']
-            if closes_at.tzinfo is None:
-                closes_at = JST.localize(closes_at)
+        return [
+            guild_id for guild_id in guild_ids
+            if guild_id in self._active_sessions and now >= self._closes_at(self._active_sessions[guild_id])
+        ]
 
-            if now >= closes_at:
-                to_close.append(guild_id)
-
-        for guild_id in to_close:
-            guild = self.bot.get_guild(guild_id)
-            if guild:
-                await self._close_earthquake_channel(guild, auto=True)
-
-    @auto_close_check.before_loop
-    async def before_auto_close_check(self):
-        await self.bot.wait_until_ready()
+    async def _auto_close(self, guild_id: int):
+        """自動クローズ"""
+        guild = self.bot.get_guild(guild_id)
+        if guild:
+            await self._close_earthquake_channel(guild, auto=True)
 
     async def _close_earthquake_channel(
         self, guild: discord.Guild, auto: bool = False
@@ -832,6 +791,7 @@ class EarthquakeChannel(commands.Cog):
         )
 
         del self._active_sessions[guild.id]
+        scheduler.cancel(AUTO_CLOSE_JOB, guild.id)
 
         close_type = "自動" if auto else "手動"
         logger.info(f"地震チャンネルを{close_type}クローズ: {guild.name}, {removed_count}人からロール剥奪")
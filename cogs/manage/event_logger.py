@@ -17,6 +17,7 @@ from discord.ext import commands
 
 from utils.database import execute_query
 from utils.logging import setup_logging
+from utils.voice_presence import VoiceEventType, VoicePresenceEvent, voice_presence
 
 logger = setup_logging()
 
@@ -159,75 +160,16 @@ class EventLogger(commands.Cog):
         self._thread_cache: dict[int, dict[str, int]] = {}  # guild_id -> {category: thread_id}
 
     async def cog_load(self):
-        """Cogロード時にテーブルを作成"""
-        await self._setup_table()
+        """Cogロード時に設定を読み込み"""
         await self._load_settings()
-
-    async def _setup_table(self):
-        """イベントログ設定テーブルを作成・マイグレーション"""
-        # 既存テーブルがあるか確認
-        table_exists = await execute_query(
-            '''
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables
-                WHERE table_name = 'event_log_settings'
-            )
-            ''',
-            fetch_type='row'
+        voice_presence.attach(self.bot)
+        voice_presence.subscribe(
+            self.on_vc_event, VoiceEventType.JOIN, VoiceEventType.LEAVE, VoiceEventType.MOVE
         )
 
-        if table_exists and table_exists['exists']:
-            # 既存テーブルのカラムを確認
-            columns = await execute_query(
-                '''
-                SELECT column_name FROM information_schema.columns
-                WHERE table_name = 'event_log_settings'
-                ''',
-                fetch_type='all'
-            )
-            column_names = [c['column_name'] for c in columns]
-
-            # 古いスキーマからの移行（channel_id → forum_channel_id）
-            if 'channel_id' in column_names and 'forum_channel_id' not in column_names:
-                await execute_query(
-                    'ALTER TABLE event_log_settings RENAME COLUMN channel_id TO forum_channel_id',
-                    fetch_type='status'
-                )
-                logger.info("カラム名を channel_id → forum_channel_id に変更しました")
-
-            # thread_ids カラムがなければ追加
-            if 'thread_ids' not in column_names:
-                await execute_query(
-                    "ALTER TABLE event_log_settings ADD COLUMN thread_ids JSONB DEFAULT '{}'",
-                    fetch_type='status'
-                )
-                logger.info("thread_ids カラムを追加しました")
-
-            # ignore_channels カラムがあれば削除（不要）
-            if 'ignore_channels' in column_names:
-                await execute_query(
-                    'ALTER TABLE event_log_settings DROP COLUMN ignore_channels',
-                    fetch_type='status'
-                )
-                logger.info("ignore_channels カラムを削除しました")
-        else:
-            # 新規作成
-            await execute_query(
-                '''
-                CREATE TABLE IF NOT EXISTS event_log_settings (
-                    guild_id BIGINT PRIMARY KEY,
-                    forum_channel_id BIGINT NOT NULL,
-                    events BIGINT NOT NULL DEFAULT 0,
-                    ignore_bots BOOLEAN DEFAULT TRUE,
-                    thread_ids JSONB DEFAULT '{}',
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                )
-                ''',
-                fetch_type='status'
-            )
-
-        logger.info("イベントログ設定テーブルを確認・作成しました")
+    async def cog_unload(self):
+        """Cogアンロード時にVCイベントの購読を解除"""
+        voice_presence.unsubscribe(self.on_vc_event)
 
     async def _load_settings(self):
         """設定をメモリにロード"""
@@ -598,18 +540,18 @@ class EventLogger(commands.Cog):
 
         await self._send_log(after.guild, LogEventType.MESSAGE_EDIT, embed)
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState
-    ):
-        """ボイス状態更新"""
+    async def on_vc_event(self, event: VoicePresenceEvent):
+        """ボイス状態更新（voice_presenceが解析済み）"""
+        # 再起動後に補完したイベントは実際の時刻と異なるのでログしない
+        if event.restored:
+            return
+
+        member = event.member
         guild = member.guild
+        before, after = event.before, event.after
 
         # VC参加
-        if before.channel is None and after.channel is not None:
+        if event.type == VoiceEventType.JOIN:
             if self._should_log(guild.id, LogEventType.VOICE_JOIN):
                 embed = discord.Embed(
                     title="VCに参加しました",
@@ -621,7 +563,7 @@ class EventLogger(commands.Cog):
                 await self._send_log(guild, LogEventType.VOICE_JOIN, embed)
 
         # VC退出
-        elif before.channel is not None and after.channel is None:
+        elif event.type == VoiceEventType.LEAVE:
             if self._should_log(guild.id, LogEventType.VOICE_LEAVE):
                 embed = discord.Embed(
                     title="VCから退出しました",
@@ -633,7 +575,7 @@ class EventLogger(commands.Cog):
                 await self._send_log(guild, LogEventType.VOICE_LEAVE, embed)
 
         # VC移動
-        elif before.channel != after.channel and before.channel and after.channel:
+        elif event.type == VoiceEventType.MOVE:
             if self._should_log(guild.id, LogEventType.VOICE_MOVE):
                 embed = discord.Embed(
                     title="VCを移動しました",
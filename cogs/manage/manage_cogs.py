@@ -4,6 +4,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+from utils.command_sync import command_syncer
 from utils.commands_help import is_owner, is_owner_app, log_commands
 from utils.logging import setup_logging
 
@@ -138,7 +139,7 @@ class ManagementCog(commands.Cog):
 
         try:
             await self.bot.reload_extension(cog)
-            await self.bot.tree.sync()
+            await command_syncer.sync(self.bot)
             logger.debug("Cog reloaded successfully")
             await interaction.followup.send(f"{cog}を再読み込みしました。")
             logger.info(f"{cog}を再読み込みしました。")
@@ -151,6 +152,24 @@ class ManagementCog(commands.Cog):
             await interaction.followup.send(f"'{cog}' の再読み込み中にエラーが発生しました。\n{type(e).__name__}: {e}")
             logger.error(f"'{cog}' の再読み込み中にエラーが発生しました。\n{type(e).__name__}: {e}")
 
+    @app_commands.command(name="sync_commands", description="アプリコマンドを同期します")
+    @app_commands.describe(force="変更がなくてもすべてのスコープを同期する")
+    @is_owner_app()
+    @log_commands()
+    async def sync_commands(self, interaction: discord.Interaction, force: bool = False):
+        await interaction.response.defer()
+        try:
+            synced = await command_syncer.sync(self.bot, force=force)
+        except discord.HTTPException as e:
+            await interaction.followup.send(f"コマンドの同期中にエラーが発生しました。\n{type(e).__name__}: {e}")
+            logger.error(f"コマンドの同期中にエラーが発生しました。\n{type(e).__name__}: {e}")
+            return
+
+        if synced:
+            await interaction.followup.send(f"コマンドを同期しました: {', '.join(synced)}")
+        else:
+            await interaction.followup.send("コマンドに変更はありません。強制する場合は force を指定してください。")
+
     @commands.hybrid_command(name='list_cogs', with_app_command=True)
     @is_owner()
     @log_commands()
@@ -1,4 +1,3 @@
-import asyncio
 from enum import Enum
 from typing import Any, Optional
 
@@ -48,87 +47,10 @@ class HFSVoices(commands.Cog):
         self.bot = bot
         self.active_interviews: dict[int, dict[str, Any]] = {}
         logger.info("HFS Voices インタビュー機能を初期化しました")
-        # データベーステーブルを即座作成を試行
-        asyncio.create_task(self._delayed_table_creation())
         # 永続化Viewを登録
         self.bot.add_view(InterviewControlView())
         self.bot.add_view(QuestionResponseView())
 
-    async def cog_load(self) -> None:
-        """Cogロード時の初期化処理"""
-        try:
-            await self._ensure_database_tables()
-            logger.info("HFS Voices データベーステーブルを初期化しました")
-        except Exception as e:
-            logger.error(f"HFS Voices データベース初期化エラー: {e}")
-            raise
-
-    async def _ensure_database_tables(self) -> None:
-        """必要なデータベーステーブルを作成"""
-        try:
-            logger.info("HFS Voicesテーブル作成を開始します...")
-
-            if not hasattr(db, 'pool') or db.pool is None:
-                logger.error("データベースプールが初期化されていません")
-                return
-
-            async with db.pool.acquire() as conn:
-                # hfs_interviewsテーブルを作成
-                logger.info("hfs_interviewsテーブルを作成中...")
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS hfs_interviews (
-                        id SERIAL PRIMARY KEY,
-                        user_id BIGINT NOT NULL,
-                        interviewer_id BIGINT NOT NULL,
-                        status VARCHAR(20) NOT NULL DEFAULT 'pending',
-                        thread_id BIGINT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        started_at TIMESTAMP,
-                        completed_at TIMESTAMP,
-                        published_at TIMESTAMP,
-                        note_url VARCHAR(500)
-                    )
-                """)
-
-                # ユニーク制約を別途追加（PostgreSQLの部分インデックスを使用）
-                logger.info("ユニーク制約を作成中...")
-                await conn.execute("""
-                    CREATE UNIQUE INDEX IF NOT EXISTS idx_hfs_interviews_user_active_status
-                    ON hfs_interviews (user_id, status)
-                    WHERE status IN ('pending', 'in_progress')
-                """)
-
-                # hfs_interview_responsesテーブルを作成
-                logger.info("hfs_interview_responsesテーブルを作成中...")
-                await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS hfs_interview_responses (
-                        id SERIAL PRIMARY KEY,
-                        interview_id INTEGER REFERENCES hfs_interviews(id) ON DELETE CASCADE,
-                        question_number INTEGER NOT NULL,
-                        question_text TEXT NOT NULL,
-                        response_text TEXT,
-                        answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(interview_id, question_number)
-                    )
-                """)
-
-                logger.info("HFS Voicesテーブル作成完了")
-
-        except Exception as e:
-            logger.error(f"データベーステーブル作成エラー: {e}")
-            raise
-
-    async def _delayed_table_creation(self) -> None:
-        """データベース初期化後にテーブル作成を実行"""
-        try:
-            # Botがレディ状態になるまで待機
-            await self.bot.wait_until_ready()
-            # データベース接続が初期化されるまで少し待機
-            await asyncio.sleep(2)
-            await self._ensure_database_tables()
-        except Exception as e:
-            logger.error(f"遅延テーブル作成エラー: {e}")
-
     async def _restore_active_interviews(self) -> None:
         """アクティブなインタビューを復元"""
         try:
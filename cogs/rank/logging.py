@@ -9,6 +9,13 @@ import discord
 from discord.ext import commands, tasks
 
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
+from utils.voice_presence import (
+    VoiceEventType,
+    VoicePresence,
+    VoicePresenceEvent,
+    voice_presence,
+)
 
 from .models import rank_db
 from .service import rank_service
@@ -21,89 +28,65 @@ class RankLogging(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # VC追跡: {user_id: {guild_id: joined_at}}
-        self._vc_sessions: dict[int, dict[int, datetime]] = {}
 
     async def cog_load(self):
         """Cog読み込み時に初期化"""
         await rank_db.initialize()
+        # VC滞在はvoice_presenceのセッション表を使う（再起動後の復元も含む）
+        voice_presence.attach(self.bot)
+        voice_presence.subscribe(self.on_vc_leave, VoiceEventType.LEAVE)
+        message_pipeline.attach(self.bot)
+        message_pipeline.register("rank_message_xp", self.add_message_xp)
         self.vc_xp_task.start()
         logger.info("✅ Rank Logging Cog 読み込み完了")
 
     async def cog_unload(self):
         """Cog終了時"""
         self.vc_xp_task.cancel()
+        voice_presence.unsubscribe(self.on_vc_leave)
+        message_pipeline.unregister("rank_message_xp")
 
     # ==================== メッセージXP ====================
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """メッセージ送信でXP付与"""
-        # Bot・DMは除外
-        if message.author.bot or not message.guild:
-            return
-
-        # 設定取得・除外チェック
-        config = await rank_db.get_config(message.guild.id)
+    async def add_message_xp(self, ctx: MessageContext):
+        """メッセージ送信でXP付与（Bot・DMはパイプライン側で除外済み）"""
+        # 設定取得・除外チェック（同じメッセージを処理する他のステージと共有）
+        config = await ctx.memo(("rank_config", ctx.guild_id), lambda: rank_db.get_config(ctx.guild_id))
         if not config.is_enabled:
             return
 
-        if rank_service.is_channel_excluded(message.channel.id, config):
+        if rank_service.is_channel_excluded(ctx.channel_id, config):
             return
 
         # 除外ロールチェック
-        if config.excluded_roles:
-            member_role_ids = {r.id for r in message.author.roles}
-            if member_role_ids & set(config.excluded_roles):
-                return
+        if config.excluded_roles and ctx.has_any_role(config.excluded_roles):
+            return
 
         # XP付与（メッセージ内容とチャンネルIDを渡して品質・倍率計算）
         await rank_service.add_message_xp(
-            message.author.id,
-            message.guild.id,
-            message.content,
-            message.channel.id,
+            ctx.author_id,
+            ctx.guild_id,
+            ctx.message.content,
+            ctx.channel_id,
         )
 
     # ==================== VC XP ====================
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
-        """VC参加・退出を追跡"""
-        if member.bot:
-            return
+    def _vc_counted_from(self, session: VoicePresence) -> datetime:
+        """VC XPの未付与区間の開始時刻（参加時刻、10分付与後はその時刻）"""
+        counted_from = (session.state or {}).get("rank_counted_from")
+        if counted_from is None:
+            return session.joined_at
+        return datetime.fromtimestamp(counted_from, timezone.utc)
 
-        guild_id = member.guild.id
-        user_id = member.id
-        now = datetime.now(timezone.utc)
+    async def on_vc_leave(self, event: VoicePresenceEvent):
+        """VC退出時に未付与分のXPを付与（チャンネル移動ではセッションを中断しない）"""
+        if event.is_bot:
+            return
 
-        # VC参加
-        if before.channel is None and after.channel is not None:
-            if user_id not in self._vc_sessions:
-                self._vc_sessions[user_id] = {}
-            self._vc_sessions[user_id][guild_id] = now
-
-        # VC退出
-        elif before.channel is not None and after.channel is None:
-            if user_id in self._vc_sessions and guild_id in self._vc_sessions[user_id]:
-                joined_at = self._vc_sessions[user_id].pop(guild_id)
-                duration = (now - joined_at).total_seconds() / 60
-                if duration >= 5:  # 5分以上でXP付与
-                    await rank_service.add_vc_xp(user_id, guild_id, int(duration))
-
-        # チャンネル移動
-        elif (
-            before.channel is not None
-            and after.channel is not None
-            and before.channel.id != after.channel.id
-        ):
-            # セッション継続（チャンネル変更では中断しない）
-            pass
+        duration = (event.at - self._vc_counted_from(event.session)).total_seconds() / 60
+        if duration >= 5:  # 5分以上でXP付与
+            await rank_service.add_vc_xp(event.user_id, event.guild_id, int(duration))
 
     # ==================== リアクションXP ====================
 
@@ -142,13 +125,14 @@ class RankLogging(commands.Cog):
         """10分ごとにVC中のユーザーにXP付与"""
         now = datetime.now(timezone.utc)
 
-        for user_id, guilds in list(self._vc_sessions.items()):
-            for guild_id, joined_at in list(guilds.items()):
-                duration = (now - joined_at).total_seconds() / 60
-                if duration >= 10:
-                    # 10分経過したらXP付与してリセット
-                    await rank_service.add_vc_xp(user_id, guild_id, 10)
-                    self._vc_sessions[user_id][guild_id] = now
+        for session in list(voice_presence.sessions.values()):
+            if session.bot:
+                continue
+            duration = (now - self._vc_counted_from(session)).total_seconds() / 60
+            if duration >= 10:
+                # 10分経過したらXP付与してリセット
+                await rank_service.add_vc_xp(session.user_id, session.guild_id, 10)
+                voice_presence.update_state(session, rank_counted_from=now.timestamp())
 
     @vc_xp_task.before_loop
     async def before_vc_xp_task(self):
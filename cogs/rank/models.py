@@ -5,10 +5,52 @@ from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 
 from cogs.cp.db import checkpoint_db
+from utils.db_statements import statements
 from utils.logging import setup_logging
 
 logger = setup_logging(__name__)
 
+# XP付与（全xp_type・update_activeで共通のSQL）
+# $7: last_message_xp_at（message以外はNULLで据え置き）
+# $8: last_omikuji_xp_date（omikuji以外はNULLで据え置き）
+# $9: アクティブ日数・ストリークも更新するか
+ADD_XP = statements.register("checkpoint", "rank.add_xp", """
+    INSERT INTO rank_users (user_id, guild_id, yearly_xp, lifetime_xp, last_active_date, updated_at,
+        last_message_xp_at, last_omikuji_xp_date, active_days, current_streak)
+    VALUES ($1, $2, $3::INT, $3::BIGINT, $4, $5, $7, $8,
+        CASE WHEN $9::BOOLEAN THEN 1 ELSE 0 END, CASE WHEN $9::BOOLEAN THEN 1 ELSE 0 END)
+    ON CONFLICT (user_id, guild_id) DO UPDATE
+    SET yearly_xp = rank_users.yearly_xp + $3::INT,
+        lifetime_xp = rank_users.lifetime_xp + $3::BIGINT,
+        last_active_date = $4,
+        updated_at = $5,
+        last_message_xp_at = COALESCE($7, rank_users.last_message_xp_at),
+        last_omikuji_xp_date = COALESCE($8, rank_users.last_omikuji_xp_date),
+        active_days = CASE
+            WHEN $9::BOOLEAN AND (rank_users.last_active_date IS NULL OR rank_users.last_active_date < $4)
+                THEN rank_users.active_days + 1
+            ELSE rank_users.active_days
+        END,
+        current_streak = CASE
+            WHEN $9::BOOLEAN AND (rank_users.last_active_date IS NULL OR rank_users.last_active_date < $4) THEN
+                CASE
+                    WHEN rank_users.last_active_date = $6 THEN rank_users.current_streak + 1
+                    ELSE 1
+                END
+            ELSE rank_users.current_streak
+        END
+    RETURNING *
+""")
+
+GET_USER = statements.register(
+    "checkpoint", "rank.get_user", "SELECT * FROM rank_users WHERE user_id = $1 AND guild_id = $2"
+)
+
+UPDATE_LEVEL = statements.register("checkpoint", "rank.update_level", """
+    UPDATE rank_users SET current_level = $3, updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = $1 AND guild_id = $2
+""")
+
 
 @dataclass
 class RankUser:
@@ -128,10 +170,9 @@ class RankDB:
         if not checkpoint_db._initialized:
             return None
 
-        query = "SELECT * FROM rank_users WHERE user_id = $1 AND guild_id = $2"
         try:
             async with checkpoint_db.pool.acquire() as conn:
-                row = await conn.fetchrow(query, user_id, guild_id)
+                row = await GET_USER.fetchrow(conn, user_id, guild_id)
 
             if not row:
                 return None
@@ -178,64 +219,14 @@ class RankDB:
         today = date.today()
         yesterday = today - timedelta(days=1)
 
-        # XPタイプに応じたカラム更新
-        extra_set = ""
-        if xp_type == "message":
-            extra_set = ", last_message_xp_at = $5"
-        elif xp_type == "omikuji":
-            extra_set = ", last_omikuji_xp_date = $6"
-
-        # アクティブ日数・ストリーク更新を含めるか
-        if update_active:
-            # INSERT時: active_days=1, current_streak=1
-            # UPDATE時: last_active_dateが今日より前なら更新
-            active_insert = ", active_days, current_streak"
-            active_values = ", 1, 1"
-            active_update = """,
-                active_days = CASE
-                    WHEN rank_users.last_active_date IS NULL OR rank_users.last_active_date < $4 THEN rank_users.active_days + 1
-                    ELSE rank_users.active_days
-                END,
-                current_streak = CASE
-                    WHEN rank_users.last_active_date IS NULL OR rank_users.last_active_date < $4 THEN
-                        CASE
-                            WHEN rank_users.last_active_date = $6 THEN rank_users.current_streak + 1
-                            ELSE 1
-                        END
-                    ELSE rank_users.current_streak
-                END"""
-        else:
-            active_insert = ""
-            active_values = ""
-            active_update = ""
-
-        query = f"""
-            INSERT INTO rank_users (user_id, guild_id, yearly_xp, lifetime_xp, last_active_date, updated_at
-                {', last_message_xp_at' if xp_type == 'message' else ''}
-                {', last_omikuji_xp_date' if xp_type == 'omikuji' else ''}
-                {active_insert})
-            VALUES ($1, $2, $3::INT, $3::BIGINT, $4, $5
-                {', $5' if xp_type == 'message' else ''}
-                {', $6' if xp_type == 'omikuji' else ''}
-                {active_values})
-            ON CONFLICT (user_id, guild_id) DO UPDATE
-            SET yearly_xp = rank_users.yearly_xp + $3::INT,
-                lifetime_xp = rank_users.lifetime_xp + $3::BIGINT,
-                last_active_date = $4,
-                updated_at = $5
-                {extra_set}
-                {active_update}
-            RETURNING *
-        """
-
         try:
             async with checkpoint_db.pool.acquire() as conn:
-                if xp_type == "message":
-                    row = await conn.fetchrow(query, user_id, guild_id, xp, today, now, yesterday)
-                elif xp_type == "omikuji":
-                    row = await conn.fetchrow(query, user_id, guild_id, xp, today, now, today if not update_active else yesterday)
-                else:
-                    row = await conn.fetchrow(query, user_id, guild_id, xp, today, now, yesterday)
+                row = await ADD_XP.fetchrow(
+                    conn, user_id, guild_id, xp, today, now, yesterday,
+                    now if xp_type == "message" else None,
+                    today if xp_type == "omikuji" else None,
+                    update_active,
+                )
 
             if row:
                 # レベル再計算
@@ -260,13 +251,9 @@ class RankDB:
 
     async def _update_level(self, user_id: int, guild_id: int, level: int):
         """レベルを更新"""
-        query = """
-            UPDATE rank_users SET current_level = $3, updated_at = CURRENT_TIMESTAMP
-            WHERE user_id = $1 AND guild_id = $2
-        """
         try:
             async with checkpoint_db.pool.acquire() as conn:
-                await conn.execute(query, user_id, guild_id, level)
+                await UPDATE_LEVEL.execute(conn, user_id, guild_id, level)
         except Exception as e:
             logger.error(f"レベル更新エラー: {e}")
 
@@ -12,27 +12,6 @@ class ReportSettingsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    async def setup_database(self):
-        async with db.pool.acquire() as conn:
-            # 通報チャンネルのテーブル
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS report_channels (
-                    id SERIAL PRIMARY KEY,
-                    guild_id BIGINT NOT NULL UNIQUE,
-                    channel_id BIGINT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            # モデレーターロールのテーブル
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS moderator_roles (
-                    id SERIAL PRIMARY KEY,
-                    guild_id BIGINT NOT NULL UNIQUE,
-                    role_id BIGINT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
     @app_commands.command(name="set_report_channel", description="通報チャンネルを設定します")
     @is_guild_app()
     @is_owner_app()
@@ -92,6 +71,4 @@ class ReportSettingsCog(commands.Cog):
             return record['role_id'] if record else None
 
 async def setup(bot):
-    cog = ReportSettingsCog(bot)
-    await cog.setup_database()
-    await bot.add_cog(cog)
+    await bot.add_cog(ReportSettingsCog(bot))
@@ -27,27 +27,12 @@ class LiveNotificationManager:
 
     async def initialize(self) -> None:
         """
-        DB初期化とキャッシュ読み込み
+        DBからキャッシュを読み込み
         """
         if self._initialized:
             return
 
         try:
-            # テーブル作成
-            await execute_query(
-                """
-                CREATE TABLE IF NOT EXISTS live_notifications (
-                    video_id TEXT PRIMARY KEY,
-                    branch TEXT NOT NULL,
-                    message_id BIGINT NOT NULL,
-                    webhook_id BIGINT NOT NULL,
-                    webhook_token TEXT NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT NOW()
-                )
-                """,
-                fetch_type='status'
-            )
-
             # DBからキャッシュを読み込み
             rows = await execute_query(
                 "SELECT video_id, branch, message_id, webhook_id, webhook_token FROM live_notifications"
@@ -10,6 +10,7 @@ from discord.ext import commands
 
 from utils.commands_help import is_owner, log_commands
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 logger = setup_logging("D")
 
@@ -76,11 +77,16 @@ class Announcement(commands.Cog):
         self._announcement_views = {}
         self._thread_views: dict[int, ThreadActionView] = {}
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
-            return
+    async def cog_load(self):
+        message_pipeline.attach(self.bot)
+        message_pipeline.register("announcement_thread", self.handle_thread_message)
+
+    async def cog_unload(self):
+        message_pipeline.unregister("announcement_thread")
 
+    async def handle_thread_message(self, ctx: MessageContext):
+        # Bot・DMはパイプライン側で除外済み
+        message = ctx.message
         thread = message.channel
         view = self._thread_views.get(thread.id) if isinstance(thread, discord.Thread) else None
 
@@ -5,6 +5,7 @@ from discord.ext import commands
 from utils.commands_help import is_guild_app, is_owner_app, log_commands
 from utils.db_manager import db
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 logger = setup_logging()
 
@@ -12,17 +13,12 @@ class AutoReactionCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    async def setup_database(self):
-        async with db.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS auto_reactions (
-                    id SERIAL PRIMARY KEY,
-                    guild_id BIGINT NOT NULL,
-                    trigger_word TEXT NOT NULL,
-                    reaction TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+    async def cog_load(self):
+        message_pipeline.attach(self.bot)
+        message_pipeline.register("auto_reaction", self.add_reactions)
+
+    async def cog_unload(self):
+        message_pipeline.unregister("auto_reaction")
 
     @app_commands.command(name="リアクション設定", description="自動リアクションの設定を行います")
     @is_guild_app()
@@ -95,19 +91,13 @@ class AutoReactionCog(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
-            return
-
-        # DMは無視
-        if not message.guild:
-            return
-
+    async def add_reactions(self, ctx: MessageContext):
+        # Bot・DMはパイプライン側で除外済み
+        message = ctx.message
         async with db.pool.acquire() as conn:
             reactions = await conn.fetch(
                 "SELECT reaction FROM auto_reactions WHERE guild_id = $1 AND $2 LIKE '%' || trigger_word || '%'",
-                message.guild.id, message.content
+                ctx.guild_id, ctx.content
             )
 
         for reaction, in reactions:
@@ -117,6 +107,4 @@ class AutoReactionCog(commands.Cog):
                 continue
 
 async def setup(bot):
-    cog = AutoReactionCog(bot)
-    await cog.setup_database()
-    await bot.add_cog(cog)
+    await bot.add_cog(AutoReactionCog(bot))
@@ -9,6 +9,7 @@ from config.setting import get_settings
 from utils.commands_help import is_guild, is_owner, log_commands
 from utils.db_manager import db
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 logger = setup_logging()
 settings = get_settings()
@@ -76,6 +77,15 @@ class BumpNoticeCog(commands.Cog):
         self.last_bump_sent_at = None
         self.channel = None
 
+    async def cog_load(self):
+        """Cog読み込み時にメッセージパイプラインへ登録（DISBOARDのBotのメッセージを受け取る）"""
+        message_pipeline.attach(self.bot)
+        message_pipeline.register("bump_notice", self.detect_bump, include_bots=True)
+
+    async def cog_unload(self):
+        """Cogアンロード時に登録を解除"""
+        message_pipeline.unregister("bump_notice")
+
     @commands.hybrid_group(name="bumpnotice", description="bump通知設定コマンド（管理者専用）")
     @is_owner()
     @log_commands()
@@ -153,17 +163,14 @@ class BumpNoticeCog(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if not message.guild:
-            return
-
-        # DISBOARD BOTからのメッセージかどうかをチェック
-        if message.author.id != DISBOARD_BOT_ID:
+    async def detect_bump(self, ctx: MessageContext):
+        # DISBOARD BOTからのメッセージかどうかをチェック（DMはパイプライン側で除外済み）
+        if ctx.author_id != DISBOARD_BOT_ID:
             return
+        message = ctx.message
 
         # bump通知設定を確認
-        settings = await db.get_bump_notice_settings(message.guild.id)
+        settings = await db.get_bump_notice_settings(ctx.guild_id)
         if not settings or not settings.get('channel_id'):
             return
 
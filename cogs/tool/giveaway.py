@@ -1,7 +1,7 @@
-import asyncio
+import operator
 import random
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Optional, Union
 
 import discord
 from discord import app_commands
@@ -10,44 +10,67 @@ from discord.ext import commands
 from utils.commands_help import is_guild_app, is_owner_app, log_commands
 from utils.db_manager import db
 from utils.logging import setup_logging
+from utils.scheduler import JobKind, JobNotReady, scheduler
 
 logger = setup_logging()
 
+# スケジューラのジョブ種別名
+GIVEAWAY_JOB = "giveaway"
+
 class GiveawayCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.active_giveaways = {}
 
-    async def setup_database(self):
+    async def cog_load(self):
+        """終了時刻をスケジューラに登録（再起動中に終了時刻を過ぎたものもすぐ終了する）"""
+        scheduler.attach(self.bot)
+        await scheduler.register(JobKind(
+            name=GIVEAWAY_JOB,
+            load=self._load_end_times,
+            fetch=self._fetch_due_giveaways,
+            run=self.end_giveaway,
+            complete=self._mark_ended,
+            key_of=operator.itemgetter("message_id"),
+            notify_channel="scheduler_giveaway",
+        ))
+
+    async def cog_unload(self):
+        await scheduler.unregister(GIVEAWAY_JOB)
+
+    async def _load_end_times(self, message_ids: Optional[list[int]]) -> list[tuple[int, datetime]]:
         async with db.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS giveaways (
-                    id SERIAL PRIMARY KEY,
-                    guild_id BIGINT NOT NULL,
-                    channel_id BIGINT NOT NULL,
-                    message_id BIGINT NOT NULL,
-                    creator_id BIGINT NOT NULL,
-                    prize TEXT NOT NULL,
-                    end_time TIMESTAMP NOT NULL,
-                    ended BOOLEAN DEFAULT FALSE,
-                    winner_id BIGINT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            rows = await conn.fetch(
+                """
+                SELECT message_id, end_time FROM giveaways
+                WHERE ended = FALSE AND ($1::bigint[] IS NULL OR message_id = ANY($1::bigint[]))
+                """,
+                message_ids
+            )
+        return [(row['message_id'], row['end_time']) for row in rows]
 
-    async def load_active_giveaways(self):
-        await self.bot.wait_until_ready()
+    async def _fetch_due_giveaways(self, message_ids: list[int]):
         async with db.pool.acquire() as conn:
-            active = await conn.fetch(
-                "SELECT channel_id, message_id, end_time FROM giveaways WHERE ended = FALSE"
+            return await conn.fetch(
+                """
+                SELECT channel_id, message_id FROM giveaways
+                WHERE ended = FALSE AND message_id = ANY($1::bigint[]) AND end_time <= $2
+                """,
+                message_ids,
+                datetime.now()
             )
 
-        for channel_id, message_id, end_time in active:
-            # end_timeはすでにdatetimeオブジェクトとして返される
-            if end_time > datetime.now():
-                self.active_giveaways[message_id] = asyncio.create_task(
-                    self.end_giveaway_task(channel_id, message_id, end_time)
-                )
+    async def _mark_ended(self, done: list):
+        """終了したギブアウェイの当選者をまとめて保存"""
+        async with db.pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE giveaways AS g
+                SET ended = TRUE, winner_id = v.winner_id
+                FROM unnest($1::bigint[], $2::bigint[]) AS v(message_id, winner_id)
+                WHERE g.message_id = v.message_id
+            """,
+                [row['message_id'] for row, _ in done],
+                [winner_id for _, winner_id in done]
+            )
 
     def convert_duration(self, duration: str) -> int:
         try:
@@ -125,23 +148,22 @@ class GiveawayCog(commands.Cog):
                 end_time
             )
 
-        self.active_giveaways[message.id] = asyncio.create_task(
-            self.end_giveaway_task(channel.id, message.id, end_time)
-        )
-
-    async def end_giveaway_task(self, channel_id: int, message_id: int, end_time: datetime):
-        await discord.utils.sleep_until(end_time)
+        scheduler.schedule(GIVEAWAY_JOB, message.id, end_time)
 
-        channel = self.bot.get_channel(channel_id)
+    async def end_giveaway(self, giveaway) -> Optional[int]:
+        """ギブアウェイを締め切って当選者IDを返す（保存はスケジューラがまとめて行う）"""
+        message_id = giveaway['message_id']
+        channel = self.bot.get_channel(giveaway['channel_id'])
         if not channel:
-            return
+            # 締め切らずに残し、スケジューラの再試行に任せる
+            raise JobNotReady(f"チャンネル {giveaway['channel_id']} が見つかりません")
 
         try:
             message = await channel.fetch_message(message_id)
             reaction = discord.utils.get(message.reactions, emoji="🎉")
 
             if not reaction:
-                return
+                return None
 
             users = [user async for user in reaction.users() if not user.bot]
 
@@ -160,17 +182,10 @@ class GiveawayCog(commands.Cog):
             if winner:
                 await channel.send(f"🎉 おめでとうございます！ {winner.mention} が当選しました！")
 
-            async with db.pool.acquire() as conn:
-                await conn.execute("""
-                    UPDATE giveaways
-                    SET ended = TRUE, winner_id = $1
-                    WHERE message_id = $2
-                """, winner.id if winner else None, message_id)
+            return winner.id if winner else None
 
         except discord.NotFound:
-            pass
-        finally:
-            self.active_giveaways.pop(message_id, None)
+            return None
 
     @app_commands.command(name="reroll", description="ギブアウェイの当選者を再抽選します")
     @is_guild_app()
@@ -255,6 +270,3 @@ class GiveawayCog(commands.Cog):
 async def setup(bot):
     cog = GiveawayCog(bot)
     await bot.add_cog(cog)
-    # データベース初期化とアクティブなギブアウェイのロードを非同期タスクとして実行
-    bot.loop.create_task(cog.setup_database())
-    bot.loop.create_task(cog.load_active_giveaways())
@@ -24,6 +24,7 @@ from discord.ext import commands, tasks
 from config.setting import get_settings
 from utils.db_manager import db
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 # 未使用だが将来使用予定
 # from utils.commands_help import is_guild, is_owner, log_commands
@@ -92,6 +93,9 @@ https://discord.com/channels/{guild_id}/{channel_id}"""
             self.db_manager = db
             logger.info("NewcomerFollowup: データベース接続完了")
 
+            message_pipeline.attach(self.bot)
+            message_pipeline.register("newcomer_followup", self.mark_as_spoken)
+
             # 定期タスクを開始
             if not self.check_pending_followups.is_running():
                 self.check_pending_followups.start()
@@ -101,6 +105,7 @@ https://discord.com/channels/{guild_id}/{channel_id}"""
 
     def cog_unload(self):
         """Cogアンロード時の処理"""
+        message_pipeline.unregister("newcomer_followup")
         if self.check_pending_followups.is_running():
             self.check_pending_followups.cancel()
             logger.info("NewcomerFollowup: 定期チェックタスク停止")
@@ -424,19 +429,10 @@ https://discord.com/channels/{guild_id}/{channel_id}"""
 
         await self._record_new_member(member)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """メッセージ検知時の処理"""
-        # Botのメッセージは無視
-        if message.author.bot:
-            return
-
-        # DMは無視
-        if not message.guild:
-            return
-
+    async def mark_as_spoken(self, ctx: MessageContext):
+        """メッセージ検知時の処理（Bot・DMはパイプライン側で除外済み）"""
         # 発言を記録
-        await self._mark_as_spoken(message.guild.id, message.author.id)
+        await self._mark_as_spoken(ctx.guild_id, ctx.author_id)
 
     # === 管理コマンド ===
 
@@ -13,6 +13,7 @@ from config.setting import get_settings
 from utils.commands_help import is_booster, is_guild, is_owner, log_commands
 from utils.database import execute_query
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 settings = get_settings()
 
@@ -42,6 +43,16 @@ class HololiveOmikujiCog(commands.Cog):
             "わためベージュ": 0xF5F5DC
         }
 
+    async def cog_load(self):
+        """Cog読み込み時にメッセージパイプラインへ登録"""
+        message_pipeline.attach(self.bot)
+        # 演出は15秒を超えることがあり、途中で打ち切るとストリークだけ更新された状態になる
+        message_pipeline.register("omikuji", self.handle_keyword, include_dms=True, timeout=None)
+
+    async def cog_unload(self):
+        """Cogアンロード時に登録を解除"""
+        message_pipeline.unregister("omikuji")
+
     async def get_user_last_omikuji(self, user_id: int, guild_id: int) -> Optional[str]:
         """ユーザーの最後のおみくじ日付を取得"""
         try:
@@ -662,25 +673,21 @@ class HololiveOmikujiCog(commands.Cog):
             logger.error(f"運勢一覧取得エラー: {e}")
             await ctx.send("申し訳ございません。運勢一覧の取得中にエラーが発生しました。")
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot == self.bot.user:
+    async def handle_keyword(self, ctx: MessageContext):
+        """「ギズみくじ」「運勢」の投稿でコマンドを実行（Botはパイプライン側で除外済み）"""
+        if ctx.content == "ギズみくじ":
+            command = self.omikuji
+        elif ctx.content == "運勢":
+            command = self.fortune
+        else:
             return
-        if message.content == "ギズみくじ":
-            if message.guild is None:
-                await message.channel.send("このコマンドはサーバーでのみ利用できます。")
-                return
-            if message.channel.id in OMIKUJI_CHANNEL_IDS:
-                ctx = await self.bot.get_context(message)
-                await self.omikuji(ctx)
 
-        if message.content == "運勢":
-            if message.guild is None:
-                await message.channel.send("このコマンドはサーバーでのみ利用できます。")
-                return
-            if message.channel.id in OMIKUJI_CHANNEL_IDS:
-                ctx = await self.bot.get_context(message)
-                await self.fortune(ctx)
+        if ctx.is_dm:
+            await ctx.message.channel.send("このコマンドはサーバーでのみ利用できます。")
+            return
+        if ctx.channel_id in OMIKUJI_CHANNEL_IDS:
+            command_ctx = await self.bot.get_context(ctx.message)
+            await command(command_ctx)
 
 async def setup(bot):
     await bot.add_cog(HololiveOmikujiCog(bot))
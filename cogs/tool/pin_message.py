@@ -1,4 +1,6 @@
-from datetime import datetime
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Optional
 
 import discord
@@ -8,156 +10,252 @@ from discord.ui import Container, LayoutView, Modal, TextDisplay, View
 
 from utils.commands_help import is_guild_app, is_owner_app, log_commands
 from utils.db_manager import db
+from utils.deadlines import DeadlineHeap
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 
 logger = setup_logging()
 
+# メッセージカウンターをDBへまとめて書き出す間隔（秒）
+COUNTER_FLUSH_SECONDS = 15
+
+# 時間トリガーの投稿に失敗した時の再試行までの時間（秒）
+STICKY_RETRY_SECONDS = 30
+
+STICKY_COLUMNS = """
+    guild_id, channel_id, message_content, trigger_type, time_interval, message_interval,
+    is_enabled, last_message_count, last_sticky_time, last_sticky_message_id
+"""
+
+
+@dataclass
+class StickyState:
+    """チャンネル1つ分の固定メッセージの設定と状態"""
+
+    guild_id: int
+    channel_id: int
+    content: str
+    trigger_type: str = "time"
+    time_interval: int = 300
+    message_interval: int = 10
+    message_count: int = 0
+    last_sticky_time: Optional[datetime] = None
+    last_message_id: Optional[int] = None
+    posting: bool = False
+
+    @classmethod
+    def from_row(cls, row) -> "StickyState":
+        return cls(
+            guild_id=row['guild_id'],
+            channel_id=row['channel_id'],
+            content=row['message_content'],
+            trigger_type=row['trigger_type'] or "time",
+            time_interval=row['time_interval'] or 300,
+            message_interval=row['message_interval'] or 10,
+            message_count=row['last_message_count'] or 0,
+            last_sticky_time=row['last_sticky_time'],
+            last_message_id=row['last_sticky_message_id'],
+        )
+
+    @property
+    def deadline(self) -> Optional[datetime]:
+        """時間トリガーの次の投稿時刻（初回はメッセージが来た時に投稿する）"""
+        if self.trigger_type != "time" or self.last_sticky_time is None:
+            return None
+        return self.last_sticky_time + timedelta(seconds=self.time_interval)
+
+    def on_message(self, now: datetime) -> bool:
+        """メッセージを1件数えて、今投稿すべきかを返す"""
+        self.message_count += 1
+        if self.posting:
+            return False
+        if self.trigger_type == "count":
+            return self.message_count >= self.message_interval
+        return self.last_sticky_time is None or now >= self.deadline
+
+    def on_posted(self, now: datetime, message_id: int):
+        """投稿後の状態（カウンターをリセットして次の期限へ）"""
+        self.message_count = 0
+        self.last_sticky_time = now
+        self.last_message_id = message_id
+
+
 class ChannelStickyMessageCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.message_counters = {}  # {channel_id: count}
-        self.last_sticky_times = {}  # {channel_id: datetime}
-        self.last_sticky_messages = {}  # {channel_id: message_id}
+        self.stickies: dict[int, StickyState] = {}  # 有効な設定のみ {channel_id: state}
+        self.deadlines = DeadlineHeap()
+        self._dirty_counters: set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._scheduler_task: Optional[asyncio.Task] = None
 
     async def cog_load(self):
         """Cogが読み込まれた時の初期化処理"""
-        await self.setup_database()
-        self.sticky_message_checker.start()
+        await self.restore_state_from_database()
+        self.flush_counters.start()
+        self._scheduler_task = asyncio.create_task(self._run_deadlines())
+        message_pipeline.attach(self.bot)
+        message_pipeline.register("sticky_message", self.count_message)
 
     async def cog_unload(self):
         """Cogがアンロードされる時の処理"""
-        self.sticky_message_checker.cancel()
-
-    async def setup_database(self):
-        """データベーステーブルの作成"""
-        async with db.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS sticky_messages (
-                    id SERIAL PRIMARY KEY,
-                    guild_id BIGINT NOT NULL,
-                    channel_id BIGINT NOT NULL,
-                    message_content TEXT NOT NULL,
-                    trigger_type VARCHAR(20) DEFAULT 'time',
-                    time_interval INTEGER DEFAULT 300,
-                    message_interval INTEGER DEFAULT 10,
-                    is_enabled BOOLEAN DEFAULT TRUE,
-                    last_message_count INTEGER DEFAULT 0,
-                    last_sticky_time TIMESTAMP,
-                    last_sticky_message_id BIGINT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(guild_id, channel_id)
-                )
-            """)
+        message_pipeline.unregister("sticky_message")
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+        self.flush_counters.cancel()
+        await self.write_dirty_counters()
 
-            # 既存のテーブルにtrigger_typeカラムを追加
-            try:
-                await conn.execute("ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS trigger_type VARCHAR(20) DEFAULT 'time'")
-                await conn.execute("ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS last_message_count INTEGER DEFAULT 0")
-                await conn.execute("ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS last_sticky_time TIMESTAMP")
-                await conn.execute("ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS last_sticky_message_id BIGINT")
-            except Exception as e:
-                logger.info(f"カラム追加をスキップ（既に存在）: {e}")
-
-        await self.restore_state_from_database()
+    # ==================== 状態 ====================
 
     async def restore_state_from_database(self):
         """データベースから状態を復元"""
         async with db.pool.acquire() as conn:
-            configs = await conn.fetch("""
-                SELECT channel_id, last_message_count, last_sticky_time, last_sticky_message_id
+            rows = await conn.fetch(f"""
+                SELECT {STICKY_COLUMNS}
                 FROM sticky_messages
                 WHERE is_enabled = TRUE
             """)
 
-        for config in configs:
-            channel_id = config['channel_id']
+        for row in rows:
+            self.apply_config(row)
 
-            # メッセージカウンターを復元
-            if config['last_message_count'] is not None:
-                self.message_counters[channel_id] = config['last_message_count']
+        logger.info(f"状態を復元しました: {len(rows)}チャンネル")
 
-            # 最後の投稿時間を復元
-            if config['last_sticky_time']:
-                self.last_sticky_times[channel_id] = config['last_sticky_time']
-
-            # 最後のメッセージIDを復元
-            if config['last_sticky_message_id']:
-                self.last_sticky_messages[channel_id] = config['last_sticky_message_id']
-
-        logger.info(f"状態を復元しました: {len(configs)}チャンネル")
-
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """メッセージが投稿された時の処理"""
-        if message.author.bot:
+    def apply_config(self, row):
+        """DBの行をメモリ上の状態に反映（無効化された設定は取り除く）"""
+        if not row['is_enabled']:
+            self.remove_sticky(row['channel_id'])
             return
+        state = StickyState.from_row(row)
+        current = self.stickies.get(state.channel_id)
+        if current is not None:
+            # 未保存のカウンターと投稿中フラグは引き継ぐ
+            state.message_count = current.message_count
+            state.posting = current.posting
+        self.stickies[state.channel_id] = state
+        self._schedule(state)
+
+    def remove_sticky(self, channel_id: int) -> Optional[StickyState]:
+        self.deadlines.discard(channel_id)
+        self._dirty_counters.discard(channel_id)
+        return self.stickies.pop(channel_id, None)
+
+    def _schedule(self, state: StickyState):
+        self.deadlines.push(state.channel_id, state.deadline)
+        self._wakeup.set()
+
+    async def upsert_config(self, guild_id, channel_id, content, trigger_type, time_interval, message_interval):
+        """設定を保存して有効にし、メモリ上の状態にも反映"""
+        async with db.pool.acquire() as conn:
+            row = await conn.fetchrow(f"""
+                INSERT INTO sticky_messages
+                (guild_id, channel_id, message_content, trigger_type, time_interval, message_interval, updated_at)
+                VALUES ($1, $2, $3, $4, $5, $6, CURRENT_TIMESTAMP)
+                ON CONFLICT (guild_id, channel_id)
+                DO UPDATE SET
+                    message_content = EXCLUDED.message_content,
+                    trigger_type = EXCLUDED.trigger_type,
+                    time_interval = EXCLUDED.time_interval,
+                    message_interval = EXCLUDED.message_interval,
+                    is_enabled = TRUE,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING {STICKY_COLUMNS}
+            """, guild_id, channel_id, content, trigger_type, time_interval, message_interval)
+        self.apply_config(row)
 
-        if not message.guild:
+    async def set_enabled(self, guild_id, channel_id, enabled: bool) -> bool:
+        """有効/無効を切り替え（設定がなければFalse）"""
+        async with db.pool.acquire() as conn:
+            row = await conn.fetchrow(f"""
+                UPDATE sticky_messages
+                SET is_enabled = $1, updated_at = CURRENT_TIMESTAMP
+                WHERE guild_id = $2 AND channel_id = $3
+                RETURNING {STICKY_COLUMNS}
+            """, enabled, guild_id, channel_id)
+        if row is None:
+            return False
+        self.apply_config(row)
+        return True
+
+    # ==================== メッセージ数トリガー ====================
+
+    async def count_message(self, ctx: MessageContext):
+        """メッセージが投稿された時の処理（固定メッセージのないチャンネルは辞書を引くだけ）"""
+        state = self.stickies.get(ctx.channel_id)
+        if state is None:
             return
 
-        channel_id = message.channel.id
-
-        # メッセージカウンターを更新
-        if channel_id not in self.message_counters:
-            self.message_counters[channel_id] = 0
-        self.message_counters[channel_id] += 1
-
-        # データベースにカウンターを保存
-        await self.update_message_count_in_db(message.guild.id, channel_id, self.message_counters[channel_id])
+        should_post = state.on_message(datetime.now())
+        self._dirty_counters.add(state.channel_id)
+        if should_post:
+            await self.post_sticky_message(ctx.message.channel, state.content)
 
-        # 固定メッセージの投稿条件をチェック
-        await self.check_and_post_sticky_message(message.channel)
+    @tasks.loop(seconds=COUNTER_FLUSH_SECONDS)
+    async def flush_counters(self):
+        """メッセージカウンターをまとめてDBへ書き出す"""
+        await self.write_dirty_counters()
 
-    async def update_message_count_in_db(self, guild_id, channel_id, count):
-        """メッセージカウンターをデータベースに保存"""
+    async def write_dirty_counters(self):
+        dirty = [self.stickies[cid] for cid in self._dirty_counters if cid in self.stickies]
+        self._dirty_counters.clear()
+        if not dirty:
+            return
         try:
             async with db.pool.acquire() as conn:
                 await conn.execute("""
-                    UPDATE sticky_messages
-                    SET last_message_count = $1, updated_at = CURRENT_TIMESTAMP
-                    WHERE guild_id = $2 AND channel_id = $3
-                """, count, guild_id, channel_id)
+                    UPDATE sticky_messages AS s
+                    SET last_message_count = v.message_count, updated_at = CURRENT_TIMESTAMP
+                    FROM unnest($1::bigint[], $2::bigint[], $3::int[]) AS v(guild_id, channel_id, message_count)
+                    WHERE s.guild_id = v.guild_id AND s.channel_id = v.channel_id
+                """,
+                    [state.guild_id for state in dirty],
+                    [state.channel_id for state in dirty],
+                    [state.message_count for state in dirty],
+                )
         except Exception as e:
+            # 次回のフラッシュで再試行
+            self._dirty_counters.update(state.channel_id for state in dirty)
             logger.warning(f"メッセージカウンターの保存に失敗: {e}")
 
-    async def check_and_post_sticky_message(self, channel):
-        """固定メッセージの投稿条件をチェックして投稿"""
-        async with db.pool.acquire() as conn:
-            config = await conn.fetchrow("""
-                SELECT message_content, trigger_type, time_interval, message_interval, is_enabled
-                FROM sticky_messages
-                WHERE guild_id = $1 AND channel_id = $2 AND is_enabled = TRUE
-            """, channel.guild.id, channel.id)
-
-        if not config:
-            return
-
-        channel_id = channel.id
-        current_time = datetime.now()
-        message_count = self.message_counters.get(channel_id, 0)
-        last_sticky_time = self.last_sticky_times.get(channel_id)
-
-        # 条件チェック
-        should_post = False
-
-        # メッセージ数条件
-        if config['trigger_type'] == 'count' and message_count >= config['message_interval']:
-            should_post = True
+    # ==================== 時間トリガー ====================
 
-        # 時間条件
-        if config['trigger_type'] == 'time' and last_sticky_time:
-            time_diff = current_time - last_sticky_time
-            if time_diff.total_seconds() >= config['time_interval']:
-                should_post = True
-        elif config['trigger_type'] == 'time' and not last_sticky_time:
-            should_post = True  # 初回投稿
+    async def _run_deadlines(self):
+        """期限のヒープの先頭まで眠り、期限が来たチャンネルに投稿する"""
+        await self.bot.wait_until_ready()
+        while True:
+            self._wakeup.clear()
+            for channel_id in self.deadlines.pop_due(datetime.now()):
+                state = self.stickies.get(channel_id)
+                if state is None:
+                    continue
+                channel = self.bot.get_channel(channel_id)
+                if channel is not None:
+                    try:
+                        await self.post_sticky_message(channel, state.content)
+                    except Exception as e:
+                        logger.error(f"固定メッセージの定期投稿でエラーが発生しました: {e}")
+
+                # 投稿できなかった（チャンネルが見つからない・投稿に失敗した）場合は次の期限が
+                # 登録されないので、少し後に再試行する
+                if channel_id not in self.deadlines and self.stickies.get(channel_id) is state and state.deadline is not None:
+                    self.deadlines.push(channel_id, datetime.now() + timedelta(seconds=STICKY_RETRY_SECONDS))
+
+            next_due = self.deadlines.next_due()
+            timeout = None if next_due is None else max(0.0, (next_due - datetime.now()).total_seconds())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
 
-        if should_post:
-            await self.post_sticky_message(channel, config['message_content'])
+    # ==================== 投稿 ====================
 
     async def post_sticky_message(self, channel, content):
         """固定メッセージを投稿"""
+        state = self.stickies.get(channel.id)
+        if state is not None:
+            if state.posting:
+                return
+            state.posting = True
         try:
             # 古い固定メッセージを削除
             await self.delete_old_sticky_message(channel)
@@ -166,19 +264,22 @@ class ChannelStickyMessageCog(commands.Cog):
             message = await channel.send(content)
 
             # 記録を更新
-            channel_id = channel.id
             current_time = datetime.now()
-            self.last_sticky_times[channel_id] = current_time
-            self.last_sticky_messages[channel_id] = message.id
-            self.message_counters[channel_id] = 0  # カウンターリセット
+            if state is not None:
+                state.on_posted(current_time, message.id)
+                self._dirty_counters.discard(channel.id)
+                self._schedule(state)
 
             # データベースに状態を保存
-            await self.save_sticky_state_to_db(channel.guild.id, channel_id, current_time, message.id)
+            await self.save_sticky_state_to_db(channel.guild.id, channel.id, current_time, message.id)
 
             logger.info(f"固定メッセージを投稿しました: {channel.guild.name}#{channel.name}")
 
         except discord.HTTPException as e:
             logger.error(f"固定メッセージの投稿に失敗しました: {e}")
+        finally:
+            if state is not None:
+                state.posting = False
 
     async def save_sticky_state_to_db(self, guild_id, channel_id, sticky_time, message_id):
         """固定メッセージの状態をデータベースに保存"""
@@ -195,52 +296,20 @@ class ChannelStickyMessageCog(commands.Cog):
         except Exception as e:
             logger.error(f"固定メッセージ状態の保存に失敗: {e}")
 
-    async def delete_old_sticky_message(self, channel):
+    async def delete_old_sticky_message(self, channel, message_id: Optional[int] = None):
         """古い固定メッセージを削除"""
-        channel_id = channel.id
-        old_message_id = self.last_sticky_messages.get(channel_id)
+        state = self.stickies.get(channel.id)
+        old_message_id = message_id or (state.last_message_id if state else None)
 
         if old_message_id:
             try:
-                old_message = await channel.fetch_message(old_message_id)
-                await old_message.delete()
+                await channel.get_partial_message(old_message_id).delete()
                 logger.info(f"古い固定メッセージを削除しました: {channel.guild.name}#{channel.name}")
             except discord.NotFound:
                 pass  # メッセージが既に削除されている
             except discord.HTTPException as e:
                 logger.warning(f"古い固定メッセージの削除に失敗しました: {e}")
 
-    @tasks.loop(seconds=30)
-    async def sticky_message_checker(self):
-        """定期的に時間ベースの条件をチェック"""
-        try:
-            async with db.pool.acquire() as conn:
-                configs = await conn.fetch("""
-                    SELECT guild_id, channel_id, message_content, trigger_type, time_interval
-                    FROM sticky_messages
-                    WHERE is_enabled = TRUE
-                """)
-
-            for config in configs:
-                guild = self.bot.get_guild(config['guild_id'])
-                if not guild:
-                    continue
-
-                channel = guild.get_channel(config['channel_id'])
-                if not channel:
-                    continue
-
-                channel_id = channel.id
-                last_sticky_time = self.last_sticky_times.get(channel_id)
-
-                if config['trigger_type'] == 'time' and last_sticky_time:
-                    time_diff = datetime.now() - last_sticky_time
-                    if time_diff.total_seconds() >= config['time_interval']:
-                        await self.post_sticky_message(channel, config['message_content'])
-
-        except Exception as e:
-            logger.error(f"固定メッセージチェッカーでエラーが発生しました: {e}")
-
     class StickyConfigPanel(LayoutView):
         """Components v2を使用した固定メッセージ設定パネル"""
 
@@ -267,13 +336,11 @@ class ChannelStickyMessageCog(commands.Cog):
                 config_text = "📌 固定メッセージ設定\n❌ 設定されていません"
 
             # 現在の状況表示
-            channel_id = channel.id
-            current_count = self.cog.message_counters.get(channel_id, 0)
-            last_time = self.cog.last_sticky_times.get(channel_id)
+            state = self.cog.stickies.get(channel.id)
 
-            if last_time:
-                time_since = datetime.now() - last_time
-                status_info = f"📊 現在の状況\n前回投稿から: {int(time_since.total_seconds())}秒経過\n投稿後メッセージ数: {current_count}"
+            if state and state.last_sticky_time:
+                time_since = datetime.now() - state.last_sticky_time
+                status_info = f"📊 現在の状況\n前回投稿から: {int(time_since.total_seconds())}秒経過\n投稿後メッセージ数: {state.message_count}"
             else:
                 status_info = "📊 現在の状況\nまだ投稿されていません"
 
@@ -312,12 +379,7 @@ class ChannelStickyMessageCog(commands.Cog):
                 return
 
             new_status = not self.config['is_enabled']
-            async with db.pool.acquire() as conn:
-                await conn.execute("""
-                    UPDATE sticky_messages
-                    SET is_enabled = $1, updated_at = CURRENT_TIMESTAMP
-                    WHERE guild_id = $2 AND channel_id = $3
-                """, new_status, interaction.guild_id, self.channel.id)
+            await self.cog.set_enabled(interaction.guild_id, self.channel.id, new_status)
 
             status_text = "有効" if new_status else "無効"
             await interaction.response.send_message(f"固定メッセージを{status_text}にしました", ephemeral=True)
@@ -335,10 +397,7 @@ class ChannelStickyMessageCog(commands.Cog):
                 """, interaction.guild_id, self.channel.id)
 
             # 内部状態もクリア
-            channel_id = self.channel.id
-            self.cog.message_counters.pop(channel_id, None)
-            self.cog.last_sticky_times.pop(channel_id, None)
-            self.cog.last_sticky_message_ids.pop(channel_id, None)
+            self.cog.remove_sticky(self.channel.id)
 
             await interaction.response.send_message("固定メッセージ設定を削除しました", ephemeral=True)
 
@@ -416,27 +475,14 @@ class ChannelStickyMessageCog(commands.Cog):
                 await interaction.response.send_message("時間間隔とメッセージ数間隔は数値で入力してください。", ephemeral=True)
                 return
 
-            async with db.pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO sticky_messages
-                    (guild_id, channel_id, message_content, trigger_type, time_interval, message_interval, updated_at)
-                    VALUES ($1, $2, $3, $4, $5, $6, CURRENT_TIMESTAMP)
-                    ON CONFLICT (guild_id, channel_id)
-                    DO UPDATE SET
-                        message_content = EXCLUDED.message_content,
-                        trigger_type = EXCLUDED.trigger_type,
-                        time_interval = EXCLUDED.time_interval,
-                        message_interval = EXCLUDED.message_interval,
-                        is_enabled = TRUE,
-                        updated_at = CURRENT_TIMESTAMP
-                """,
-                    interaction.guild_id,
-                    self.channel.id,
-                    self.message_content.value,
-                    self.trigger_type.value,
-                    time_int,
-                    msg_int
-                )
+            await self.cog.upsert_config(
+                interaction.guild_id,
+                self.channel.id,
+                self.message_content.value,
+                self.trigger_type.value,
+                time_int,
+                msg_int
+            )
 
             await interaction.response.send_message(
                 f"設定を保存しました\n"
@@ -503,27 +549,14 @@ class ChannelStickyMessageCog(commands.Cog):
     ):
         target_channel = チャンネル or interaction.channel
 
-        async with db.pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO sticky_messages
-                (guild_id, channel_id, message_content, trigger_type, time_interval, message_interval, updated_at)
-                VALUES ($1, $2, $3, $4, $5, $6, CURRENT_TIMESTAMP)
-                ON CONFLICT (guild_id, channel_id)
-                DO UPDATE SET
-                    message_content = EXCLUDED.message_content,
-                    trigger_type = EXCLUDED.trigger_type,
-                    time_interval = EXCLUDED.time_interval,
-                    message_interval = EXCLUDED.message_interval,
-                    is_enabled = TRUE,
-                    updated_at = CURRENT_TIMESTAMP
-            """,
-                interaction.guild_id,
-                target_channel.id,
-                メッセージ,
-                トリガータイプ,
-                時間間隔秒,
-                メッセージ数間隔
-            )
+        await self.upsert_config(
+            interaction.guild_id,
+            target_channel.id,
+            メッセージ,
+            トリガータイプ,
+            時間間隔秒,
+            メッセージ数間隔
+        )
 
         await interaction.response.send_message(
             f"固定メッセージを設定しました\n"
@@ -545,21 +578,16 @@ class ChannelStickyMessageCog(commands.Cog):
     ):
         target_channel = チャンネル or interaction.channel
 
-        async with db.pool.acquire() as conn:
-            result = await conn.execute("""
-                UPDATE sticky_messages
-                SET is_enabled = FALSE, updated_at = CURRENT_TIMESTAMP
-                WHERE guild_id = $1 AND channel_id = $2
-            """, interaction.guild_id, target_channel.id)
-
-        if result == "UPDATE 0":
+        state = self.stickies.get(target_channel.id)
+        if not await self.set_enabled(interaction.guild_id, target_channel.id, False):
             await interaction.response.send_message(
                 f"{target_channel.mention} に固定メッセージの設定がありません",
                 ephemeral=True
             )
         else:
             # 古い固定メッセージを削除
-            await self.delete_old_sticky_message(target_channel)
+            if state:
+                await self.delete_old_sticky_message(target_channel, state.last_message_id)
 
             await interaction.response.send_message(
                 f"{target_channel.mention} の固定メッセージを無効にしました",
@@ -627,16 +655,14 @@ class ChannelStickyMessageCog(commands.Cog):
         )
 
         # 現在の状況
-        channel_id = target_channel.id
-        current_count = self.message_counters.get(channel_id, 0)
-        last_time = self.last_sticky_times.get(channel_id)
+        state = self.stickies.get(target_channel.id)
 
-        if last_time:
-            time_since = datetime.now() - last_time
+        if state and state.last_sticky_time:
+            time_since = datetime.now() - state.last_sticky_time
             embed.add_field(
                 name="現在の状況",
                 value=f"前回投稿からの経過時間: {int(time_since.total_seconds())}秒\n"
-                      f"前回投稿からのメッセージ数: {current_count}",
+                      f"前回投稿からのメッセージ数: {state.message_count}",
                 inline=False
             )
 
@@ -11,16 +11,20 @@ from typing import Optional
 import discord
 import pytz
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from utils.database import execute_query
 from utils.logging import setup_logging
+from utils.scheduler import JobKind, scheduler
 
 logger = setup_logging()
 
 # 日本時間のタイムゾーン
 JST = pytz.timezone('Asia/Tokyo')
 
+# スケジューラのジョブ種別名
+REMINDER_JOB = "reminder"
+
 
 def parse_time_string(time_str: str) -> Optional[timedelta]:
     """
@@ -117,6 +121,7 @@ class ReminderView(discord.ui.View):
             self.reminder_id,
             fetch_type='status'
         )
+        scheduler.cancel(REMINDER_JOB, self.reminder_id)
 
         await interaction.response.send_message(
             "✅ リマインダーを削除しました。",
@@ -134,73 +139,56 @@ class Reminder(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_reminders.start()
 
     async def cog_load(self):
-        """Cogロード時にテーブルを作成"""
-        await self._setup_table()
+        """期限付きジョブとしてスケジューラに登録"""
+        scheduler.attach(self.bot)
+        await scheduler.register(JobKind(
+            name=REMINDER_JOB,
+            load=self._load_due_times,
+            fetch=self._fetch_due_reminders,
+            run=self._send_reminder,
+            complete=self._delete_sent_reminders,
+            notify_channel="scheduler_reminder",
+        ))
 
     async def cog_unload(self):
-        """Cogアンロード時にタスクを停止"""
-        self.check_reminders.cancel()
+        """Cogアンロード時に登録を解除"""
+        await scheduler.unregister(REMINDER_JOB)
 
-    async def _setup_table(self):
-        """リマインダーテーブルを作成"""
-        await execute_query(
+    async def _load_due_times(self, ids: Optional[list[int]]) -> list[tuple[int, datetime]]:
+        """未送信のリマインダーの期限（idsを指定するとその分だけ）"""
+        rows = await execute_query(
             '''
-            CREATE TABLE IF NOT EXISTS reminders (
-                id SERIAL PRIMARY KEY,
-                user_id BIGINT NOT NULL,
-                guild_id BIGINT,
-                channel_id BIGINT NOT NULL,
-                message_id BIGINT,
-                content TEXT NOT NULL,
-                remind_at TIMESTAMP WITH TIME ZONE NOT NULL,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                is_dm BOOLEAN DEFAULT FALSE
-            )
+            SELECT id, remind_at FROM reminders
+            WHERE $1::int[] IS NULL OR id = ANY($1::int[])
             ''',
-            fetch_type='status'
+            ids,
+            fetch_type='all'
+        )
+        return [(row['id'], row['remind_at']) for row in rows]
+
+    async def _fetch_due_reminders(self, ids: list[int]):
+        """期限が来たリマインダーをまとめて取得"""
+        return await execute_query(
+            '''
+            SELECT id, user_id, guild_id, channel_id, message_id, content, remind_at, is_dm
+            FROM reminders
+            WHERE id = ANY($1::int[]) AND remind_at <= $2
+            ORDER BY remind_at ASC
+            ''',
+            ids,
+            datetime.now(JST),
+            fetch_type='all'
         )
-        # インデックス作成
+
+    async def _delete_sent_reminders(self, done: list):
+        """送信済みのリマインダーをまとめて削除"""
         await execute_query(
-            'CREATE INDEX IF NOT EXISTS idx_reminders_remind_at ON reminders (remind_at)',
+            "DELETE FROM reminders WHERE id = ANY($1::int[])",
+            [reminder['id'] for reminder, _ in done],
             fetch_type='status'
         )
-        logger.info("リマインダーテーブルを確認・作成しました")
-
-    @tasks.loop(seconds=30)
-    async def check_reminders(self):
-        """期限が来たリマインダーをチェックして送信"""
-        try:
-            now = datetime.now(JST)
-            reminders = await execute_query(
-                '''
-                SELECT id, user_id, guild_id, channel_id, message_id, content, remind_at, is_dm
-                FROM reminders
-                WHERE remind_at <= $1
-                ORDER BY remind_at ASC
-                LIMIT 50
-                ''',
-                now,
-                fetch_type='all'
-            )
-
-            for reminder in reminders:
-                await self._send_reminder(reminder)
-                await execute_query(
-                    "DELETE FROM reminders WHERE id = $1",
-                    reminder['id'],
-                    fetch_type='status'
-                )
-
-        except Exception as e:
-            logger.error(f"リマインダーチェック中にエラー: {e}")
-
-    @check_reminders.before_loop
-    async def before_check_reminders(self):
-        """BOT準備完了まで待機"""
-        await self.bot.wait_until_ready()
 
     async def _send_reminder(self, reminder: dict):
         """リマインダーを送信"""
@@ -302,6 +290,7 @@ class Reminder(commands.Cog):
         )
 
         reminder_id = result['id']
+        scheduler.schedule(REMINDER_JOB, reminder_id, remind_at)
 
         embed = discord.Embed(
             title="✅ リマインダーを設定しました",
@@ -404,6 +393,7 @@ class Reminder(commands.Cog):
             reminder_id,
             fetch_type='status'
         )
+        scheduler.cancel(REMINDER_JOB, reminder_id)
 
         await ctx.send(
             f"✅ リマインダー #{reminder_id} をキャンセルしました。",
@@ -11,16 +11,20 @@ from typing import Optional
 import discord
 import pytz
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from utils.database import execute_query
 from utils.logging import setup_logging
+from utils.scheduler import JobKind, scheduler
 
 logger = setup_logging()
 
 # 日本時間のタイムゾーン
 JST = pytz.timezone('Asia/Tokyo')
 
+# スケジューラのジョブ種別名
+SCHEDULED_POST_JOB = "scheduled_post"
+
 
 def parse_datetime_string(dt_str: str) -> Optional[datetime]:
     """
@@ -139,6 +143,7 @@ class ScheduledPostView(discord.ui.View):
             self.post_id,
             fetch_type='status'
         )
+        scheduler.cancel(SCHEDULED_POST_JOB, self.post_id)
 
         await interaction.response.send_message(
             "✅ スケジュール投稿をキャンセルしました。",
@@ -162,93 +167,95 @@ class ScheduledPost(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_scheduled_posts.start()
 
     async def cog_load(self):
-        """Cogロード時にテーブルを作成"""
-        await self._setup_table()
+        """期限付きジョブとしてスケジューラに登録"""
+        scheduler.attach(self.bot)
+        await scheduler.register(JobKind(
+            name=SCHEDULED_POST_JOB,
+            load=self._load_due_times,
+            fetch=self._fetch_due_posts,
+            run=self._run_post,
+            complete=self._complete_posts,
+            notify_channel="scheduler_scheduled_post",
+        ))
 
     async def cog_unload(self):
-        """Cogアンロード時にタスクを停止"""
-        self.check_scheduled_posts.cancel()
+        """Cogアンロード時に登録を解除"""
+        await scheduler.unregister(SCHEDULED_POST_JOB)
 
-    async def _setup_table(self):
-        """スケジュール投稿テーブルを作成"""
-        await execute_query(
+    async def _load_due_times(self, ids: Optional[list[int]]) -> list[tuple[int, datetime]]:
+        """有効なスケジュール投稿の期限（idsを指定するとその分だけ）"""
+        rows = await execute_query(
             '''
-            CREATE TABLE IF NOT EXISTS scheduled_posts (
-                id SERIAL PRIMARY KEY,
-                guild_id BIGINT NOT NULL,
-                channel_id BIGINT NOT NULL,
-                author_id BIGINT NOT NULL,
-                content TEXT,
-                embed_json JSONB,
-                post_at TIMESTAMP WITH TIME ZONE NOT NULL,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                repeat_interval TEXT,
-                is_active BOOLEAN DEFAULT TRUE
-            )
+            SELECT id, post_at FROM scheduled_posts
+            WHERE is_active = TRUE AND ($1::int[] IS NULL OR id = ANY($1::int[]))
             ''',
-            fetch_type='status'
+            ids,
+            fetch_type='all'
         )
-        # インデックス作成
-        await execute_query(
-            'CREATE INDEX IF NOT EXISTS idx_scheduled_posts_post_at ON scheduled_posts (post_at) WHERE is_active = TRUE',
-            fetch_type='status'
+        return [(row['id'], row['post_at']) for row in rows]
+
+    async def _fetch_due_posts(self, ids: list[int]):
+        """期限が来たスケジュール投稿をまとめて取得"""
+        return await execute_query(
+            '''
+            SELECT id, guild_id, channel_id, author_id, content, embed_json, post_at, repeat_interval
+            FROM scheduled_posts
+            WHERE id = ANY($1::int[]) AND is_active = TRUE AND post_at <= $2
+            ORDER BY post_at ASC
+            ''',
+            ids,
+            datetime.now(JST),
+            fetch_type='all'
         )
-        logger.info("スケジュール投稿テーブルを確認・作成しました")
 
-    @tasks.loop(seconds=30)
-    async def check_scheduled_posts(self):
-        """期限が来たスケジュール投稿を実行"""
-        try:
-            now = datetime.now(JST)
-            posts = await execute_query(
+    async def _run_post(self, post) -> Optional[datetime]:
+        """投稿して、リピート設定があれば次回の投稿時間を返す"""
+        await self._execute_post(post)
+        if post['repeat_interval']:
+            return self._calculate_next_time(post['post_at'], post['repeat_interval'])
+        return None
+
+    async def _complete_posts(self, done: list):
+        """投稿後の削除・次回時刻の更新・無効化をまとめて行う"""
+        delete_ids, deactivate_ids = [], []
+        next_ids, next_times = [], []
+        for post, next_time in done:
+            if not post['repeat_interval']:
+                # 一回限りの投稿は削除
+                delete_ids.append(post['id'])
+            elif next_time:
+                next_ids.append(post['id'])
+                next_times.append(next_time)
+            else:
+                deactivate_ids.append(post['id'])
+
+        if delete_ids:
+            await execute_query(
+                "DELETE FROM scheduled_posts WHERE id = ANY($1::int[])",
+                delete_ids,
+                fetch_type='status'
+            )
+        if next_ids:
+            await execute_query(
                 '''
-                SELECT id, guild_id, channel_id, author_id, content, embed_json, post_at, repeat_interval
-                FROM scheduled_posts
-                WHERE post_at <= $1 AND is_active = TRUE
-                ORDER BY post_at ASC
-                LIMIT 20
+                UPDATE scheduled_posts AS p SET post_at = v.post_at
+                FROM unnest($1::int[], $2::timestamptz[]) AS v(id, post_at)
+                WHERE p.id = v.id
                 ''',
-                now,
-                fetch_type='all'
+                next_ids,
+                next_times,
+                fetch_type='status'
+            )
+            for post_id, next_time in zip(next_ids, next_times):
+                scheduler.schedule(SCHEDULED_POST_JOB, post_id, next_time)
+        if deactivate_ids:
+            await execute_query(
+                "UPDATE scheduled_posts SET is_active = FALSE WHERE id = ANY($1::int[])",
+                deactivate_ids,
+                fetch_type='status'
             )
-
-            for post in posts:
-                await self._execute_post(post)
-
-                if post['repeat_interval']:
-                    # リピート設定がある場合は次回の投稿時間を計算
-                    next_time = self._calculate_next_time(post['post_at'], post['repeat_interval'])
-                    if next_time:
-                        await execute_query(
-                            "UPDATE scheduled_posts SET post_at = $1 WHERE id = $2",
-                            next_time,
-                            post['id'],
-                            fetch_type='status'
-                        )
-                    else:
-                        await execute_query(
-                            "UPDATE scheduled_posts SET is_active = FALSE WHERE id = $1",
-                            post['id'],
-                            fetch_type='status'
-                        )
-                else:
-                    # 一回限りの投稿は削除
-                    await execute_query(
-                        "DELETE FROM scheduled_posts WHERE id = $1",
-                        post['id'],
-                        fetch_type='status'
-                    )
-
-        except Exception as e:
-            logger.error(f"スケジュール投稿チェック中にエラー: {e}")
-
-    @check_scheduled_posts.before_loop
-    async def before_check_scheduled_posts(self):
-        """BOT準備完了まで待機"""
-        await self.bot.wait_until_ready()
 
     def _calculate_next_time(self, current_time: datetime, interval: str) -> Optional[datetime]:
         """次回の投稿時間を計算"""
@@ -380,6 +387,7 @@ class ScheduledPost(commands.Cog):
         )
 
         post_id = result['id']
+        scheduler.schedule(SCHEDULED_POST_JOB, post_id, post_at)
 
         # 確認メッセージ
         embed = discord.Embed(
@@ -495,6 +503,7 @@ class ScheduledPost(commands.Cog):
             post_id,
             fetch_type='status'
         )
+        scheduler.cancel(SCHEDULED_POST_JOB, post_id)
 
         await interaction.response.send_message(
             f"✅ スケジュール投稿 #{post_id} をキャンセルしました。",
@@ -10,6 +10,7 @@ from discord.ext import commands, tasks
 from config.setting import get_settings
 from utils.commands_help import is_guild
 from utils.logging import setup_logging
+from utils.loop_monitor import loop_monitor
 
 logger = setup_logging()
 
@@ -67,7 +68,13 @@ class UptimeKumaStatus(commands.Cog):
             ping = 0
         else:
             ping = round(ping * 1000)
-        url = f"{push_url}{ping}ms"
+        # ループラグのパーセンタイルはmsgに載せる（ハートビート履歴で推移を追える）
+        # paramsを渡すと既存のクエリが丸ごと置き換わるので、status・pingを残したままmsgだけ差し替える
+        lag = loop_monitor.summary()
+        url = httpx.URL(f"{push_url}{ping}ms").copy_merge_params({
+            "msg": f"OK loop_lag p50={lag['p50_ms']}ms p95={lag['p95_ms']}ms "
+                   f"p99={lag['p99_ms']}ms max={lag['max_ms']}ms slow={loop_monitor.slow_count}"
+        })
         #logger.info(f"URL: {url}")
         max_retries = 3
         retry_delay = 5
@@ -5,6 +5,7 @@ Voice Recording DB接続管理
 import asyncpg
 
 from config.setting import get_settings
+from utils.db_pool import pool_registry
 from utils.logging import setup_logging
 
 logger = setup_logging(__name__)
@@ -29,8 +30,9 @@ class VoiceDatabase:
             return False
 
         try:
-            self.pool = await asyncpg.create_pool(
+            self.pool = await pool_registry.get(
                 db_url,
+                name="voice",
                 min_size=1,
                 max_size=5,
                 command_timeout=30,
@@ -45,7 +47,8 @@ class VoiceDatabase:
     async def close(self):
         """DB接続を閉じる"""
         if self.pool:
-            await self.pool.close()
+            await pool_registry.release(self.pool, owner="voice")
+            self.pool = None
             self._initialized = False
             logger.info("Voice DB接続を閉じました")
 
@@ -0,0 +1,150 @@
+"""
+VC録音のエンコードステージ
+
+録音中のスプールWAVをワーカースレッドで追いかけ、ffmpegに逐次流し込む。
+1つのffmpegプロセスから2系統を出力する:
+- アーカイブ用: Opus (Ogg) 圧縮
+- 文字起こし用: モノラル 16kHz の生PCM
+停止時は残りを流し込んでffmpegの終了を待つだけなので、録音時間に比例した処理は発生しない。
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+# 入力（スプール）: 48kHz / 2ch / 16bit
+INPUT_ARGS = ["-f", "s16le", "-ar", "48000", "-ac", "2", "-i", "pipe:0"]
+
+# アーカイブ用: Opus 32kbps モノラル（1時間で約14MB）
+ARCHIVE_SUFFIX = ".ogg"
+ARCHIVE_ARGS = ["-map", "0:a", "-ac", "1", "-c:a", "libopus", "-b:a", "32k", "-application", "voip"]
+
+# 文字起こし用: 16kHz / 1ch / 16bit 生PCM
+SPEECH_SAMPLE_RATE = 16000
+SPEECH_SUFFIX = ".pcm"
+SPEECH_ARGS = ["-map", "0:a", "-ac", "1", "-ar", str(SPEECH_SAMPLE_RATE), "-f", "s16le"]
+
+# WAVヘッダ長（スプールの先頭をスキップ）
+WAV_HEADER_SIZE = 44
+
+READ_CHUNK_SIZE = 64 * 1024
+POLL_INTERVAL = 0.5
+
+
+def ffmpeg_available() -> bool:
+    """ffmpegが利用可能か"""
+    return shutil.which("ffmpeg") is not None
+
+
+class IncrementalEncoder:
+    """スプールWAVを逐次エンコードするワーカー"""
+
+    def __init__(self, source: Path, poll_interval: float = POLL_INTERVAL):
+        self.source = source
+        self.archive_path = source.with_suffix(ARCHIVE_SUFFIX)
+        self.speech_path = source.with_suffix(SPEECH_SUFFIX)
+        self.poll_interval = poll_interval
+        self.bytes_encoded = 0
+        self.failed = False
+
+        self._process: subprocess.Popen | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        """ffmpegとフィードスレッドを起動"""
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            *INPUT_ARGS,
+            *ARCHIVE_ARGS, str(self.archive_path),
+            *SPEECH_ARGS, str(self.speech_path),
+        ]
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        self._thread = threading.Thread(
+            target=self._feed,
+            name=f"vc-encoder-{self.source.stem}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _feed(self):
+        """スプールの増分を読み取りffmpegへ書き込む"""
+        try:
+            with open(self.source, "rb") as f:
+                f.seek(WAV_HEADER_SIZE)
+                while True:
+                    chunk = f.read(READ_CHUNK_SIZE)
+                    if chunk:
+                        self._process.stdin.write(chunk)
+                        self.bytes_encoded += len(chunk)
+                        continue
+                    if self._stopping.is_set():
+                        # 停止要求後に書き足された分を読み切ってから終了
+                        chunk = f.read()
+                        if chunk:
+                            self._process.stdin.write(chunk)
+                            self.bytes_encoded += len(chunk)
+                        break
+                    time.sleep(self.poll_interval)
+        except (BrokenPipeError, OSError) as e:
+            self.failed = True
+            logger.error(f"エンコーダ書き込みエラー ({self.source.name}): {e}")
+        finally:
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+
+    def finish(self, timeout: float = 60) -> bool:
+        """残りを流し込んでエンコードを完了（ブロッキング・スレッドから呼ぶ）"""
+        if self._process is None:
+            return False
+
+        self._stopping.set()
+        self._thread.join(timeout)
+        try:
+            # stdinはフィードスレッドが閉じ済み（-loglevel errorなのでstderrは詰まらない）
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+            logger.error(f"エンコーダタイムアウト: {self.source.name}")
+            self.failed = True
+            return False
+        finally:
+            stderr = self._process.stderr.read()
+            self._process.stderr.close()
+
+        if self._process.returncode != 0:
+            logger.error(
+                f"ffmpegエラー ({self.source.name}): "
+                f"{stderr.decode(errors='replace').strip()}"
+            )
+            self.failed = True
+        return not self.failed
+
+    def discard(self):
+        """出力ファイルを削除"""
+        if self._process and self._process.poll() is None:
+            self._stopping.set()
+            self._process.kill()
+        self.archive_path.unlink(missing_ok=True)
+        self.speech_path.unlink(missing_ok=True)
+
+
+async def setup(bot):
+    """ダミーsetup - このモジュールはCogではない"""
+    pass
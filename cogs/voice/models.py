@@ -176,6 +176,39 @@ class VoiceDB:
             logger.error(f"文字起こし保存エラー: {e}")
             return None
 
+    async def add_transcripts(self, transcripts: list[dict]) -> bool:
+        """文字起こし結果をまとめて保存
+
+        Args:
+            transcripts: add_transcriptと同じキー（content, recording_id, session_id, user_id, language）の辞書リスト
+        """
+        if not voice_database._initialized or not transcripts:
+            return False
+
+        query = """
+            INSERT INTO voice_transcripts
+            (recording_id, session_id, user_id, content, language, word_count)
+            VALUES ($1, $2, $3, $4, $5, $6)
+        """
+        rows = [
+            (
+                t.get("recording_id"),
+                t.get("session_id"),
+                t.get("user_id"),
+                t["content"],
+                t.get("language", "ja"),
+                len(t["content"]),
+            )
+            for t in transcripts
+        ]
+        try:
+            async with voice_database.pool.acquire() as conn:
+                await conn.executemany(query, rows)
+            return True
+        except Exception as e:
+            logger.error(f"文字起こし一括保存エラー: {e}")
+            return False
+
     async def add_summary(
         self,
         session_id: int,
@@ -7,8 +7,12 @@ OpenAI Whisper API で文字起こしを行う
 
 from __future__ import annotations
 
+import asyncio
 import io
+import os
 import tempfile
+import threading
+import time
 import wave
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,7 +22,10 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+from cogs.voice.encoder import SPEECH_SAMPLE_RATE, IncrementalEncoder, ffmpeg_available
 from cogs.voice.models import voice_db
+from cogs.voice.transcription import TranscriptionRequest, TranscriptionService
+from cogs.voice.vad import EnergySegmenter, SpeechSegment, speech_byte_range
 from config.setting import get_settings
 from utils.logging import setup_logging
 
@@ -29,38 +36,135 @@ logger = setup_logging(__name__)
 settings = get_settings()
 
 
+# 録音スプールファイルの保存先
+SPOOL_DIR = Path("data/voice/spool")
+
+# 48kHz / 2ch / 16bit
+SAMPLE_RATE = 48000
+CHANNELS = 2
+SAMPLE_WIDTH = 2
+BYTES_PER_SECOND = SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH  # 192000
+
+# 文字起こし用に保持する録音の件数
+MAX_FINISHED_RECORDINGS = 5
+
+
+def pcm_to_wav_bytes(pcm: bytes, sample_rate: int = SPEECH_SAMPLE_RATE, channels: int = 1) -> bytes:
+    """生PCMをメモリ上でWAVに包む"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
 class UserAudioBuffer:
-    """ユーザーごとの音声バッファ"""
+    """ユーザーごとの音声バッファ（ディスク上のWAVスプールに逐次追記）"""
 
-    def __init__(self, user_id: int):
+    def __init__(self, user_id: int, spool_dir: Path = SPOOL_DIR):
         self.user_id = user_id
-        self.chunks: list[bytes] = []
         self.start_time = datetime.now(timezone.utc)
+        self.bytes_written = 0
+
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=f"vc_{user_id}_", suffix=".wav", dir=spool_dir)
+        self.path = Path(path)
+        self._file = os.fdopen(fd, "wb")
+        self._wav = wave.open(self._file, "wb")
+        self._wav.setnchannels(CHANNELS)
+        self._wav.setsampwidth(SAMPLE_WIDTH)
+        self._wav.setframerate(SAMPLE_RATE)
+        # 書き込みは受信スレッド、クローズはイベントループから呼ばれる
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 録音中に並行してエンコードするワーカー（ffmpegがない環境ではNone）
+        self.encoder: IncrementalEncoder | None = None
+
+        # 受信時刻付きパケットから発話区間を切り出す
+        self.segmenter = EnergySegmenter(user_id)
+
+    def start_encoder(self):
+        """逐次エンコードを開始"""
+        try:
+            self.encoder = IncrementalEncoder(self.path)
+            self.encoder.start()
+        except OSError as e:
+            logger.warning(f"エンコーダ起動失敗、WAVのまま保存します: {e}")
+            self.encoder = None
+
+    def finish_encoding(self) -> bool:
+        """エンコードを完了（ブロッキング・スレッドから呼ぶ）"""
+        if self.encoder is None:
+            return False
+        return self.encoder.finish()
+
+    @property
+    def upload_path(self) -> Path:
+        """アップロードするファイル（エンコード成功時は圧縮版）"""
+        if self.encoder and not self.encoder.failed and self.encoder.archive_path.exists():
+            return self.encoder.archive_path
+        return self.path
 
-    def write(self, data: bytes):
-        """音声データを追加"""
-        self.chunks.append(data)
+    @property
+    def speech_path(self) -> Path | None:
+        """文字起こし用のモノラル16kHz PCM"""
+        if self.encoder and not self.encoder.failed and self.encoder.speech_path.exists():
+            return self.encoder.speech_path
+        return None
 
-    def get_wav_bytes(self) -> bytes:
-        """WAV形式のバイト列を取得"""
-        audio_data = b"".join(self.chunks)
+    def write(self, data: bytes, timestamp: float | None = None):
+        """音声データをスプールに追記（ヘッダはclose時にまとめて更新）
 
-        buffer = io.BytesIO()
-        with wave.open(buffer, "wb") as wav:
-            wav.setnchannels(2)  # ステレオ
-            wav.setsampwidth(2)  # 16bit
-            wav.setframerate(48000)  # 48kHz
-            wav.writeframes(audio_data)
+        Args:
+            data: PCMパケット
+            timestamp: 受信時刻（セッション開始からの秒数）。指定時は発話区間検出に使う
+        """
+        with self._lock:
+            if self._closed:
+                return
+            if timestamp is not None:
+                self.segmenter.feed(data, timestamp, self.bytes_written, len(data) / BYTES_PER_SECOND)
+            self._wav.writeframesraw(data)
+            self.bytes_written += len(data)
 
-        buffer.seek(0)
-        return buffer.read()
+    @property
+    def segments(self) -> list[SpeechSegment]:
+        """発話区間（close後に確定）"""
+        return self.segmenter.finish()
+
+    def close(self) -> Path:
+        """スプールを閉じてWAVヘッダのサイズを確定"""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._wav.close()
+                self._file.close()
+                self.segmenter.finish()
+        return self.path
+
+    def discard(self, keep_speech: bool = False):
+        """スプールファイルとエンコード出力を削除"""
+        self.close()
+        self.path.unlink(missing_ok=True)
+        if self.encoder:
+            speech_path = self.encoder.speech_path
+            self.encoder.discard()
+            if keep_speech and speech_path.exists():
+                return
+            speech_path.unlink(missing_ok=True)
+
+    @property
+    def file_size_bytes(self) -> int:
+        """WAVファイルのサイズ（44バイトのヘッダを含む）"""
+        return self.bytes_written + 44
 
     @property
     def duration_seconds(self) -> float:
         """録音時間（秒）"""
-        total_bytes = sum(len(c) for c in self.chunks)
-        # 2ch * 2bytes * 48000Hz = 192000 bytes/sec
-        return total_bytes / 192000
+        return self.bytes_written / BYTES_PER_SECOND
 
 
 class RecordingSession:
@@ -74,13 +178,51 @@ class RecordingSession:
         self.user_buffers: dict[int, UserAudioBuffer] = {}
         self.is_recording = True
         self.db_session_id = db_session_id  # DB上のセッションID
+        self.encode = ffmpeg_available()
+        self._monotonic_start = time.monotonic()
+
+    def elapsed(self) -> float:
+        """セッション開始からの経過秒数（パケットの受信時刻）"""
+        return time.monotonic() - self._monotonic_start
 
     def get_or_create_buffer(self, user_id: int) -> UserAudioBuffer:
         """ユーザーのバッファを取得または作成"""
         if user_id not in self.user_buffers:
-            self.user_buffers[user_id] = UserAudioBuffer(user_id)
+            buffer = UserAudioBuffer(user_id)
+            if self.encode:
+                buffer.start_encoder()
+            self.user_buffers[user_id] = buffer
         return self.user_buffers[user_id]
 
+    def discard(self, keep_speech: bool = False):
+        """全ユーザーのスプールファイルを削除"""
+        for buffer in self.user_buffers.values():
+            buffer.discard(keep_speech=keep_speech)
+
+
+class FinishedRecording:
+    """停止済み録音の文字起こし用トラック（モノラル16kHz PCM）"""
+
+    def __init__(self, message_id: int, start_time: datetime, session_id: int | None = None):
+        self.message_id = message_id
+        self.start_time = start_time
+        self.session_id = session_id  # DB上のセッションID
+        # (user_id, username, speech_path, 発話区間)
+        self.tracks: list[tuple[int, str, Path, list[SpeechSegment]]] = []
+
+    def discard(self):
+        """トラックファイルを削除"""
+        for _, _, path, _ in self.tracks:
+            path.unlink(missing_ok=True)
+
+
+def read_speech_segment(path: Path, segment: SpeechSegment) -> bytes:
+    """文字起こし用トラックから発話区間のPCMだけを読み出す"""
+    start, end = speech_byte_range(segment)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
 
 class BasicSink:
     """シンプルな音声受信シンク"""
@@ -102,7 +244,7 @@ class BasicSink:
         if pcm_data is None:
             return
         buffer = self.session.get_or_create_buffer(user.id)
-        buffer.write(pcm_data)
+        buffer.write(pcm_data, self.session.elapsed())
 
     def cleanup(self):
         """クリーンアップ"""
@@ -115,20 +257,46 @@ class VoiceRecording(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.sessions: dict[int, RecordingSession] = {}  # guild_id -> session
+        self.finished_recordings: dict[int, FinishedRecording] = {}  # message_id -> recording
         self._openai_client = None
+        self._transcription: TranscriptionService | None = None
+
+    async def cog_unload(self):
+        """アンロード時に録音中セッションのスプールを削除"""
+        for session in self.sessions.values():
+            session.is_recording = False
+            session.discard()
+        self.sessions.clear()
+        for recording in self.finished_recordings.values():
+            recording.discard()
+        self.finished_recordings.clear()
+
+    def _remember_recording(self, recording: FinishedRecording):
+        """文字起こし用トラックを保持（古いものから削除）"""
+        self.finished_recordings[recording.message_id] = recording
+        while len(self.finished_recordings) > MAX_FINISHED_RECORDINGS:
+            oldest = next(iter(self.finished_recordings))
+            self.finished_recordings.pop(oldest).discard()
 
     @property
     def openai_client(self):
-        """OpenAIクライアント（遅延初期化）"""
+        """OpenAI非同期クライアント（遅延初期化）"""
         if self._openai_client is None:
             try:
-                from openai import OpenAI
-                self._openai_client = OpenAI(api_key=settings.etc_api_openai_api_key)
+                from openai import AsyncOpenAI
+                self._openai_client = AsyncOpenAI(api_key=settings.etc_api_openai_api_key)
             except ImportError:
                 logger.error("openaiパッケージがインストールされていません")
                 return None
         return self._openai_client
 
+    @property
+    def transcription(self) -> TranscriptionService:
+        """並列数制限付きの文字起こしサービス"""
+        if self._transcription is None:
+            self._transcription = TranscriptionService(self.openai_client)
+        return self._transcription
+
     vc_record = app_commands.Group(
         name="vc-record",
         description="VC録音・文字起こし機能",
@@ -230,27 +398,42 @@ class VoiceRecording(commands.Cog):
             if interaction.guild.voice_client:
                 await interaction.guild.voice_client.disconnect()
 
-            # ファイル生成
+            # スプールを閉じ、録音中に進めていたエンコードの残りを並列で完了
+            buffers = list(session.user_buffers.values())
+            for buffer in buffers:
+                buffer.close()
+            await asyncio.gather(
+                *(asyncio.to_thread(buffer.finish_encoding) for buffer in buffers)
+            )
+
+            # ファイル生成（ディスクから直接アップロード）
             files = []
             user_info = []
+            uploaded_buffers = []
+            finished = FinishedRecording(0, session.start_time, session.db_session_id)
 
-            for user_id, buffer in session.user_buffers.items():
+            for buffer in buffers:
                 if buffer.duration_seconds < 1:
                     continue  # 1秒未満はスキップ
 
+                user_id = buffer.user_id
                 user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
                 username = user.display_name if user else str(user_id)
 
-                wav_bytes = buffer.get_wav_bytes()
-                filename = f"{username}_{session.start_time.strftime('%Y%m%d_%H%M%S')}.wav"
+                upload_path = buffer.upload_path
+                filename = f"{username}_{session.start_time.strftime('%Y%m%d_%H%M%S')}{upload_path.suffix}"
 
-                files.append(discord.File(io.BytesIO(wav_bytes), filename=filename))
+                files.append(discord.File(upload_path, filename=filename))
                 user_info.append(f"- {username}: {buffer.duration_seconds:.1f}秒")
+                uploaded_buffers.append(buffer)
+                if buffer.speech_path:
+                    finished.tracks.append((user_id, username, buffer.speech_path, buffer.segments))
 
             # セッション削除
             del self.sessions[interaction.guild_id]
 
             if not files:
+                session.discard()
                 await interaction.followup.send(
                     "⚠️ 録音データがありませんでした（誰も発言していない可能性）"
                 )
@@ -267,6 +450,12 @@ class VoiceRecording(commands.Cog):
                 "💡 文字起こし: `/vc-record transcribe` で添付ファイルを指定",
                 files=files[:10],  # 最大10ファイル
             )
+            for file in files:
+                file.close()
+
+            if finished.tracks:
+                finished.message_id = msg.id
+                self._remember_recording(finished)
 
             # DBにセッション終了を記録
             if session.db_session_id:
@@ -279,24 +468,27 @@ class VoiceRecording(commands.Cog):
                 )
 
                 # 各ユーザーの録音データを保存
-                for i, (user_id, buffer) in enumerate(session.user_buffers.items()):
-                    if buffer.duration_seconds >= 1:
-                        attachment_url = msg.attachments[i].url if i < len(msg.attachments) else None
-                        await voice_db.add_recording(
-                            session_id=session.db_session_id,
-                            user_id=user_id,
-                            duration_seconds=buffer.duration_seconds,
-                            file_size_bytes=len(buffer.get_wav_bytes()),
-                            discord_message_id=msg.id,
-                            discord_attachment_url=attachment_url,
-                        )
-
+                for i, buffer in enumerate(uploaded_buffers):
+                    attachment_url = msg.attachments[i].url if i < len(msg.attachments) else None
+                    await voice_db.add_recording(
+                        session_id=session.db_session_id,
+                        user_id=buffer.user_id,
+                        duration_seconds=buffer.duration_seconds,
+                        file_size_bytes=buffer.upload_path.stat().st_size,
+                        discord_message_id=msg.id,
+                        discord_attachment_url=attachment_url,
+                    )
+
+            kept_tracks = {path for _, _, path, _ in finished.tracks} if finished.message_id else set()
+            for buffer in buffers:
+                buffer.discard(keep_speech=buffer.speech_path in kept_tracks)
             logger.info(f"録音完了: {interaction.guild_id} - {len(files)}ファイル")
 
         except Exception as e:
             logger.error(f"録音停止エラー: {e}")
-            # セッションは削除
+            # セッションとスプールは削除
             self.sessions.pop(interaction.guild_id, None)
+            session.discard()
             await interaction.followup.send(f"❌ エラーが発生しました: {e}")
 
     @vc_record.command(name="transcribe", description="音声ファイルを文字起こしします")
@@ -345,50 +537,31 @@ class VoiceRecording(commands.Cog):
         await interaction.response.defer()
 
         try:
-            # ファイルダウンロード
+            # ファイルダウンロード（メモリ上のままアップロード）
             audio_bytes = await audio_file.read()
+            text = await self.transcription.transcribe(
+                TranscriptionRequest(audio_file.filename, audio_bytes, language)
+            )
 
-            # 一時ファイルに保存
-            with tempfile.NamedTemporaryFile(
-                suffix=Path(audio_file.filename).suffix, delete=False
-            ) as tmp:
-                tmp.write(audio_bytes)
-                tmp_path = tmp.name
-
-            try:
-                # Whisper API呼び出し
-                with open(tmp_path, "rb") as f:
-                    kwargs = {"model": "whisper-1", "file": f}
-                    if language != "auto":
-                        kwargs["language"] = language
-
-                    transcript = self.openai_client.audio.transcriptions.create(**kwargs)
-
-                text = transcript.text
-
-                # DBに保存
-                await voice_db.add_transcript(
-                    content=text,
-                    session_id=None,  # 単体transcribeはセッション紐付けなし
-                    user_id=interaction.user.id,
-                    language=language if language != "auto" else "ja",
-                )
-
-                # 常にtxtファイルで送信 + プレビュー
-                preview = text[:500] + "..." if len(text) > 500 else text
-                await interaction.followup.send(
-                    f"📝 **文字起こし完了** ({audio_file.filename})\n"
-                    f"文字数: {len(text)}字\n\n"
-                    f"**プレビュー:**\n```\n{preview}\n```",
-                    file=discord.File(
-                        io.BytesIO(text.encode("utf-8")),
-                        filename=f"transcript_{audio_file.filename.rsplit('.', 1)[0]}.txt",
-                    ),
-                )
+            # DBに保存
+            await voice_db.add_transcript(
+                content=text,
+                session_id=None,  # 単体transcribeはセッション紐付けなし
+                user_id=interaction.user.id,
+                language=language if language != "auto" else "ja",
+            )
 
-            finally:
-                # 一時ファイル削除
-                Path(tmp_path).unlink(missing_ok=True)
+            # 常にtxtファイルで送信 + プレビュー
+            preview = text[:500] + "..." if len(text) > 500 else text
+            await interaction.followup.send(
+                f"📝 **文字起こし完了** ({audio_file.filename})\n"
+                f"文字数: {len(text)}字\n\n"
+                f"**プレビュー:**\n```\n{preview}\n```",
+                file=discord.File(
+                    io.BytesIO(text.encode("utf-8")),
+                    filename=f"transcript_{audio_file.filename.rsplit('.', 1)[0]}.txt",
+                ),
+            )
 
         except Exception as e:
             logger.error(f"文字起こしエラー: {e}")
@@ -453,8 +626,11 @@ class VoiceRecording(commands.Cog):
                 )
                 return
 
-            # WAVファイルのみ抽出
-            audio_files = [a for a in target_msg.attachments if a.filename.lower().endswith(('.wav', '.mp3', '.m4a'))]
+            # 音声ファイルのみ抽出
+            audio_files = [
+                a for a in target_msg.attachments
+                if a.filename.lower().endswith(('.wav', '.mp3', '.m4a', '.ogg', '.flac'))
+            ]
 
             if not audio_files:
                 await interaction.followup.send("❌ 音声ファイルが見つかりません", ephemeral=True)
@@ -466,45 +642,65 @@ class VoiceRecording(commands.Cog):
                 f"処理中...",
             )
 
-            # 全ファイルを文字起こし
+            # 全ファイル（区間）を並列に文字起こし
+            db_language = language if language != "auto" else "ja"
             results = []
-            for attachment in audio_files:
-                try:
-                    # ファイル名からユーザー名を抽出
-                    username = attachment.filename.rsplit("_", 2)[0]
-
-                    # ダウンロード
-                    audio_bytes = await attachment.read()
-
-                    # 一時ファイルに保存
-                    with tempfile.NamedTemporaryFile(
-                        suffix=Path(attachment.filename).suffix, delete=False
-                    ) as tmp:
-                        tmp.write(audio_bytes)
-                        tmp_path = tmp.name
-
-                    try:
-                        # Whisper API呼び出し
-                        with open(tmp_path, "rb") as f:
-                            kwargs = {"model": "whisper-1", "file": f}
-                            if language != "auto":
-                                kwargs["language"] = language
-                            transcript = self.openai_client.audio.transcriptions.create(**kwargs)
-
-                        results.append({
-                            "username": username,
-                            "filename": attachment.filename,
-                            "text": transcript.text,
-                        })
-                    finally:
-                        Path(tmp_path).unlink(missing_ok=True)
-
-                except Exception as e:
-                    logger.error(f"文字起こしエラー ({attachment.filename}): {e}")
+            transcripts = []
+
+            # このBotで録音した直後なら、保持しているトラックから発話区間だけを文字起こし
+            finished = self.finished_recordings.get(target_msg.id)
+            utterances = []
+            if finished:
+                requests = []
+                owners = []
+                for user_id, username, speech_path, segments in finished.tracks:
+                    for segment in segments:
+                        pcm = await asyncio.to_thread(read_speech_segment, speech_path, segment)
+                        requests.append(TranscriptionRequest(
+                            f"{username}_{segment.start:.0f}.wav",
+                            pcm_to_wav_bytes(pcm),
+                            language,
+                        ))
+                        owners.append((user_id, username, segment))
+                    results.append({"username": username, "filename": speech_path.name})
+
+                texts = await self.transcription.transcribe_many(requests)
+
+                per_user: dict[int, list[str]] = {}
+                for (user_id, username, segment), text in zip(owners, texts):
+                    if isinstance(text, Exception):
+                        logger.error(f"文字起こしエラー ({username} @ {segment.start:.1f}s): {text}")
+                        text = f"[エラー: {text}]"
+                    if text:
+                        utterances.append((segment.start, username, text))
+                        per_user.setdefault(user_id, []).append(text)
+
+                for user_id, texts_of_user in per_user.items():
+                    transcripts.append({
+                        "content": "\n".join(texts_of_user),
+                        "session_id": finished.session_id,
+                        "user_id": user_id,
+                        "language": db_language,
+                    })
+            else:
+                # 添付ファイルを並列にダウンロードし、メモリ上のまま文字起こし
+                audio_bytes_list = await asyncio.gather(
+                    *(attachment.read() for attachment in audio_files)
+                )
+                texts = await self.transcription.transcribe_many([
+                    TranscriptionRequest(attachment.filename, audio_bytes, language)
+                    for attachment, audio_bytes in zip(audio_files, audio_bytes_list)
+                ])
+
+                for attachment, text in zip(audio_files, texts):
+                    if isinstance(text, Exception):
+                        logger.error(f"文字起こしエラー ({attachment.filename}): {text}")
+                        text = f"[エラー: {text}]"
                     results.append({
-                        "username": username,
+                        # ファイル名からユーザー名を抽出
+                        "username": attachment.filename.rsplit("_", 2)[0],
                         "filename": attachment.filename,
-                        "text": f"[エラー: {e}]",
+                        "text": text,
                     })
 
             # 結果をまとめる
@@ -513,18 +709,25 @@ class VoiceRecording(commands.Cog):
             combined_text += f"録音日時: {target_msg.created_at.strftime('%Y-%m-%d %H:%M')}\n\n"
             combined_text += "---\n\n"
 
-            for r in results:
-                combined_text += f"## {r['username']}\n\n"
-                combined_text += f"{r['text']}\n\n"
-                combined_text += "---\n\n"
-
-            # DBに保存
-            await voice_db.add_transcript(
-                content=combined_text,
-                session_id=None,
-                user_id=interaction.user.id,
-                language=language if language != "auto" else "ja",
-            )
+            if finished:
+                # 全員の発話を時刻順にマージ
+                for start, username, text in sorted(utterances):
+                    minutes, seconds = divmod(int(start), 60)
+                    combined_text += f"[{minutes:02d}:{seconds:02d}] **{username}**: {text}\n"
+            else:
+                for r in results:
+                    combined_text += f"## {r['username']}\n\n"
+                    combined_text += f"{r['text']}\n\n"
+                    combined_text += "---\n\n"
+
+            # DBに一括保存（ユーザーごとの結果 + 結合結果）
+            transcripts.append({
+                "content": combined_text,
+                "session_id": finished.session_id if finished else None,
+                "user_id": interaction.user.id,
+                "language": db_language,
+            })
+            await voice_db.add_transcripts(transcripts)
 
             # プレビュー
             preview = combined_text[:800] + "..." if len(combined_text) > 800 else combined_text
@@ -584,7 +787,7 @@ class VoiceRecording(commands.Cog):
         await interaction.response.defer()
 
         try:
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -0,0 +1,85 @@
+"""
+Whisper 文字起こしサービス
+
+AsyncOpenAIで並列数を制限しながら文字起こしを行う。
+音声はメモリ上のバイト列のままアップロードし（一時ファイルなし）、
+区間ごとに指数バックオフで再試行する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+# 同時に投げるWhisperリクエスト数
+DEFAULT_CONCURRENCY = 4
+
+# 1区間あたりの試行回数
+DEFAULT_ATTEMPTS = 3
+
+# 再試行の初回待機秒数（試行ごとに倍）
+RETRY_BASE_DELAY = 1.0
+
+WHISPER_MODEL = "whisper-1"
+
+
+@dataclass
+class TranscriptionRequest:
+    """文字起こし対象の音声"""
+
+    filename: str
+    audio: bytes
+    language: str = "ja"
+
+
+class TranscriptionService:
+    """並列数制限付きの非同期文字起こし"""
+
+    def __init__(
+        self,
+        client,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        attempts: int = DEFAULT_ATTEMPTS,
+        retry_base_delay: float = RETRY_BASE_DELAY,
+    ):
+        self.client = client
+        self.attempts = attempts
+        self.retry_base_delay = retry_base_delay
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def transcribe(self, request: TranscriptionRequest) -> str:
+        """1件を文字起こし（失敗時は再試行し、最後の例外を送出）"""
+        kwargs = {"model": WHISPER_MODEL, "file": (request.filename, request.audio)}
+        if request.language != "auto":
+            kwargs["language"] = request.language
+
+        attempt = 1
+        while True:
+            try:
+                async with self._semaphore:
+                    transcript = await self.client.audio.transcriptions.create(**kwargs)
+                return transcript.text.strip()
+            except Exception as e:
+                if attempt >= self.attempts:
+                    raise
+                logger.warning(
+                    f"文字起こし再試行 ({request.filename}, {attempt}/{self.attempts}): {e}"
+                )
+                await asyncio.sleep(self.retry_base_delay * 2 ** (attempt - 1))
+                attempt += 1
+
+    async def transcribe_many(self, requests: list[TranscriptionRequest]) -> list[str | Exception]:
+        """複数件を並列に文字起こし（結果は入力順、失敗した件は例外オブジェクト）"""
+        return await asyncio.gather(
+            *(self.transcribe(request) for request in requests),
+            return_exceptions=True,
+        )
+
+
+async def setup(bot):
+    """ダミーsetup - このモジュールはCogではない"""
+    pass
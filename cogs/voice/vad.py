@@ -0,0 +1,137 @@
+"""
+VC録音の発話区間検出（エネルギーベースVAD）
+
+受信時刻付きのPCMパケットから発話区間を切り出す。
+区間はスプール内のバイト範囲とセッション開始からの時刻を持ち、
+無音を除いた発話だけを文字起こしに回し、複数話者を時刻順に並べるために使う。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+ で audioop-lts が無い場合
+    audioop = None
+
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+# 有音とみなすRMS（16bit PCM）
+ENERGY_THRESHOLD = 300
+
+# この秒数だけ無音（またはパケット途絶）が続いたら区間を閉じる
+HANGOVER_SECONDS = 0.6
+
+# これより短い区間は咳・ノイズとして捨てる
+MIN_SEGMENT_SECONDS = 0.3
+
+# Whisperに送る1区間の最大長
+MAX_SEGMENT_SECONDS = 60.0
+
+
+def rms(pcm: bytes, sample_width: int = 2) -> int:
+    """PCMのRMSを計算"""
+    if audioop is not None:
+        return audioop.rms(pcm, sample_width)
+
+    import array
+    import math
+
+    samples = array.array("h", pcm[: len(pcm) - len(pcm) % 2])
+    if not samples:
+        return 0
+    return int(math.sqrt(sum(s * s for s in samples) / len(samples)))
+
+
+@dataclass
+class SpeechSegment:
+    """発話区間"""
+
+    user_id: int
+    start: float  # セッション開始からの秒数
+    end: float
+    byte_start: int  # スプールPCM内のオフセット
+    byte_end: int
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class EnergySegmenter:
+    """パケット単位のエネルギーで発話区間を切り出す"""
+
+    def __init__(
+        self,
+        user_id: int,
+        threshold: int = ENERGY_THRESHOLD,
+        hangover: float = HANGOVER_SECONDS,
+        min_duration: float = MIN_SEGMENT_SECONDS,
+        max_duration: float = MAX_SEGMENT_SECONDS,
+    ):
+        self.user_id = user_id
+        self.threshold = threshold
+        self.hangover = hangover
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.segments: list[SpeechSegment] = []
+
+        self._current: SpeechSegment | None = None
+        self._last_voiced: float = 0.0
+
+    def feed(self, pcm: bytes, timestamp: float, offset: int, packet_seconds: float):
+        """パケットを投入
+
+        Args:
+            pcm: パケットのPCM
+            timestamp: 受信時刻（セッション開始からの秒数）
+            offset: スプールPCM内でのパケット開始オフセット
+            packet_seconds: パケットの長さ（秒）
+        """
+        current = self._current
+        if current and timestamp - self._last_voiced > self.hangover:
+            self._close()
+            current = None
+
+        if rms(pcm) < self.threshold:
+            return
+
+        end = timestamp + packet_seconds
+        if current is None:
+            self._current = SpeechSegment(self.user_id, timestamp, end, offset, offset + len(pcm))
+        else:
+            current.end = end
+            current.byte_end = offset + len(pcm)
+            if current.duration >= self.max_duration:
+                self._close()
+        self._last_voiced = end
+
+    def _close(self):
+        segment = self._current
+        self._current = None
+        if segment and segment.duration >= self.min_duration:
+            self.segments.append(segment)
+
+    def finish(self) -> list[SpeechSegment]:
+        """開いている区間を閉じて全区間を返す"""
+        self._close()
+        return self.segments
+
+
+def speech_byte_range(segment: SpeechSegment, ratio: int = 12) -> tuple[int, int]:
+    """スプール（48kHz/2ch）のバイト範囲を文字起こし用トラック（16kHz/1ch）の範囲に変換
+
+    48kHz/2ch/16bitは1秒192000バイト、16kHz/1ch/16bitは32000バイトなので1/6。
+    サンプル境界に揃えるためフレーム（12バイト -> 2バイト）単位で変換する。
+    """
+    start = segment.byte_start // ratio * 2
+    end = segment.byte_end // ratio * 2
+    return start, end
+
+
+async def setup(bot):
+    """ダミーsetup - このモジュールはCogではない"""
+    pass
@@ -78,6 +78,13 @@ class Settings:
         self.cp_database_url: str = os.getenv("CP_DATABASE_URL", "")
         self.voice_database_url: str = os.getenv("VOICE_DATABASE_URL", "")
 
+        # DB接続プール（全DB共通）
+        self.db_pool_min_size: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+        self.db_pool_max_size: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+        self.db_pool_statement_cache_size: int = int(os.getenv("DB_POOL_STATEMENT_CACHE_SIZE", "100"))
+        self.db_pool_max_inactive_lifetime: float = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+        self.db_slow_query_ms: float = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+
         # Note通知機能
         self.note_rss_url: str = os.getenv("NOTE_RSS_URL", "https://note.com/hfs_discord/rss")
         self.note_webhook_url: str = os.getenv("NOTE_WEBHOOK_URL", "")
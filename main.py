@@ -2,11 +2,9 @@ import asyncio
 import json
 import logging
 import os
-import pathlib
 
 # from discord.ext.prometheus import PrometheusCog
 import re
-import traceback
 from datetime import datetime
 
 import discord
@@ -37,8 +35,15 @@ from dotenv import load_dotenv
 from config.setting import get_settings
 from utils import presence
 from utils.auth import load_auth, verify_auth
+from utils.cog_loader import PACKAGE_EXTENSIONS, CogLoader, discover_extensions
+from utils.command_sync import command_syncer
+from utils.db_pool import pool_registry
 from utils.error import handle_application_command_error, handle_command_error
-from utils.logging import save_log, setup_logging
+from utils.event_log import event_log
+from utils.logging import setup_logging
+from utils.loop_monitor import loop_monitor
+from utils.migrations import MigrationRunner
+from utils.scheduler import scheduler
 from utils.startup import (
     git_pull,
     pip_install,
@@ -48,6 +53,7 @@ from utils.startup import (
     yokobou,
 )
 from utils.startup_status import update_status
+from utils.voice_journal import voice_journal
 
 # ログディレクトリの作成
 log_dir = "data/logging"
@@ -95,27 +101,23 @@ class MyBot(commands.AutoShardedBot):
         super().__init__(*args, **kwargs)
         self.initialized: bool = False
         self.cog_classes: dict = {}
+        self.extension_load_results: list = []
         self.ERROR_LOG_CHANNEL_ID: int = error_log_channel_id
         self.gagame_sessions: dict = {}
 
     async def setup_hook(self) -> None:
+        loop_monitor.start()
         try:
-            logger.info("データベースの初期化を開始します。")
-            from utils.db_manager import db
-            await db.initialize()
+            logger.info("データベースの初期化とソース更新を開始します。")
+            await asyncio.gather(self._init_database(), self._update_source())
+            # migrations/ はgit pullで更新されるので、更新が終わってから読み込む
+            await self._apply_migrations()
             logger.info("データベースの初期化が完了しました。Cogのロードを開始します。")
-            await git_pull()
-            await pip_install()
 
+            # VCセッションジャーナルはイベントループの外で読み込んでおく
+            await voice_journal.load_async()
             await self.load_cogs('cogs')
 
-            await self.load_extension('cogs.aus')
-            await self.load_extension('cogs.stream')
-            await self.load_extension('cogs.cp')
-            await self.load_extension('cogs.rank')
-
-            await self.load_extension('jishaku')
-
             # 管理API起動
             await self._start_api()
 
@@ -125,6 +127,31 @@ class MyBot(commands.AutoShardedBot):
 
         self.loop.create_task(self.after_ready())
 
+    async def _init_database(self) -> None:
+        """DB接続（ソース更新と並行して行う）"""
+        from utils.db_manager import db
+        await db.initialize()
+
+    async def _apply_migrations(self) -> None:
+        """未適用のマイグレーションを適用（Cogは起動時にDDLを流さない）"""
+        from utils.db_manager import db
+        await MigrationRunner(db.pool).run()
+
+    async def _update_source(self) -> None:
+        """git pull → pip install（pip installは更新後のrequirementsを使う）"""
+        await git_pull()
+        await pip_install()
+
+    async def close(self) -> None:
+        await super().close()
+        await scheduler.stop()
+        await loop_monitor.stop()
+        await event_log.close()
+        voice_journal.stop_heartbeat()
+        await voice_journal.flush()
+        # Cogが返却しきれなかった共有DBプールを閉じる
+        await pool_registry.close_all()
+
     async def _start_api(self) -> None:
         """管理APIを起動"""
         import uvicorn
@@ -155,7 +182,8 @@ class MyBot(commands.AutoShardedBot):
         logger.info(startup_message())
         await update_status(self, "Bot Startup...")
 
-        await self.tree.sync()
+        # コマンドツリーが前回の同期から変わったスコープだけ同期
+        await command_syncer.sync(self)
 
         logger.info(yokobou())
         await update_status(self, "現在の処理: tree sync")
@@ -173,7 +201,7 @@ class MyBot(commands.AutoShardedBot):
             "timestamp": datetime.now(pytz.timezone('Asia/Tokyo')).strftime('%Y-%m-%d %H:%M:%S'),
             "session_id": session_id
         }
-        save_log(log_data)
+        event_log.record(log_data)
         if not self.initialized:
             try:
                 await startup_send_webhook(self, guild_id=dev_guild_id)
@@ -183,33 +211,10 @@ class MyBot(commands.AutoShardedBot):
             self.initialized = True
 
     async def load_cogs(self, folder_name: str) -> None:
-        cur: pathlib.Path = pathlib.Path('.')
-        for p in cur.glob(f"{folder_name}/**/*.py"):
-            if 'Dev' in p.parts:
-                continue
-
-            if p.stem == "__init__":
-                continue
-
-            if 'aus' in p.parts:
-                continue
-
-            if 'stream' in p.parts:
-                continue
-
-            if 'cp' in p.parts:
-                continue
-
-            if 'rank' in p.parts:
-                continue
-
-            try:
-                cog_path: str = p.relative_to(cur).with_suffix('').as_posix().replace('/', '.')
-                await self.load_extension(cog_path)
-                logger.info(f"Loaded extension: {cog_path}")
-            except commands.ExtensionFailed as e:
-                traceback.print_exc()
-                logger.error(f"Failed to load extension: {cog_path} | {e}")
+        """自動ロード対象のCogとパッケージCogを依存関係に沿って並列ロード"""
+        loader = CogLoader(self)
+        extensions = [*discover_extensions(folder_name), *PACKAGE_EXTENSIONS, 'jishaku']
+        self.extension_load_results = await loader.load_all(extensions)
 
     async def auth(self):
         auth_data = load_auth()
@@ -1,2 +0,0 @@
--- Placeholder migration file for CI test
--- This file ensures the migrations directory is tracked by git
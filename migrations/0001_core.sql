@@ -0,0 +1,81 @@
+-- 共通テーブル（utils/db_manager.py）
+CREATE TABLE IF NOT EXISTS users (
+    user_id BIGINT PRIMARY KEY,
+    username VARCHAR(255),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS auth_config (
+    id UUID PRIMARY KEY,
+    label VARCHAR(100) NOT NULL,
+    auth_code VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS members (
+    id BIGINT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    role VARCHAR(100) NOT NULL,
+    avatar TEXT,
+    message TEXT,
+    joined_at DATE,
+    joined_at_jp VARCHAR(50),
+    role_color VARCHAR(10),
+    socials JSONB DEFAULT '{}'::jsonb,
+    type VARCHAR(50) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS server_stats (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    total_ch_id BIGINT,
+    members_ch_id BIGINT,
+    bot_ch_id BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(guild_id)
+);
+
+CREATE TABLE IF NOT EXISTS bump_notice_settings (
+    guild_id BIGINT PRIMARY KEY,
+    channel_id BIGINT,
+    bot_id BIGINT,
+    role_id BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS member_emojis (
+    emoji_id BIGINT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    url TEXT NOT NULL,
+    animated BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS role_emoji_mappings (
+    role_id BIGINT PRIMARY KEY,
+    emoji_id BIGINT,
+    emoji_name TEXT,
+    animated BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS note_posts (
+    id SERIAL PRIMARY KEY,
+    post_id TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    author TEXT,
+    published_at TIMESTAMP WITH TIME ZONE,
+    summary TEXT,
+    thumbnail_url TEXT,
+    creator_icon TEXT,
+    notified_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
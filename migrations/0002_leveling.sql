@@ -0,0 +1,22 @@
+-- レベリング（rank/rank.py LevelDatabase）
+CREATE TABLE IF NOT EXISTS leaderboard (
+    guild_id BIGINT NOT NULL,
+    member_id BIGINT NOT NULL,
+    member_name TEXT NOT NULL,
+    member_level INTEGER NOT NULL DEFAULT 1,
+    member_xp INTEGER NOT NULL DEFAULT 0,
+    member_total_xp INTEGER NOT NULL DEFAULT 0,
+    last_message_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (guild_id, member_id)
+);
+
+CREATE TABLE IF NOT EXISTS role_rewards (
+    guild_id BIGINT NOT NULL,
+    role_id BIGINT NOT NULL,
+    level_requirement INTEGER NOT NULL,
+    role_name TEXT,
+    PRIMARY KEY (guild_id, role_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_guild_xp
+ON leaderboard(guild_id, member_total_xp DESC);
@@ -0,0 +1,28 @@
+-- イベントログ（cogs/manage/event_logger.py）
+
+-- 旧スキーマからの移行（channel_id → forum_channel_id）
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT FROM information_schema.columns
+        WHERE table_name = 'event_log_settings' AND column_name = 'channel_id'
+    ) AND NOT EXISTS (
+        SELECT FROM information_schema.columns
+        WHERE table_name = 'event_log_settings' AND column_name = 'forum_channel_id'
+    ) THEN
+        ALTER TABLE event_log_settings RENAME COLUMN channel_id TO forum_channel_id;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS event_log_settings (
+    guild_id BIGINT PRIMARY KEY,
+    forum_channel_id BIGINT NOT NULL,
+    events BIGINT NOT NULL DEFAULT 0,
+    ignore_bots BOOLEAN DEFAULT TRUE,
+    thread_ids JSONB DEFAULT '{}',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE event_log_settings ADD COLUMN IF NOT EXISTS thread_ids JSONB DEFAULT '{}';
+ALTER TABLE event_log_settings DROP COLUMN IF EXISTS ignore_channels;
@@ -0,0 +1,14 @@
+-- 自動削除（cogs/manage/auto_purge.py）
+CREATE TABLE IF NOT EXISTS auto_purge_settings (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    filter_type TEXT NOT NULL,
+    filter_value TEXT,
+    interval_hours INT NOT NULL DEFAULT 24,
+    max_age_hours INT NOT NULL DEFAULT 24,
+    last_run TIMESTAMP WITH TIME ZONE,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(guild_id, channel_id, filter_type)
+);
@@ -0,0 +1,14 @@
+-- リマインダー（cogs/tool/reminder.py）
+CREATE TABLE IF NOT EXISTS reminders (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT,
+    content TEXT NOT NULL,
+    remind_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    is_dm BOOLEAN DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS idx_reminders_remind_at ON reminders (remind_at);
@@ -0,0 +1,15 @@
+-- スケジュール投稿（cogs/tool/scheduled_post.py）
+CREATE TABLE IF NOT EXISTS scheduled_posts (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    author_id BIGINT NOT NULL,
+    content TEXT,
+    embed_json JSONB,
+    post_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    repeat_interval TEXT,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_posts_post_at ON scheduled_posts (post_at) WHERE is_active = TRUE;
@@ -0,0 +1,62 @@
+-- 匿名DM v2（cogs/manage/anonymous_dm.py）
+CREATE TABLE IF NOT EXISTS anon_dm_sessions_v2 (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL UNIQUE,
+    target_user_id BIGINT NOT NULL,
+    created_by BIGINT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    closed_at TIMESTAMP WITH TIME ZONE,
+    priority VARCHAR(20) DEFAULT 'medium',
+    tags TEXT[],
+    last_responder_id BIGINT,
+    last_activity_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS anon_dm_config_v2 (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL UNIQUE,
+    category_id BIGINT NOT NULL,
+    log_channel_id BIGINT,
+    updated_by BIGINT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 編集・削除同期用
+CREATE TABLE IF NOT EXISTS anon_dm_message_map (
+    id SERIAL PRIMARY KEY,
+    session_id INT,
+    server_message_id BIGINT NOT NULL,
+    dm_message_id BIGINT NOT NULL,
+    direction VARCHAR(10) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS anon_dm_memos (
+    id SERIAL PRIMARY KEY,
+    session_id INT NOT NULL,
+    content TEXT NOT NULL,
+    author_id BIGINT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS anon_dm_snippets (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    content TEXT NOT NULL,
+    created_by BIGINT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS anon_dm_messages_v2 (
+    id SERIAL PRIMARY KEY,
+    session_id INT,
+    direction VARCHAR(10) NOT NULL,
+    content TEXT,
+    author_id BIGINT NOT NULL,
+    has_attachment BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,40 @@
+-- チャンネルミュート（cogs/manage/channel_mute_system.py）
+CREATE TABLE IF NOT EXISTS channel_muted_users (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    added_by BIGINT NOT NULL,
+    added_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    reason TEXT,
+    UNIQUE(guild_id, user_id)
+);
+
+-- ユーザーごとの除外チャンネル
+CREATE TABLE IF NOT EXISTS channel_mute_exclusions (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    added_by BIGINT NOT NULL,
+    added_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, user_id, channel_id)
+);
+
+CREATE TABLE IF NOT EXISTS channel_mute_config (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL UNIQUE,
+    log_channel_id BIGINT,
+    is_enabled BOOLEAN DEFAULT TRUE,
+    updated_by BIGINT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS channel_mute_logs (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    action TEXT NOT NULL,
+    performed_by BIGINT NOT NULL,
+    details TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
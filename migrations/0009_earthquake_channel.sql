@@ -0,0 +1,35 @@
+-- 地震チャンネル（cogs/manage/earthquake_channel.py）
+CREATE TABLE IF NOT EXISTS earthquake_channel_settings (
+    guild_id BIGINT PRIMARY KEY,
+    category_id BIGINT NOT NULL,
+    notification_channel_id BIGINT NOT NULL,
+    notification_role_id BIGINT NOT NULL,
+    earthquake_role_id BIGINT,
+    min_scale INTEGER DEFAULT 30,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS earthquake_channel_sessions (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    talk_channel_id BIGINT,
+    info_channel_id BIGINT,
+    opened_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    closes_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    closed_at TIMESTAMP WITH TIME ZONE,
+    earthquake_info JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 古いテーブルに後から追加したカラム
+ALTER TABLE earthquake_channel_sessions
+ADD COLUMN IF NOT EXISTS talk_channel_id BIGINT,
+ADD COLUMN IF NOT EXISTS info_channel_id BIGINT,
+ADD COLUMN IF NOT EXISTS earthquake_info JSONB;
+
+ALTER TABLE earthquake_channel_settings
+ADD COLUMN IF NOT EXISTS min_scale INTEGER DEFAULT 30;
@@ -0,0 +1,9 @@
+-- 配信通知（cogs/stream/live_notification.py）
+CREATE TABLE IF NOT EXISTS live_notifications (
+    video_id TEXT PRIMARY KEY,
+    branch TEXT NOT NULL,
+    message_id BIGINT NOT NULL,
+    webhook_id BIGINT NOT NULL,
+    webhook_token TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
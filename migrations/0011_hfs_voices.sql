@@ -0,0 +1,28 @@
+-- HFS Voices インタビュー（cogs/note/hfs_voices.py）
+CREATE TABLE IF NOT EXISTS hfs_interviews (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    interviewer_id BIGINT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    thread_id BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    published_at TIMESTAMP,
+    note_url VARCHAR(500)
+);
+
+-- 進行中のインタビューはユーザーごとに1件
+CREATE UNIQUE INDEX IF NOT EXISTS idx_hfs_interviews_user_active_status
+ON hfs_interviews (user_id, status)
+WHERE status IN ('pending', 'in_progress');
+
+CREATE TABLE IF NOT EXISTS hfs_interview_responses (
+    id SERIAL PRIMARY KEY,
+    interview_id INTEGER REFERENCES hfs_interviews(id) ON DELETE CASCADE,
+    question_number INTEGER NOT NULL,
+    question_text TEXT NOT NULL,
+    response_text TEXT,
+    answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(interview_id, question_number)
+);
@@ -0,0 +1,8 @@
+-- 自動リアクション（cogs/tool/auto_reaction.py）
+CREATE TABLE IF NOT EXISTS auto_reactions (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    trigger_word TEXT NOT NULL,
+    reaction TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
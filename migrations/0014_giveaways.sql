@@ -0,0 +1,13 @@
+-- ギブアウェイ（cogs/tool/giveaway.py）
+CREATE TABLE IF NOT EXISTS giveaways (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    creator_id BIGINT NOT NULL,
+    prize TEXT NOT NULL,
+    end_time TIMESTAMP NOT NULL,
+    ended BOOLEAN DEFAULT FALSE,
+    winner_id BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
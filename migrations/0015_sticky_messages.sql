@@ -0,0 +1,23 @@
+-- スティッキーメッセージ（cogs/tool/pin_message.py）
+CREATE TABLE IF NOT EXISTS sticky_messages (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    message_content TEXT NOT NULL,
+    trigger_type VARCHAR(20) DEFAULT 'time',
+    time_interval INTEGER DEFAULT 300,
+    message_interval INTEGER DEFAULT 10,
+    is_enabled BOOLEAN DEFAULT TRUE,
+    last_message_count INTEGER DEFAULT 0,
+    last_sticky_time TIMESTAMP,
+    last_sticky_message_id BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, channel_id)
+);
+
+-- 古いテーブルに後から追加したカラム
+ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS trigger_type VARCHAR(20) DEFAULT 'time';
+ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS last_message_count INTEGER DEFAULT 0;
+ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS last_sticky_time TIMESTAMP;
+ALTER TABLE sticky_messages ADD COLUMN IF NOT EXISTS last_sticky_message_id BIGINT;
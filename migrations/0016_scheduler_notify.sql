@@ -0,0 +1,25 @@
+-- 期限付きジョブの追加・期限変更をスケジューラに通知（utils/scheduler.py）
+-- TG_ARGV[0]: 通知チャンネル, TG_ARGV[1]: ジョブのキーの列名
+CREATE OR REPLACE FUNCTION notify_scheduled_job() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(TG_ARGV[0], to_jsonb(NEW) ->> TG_ARGV[1]);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reminders_notify_scheduler ON reminders;
+CREATE TRIGGER reminders_notify_scheduler
+    AFTER INSERT OR UPDATE OF remind_at ON reminders
+    FOR EACH ROW EXECUTE FUNCTION notify_scheduled_job('scheduler_reminder', 'id');
+
+DROP TRIGGER IF EXISTS scheduled_posts_notify_scheduler ON scheduled_posts;
+CREATE TRIGGER scheduled_posts_notify_scheduler
+    AFTER INSERT OR UPDATE OF post_at, is_active ON scheduled_posts
+    FOR EACH ROW EXECUTE FUNCTION notify_scheduled_job('scheduler_scheduled_post', 'id');
+
+DROP TRIGGER IF EXISTS giveaways_notify_scheduler ON giveaways;
+CREATE TRIGGER giveaways_notify_scheduler
+    AFTER INSERT OR UPDATE OF end_time ON giveaways
+    FOR EACH ROW EXECUTE FUNCTION notify_scheduled_job('scheduler_giveaway', 'message_id');
+
+CREATE INDEX IF NOT EXISTS idx_giveaways_active ON giveaways (end_time) WHERE ended = FALSE;
@@ -17,7 +17,9 @@ from models.rank.achievements import AchievementType
 from models.rank.level_config import LevelConfig
 from utils.commands_help import is_guild, log_commands
 from utils.database import execute_query
+from utils.db_statements import statements
 from utils.logging import setup_logging
+from utils.message_pipeline import MessageContext, message_pipeline
 from utils.rank.achievement_manager import achievement_manager
 from utils.rank.formula_manager import calculate_level_from_xp, formula_manager
 from utils.rank.quality_analyzer import analyze_message_quality
@@ -25,6 +27,21 @@ from utils.rank.quality_analyzer import analyze_message_quality
 logger = setup_logging("D")
 settings = get_settings()
 
+# メッセージごとに実行されるリーダーボードのステートメント
+GET_MEMBER = statements.register(
+    "main", "leaderboard.get_member", "SELECT * FROM leaderboard WHERE guild_id = $1 AND member_id = $2"
+)
+INSERT_MEMBER = statements.register(
+    "main", "leaderboard.insert_member",
+    "INSERT INTO leaderboard (guild_id, member_id, member_name) VALUES ($1, $2, $3)"
+)
+UPDATE_MEMBER_XP = statements.register("main", "leaderboard.update_xp", '''
+    UPDATE leaderboard
+    SET member_xp = $1, member_total_xp = $2, member_level = $3,
+        last_message_time = CURRENT_TIMESTAMP
+    WHERE guild_id = $4 AND member_id = $5
+''')
+
 
 class RankCardGenerator:
     """美しいランクカード画像を生成するクラス"""
@@ -310,41 +327,6 @@ class LevelDatabase:
     def __init__(self):
         pass
 
-    async def initialize(self):
-        """データベース初期化"""
-        # メインテーブル作成
-        await execute_query('''
-            CREATE TABLE IF NOT EXISTS leaderboard (
-                guild_id BIGINT NOT NULL,
-                member_id BIGINT NOT NULL,
-                member_name TEXT NOT NULL,
-                member_level INTEGER NOT NULL DEFAULT 1,
-                member_xp INTEGER NOT NULL DEFAULT 0,
-                member_total_xp INTEGER NOT NULL DEFAULT 0,
-                last_message_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (guild_id, member_id)
-            )
-        ''', fetch_type='status')
-
-        # ロール報酬テーブル
-        await execute_query('''
-            CREATE TABLE IF NOT EXISTS role_rewards (
-                guild_id BIGINT NOT NULL,
-                role_id BIGINT NOT NULL,
-                level_requirement INTEGER NOT NULL,
-                role_name TEXT,
-                PRIMARY KEY (guild_id, role_id)
-            )
-        ''', fetch_type='status')
-
-        # インデックス作成
-        await execute_query('''
-            CREATE INDEX IF NOT EXISTS idx_leaderboard_guild_xp
-            ON leaderboard(guild_id, member_total_xp DESC)
-        ''', fetch_type='status')
-
-        logger.info("レベリングシステムのテーブルが初期化されました")
-
     async def calculate_level(self, guild_id: int, total_xp: int) -> int:
         """総XPからレベルを計算（カスタム公式対応）"""
         if total_xp <= 0:
@@ -392,18 +374,12 @@ class LevelDatabase:
     async def get_or_create_member(self, guild_id: int, member_id: int,
                                   member_name: str) -> dict[str, Any]:
         """メンバー情報を取得または作成"""
-        result = await execute_query(
-            "SELECT * FROM leaderboard WHERE guild_id = $1 AND member_id = $2",
-            guild_id, member_id, fetch_type='row'
-        )
+        result = await execute_query(GET_MEMBER, guild_id, member_id, fetch_type='row')
 
         if result:
             return dict(result)
         else:
-            await execute_query(
-                "INSERT INTO leaderboard (guild_id, member_id, member_name) VALUES ($1, $2, $3)",
-                guild_id, member_id, member_name, fetch_type='status'
-            )
+            await execute_query(INSERT_MEMBER, guild_id, member_id, member_name, fetch_type='status')
             return {
                 'guild_id': guild_id,
                 'member_id': member_id,
@@ -425,12 +401,10 @@ class LevelDatabase:
 
             current_level_xp, required_xp = await self.get_current_level_xp(guild_id, new_total_xp)
 
-            await execute_query('''
-                UPDATE leaderboard
-                SET member_xp = $1, member_total_xp = $2, member_level = $3,
-                    last_message_time = CURRENT_TIMESTAMP
-                WHERE guild_id = $4 AND member_id = $5
-            ''', current_level_xp, new_total_xp, new_level, guild_id, member_id, fetch_type='status')
+            await execute_query(
+                UPDATE_MEMBER_XP, current_level_xp, new_total_xp, new_level, guild_id, member_id,
+                fetch_type='status'
+            )
 
             level_up = new_level > old_level
             return level_up, new_level
@@ -496,9 +470,13 @@ class LevelingSystem(commands.Cog, name="レベリング"):
 
     async def cog_load(self):
         """Cog読み込み時の処理"""
-        await self.db.initialize()
+        message_pipeline.attach(self.bot)
+        message_pipeline.register("leveling_xp", self.add_message_xp)
         logger.info("レベリングシステム（AI設定対応）が正常に読み込まれました")
 
+    async def cog_unload(self):
+        message_pipeline.unregister("leveling_xp")
+
     async def get_guild_config(self, guild_id: int) -> LevelConfig:
         """ギルドのAI設定を取得（キャッシュ対応）"""
         import time
@@ -592,9 +570,9 @@ class LevelingSystem(commands.Cog, name="レベリング"):
 
                 if quality_result.success and quality_result.analysis:
                     quality_multiplier = quality_result.analysis.xp_multiplier
-                    logger.info(f"品質分析完了 - カテゴリ: {quality_result.analysis.category}, "
-                               f"品質倍率: {quality_multiplier:.2f}, "
-                               f"総合スコア: {quality_result.analysis.quality_scores.overall:.2f}")
+                    logger.debug("品質分析完了 - カテゴリ: %s, 品質倍率: %.2f, 総合スコア: %.2f",
+                                 quality_result.analysis.category, quality_multiplier,
+                                 quality_result.analysis.quality_scores.overall)
                 else:
                     logger.warning(f"品質分析失敗: {quality_result.error_message}")
 
@@ -720,11 +698,9 @@ class LevelingSystem(commands.Cog, name="レベリング"):
 
         return False
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """AI設定対応メッセージイベントリスナー"""
-        if message.author.bot or not message.guild:
-            return
+    async def add_message_xp(self, ctx: MessageContext):
+        """AI設定対応のメッセージXP付与（Bot・DMはパイプライン側で除外済み）"""
+        message = ctx.message
 
         try:
             current_time = asyncio.get_event_loop().time()
@@ -733,8 +709,8 @@ class LevelingSystem(commands.Cog, name="レベリング"):
             if await self.is_spam(message.guild.id, message.author.id, message.content):
                 return
 
-            # ユーザーロール取得
-            user_roles = [role.id for role in message.author.roles]
+            # ユーザーロール（パイプラインで解析済み）
+            user_roles = list(ctx.role_ids)
 
             # AI設定に基づくXP計算
             xp_gain, cooldown = await self.calculate_xp_gain(
@@ -777,8 +753,7 @@ class LevelingSystem(commands.Cog, name="レベリング"):
                 logger.info(f"Guild {message.guild.id}, User {message.author.id}: "
                            f"レベルアップ {new_level} (XP: {xp_gain})")
             else:
-                logger.debug(f"Guild {message.guild.id}, User {message.author.id}: "
-                            f"XP付与 {xp_gain}")
+                logger.debug("Guild %s, User %s: XP付与 %s", message.guild.id, message.author.id, xp_gain)
 
         except Exception as e:
             logger.error(f"メッセージ処理エラー (Guild: {message.guild.id}): {e}")
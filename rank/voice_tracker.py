@@ -6,16 +6,23 @@ Discord.pyのVoiceStateUpdateイベントを利用して
 リアルタイムでXP計算を実行する。
 """
 
+import asyncio
 from datetime import datetime
 from typing import Optional
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from models.rank.voice_activity import VoiceActivityType
 from utils.database import execute_query
 from utils.logging import setup_logging
 from utils.rank.voice_manager import voice_manager
+from utils.voice_presence import (
+    VoiceEventType,
+    VoicePresence,
+    VoicePresenceEvent,
+    voice_presence,
+)
 
 logger = setup_logging("VOICE_TRACKER")
 
@@ -28,57 +35,79 @@ class VoiceTrackerCog(commands.Cog):
         # 発言検出用のキャッシュ
         self.speaking_cache: dict[int, bool] = {}  # user_id -> is_speaking
 
-        # 定期的なAFK検出タスク
-        self.afk_detection_task.start()
-
+        # AFK検出はvoice_managerのタイマーで最後の活動から一定時間後に行う
+        self._restore_task: Optional[asyncio.Task] = None
         logger.info("音声チャンネル追跡システムを開始しました")
 
+    async def cog_load(self):
+        """VCイベントを購読し、再起動前の音声セッションを復元"""
+        voice_presence.attach(self.bot)
+        voice_presence.subscribe(self.on_vc_event)
+        self._restore_task = asyncio.create_task(self._restore_voice_sessions())
+
     def cog_unload(self):
         """Cog終了時のクリーンアップ"""
-        self.afk_detection_task.cancel()
+        voice_presence.unsubscribe(self.on_vc_event)
+        if self._restore_task:
+            self._restore_task.cancel()
+        voice_manager.stop_timers()
         logger.info("音声チャンネル追跡システムを停止しました")
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState
-    ):
-        """音声状態変更イベント処理"""
+    async def _restore_voice_sessions(self):
+        """ジャーナルと現在のVC状態を突き合わせて音声XPセッションを復元
+
+        停止中に参加したメンバーはvoice_presenceの復元JOINイベントで開始される。
+        """
+        await self.bot.wait_until_ready()
+        try:
+            completed, _ = await voice_manager.restore_sessions(self.bot.guilds)
+
+            # 停止中に退出したセッションのXPを統合
+            for completed_session in completed:
+                await self._integrate_voice_xp_to_main_system(completed_session)
+
+        except Exception as e:
+            logger.error(f"音声セッション復元エラー: {e}")
+
+    async def on_vc_event(self, event: VoicePresenceEvent):
+        """VCイベント処理（voice_presenceが解析済み）"""
         try:
             # ボットは除外
-            if member.bot:
+            if event.is_bot:
                 return
 
-            guild_id = member.guild.id
-            user_id = member.id
+            guild_id = event.guild_id
+            user_id = event.user_id
 
             # 音声チャンネル参加処理
-            if before.channel is None and after.channel is not None:
-                await self._handle_voice_join(guild_id, user_id, after.channel.id, after)
+            if event.type == VoiceEventType.JOIN:
+                await self._handle_voice_join(guild_id, user_id, event.channel_id, event.session)
 
             # 音声チャンネル離脱処理
-            elif before.channel is not None and after.channel is None:
-                await self._handle_voice_leave(guild_id, user_id)
+            elif event.type == VoiceEventType.LEAVE:
+                # 停止中の退出はvoice_managerのジャーナル復元で最後の記録時刻に完了済み
+                if not event.restored:
+                    await self._handle_voice_leave(guild_id, user_id)
 
             # 音声チャンネル移動処理
-            elif before.channel != after.channel and before.channel is not None and after.channel is not None:
-                await self._handle_voice_move(guild_id, user_id, before.channel.id, after.channel.id, after)
+            elif event.type == VoiceEventType.MOVE:
+                await self._handle_voice_move(
+                    guild_id, user_id, event.previous_channel_id, event.channel_id, event.session
+                )
 
             # 音声状態変更処理（同じチャンネル内）
-            elif before.channel == after.channel and after.channel is not None:
-                await self._handle_voice_state_change(guild_id, user_id, after)
+            elif event.type == VoiceEventType.MUTE:
+                await self._handle_voice_state_change(guild_id, user_id, event.session)
 
         except Exception as e:
-            logger.error(f"音声状態更新エラー (Guild: {member.guild.id}, User: {member.id}): {e}")
+            logger.error(f"音声状態更新エラー (Guild: {event.guild_id}, User: {event.user_id}): {e}")
 
     async def _handle_voice_join(
         self,
         guild_id: int,
         user_id: int,
         channel_id: int,
-        voice_state: discord.VoiceState
+        voice_state: VoicePresence
     ):
         """音声チャンネル参加処理"""
         try:
@@ -123,7 +152,7 @@ class VoiceTrackerCog(commands.Cog):
         user_id: int,
         old_channel_id: int,
         new_channel_id: int,
-        voice_state: discord.VoiceState
+        voice_state: VoicePresence
     ):
         """音声チャンネル移動処理"""
         try:
@@ -150,7 +179,7 @@ class VoiceTrackerCog(commands.Cog):
         self,
         guild_id: int,
         user_id: int,
-        voice_state: discord.VoiceState
+        voice_state: VoicePresence
     ):
         """音声状態変更処理（同じチャンネル内）"""
         try:
@@ -167,8 +196,8 @@ class VoiceTrackerCog(commands.Cog):
         except Exception as e:
             logger.error(f"音声状態変更処理エラー: {e}")
 
-    def _determine_activity_type(self, voice_state: discord.VoiceState) -> VoiceActivityType:
-        """VoiceStateからVoiceActivityTypeを判定"""
+    def _determine_activity_type(self, voice_state: VoicePresence) -> VoiceActivityType:
+        """ミュート・スピーカーオフ状態からVoiceActivityTypeを判定"""
         # スピーカーオフ（deafened）
         if voice_state.deaf or voice_state.self_deaf:
             return VoiceActivityType.DEAFENED
@@ -248,55 +277,6 @@ class VoiceTrackerCog(commands.Cog):
         except Exception as e:
             logger.error(f"音声XP統合エラー: {e}")
 
-    @tasks.loop(minutes=5)  # 5分ごとにAFK検出
-    async def afk_detection_task(self):
-        """定期的なAFK検出タスク"""
-        try:
-            current_time = datetime.now()
-            afk_threshold_minutes = 10  # デフォルトAFK判定時間
-
-            for guild in self.bot.guilds:
-                try:
-                    # ギルドの音声設定を取得
-                    config = await voice_manager.get_guild_voice_config(guild.id)
-                    afk_threshold_minutes = config.afk_detection_minutes
-
-                    # 音声チャンネルのメンバーをチェック
-                    for channel in guild.voice_channels:
-                        for member in channel.members:
-                            if member.bot:
-                                continue
-
-                            # 最後の活動時間をチェック（簡易実装）
-                            active_session = None
-
-                            for session in voice_manager.active_sessions.values():
-                                if session.guild_id == guild.id and session.user_id == member.id:
-                                    active_session = session
-                                    break
-
-                            if not active_session:
-                                continue
-
-                            # AFK判定
-                            time_since_activity = (current_time - active_session.last_activity_time).total_seconds()
-                            if time_since_activity > (afk_threshold_minutes * 60):
-                                # AFK状態に設定
-                                await voice_manager.update_voice_activity(
-                                    guild.id, member.id, VoiceActivityType.AFK
-                                )
-
-                except Exception as guild_error:
-                    logger.debug(f"Guild {guild.id} AFK検出エラー: {guild_error}")
-
-        except Exception as e:
-            logger.error(f"AFK検出タスクエラー: {e}")
-
-    @afk_detection_task.before_loop
-    async def before_afk_detection_task(self):
-        """AFK検出タスク開始前の待機"""
-        await self.bot.wait_until_ready()
-
     # 音声統計表示コマンド
     @commands.hybrid_command(name="voice-stats", description="音声活動統計を表示")
     async def voice_stats(self, ctx: commands.Context, user: Optional[discord.Member] = None):
@@ -366,9 +346,8 @@ class VoiceTrackerCog(commands.Cog):
                 inline=True
             )
 
-            # 現在のアクティブセッション
-            user_key = f"{ctx.guild.id}:{target_user.id}"
-            active_session = voice_manager.active_sessions.get(user_key)
+            # 現在のアクティブセッション（現在時刻までのXPを精算して表示）
+            active_session = await voice_manager.settle_session(ctx.guild.id, target_user.id)
 
             if active_session:
                 current_session_time = int((datetime.now() - active_session.start_time).total_seconds())
@@ -380,6 +359,8 @@ class VoiceTrackerCog(commands.Cog):
                     value=f"**チャンネル:** <#{active_session.channel_id}>\n"
                           f"**経過時間:** {current_hours}時間{current_minutes}分\n"
                           f"**状態:** {active_session.current_activity.value}\n"
+                          f"**参加人数:** {voice_manager.get_participant_count(ctx.guild.id, active_session.channel_id)}人"
+                          f" (最大 {active_session.peak_participants}人)\n"
                           f"**累積XP:** {active_session.pending_xp}",
                     inline=False
                 )
@@ -0,0 +1,95 @@
+"""
+Tests for voice recording spool buffers.
+"""
+
+import io
+import wave
+
+import pytest
+
+from cogs.voice.encoder import ffmpeg_available
+from cogs.voice.recording import BYTES_PER_SECOND, UserAudioBuffer, pcm_to_wav_bytes
+
+
+class TestUserAudioBuffer:
+    """Test disk-backed per-user audio buffers."""
+
+    def test_spool_header_patched_on_close(self, tmp_path):
+        """Frames are appended to disk and the WAV header is fixed up on close."""
+        buffer = UserAudioBuffer(123, spool_dir=tmp_path)
+        packet = b"\x01\x00" * 1920  # 20ms of 48kHz stereo PCM
+
+        for _ in range(50):
+            buffer.write(packet)
+
+        path = buffer.close()
+
+        assert buffer.duration_seconds == len(packet) * 50 / BYTES_PER_SECOND
+        assert path.stat().st_size == buffer.file_size_bytes
+        with wave.open(str(path), "rb") as wav:
+            assert wav.getnchannels() == 2
+            assert wav.getframerate() == 48000
+            assert wav.getnframes() == 48000
+
+    def test_write_after_close_is_ignored(self, tmp_path):
+        """Late packets from the receive thread do not touch a closed spool."""
+        buffer = UserAudioBuffer(123, spool_dir=tmp_path)
+        buffer.close()
+        buffer.write(b"\x00" * 3840)
+
+        assert buffer.bytes_written == 0
+
+    def test_discard_removes_file(self, tmp_path):
+        """Discarding a buffer deletes its spool file."""
+        buffer = UserAudioBuffer(123, spool_dir=tmp_path)
+        buffer.write(b"\x00" * 3840)
+        buffer.discard()
+
+        assert not buffer.path.exists()
+
+
+class TestEncodingStage:
+    """Test the incremental encoding stage."""
+
+    def test_pcm_to_wav_bytes(self):
+        """Speech PCM is wrapped as 16kHz mono WAV in memory."""
+        wav_bytes = pcm_to_wav_bytes(b"\x00\x00" * 16000)
+
+        with wave.open(io.BytesIO(wav_bytes), "rb") as wav:
+            assert wav.getnchannels() == 1
+            assert wav.getframerate() == 16000
+            assert wav.getnframes() == 16000
+
+    @pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not installed")
+    def test_encoder_produces_archive_and_speech(self, tmp_path):
+        """Audio written while recording is encoded to Opus and 16kHz mono PCM."""
+        buffer = UserAudioBuffer(123, spool_dir=tmp_path)
+        buffer.start_encoder()
+        buffer.encoder.poll_interval = 0.01
+
+        for _ in range(100):
+            buffer.write(b"\x10\x00" * 1920)
+        buffer.close()
+
+        assert buffer.finish_encoding() is True
+        assert buffer.upload_path.suffix == ".ogg"
+        assert buffer.upload_path.stat().st_size < buffer.file_size_bytes
+        # 2秒 * 16000Hz * 2bytes
+        assert buffer.speech_path.stat().st_size == 64000
+
+        buffer.discard()
+        assert not buffer.upload_path.exists()
+
+    def test_timestamped_writes_produce_segments(self, tmp_path):
+        """Packets written with receive timestamps are segmented into utterances."""
+        buffer = UserAudioBuffer(123, spool_dir=tmp_path)
+        speech = b"\x00\x10" * 1920
+
+        for i in range(25):
+            buffer.write(speech, i * 0.02)
+        for i in range(25):
+            buffer.write(speech, 3.0 + i * 0.02)
+        buffer.close()
+
+        assert [round(s.start, 2) for s in buffer.segments] == [0.0, 3.0]
+        buffer.discard()
@@ -0,0 +1,92 @@
+"""
+Tests for the concurrent Whisper transcription service.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cogs.voice.transcription import TranscriptionRequest, TranscriptionService
+
+
+class FakeTranscriptions:
+    """Stand-in for client.audio.transcriptions with controllable failures."""
+
+    def __init__(self, failures=None, delay=0.01):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, file, language=None):
+        filename, audio = file
+        self.calls.append((filename, language))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures.get(filename, 0) > 0:
+                self.failures[filename] -= 1
+                raise RuntimeError("rate limited")
+            return SimpleNamespace(text=f" {audio.decode()} ")
+        finally:
+            self.in_flight -= 1
+
+
+def _service(transcriptions, **kwargs):
+    client = SimpleNamespace(audio=SimpleNamespace(transcriptions=transcriptions))
+    return TranscriptionService(client, retry_base_delay=0, **kwargs)
+
+
+class TestTranscriptionService:
+    """Test concurrency limits, retries and result ordering."""
+
+    @pytest.mark.asyncio
+    async def test_results_keep_input_order(self):
+        """Results line up with requests even though calls overlap."""
+        fake = FakeTranscriptions()
+        service = _service(fake, concurrency=2)
+        requests = [TranscriptionRequest(f"{i}.wav", f"text{i}".encode()) for i in range(6)]
+
+        texts = await service.transcribe_many(requests)
+
+        assert texts == [f"text{i}" for i in range(6)]
+        assert fake.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self):
+        """A request that fails fewer times than the attempt budget succeeds."""
+        fake = FakeTranscriptions(failures={"a.wav": 2})
+        service = _service(fake, attempts=3)
+
+        text = await service.transcribe(TranscriptionRequest("a.wav", b"hello"))
+
+        assert text == "hello"
+        assert len(fake.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_failure_is_returned_per_request(self):
+        """An exhausted request yields its exception without sinking the batch."""
+        fake = FakeTranscriptions(failures={"bad.wav": 5})
+        service = _service(fake, attempts=2)
+
+        texts = await service.transcribe_many([
+            TranscriptionRequest("ok.wav", b"fine"),
+            TranscriptionRequest("bad.wav", b"never"),
+        ])
+
+        assert texts[0] == "fine"
+        assert isinstance(texts[1], RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_auto_language_is_omitted(self):
+        """language='auto' lets Whisper detect the language."""
+        fake = FakeTranscriptions()
+        service = _service(fake)
+
+        await service.transcribe(TranscriptionRequest("a.wav", b"x", language="auto"))
+        await service.transcribe(TranscriptionRequest("b.wav", b"x", language="en"))
+
+        assert fake.calls == [("a.wav", None), ("b.wav", "en")]
@@ -0,0 +1,74 @@
+"""
+Tests for voice activity segmentation.
+"""
+
+import struct
+
+from cogs.voice.vad import EnergySegmenter, SpeechSegment, speech_byte_range
+
+PACKET_SECONDS = 0.02
+SILENCE = b"\x00\x00" * 1920
+SPEECH = struct.pack("<h", 3000) * 1920
+
+
+def _feed(segmenter, pattern, start=0.0):
+    """Feed a string of 's' (speech) / '.' (silence) packets at 20ms spacing."""
+    offset = 0
+    for i, kind in enumerate(pattern):
+        packet = SPEECH if kind == "s" else SILENCE
+        segmenter.feed(packet, start + i * PACKET_SECONDS, offset, PACKET_SECONDS)
+        offset += len(packet)
+
+
+class TestEnergySegmenter:
+    """Test energy-based utterance segmentation."""
+
+    def test_splits_on_silence(self):
+        """Two utterances separated by a long pause become two segments."""
+        segmenter = EnergySegmenter(1)
+        _feed(segmenter, "s" * 50 + "." * 50 + "s" * 25)
+
+        segments = segmenter.finish()
+
+        assert len(segments) == 2
+        assert segments[0].start == 0.0
+        assert round(segments[0].end, 2) == 1.0
+        assert round(segments[1].start, 2) == 2.0
+        assert segments[1].byte_start == 100 * len(SPEECH)
+
+    def test_short_pause_stays_in_segment(self):
+        """Pauses shorter than the hangover do not split an utterance."""
+        segmenter = EnergySegmenter(1)
+        _feed(segmenter, "s" * 20 + "." * 10 + "s" * 20)
+
+        assert len(segmenter.finish()) == 1
+
+    def test_packet_gap_closes_segment(self):
+        """A gap in received packets (user stopped transmitting) ends the segment."""
+        segmenter = EnergySegmenter(1)
+        segmenter.feed(SPEECH * 25, 0.0, 0, 0.5)
+        segmenter.feed(SPEECH * 25, 5.0, len(SPEECH) * 25, 0.5)
+
+        segments = segmenter.finish()
+
+        assert [s.start for s in segments] == [0.0, 5.0]
+
+    def test_drops_blips_and_splits_long_segments(self):
+        """Very short noises are dropped and long speech is capped."""
+        segmenter = EnergySegmenter(1, max_duration=1.0)
+        _feed(segmenter, "s" * 5 + "." * 60 + "s" * 120)
+
+        segments = segmenter.finish()
+
+        assert all(s.duration <= 1.0 + PACKET_SECONDS for s in segments)
+        assert segments[0].start > 1.0
+
+
+class TestSpeechByteRange:
+    """Test spool to speech-track offset conversion."""
+
+    def test_offsets_scale_by_six(self):
+        """48kHz stereo offsets map to 16kHz mono offsets on sample boundaries."""
+        segment = SpeechSegment(1, 0.0, 1.0, 192000, 384000)
+
+        assert speech_byte_range(segment) == (32000, 64000)
@@ -0,0 +1,103 @@
+"""
+Tests for dependency-aware parallel extension loading.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import cog_loader
+from utils.cog_loader import CogLoader, discover_extensions
+
+
+class ExtensionError(Exception):
+    pass
+
+
+class ExtensionAlreadyLoaded(ExtensionError):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def extension_errors(monkeypatch):
+    """discord is mocked in conftest; give the loader real exception classes."""
+    monkeypatch.setattr(cog_loader, "commands", SimpleNamespace(
+        ExtensionError=ExtensionError, ExtensionAlreadyLoaded=ExtensionAlreadyLoaded,
+    ))
+
+
+class FakeBot:
+    """Loads extensions by sleeping, recording start/finish order."""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = set(failing)
+        self.events = []
+
+    async def load_extension(self, name):
+        self.events.append(("start", name))
+        await asyncio.sleep(self.delays.get(name, 0))
+        if name in self.failing:
+            raise ExtensionError(f"{name}: boom")
+        self.events.append(("done", name))
+
+
+class TestCogLoader:
+    """Test concurrent loading under the dependency graph."""
+
+    @pytest.mark.asyncio
+    async def test_independent_extensions_load_concurrently(self):
+        """Wall time is bounded by the slowest extension, not the sum."""
+        bot = FakeBot({f"cogs.c{i}": 0.05 for i in range(5)})
+        loader = CogLoader(bot, dependencies={})
+
+        started = time.perf_counter()
+        results = await loader.load_all(bot.delays)
+        elapsed = time.perf_counter() - started
+
+        assert all(r.ok for r in results)
+        assert elapsed < 0.2
+        assert all(r.seconds >= 0.04 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_dependencies_finish_first(self):
+        """An extension starts only after its dependencies have loaded."""
+        bot = FakeBot({"cogs.cp": 0.05, "cogs.rank": 0, "cogs.other": 0})
+        loader = CogLoader(bot, dependencies={"cogs.rank": ("cogs.cp",)})
+
+        results = await loader.load_all(["cogs.rank", "cogs.cp", "cogs.other"])
+
+        assert bot.events.index(("done", "cogs.cp")) < bot.events.index(("start", "cogs.rank"))
+        assert bot.events.index(("start", "cogs.other")) < bot.events.index(("done", "cogs.cp"))
+        rank = next(r for r in results if r.name == "cogs.rank")
+        assert rank.waited_seconds >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded_not_raised(self):
+        """A failing extension is reported; the others still load."""
+        bot = FakeBot({"cogs.a": 0, "cogs.b": 0}, failing=["cogs.a"])
+        loader = CogLoader(bot, dependencies={})
+
+        await loader.load_all(["cogs.a", "cogs.b"])
+
+        assert list(loader.failed) == ["cogs.a"]
+        assert ("done", "cogs.b") in bot.events
+
+    @pytest.mark.asyncio
+    async def test_cycles_are_rejected(self):
+        """A dependency cycle fails fast instead of deadlocking."""
+        loader = CogLoader(FakeBot({}), dependencies={"a": ("b",), "b": ("a",)})
+
+        with pytest.raises(ValueError):
+            await loader.load_all(["a", "b"])
+
+
+def test_discover_extensions(tmp_path):
+    """Package directories and __init__ files are left to explicit loading."""
+    for path in ("cogs/tool/omikuji.py", "cogs/tool/__init__.py", "cogs/cp/db.py", "cogs/Dev/x.py"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+
+    assert discover_extensions("cogs", tmp_path) == ["cogs.tool.omikuji"]
@@ -0,0 +1,131 @@
+"""
+Benchmark: registry statements vs. per-call statement text under message load.
+
+Requires a PostgreSQL server; set BENCHMARK_DATABASE_URL to run, e.g.
+    BENCHMARK_DATABASE_URL=postgresql://postgres@localhost/bench \
+        pytest tests/test_performance/test_prepared_statements.py --benchmark-only
+
+"text" models the old RankDB.add_xp path: the SQL text varies per
+xp_type/update_active combination and, with the statement cache disabled,
+every call pays Parse + plan on the server. "registry" uses the single
+registered statement prepared in the pool's init hook, so each call is only
+Bind + Execute. Compare the two means in the benchmark report.
+"""
+
+import asyncio
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from cogs.rank.models import ADD_XP
+from utils.db_pool import PoolRegistry
+from utils.db_statements import statements
+
+DSN = os.environ.get("BENCHMARK_DATABASE_URL")
+MESSAGES = 2000
+CONCURRENCY = 8
+
+pytestmark = pytest.mark.skipif(not DSN, reason="BENCHMARK_DATABASE_URL is not set")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rank_users (
+        user_id BIGINT NOT NULL,
+        guild_id BIGINT NOT NULL,
+        yearly_xp INT NOT NULL DEFAULT 0,
+        lifetime_xp BIGINT NOT NULL DEFAULT 0,
+        active_days INT NOT NULL DEFAULT 0,
+        current_level INT NOT NULL DEFAULT 1,
+        is_regular BOOLEAN NOT NULL DEFAULT FALSE,
+        current_streak INT NOT NULL DEFAULT 0,
+        last_message_xp_at TIMESTAMPTZ,
+        last_omikuji_xp_date DATE,
+        last_active_date DATE,
+        updated_at TIMESTAMPTZ,
+        PRIMARY KEY (user_id, guild_id)
+    )
+"""
+
+
+def _text_variant(xp_type: str, update_active: bool) -> str:
+    """The per-combination SQL the f-string version produced."""
+    extra = ", last_message_xp_at = $5" if xp_type == "message" else ""
+    active = ", active_days = rank_users.active_days + 1" if update_active else ""
+    return f"""
+        INSERT INTO rank_users (user_id, guild_id, yearly_xp, lifetime_xp, last_active_date, updated_at)
+        VALUES ($1, $2, $3::INT, $3::BIGINT, $4, $5)
+        ON CONFLICT (user_id, guild_id) DO UPDATE
+        SET yearly_xp = rank_users.yearly_xp + $3::INT, updated_at = $5 {extra} {active}
+        RETURNING *
+    """
+
+
+def _workload():
+    rng = random.Random(0)
+    return [
+        (rng.randrange(500), rng.choice(("message", "vc", "reaction")), rng.random() < 0.5)
+        for _ in range(MESSAGES)
+    ]
+
+
+async def _run(pool, call):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(item):
+        async with semaphore, pool.acquire() as conn:
+            await call(conn, *item)
+
+    await asyncio.gather(*(one(item) for item in _workload()))
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def registry(loop):
+    registry = PoolRegistry()
+    registry.add_init_hook(statements.prepare_connection)
+
+    async def setup():
+        pool = await registry.get(DSN, name="checkpoint", min_size=CONCURRENCY, max_size=CONCURRENCY)
+        await pool.execute(SCHEMA)
+        return pool
+
+    loop.run_until_complete(setup())
+    yield registry
+    loop.run_until_complete(registry.close_all())
+
+
+def test_text_statements(benchmark, loop, registry):
+    """Baseline: statement text varies per combination and is never cached."""
+    pool = loop.run_until_complete(
+        PoolRegistry().get(DSN, name="bench_text", min_size=CONCURRENCY, max_size=CONCURRENCY, statement_cache_size=0)
+    )
+
+    async def call(conn, user_id, xp_type, update_active):
+        await conn.fetchrow(
+            _text_variant(xp_type, update_active), user_id, 1, 5, date.today(), datetime.now(timezone.utc)
+        )
+
+    benchmark.pedantic(lambda: loop.run_until_complete(_run(pool, call)), rounds=5, iterations=1)
+    loop.run_until_complete(pool.close())
+
+
+def test_registry_statements(benchmark, loop, registry):
+    """Registry: one statement, prepared on connection init, executed by handle."""
+    pool = registry.pools()[0]
+
+    async def call(conn, user_id, xp_type, update_active):
+        now = datetime.now(timezone.utc)
+        today = date.today()
+        await ADD_XP.fetchrow(
+            conn, user_id, 1, 5, today, now, today - timedelta(days=1),
+            now if xp_type == "message" else None, None, update_active,
+        )
+
+    benchmark.pedantic(lambda: loop.run_until_complete(_run(pool, call)), rounds=5, iterations=1)
@@ -0,0 +1,103 @@
+"""
+Tests for hash-based application command sync.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from utils import command_sync
+from utils.command_sync import CommandSyncer, payload_hash
+
+
+class FakeCommand:
+    def __init__(self, name, description="desc"):
+        self.name = name
+        self.description = description
+
+    def to_dict(self, tree):
+        return {"name": self.name, "description": self.description, "options": []}
+
+
+class FakeTree:
+    """Holds global and per-guild commands and records sync calls."""
+
+    translator = None
+
+    def __init__(self):
+        self.global_commands = [FakeCommand("ping"), FakeCommand("help")]
+        self._guild_commands = {}
+        self.synced = []
+
+    def get_commands(self, guild=None):
+        if guild is None:
+            return list(self.global_commands)
+        return list(self._guild_commands.get(guild.id, {}).values())
+
+    async def sync(self, guild=None):
+        self.synced.append(None if guild is None else guild.id)
+
+
+@pytest.fixture(autouse=True)
+def discord_object(monkeypatch):
+    """discord is mocked in conftest; give guild snowflakes a real id."""
+    monkeypatch.setattr(command_sync.discord, "Object", lambda id: SimpleNamespace(id=id))
+
+
+@pytest.fixture
+def bot():
+    return SimpleNamespace(application_id=42, tree=FakeTree())
+
+
+class TestCommandSyncer:
+    """Test that only changed scopes are synced."""
+
+    def test_hash_ignores_command_order(self):
+        """Registration order does not change the hash."""
+        a, b = {"name": "a"}, {"name": "b"}
+        assert payload_hash([a, b]) == payload_hash([b, a])
+        assert payload_hash([a]) != payload_hash([a, b])
+
+    @pytest.mark.asyncio
+    async def test_unchanged_tree_skips_sync(self, bot, tmp_path):
+        """A restart with the same commands makes no sync call."""
+        await CommandSyncer(tmp_path / "sync.json").sync(bot)
+        bot.tree.synced.clear()
+
+        synced = await CommandSyncer(tmp_path / "sync.json").sync(bot)
+
+        assert synced == []
+        assert bot.tree.synced == []
+
+    @pytest.mark.asyncio
+    async def test_changed_scope_only(self, bot, tmp_path):
+        """Only the scope whose commands changed is synced."""
+        syncer = CommandSyncer(tmp_path / "sync.json")
+        bot.tree._guild_commands[123] = {"admin": FakeCommand("admin")}
+        await syncer.sync(bot)
+        bot.tree.synced.clear()
+
+        bot.tree._guild_commands[123]["admin"] = FakeCommand("admin", "changed")
+        synced = await syncer.sync(bot)
+
+        assert synced == ["123"]
+        assert bot.tree.synced == [123]
+
+    @pytest.mark.asyncio
+    async def test_emptied_guild_is_cleared_once(self, bot, tmp_path):
+        """Removing a guild's last command syncs it empty, then forgets it."""
+        syncer = CommandSyncer(tmp_path / "sync.json")
+        bot.tree._guild_commands[123] = {"admin": FakeCommand("admin")}
+        await syncer.sync(bot)
+
+        del bot.tree._guild_commands[123]
+        assert await syncer.sync(bot) == ["123"]
+        assert await syncer.sync(bot) == []
+
+    @pytest.mark.asyncio
+    async def test_force_syncs_everything(self, bot, tmp_path):
+        """force syncs every scope even when hashes match."""
+        syncer = CommandSyncer(tmp_path / "sync.json")
+        await syncer.sync(bot)
+
+        assert await syncer.sync(bot, force=True) == ["global"]
@@ -0,0 +1,118 @@
+"""
+Tests for per-statement query instrumentation.
+"""
+
+import logging
+
+import pytest
+
+from utils import db_metrics as db_metrics_module
+from utils.db_metrics import InstrumentedConnection, QueryMetrics, fingerprint
+
+
+class TestFingerprint:
+    """Test SQL normalization."""
+
+    def test_literals_and_whitespace_collapse(self):
+        """Statements differing only in literals and layout share one fingerprint."""
+        first = fingerprint("SELECT * FROM rank_users\n  WHERE guild_id = 123 AND name = 'a'")
+        second = fingerprint("select * FROM rank_users WHERE guild_id = 456 AND name = 'b''c';")
+
+        assert first == "SELECT * FROM rank_users WHERE guild_id = ? AND name = ?"
+        assert second.lower() == first.lower()
+
+    def test_placeholders_and_in_lists(self):
+        """Bind parameters stay; literal IN lists of any length collapse."""
+        assert fingerprint("DELETE FROM t WHERE id IN (1, 2, 3) AND g = $1") == (
+            "DELETE FROM t WHERE id IN (...) AND g = $1"
+        )
+        assert fingerprint("UPDATE t2 SET v = $2 -- comment\nWHERE id = $1") == "UPDATE t2 SET v = $2 WHERE id = $1"
+
+
+class TestQueryMetrics:
+    """Test aggregation, slow-query logging and exposition."""
+
+    def test_aggregates_by_fingerprint(self):
+        """Calls, rows, waits and latency percentiles roll up per statement."""
+        metrics = QueryMetrics(slow_query_ms=1000)
+        for user_id, seconds in ((1, 0.002), (2, 0.004), (3, 0.2)):
+            metrics.record("main", f"SELECT * FROM users WHERE id = {user_id}", seconds, rows=1, pool_wait=0.001)
+        metrics.record("main", "UPDATE users SET x = 1", 0.001, rows=5)
+
+        top = metrics.snapshot(sort="total")
+        assert [s["calls"] for s in top] == [3, 1]
+        assert top[0]["rows"] == 3
+        assert top[0]["pool_wait_ms"] == pytest.approx(3.0)
+        assert top[0]["p50_ms"] == pytest.approx(5.0)
+        assert top[0]["max_ms"] == pytest.approx(200.0)
+        assert metrics.snapshot(sort="rows")[0]["statement"] == "UPDATE users SET x = ?"
+
+    def test_slow_query_logged(self, caplog):
+        """Queries above the threshold are logged once each."""
+        metrics = QueryMetrics(slow_query_ms=10)
+        with caplog.at_level(logging.WARNING):
+            metrics.record("main", "SELECT pg_sleep(1)", 0.02)
+            metrics.record("main", "SELECT 1", 0.001)
+
+        slow = [r for r in caplog.records if "スロークエリ" in r.getMessage()]
+        assert len(slow) == 1
+        assert "pg_sleep" in slow[0].getMessage()
+
+    def test_prometheus_exposition(self):
+        """Latency histograms are labelled by pool and statement id."""
+        metrics = QueryMetrics(slow_query_ms=1000)
+        metrics.record("checkpoint", "SELECT 1", 0.003, rows=1)
+        statement_id = metrics.snapshot()[0]["id"]
+
+        text = metrics.render_prometheus().decode()
+        assert f'hfs_db_query_duration_seconds_count{{pool="checkpoint",statement="{statement_id}"}} 1.0' in text
+        assert "hfs_db_query_rows_total" in text
+
+
+def _connection():
+    """An unconnected InstrumentedConnection for exercising the measuring path."""
+    connection = InstrumentedConnection.__new__(InstrumentedConnection)
+    connection._aborted = True
+    connection._protocol = None
+    connection.pool_name = "main"
+    connection._pending_wait = 0.0
+    connection._resetting = False
+    return connection
+
+
+class TestInstrumentedConnection:
+    """Test that connection calls feed the metrics."""
+
+    @pytest.mark.asyncio
+    async def test_measure_attributes_pool_wait_once(self, monkeypatch):
+        """The acquire wait is charged to the first statement after acquisition."""
+        metrics = QueryMetrics(slow_query_ms=1000)
+        monkeypatch.setattr(db_metrics_module, "query_metrics", metrics)
+        connection = _connection()
+
+        async def result(value):
+            return value
+
+        connection.note_acquire_wait(0.05)
+        await connection._measure("SELECT 1", result([1, 2]), len)
+        await connection._measure("SELECT 1", result([1]), len)
+
+        (stats,) = metrics.snapshot()
+        assert stats["calls"] == 2
+        assert stats["rows"] == 3
+        assert stats["pool_wait_ms"] == pytest.approx(50.0)
+
+    @pytest.mark.asyncio
+    async def test_errors_are_counted(self, monkeypatch):
+        """Failed statements are recorded as errors and re-raised."""
+        metrics = QueryMetrics(slow_query_ms=1000)
+        monkeypatch.setattr(db_metrics_module, "query_metrics", metrics)
+        connection = _connection()
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await connection._measure("SELECT broken", failing(), len)
+
+        assert metrics.snapshot()[0]["errors"] == 1
@@ -0,0 +1,101 @@
+"""
+Tests for the prepared-statement registry.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+
+import asyncpg
+import pytest
+
+from cogs.rank import models as rank_models
+from utils.db_statements import StatementRegistry
+
+
+class FakeConnection:
+    """Records prepared and executed SQL."""
+
+    def __init__(self, failing=()):
+        self.prepared = []
+        self.calls = []
+        self.failing = set(failing)
+
+    async def _get_statement(self, sql, timeout):
+        if sql in self.failing:
+            raise asyncpg.UndefinedTableError("relation does not exist")
+        self.prepared.append(sql)
+
+    async def fetchrow(self, sql, *args):
+        self.calls.append((sql, args))
+        return None
+
+    async def execute(self, sql, *args):
+        self.calls.append((sql, args))
+        return "INSERT 0 1"
+
+
+class TestStatementRegistry:
+    """Test registration and per-connection preparation."""
+
+    @pytest.mark.asyncio
+    async def test_prepare_connection_warms_pool_statements(self):
+        """Only the pool's statements are prepared; missing tables are skipped."""
+        registry = StatementRegistry()
+        ok = registry.register("checkpoint", "ok", "  SELECT 1  ")
+        missing = registry.register("checkpoint", "missing", "SELECT * FROM not_yet")
+        registry.register("main", "other", "SELECT 2")
+        connection = FakeConnection(failing=[missing.sql])
+
+        await registry.prepare_connection(connection, "checkpoint")
+
+        assert connection.prepared == ["SELECT 1"]
+        assert registry.get("checkpoint", "ok") is ok
+
+    @pytest.mark.asyncio
+    async def test_prepare_is_skipped_without_private_api(self):
+        """Without Connection._get_statement, connections still initialize."""
+        registry = StatementRegistry()
+        registry.register("checkpoint", "ok", "SELECT 1")
+        connection = SimpleNamespace()
+
+        await registry.prepare_connection(connection, "checkpoint")
+
+    @pytest.mark.asyncio
+    async def test_handle_executes_registered_text(self):
+        """Executing by handle always sends the same statement text."""
+        registry = StatementRegistry()
+        statement = registry.register("main", "insert", "INSERT INTO t VALUES ($1)")
+        connection = FakeConnection()
+
+        status = await statement.execute(connection, 1)
+
+        assert status == "INSERT 0 1"
+        assert connection.calls == [("INSERT INTO t VALUES ($1)", (1,))]
+
+
+class TestRankAddXP:
+    """Test that every add_xp variant uses one statement."""
+
+    @pytest.mark.asyncio
+    async def test_single_statement_for_all_variants(self, monkeypatch):
+        """xp_type/update_active only change parameters, not the SQL text."""
+        connection = FakeConnection()
+
+        @asynccontextmanager
+        async def acquire():
+            yield connection
+
+        monkeypatch.setattr(
+            rank_models, "checkpoint_db", SimpleNamespace(_initialized=True, pool=SimpleNamespace(acquire=acquire))
+        )
+        db = rank_models.RankDB()
+        for xp_type in ("message", "omikuji", "vc", "reaction"):
+            for update_active in (True, False):
+                await db.add_xp(1, 2, 5, xp_type, update_active=update_active)
+
+        assert {sql for sql, _ in connection.calls} == {rank_models.ADD_XP.sql}
+        omikuji_args = connection.calls[2][1]
+        assert omikuji_args[6] is None
+        assert omikuji_args[7] == date.today()
+        assert omikuji_args[8] is True
@@ -0,0 +1,78 @@
+"""
+Tests for the keyed deadline heap.
+"""
+
+from datetime import datetime, timedelta
+
+from utils.deadlines import DeadlineHeap
+
+T0 = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+class TestDeadlineHeap:
+    """Test ordering, replacement and removal of deadlines."""
+
+    def test_pop_due_in_order(self):
+        """Only deadlines at or before now are returned, earliest first."""
+        heap = DeadlineHeap()
+        heap.push("b", at(20))
+        heap.push("a", at(10))
+        heap.push("c", at(30))
+
+        assert heap.pop_due(at(20)) == ["a", "b"]
+        assert heap.next_due() == at(30)
+        assert len(heap) == 1
+
+    def test_push_replaces_existing_deadline(self):
+        """Rescheduling a key moves it; the old entry is skipped."""
+        heap = DeadlineHeap()
+        heap.push("a", at(10))
+        heap.push("a", at(50))
+
+        assert heap.pop_due(at(20)) == []
+        assert heap.next_due() == at(50)
+        assert heap.pop_due(at(50)) == ["a"]
+        assert "a" not in heap
+
+    def test_discard_and_none_remove(self):
+        """discard() and push(None) both drop the deadline."""
+        heap = DeadlineHeap()
+        heap.push("a", at(10))
+        heap.push("b", at(20))
+        heap.discard("a")
+        heap.push("b", None)
+
+        assert heap.next_due() is None
+        assert heap.pop_due(at(100)) == []
+
+    def test_float_deadlines(self):
+        """UNIX-second deadlines (voice XP AFK timers) work the same way."""
+        heap = DeadlineHeap()
+        heap.push("b", 20.0)
+        heap.push("a", 10.0)
+        heap.push("a", 15.0)
+
+        assert heap.due_of("a") == 15.0
+        assert heap.next_due() == 15.0
+        assert heap.pop_due(25.0) == ["a", "b"]
+        assert heap.due_of("a") is None
+
+    def test_replacements_do_not_grow_the_heap(self):
+        """Re-pushing the same deadline is a no-op and moved deadlines are compacted."""
+        heap = DeadlineHeap()
+        for _ in range(10):
+            for key in range(100):
+                heap.push(key, at(86400))
+        assert len(heap._heap) == 100
+
+        for round_ in range(10):
+            for key in range(100):
+                heap.push(key, at(86400 + round_ + 1))
+
+        assert len(heap) == 100
+        assert len(heap._heap) <= 300
+        assert heap.pop_due(at(86400 + 10)) == list(range(100))
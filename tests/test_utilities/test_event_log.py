@@ -0,0 +1,65 @@
+"""
+Tests for the append-only JSONL event log.
+"""
+
+import json
+
+import pytest
+
+from utils.event_log import EventLog
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestEventLog:
+    """Test batching, rotation and the latest-event index."""
+
+    @pytest.mark.asyncio
+    async def test_records_are_batched(self, tmp_path):
+        """Events are buffered in memory and written together on flush."""
+        log = EventLog(tmp_path / "events.jsonl", flush_interval=60)
+        for i in range(3):
+            log.record({"event": "Tick", "n": i})
+
+        assert not (tmp_path / "events.jsonl").exists()
+        await log.close()
+
+        assert [e["n"] for e in read_lines(tmp_path / "events.jsonl")] == [0, 1, 2]
+
+    def test_latest_session_survives_restart(self, tmp_path):
+        """A new instance rebuilds the index from the tail of the file."""
+        path = tmp_path / "events.jsonl"
+        log = EventLog(path)
+        log.record({"event": "BotReady", "session_id": "abc"})
+        log.record({"event": "BotReady", "session_id": "def"})
+        log.record({"event": "Other"})
+
+        restarted = EventLog(path)
+
+        assert restarted.latest_session_id() == "def"
+        assert restarted.latest("BotReady")["session_id"] == "def"
+        assert restarted.latest("Missing") is None
+
+    def test_missing_session_id_is_not_carried_over(self, tmp_path):
+        """A BotReady without a session ID reports None, not the previous run's ID."""
+        path = tmp_path / "events.jsonl"
+        log = EventLog(path)
+        log.record({"event": "BotReady", "session_id": "abc"})
+        log.record({"event": "BotReady", "session_id": None})
+
+        assert log.latest_session_id() is None
+        assert EventLog(path).latest_session_id() is None
+
+    def test_rotation_keeps_bounded_backups(self, tmp_path):
+        """The file rotates by size and only backup_count old files are kept."""
+        path = tmp_path / "events.jsonl"
+        log = EventLog(path, max_bytes=200, backup_count=2)
+        for i in range(50):
+            log.record({"event": "Tick", "payload": "x" * 50, "n": i})
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "events.1.jsonl", "events.2.jsonl", "events.jsonl"
+        ]
+        assert read_lines(path)[-1]["n"] == 49
@@ -0,0 +1,90 @@
+"""
+Tests for the queue-based logging pipeline.
+"""
+
+import logging
+import queue
+
+from utils.logging import (
+    APP_LOGGER_NAME,
+    CustomFormatter,
+    LoopSafeQueueHandler,
+    _Pipeline,
+    setup_logging,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestSetupLogging:
+    """Test per-module named loggers."""
+
+    def test_level_alias_names_caller_module(self):
+        """A level alias returns the calling module's logger at that level."""
+        module_logger = setup_logging("D")
+
+        assert module_logger.name == f"{APP_LOGGER_NAME}.{__name__}"
+        assert module_logger.level == logging.DEBUG
+
+    def test_levels_are_independent(self):
+        """One module asking for ERROR no longer silences every other module."""
+        quiet = setup_logging("QUIET_MODULE_FOR_TEST")
+        quiet.setLevel(logging.ERROR)
+        loud = setup_logging("LOUD_MODULE_FOR_TEST")
+
+        assert loud.name == f"{APP_LOGGER_NAME}.LOUD_MODULE_FOR_TEST"
+        assert loud.isEnabledFor(logging.INFO)
+        assert not quiet.isEnabledFor(logging.INFO)
+
+
+class TestPipeline:
+    """Test that records are handed off and written by the listener thread."""
+
+    def test_queue_handler_freezes_args(self):
+        """%-args are merged at call time; formatting is left to the listener."""
+        log_queue = queue.SimpleQueue()
+        handler = LoopSafeQueueHandler(log_queue)
+        values = ["before"]
+        record = logging.LogRecord("t", logging.INFO, __file__, 1, "value=%s", (values,), None)
+
+        handler.emit(record)
+        values[0] = "after"
+
+        queued = log_queue.get_nowait()
+        assert queued.getMessage() == "value=['before']"
+        assert not hasattr(queued, "asctime")
+
+    def test_listener_writes_and_flushes_on_stop(self):
+        """Everything enqueued before stop() reaches the handlers."""
+        pipeline = _Pipeline()
+        sink = ListHandler()
+        test_logger = logging.getLogger(f"{APP_LOGGER_NAME}.pipeline_test")
+        test_logger.propagate = False
+        queue_handler = pipeline.queue_handler(sink)
+        test_logger.addHandler(queue_handler)
+        try:
+            for i in range(100):
+                test_logger.warning("message %d", i)
+        finally:
+            pipeline.stop()
+            test_logger.removeHandler(queue_handler)
+
+        assert [r.getMessage() for r in sink.records] == [f"message {i}" for i in range(100)]
+
+    def test_formatter_uses_cached_level_formats(self):
+        """Each level reuses one prebuilt Formatter with its colour."""
+        formatter = CustomFormatter()
+        record = logging.LogRecord("t", logging.WARNING, __file__, 1, "careful", None, None)
+
+        first = formatter._formatters[logging.WARNING]
+        output = formatter.format(record)
+
+        assert output.startswith(CustomFormatter.yellow)
+        assert formatter._formatters[logging.WARNING] is first
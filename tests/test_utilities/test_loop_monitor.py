@@ -0,0 +1,60 @@
+"""
+Tests for the event-loop lag monitor.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from utils.loop_monitor import LoopMonitor
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """Test lag sampling, percentiles and slow-callback stacks."""
+
+    def test_percentiles(self):
+        """Percentiles are taken from the recent samples."""
+        monitor = LoopMonitor()
+        for ms in range(1, 101):
+            monitor.observe(ms / 1000)
+
+        summary = monitor.summary()
+
+        assert summary["p50_ms"] == 51.0
+        assert summary["p99_ms"] == 100.0
+        assert summary["max_ms"] == 100.0
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_captured_with_stack(self):
+        """A synchronous call that blocks the loop is recorded with its stack."""
+        monitor = LoopMonitor(interval=0.02, slow_threshold=0.1)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            block_the_loop(0.4)
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        snapshot = monitor.snapshot()
+        assert not snapshot["running"]
+        assert snapshot["slow_callbacks"] >= 1
+        event = snapshot["recent_slow"][0]
+        assert event["lag_ms"] >= 300
+        assert "block_the_loop" in "".join(event["stack"])
+
+    def test_reset(self):
+        """reset() clears samples and slow events."""
+        monitor = LoopMonitor(slow_threshold=0.1)
+        monitor.observe(0.5)
+
+        monitor.reset()
+
+        assert monitor.snapshot()["samples"] == 0
+        assert monitor.slow_count == 0
+        assert monitor.summary()["max_ms"] == 0.0
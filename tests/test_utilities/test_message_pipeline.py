@@ -0,0 +1,153 @@
+"""
+Tests for the shared on_message pipeline.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.message_pipeline import MessageContext, MessagePipeline
+
+
+def make_message(*, bot=False, guild_id=1, role_ids=(), content="hello"):
+    guild = SimpleNamespace(id=guild_id) if guild_id is not None else None
+    author = SimpleNamespace(id=42, bot=bot, roles=[SimpleNamespace(id=r) for r in role_ids])
+    channel = SimpleNamespace(id=10, parent_id=None)
+    return SimpleNamespace(guild=guild, author=author, channel=channel, content=content)
+
+
+class TestMessageContext:
+    """Test the per-message parsed context."""
+
+    def test_from_message(self):
+        """Guild, author and roles are parsed once up front."""
+        ctx = MessageContext.from_message(make_message(role_ids=(5, 6)))
+
+        assert (ctx.guild_id, ctx.channel_id, ctx.author_id) == (1, 10, 42)
+        assert ctx.has_any_role([6, 7])
+        assert not ctx.has_any_role([7])
+
+    @pytest.mark.asyncio
+    async def test_memo_runs_factory_once(self):
+        """Concurrent stages share one lookup for the same key."""
+        ctx = MessageContext.from_message(make_message())
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return "config"
+
+        results = await asyncio.gather(*(ctx.memo("key", load) for _ in range(3)))
+
+        assert results == ["config"] * 3
+        assert calls == 1
+
+
+class TestMessagePipeline:
+    """Test fan-out, filtering and per-stage timing."""
+
+    @pytest.mark.asyncio
+    async def test_stages_run_concurrently(self):
+        """A slow stage does not delay the others."""
+        pipeline = MessagePipeline()
+        order = []
+
+        async def slow(ctx):
+            await asyncio.sleep(0.05)
+            order.append("slow")
+
+        async def fast(ctx):
+            order.append("fast")
+
+        pipeline.register("slow", slow)
+        pipeline.register("fast", fast)
+        await pipeline.on_message(make_message())
+
+        assert order == ["fast", "slow"]
+        assert pipeline.messages == 1
+
+    @pytest.mark.asyncio
+    async def test_bot_and_dm_filtering(self):
+        """Bots and DMs only reach stages that opted in."""
+        pipeline = MessagePipeline()
+        seen = []
+
+        def record(name):
+            async def handler(ctx):
+                seen.append(name)
+            return handler
+
+        pipeline.register("default", record("default"))
+        pipeline.register("bots", record("bots"), include_bots=True)
+        pipeline.register("dms", record("dms"), include_dms=True)
+
+        await pipeline.on_message(make_message(bot=True))
+        await pipeline.on_message(make_message(guild_id=None))
+
+        assert seen == ["bots", "dms"]
+
+    @pytest.mark.asyncio
+    async def test_errors_and_timeouts_are_isolated(self):
+        """A failing or hanging stage is counted without affecting others."""
+        pipeline = MessagePipeline()
+        done = []
+
+        async def broken(ctx):
+            raise RuntimeError("boom")
+
+        async def hanging(ctx):
+            await asyncio.sleep(10)
+
+        async def ok(ctx):
+            done.append(True)
+
+        pipeline.register("broken", broken)
+        pipeline.register("hanging", hanging, timeout=0.01)
+        pipeline.register("ok", ok)
+        await pipeline.on_message(make_message())
+
+        stats = {row["stage"]: row for row in pipeline.snapshot()}
+        assert done == [True]
+        assert stats["broken"]["errors"] == 1
+        assert stats["hanging"]["timeouts"] == 1
+        assert stats["ok"]["calls"] == 1
+        assert pipeline.snapshot()[0]["stage"] == "hanging"
+
+    @pytest.mark.asyncio
+    async def test_stage_without_timeout_runs_to_completion(self):
+        """A stage registered with timeout=None is never cancelled, only timed."""
+        pipeline = MessagePipeline()
+        done = []
+
+        async def slow(ctx):
+            await asyncio.sleep(0.05)
+            done.append(True)
+
+        pipeline.register("slow", slow, timeout=None)
+        await pipeline.on_message(make_message())
+
+        row = pipeline.snapshot()[0]
+        assert done == [True]
+        assert row["timeouts"] == 0
+        assert row["timeout_s"] is None
+        assert row["max_ms"] >= 50
+
+    @pytest.mark.asyncio
+    async def test_reregister_keeps_stats_and_unregister_removes(self):
+        """Reloading a cog keeps its stats; unloading removes the stage."""
+        pipeline = MessagePipeline()
+
+        async def handler(ctx):
+            pass
+
+        pipeline.register("stage", handler)
+        await pipeline.on_message(make_message())
+        pipeline.register("stage", handler)
+
+        assert pipeline.snapshot()[0]["calls"] == 1
+
+        pipeline.unregister("stage")
+        assert pipeline.snapshot() == []
@@ -0,0 +1,126 @@
+"""
+Tests for the versioned schema migration runner.
+"""
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from utils.migrations import Migration, MigrationError, MigrationRunner, load_migrations
+
+
+class FakeConnection:
+    """Records SQL and keeps schema_migrations rows in memory."""
+
+    def __init__(self):
+        self.has_table = False
+        self.rows = {}
+        self.executed = []
+
+    async def fetchval(self, query, *args):
+        return self.has_table
+
+    async def fetch(self, query, *args):
+        return [{"version": v, "checksum": c} for v, c in self.rows.items()]
+
+    async def execute(self, query, *args):
+        self.executed.append(query.strip())
+        if "CREATE TABLE IF NOT EXISTS schema_migrations" in query:
+            self.has_table = True
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.rows[args[0]] = args[2]
+        return "OK"
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    def __init__(self):
+        self.connection = FakeConnection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+def write(directory, name, sql):
+    (directory / name).write_text(sql, encoding="utf-8")
+
+
+class TestLoadMigrations:
+    """Test discovery of migration files."""
+
+    def test_sorted_by_version(self, tmp_path):
+        """Files load in version order with a content checksum."""
+        write(tmp_path, "0002_second.sql", "SELECT 2;")
+        write(tmp_path, "0001_first.sql", "SELECT 1;")
+
+        migrations = load_migrations(tmp_path)
+
+        assert [(m.version, m.name) for m in migrations] == [(1, "first"), (2, "second")]
+        assert migrations[0].checksum != migrations[1].checksum
+
+    def test_rejects_bad_names_and_duplicates(self, tmp_path):
+        """Misnamed or duplicated versions fail loudly instead of being skipped."""
+        write(tmp_path, "create_tables.sql", "SELECT 1;")
+        with pytest.raises(MigrationError):
+            load_migrations(tmp_path)
+
+        (tmp_path / "create_tables.sql").unlink()
+        write(tmp_path, "0001_a.sql", "SELECT 1;")
+        write(tmp_path, "0001_b.sql", "SELECT 1;")
+        with pytest.raises(MigrationError):
+            load_migrations(tmp_path)
+
+    def test_repository_migrations_load(self):
+        """The shipped migrations directory is well-formed."""
+        migrations = load_migrations()
+
+        assert migrations
+        assert [m.version for m in migrations] == sorted({m.version for m in migrations})
+
+
+class TestMigrationRunner:
+    """Test applying pending migrations."""
+
+    MIGRATIONS = [Migration(1, "first", "CREATE TABLE a (id INT);"), Migration(2, "second", "CREATE TABLE b (id INT);")]
+
+    @pytest.mark.asyncio
+    async def test_applies_pending_once_under_lock(self):
+        """Pending files run inside the advisory lock and are recorded."""
+        pool = FakePool()
+
+        applied = await MigrationRunner(pool, self.MIGRATIONS).run()
+
+        executed = pool.connection.executed
+        assert [m.version for m in applied] == [1, 2]
+        assert executed[0].startswith("SELECT pg_advisory_lock")
+        assert executed[-1].startswith("SELECT pg_advisory_unlock")
+        assert pool.connection.rows == {1: self.MIGRATIONS[0].checksum, 2: self.MIGRATIONS[1].checksum}
+
+    @pytest.mark.asyncio
+    async def test_up_to_date_skips_lock(self):
+        """When everything is applied, boot costs a read and no DDL or lock."""
+        pool = FakePool()
+        await MigrationRunner(pool, self.MIGRATIONS).run()
+        pool.connection.executed.clear()
+
+        applied = await MigrationRunner(pool, self.MIGRATIONS).run()
+
+        assert applied == []
+        assert pool.connection.executed == []
+
+    @pytest.mark.asyncio
+    async def test_changed_migration_is_rejected(self):
+        """Editing an applied file is an error; changes go in a new migration."""
+        pool = FakePool()
+        await MigrationRunner(pool, self.MIGRATIONS[:1]).run()
+
+        edited = [Migration(1, "first", "CREATE TABLE a (id BIGINT);")]
+        with pytest.raises(MigrationError):
+            await MigrationRunner(pool, edited).run()
+
+        status = await MigrationRunner(pool, edited).status()
+        assert status == [{"version": 1, "name": "first", "applied": True, "checksum_ok": False}]
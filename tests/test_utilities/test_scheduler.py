@@ -0,0 +1,177 @@
+"""
+Tests for the shared deadline scheduler.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.scheduler import DeadlineScheduler, JobKind
+
+
+def soon(seconds=0.02):
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+class MemoryJobs:
+    """An in-memory job table standing in for a database."""
+
+    def __init__(self, due=None):
+        self.due = dict(due or {})
+        self.fetched = []
+        self.completed = []
+        self.active = 0
+        self.max_active = 0
+
+    async def load(self, keys):
+        return [(key, due) for key, due in self.due.items() if keys is None or key in keys]
+
+    async def fetch(self, keys):
+        self.fetched.append(sorted(keys))
+        return [{"id": key} for key in keys if key in self.due]
+
+    async def run(self, row):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        if row["id"] == "broken":
+            raise RuntimeError("boom")
+        return f"done-{row['id']}"
+
+    async def complete(self, done):
+        self.completed.append(sorted(result for _, result in done))
+        for row, _ in done:
+            self.due.pop(row["id"], None)
+
+    def kind(self, name="test", **overrides):
+        options = {"load": self.load, "fetch": self.fetch, "run": self.run, "complete": self.complete}
+        options.update(overrides)
+        return JobKind(name, **options)
+
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+class TestDeadlineScheduler:
+    """Test loading, batching, bounded parallelism and rescheduling."""
+
+    @pytest.mark.asyncio
+    async def test_due_jobs_are_fetched_and_completed_in_one_batch(self):
+        """Jobs due together are fetched once and completed with one call."""
+        jobs = MemoryJobs({1: soon(), 2: soon(), 3: soon(60)})
+        scheduler = DeadlineScheduler()
+        await scheduler.register(jobs.kind())
+        try:
+            await wait_until(lambda: jobs.completed)
+        finally:
+            await scheduler.stop()
+
+        assert jobs.fetched == [[1, 2]]
+        assert jobs.completed == [["done-1", "done-2"]]
+        assert scheduler.deadlines.keys() == [("test", 3)]
+
+    @pytest.mark.asyncio
+    async def test_parallelism_is_bounded(self):
+        """No more than max_concurrency jobs run at once."""
+        jobs = MemoryJobs({i: soon() for i in range(6)})
+        scheduler = DeadlineScheduler(max_concurrency=2)
+        await scheduler.register(jobs.kind())
+        try:
+            await wait_until(lambda: not jobs.due)
+        finally:
+            await scheduler.stop()
+
+        assert jobs.max_active == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_jobs_are_not_completed(self):
+        """A job that raises is left for the next resync instead of being completed."""
+        jobs = MemoryJobs({"ok": soon(), "broken": soon()})
+        scheduler = DeadlineScheduler()
+        await scheduler.register(jobs.kind())
+        try:
+            await wait_until(lambda: jobs.completed)
+        finally:
+            await scheduler.stop()
+
+        assert jobs.completed == [["done-ok"]]
+        assert "broken" in jobs.due
+
+    @pytest.mark.asyncio
+    async def test_failed_jobs_back_off_and_give_up(self):
+        """A failing job is retried with backoff and dropped after max_attempts, even across resyncs."""
+        jobs = MemoryJobs({"broken": soon()})
+        attempts = []
+
+        async def run(row):
+            attempts.append(asyncio.get_running_loop().time())
+            raise RuntimeError("boom")
+
+        scheduler = DeadlineScheduler(retry_seconds=0.05, max_attempts=3)
+        await scheduler.register(jobs.kind(run=run))
+        try:
+            await wait_until(lambda: len(attempts) == 3)
+            await asyncio.sleep(0.1)
+            await scheduler.sync("test")
+        finally:
+            await scheduler.stop()
+
+        assert len(attempts) == 3
+        assert attempts[2] - attempts[1] > attempts[1] - attempts[0]
+        assert ("test", "broken") not in scheduler.deadlines
+        assert "broken" in jobs.due
+
+    @pytest.mark.asyncio
+    async def test_reschedule_from_complete_runs_again(self):
+        """A repeating job rescheduled while it is still running fires again."""
+        jobs = MemoryJobs({1: soon()})
+        scheduler = DeadlineScheduler()
+        runs = []
+
+        async def complete(done):
+            runs.append(len(done))
+            if len(runs) < 2:
+                scheduler.schedule("test", 1, soon())
+            else:
+                jobs.due.clear()
+
+        await scheduler.register(jobs.kind(complete=complete))
+        try:
+            await wait_until(lambda: len(runs) == 2)
+        finally:
+            await scheduler.stop()
+
+        assert jobs.fetched == [[1], [1]]
+
+    @pytest.mark.asyncio
+    async def test_sync_picks_up_changes_and_deletions(self):
+        """A notified key is (re)loaded; a key missing from the source is dropped."""
+        jobs = MemoryJobs({1: soon(60), 2: soon(60)})
+        scheduler = DeadlineScheduler()
+        scheduler.kinds["test"] = jobs.kind()
+        await scheduler.sync("test")
+
+        del jobs.due[1]
+        jobs.due[3] = soon(30)
+        await scheduler.sync("test", [1, 3])
+
+        assert sorted(scheduler.deadlines.keys()) == [("test", 2), ("test", 3)]
+        assert scheduler.deadlines.next_due() == jobs.due[3]
+
+    @pytest.mark.asyncio
+    async def test_repeated_resyncs_keep_the_heap_bounded(self):
+        """Resyncing far-future jobs does not pile up stale heap entries."""
+        jobs = MemoryJobs({i: soon(30 * 86400) for i in range(1000)})
+        scheduler = DeadlineScheduler()
+        scheduler.kinds["test"] = jobs.kind()
+        for _ in range(12):
+            await scheduler.sync("test")
+
+        assert len(scheduler.deadlines) == 1000
+        assert len(scheduler.deadlines._heap) <= 2000
@@ -0,0 +1,202 @@
+"""
+Tests for the restart-safe voice session journal.
+"""
+
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from models.rank.voice_activity import VoicePresets
+from utils import voice_journal as voice_journal_module
+from utils.rank import voice_manager as voice_manager_module
+from utils.rank.voice_manager import VoiceManager
+from utils.voice_journal import VoiceSessionJournal
+
+
+def _guild(guild_id, channels):
+    """Build a cached guild whose voice channels hold the given member ids."""
+    members = {}
+    voice_channels = []
+    for channel_id, member_ids in channels.items():
+        channel = SimpleNamespace(id=channel_id, members=[])
+        for member_id in member_ids:
+            member = SimpleNamespace(id=member_id, bot=False, voice=SimpleNamespace(channel=channel))
+            members[member_id] = member
+            channel.members.append(member)
+        voice_channels.append(channel)
+
+    guild = SimpleNamespace(id=guild_id, voice_channels=voice_channels, get_member=members.get)
+    for member in members.values():
+        member.guild = guild
+    return guild
+
+
+class TestVoiceSessionJournal:
+    """Test journal replay, compaction and reconciliation."""
+
+    def test_replay_restores_open_sessions(self, tmp_path):
+        """Joins and updates survive a reload; left sessions do not."""
+        path = tmp_path / "sessions.jsonl"
+        journal = VoiceSessionJournal(path)
+        start = datetime.now() - timedelta(minutes=30)
+        journal.record_join("rank", 1, 10, 100, start)
+        journal.record_join("rank", 1, 11, 100, start)
+        journal.record_update("rank", 1, 10, reset_at=123.0)
+        journal.record_leave("rank", 1, 11)
+        journal.close()
+
+        restored = VoiceSessionJournal(path)
+        restored.load()
+
+        sessions = restored.open_sessions("rank")
+        assert [(s.user_id, s.channel_id) for s in sessions] == [(10, 100)]
+        assert sessions[0].started_at == pytest.approx(start.timestamp())
+        assert sessions[0].data == {"reset_at": 123.0}
+
+    def test_heartbeat_marks_when_the_bot_was_last_alive(self, tmp_path, monkeypatch):
+        """A session that ended during downtime closes at the last heartbeat, not the last voice event."""
+        path = tmp_path / "sessions.jsonl"
+        journal = VoiceSessionJournal(path)
+        start = datetime.now() - timedelta(hours=3)
+        journal.record_join("rank", 1, 10, 100, start)
+        alive_until = time.time() + 7200
+        monkeypatch.setattr(voice_journal_module, "time", SimpleNamespace(time=lambda: alive_until))
+        journal.record_heartbeat()
+        journal.close()
+        monkeypatch.undo()
+
+        restored = VoiceSessionJournal(path)
+        result = restored.reconcile("rank", [_guild(1, {})])
+
+        assert [s.user_id for s in result.ended] == [10]
+        assert result.ended_at(result.ended[0]) == pytest.approx(alive_until)
+
+    def test_heartbeat_is_skipped_without_open_sessions(self, tmp_path):
+        """Nothing is written while no session is open."""
+        path = tmp_path / "sessions.jsonl"
+        journal = VoiceSessionJournal(path)
+        journal.record_heartbeat()
+        journal.close()
+
+        assert path.read_text() == ""
+
+    def test_load_compacts_and_ignores_torn_line(self, tmp_path):
+        """Loading rewrites only open sessions and skips a half-written record."""
+        path = tmp_path / "sessions.jsonl"
+        journal = VoiceSessionJournal(path)
+        for user_id in range(20):
+            journal.record_join("cp", 1, user_id, 100, datetime.now())
+            journal.record_leave("cp", 1, user_id)
+        journal.record_join("cp", 1, 99, 100, datetime.now())
+        journal.close()
+        with open(path, "a") as f:
+            f.write('{"op":"join","ns":"cp"')
+
+        restored = VoiceSessionJournal(path)
+        restored.load()
+
+        assert len(path.read_text().splitlines()) == 1
+        assert [s.user_id for s in restored.open_sessions("cp")] == [99]
+
+    @pytest.mark.asyncio
+    async def test_writes_are_batched_off_the_loop(self, tmp_path):
+        """Inside the event loop records are buffered and written together on flush."""
+        path = tmp_path / "sessions.jsonl"
+        journal = VoiceSessionJournal(path, compact_threshold=5)
+        await journal.load_async()
+        await journal.flush()
+        for user_id in range(3):
+            journal.record_join("rank", 1, user_id, 100, datetime.now())
+
+        assert path.read_text() == ""
+        await journal.flush()
+        assert len(path.read_text().splitlines()) == 3
+
+        for user_id in range(3):
+            journal.record_leave("rank", 1, user_id)
+        await journal.flush()
+
+        # Past the threshold the file is rewritten with only the open sessions
+        assert path.read_text() == ""
+        assert journal.open_sessions("rank") == []
+
+    def test_reconcile_against_voice_state(self, tmp_path):
+        """Sessions are resumed, ended or started from the cached voice state."""
+        path = tmp_path / "sessions.jsonl"
+        journal = VoiceSessionJournal(path)
+        start = datetime.now() - timedelta(hours=1)
+        journal.record_join("rank", 1, 10, 100, start)  # still in channel 100
+        journal.record_join("rank", 1, 11, 100, start)  # left while offline
+        journal.record_join("rank", 1, 12, 100, start)  # moved while offline
+        journal.close()
+        last_seen = VoiceSessionJournal(path)
+        last_seen.load()
+
+        restored = VoiceSessionJournal(path)
+        result = restored.reconcile("rank", [_guild(1, {100: [10], 200: [12, 13]})])
+
+        assert [s.user_id for s in result.resumed] == [10]
+        assert sorted(s.user_id for s in result.ended) == [11, 12]
+        assert sorted(member.id for member, _ in result.joined) == [12, 13]
+        assert result.last_seen == pytest.approx(last_seen.last_seen)
+        assert [s.user_id for s in restored.open_sessions("rank")] == [10]
+
+    def test_namespaces_are_independent(self, tmp_path):
+        """Each consumer only sees its own sessions."""
+        journal = VoiceSessionJournal(tmp_path / "sessions.jsonl")
+        journal.record_join("rank", 1, 10, 100, datetime.now())
+
+        result = journal.reconcile("cp", [_guild(1, {100: [10]})])
+
+        assert result.resumed == []
+        assert [member.id for member, _ in result.joined] == [10]
+
+
+class TestVoiceManagerRestore:
+    """Test voice XP sessions resuming from the journal."""
+
+    @pytest.mark.asyncio
+    async def test_restart_keeps_accrued_xp(self, tmp_path, monkeypatch):
+        """A restarted manager resumes present members and completes departed ones."""
+        path = tmp_path / "sessions.jsonl"
+        journal = VoiceSessionJournal(path)
+        monkeypatch.setattr(voice_manager_module, "voice_journal", journal)
+
+        def manager():
+            instance = VoiceManager()
+            instance.guild_configs[1] = (VoicePresets.get_balanced(), time.time())
+            instance._create_session_in_db = AsyncMock()
+            instance._complete_session_in_db = AsyncMock()
+            return instance
+
+        before = manager()
+        await before.start_voice_session(1, 10, 100)
+        await before.start_voice_session(1, 11, 100)
+        for user_id in (10, 11):
+            # Journal a session that joined an hour ago with 40 XP settled
+            session = before.active_sessions[f"1:{user_id}"]
+            session.start_time -= timedelta(hours=1)
+            session.last_xp_calculation -= timedelta(minutes=10)
+            session.pending_xp = 40
+            journal.record_join(
+                "voice_xp", 1, user_id, 100, session.start_time, **before._journal_state(session)
+            )
+        before.stop_timers()
+        journal.close()
+
+        restored_journal = VoiceSessionJournal(path)
+        monkeypatch.setattr(voice_manager_module, "voice_journal", restored_journal)
+        after = manager()
+        completed, result = await after.restore_sessions([_guild(1, {100: [10]})])
+
+        resumed = after.active_sessions["1:10"]
+        assert resumed.pending_xp >= 40
+        assert "1:10" in after.timers
+        assert [s.user_id for s in completed] == [11]
+        assert completed[0].total_xp_earned >= 40
+        assert completed[0].duration_seconds >= 3600
+        assert result.joined == []
+        after.stop_timers()
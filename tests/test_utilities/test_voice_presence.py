@@ -0,0 +1,216 @@
+"""
+Tests for the unified voice presence tracker.
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from utils import voice_presence as voice_presence_module
+from utils.voice_journal import VoiceSessionJournal
+from utils.voice_presence import VoiceEventType, VoicePresenceTracker
+
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def journal(tmp_path, monkeypatch):
+    """Keep the session journal out of the working tree."""
+    journal = VoiceSessionJournal(tmp_path / "sessions.jsonl")
+    monkeypatch.setattr(voice_presence_module, "voice_journal", journal)
+    return journal
+
+
+def _member(user_id=10, guild_id=1, bot=False):
+    return SimpleNamespace(id=user_id, bot=bot, guild=SimpleNamespace(id=guild_id))
+
+
+def _state(channel_id=None, self_mute=False, self_deaf=False):
+    channel = SimpleNamespace(id=channel_id) if channel_id else None
+    return SimpleNamespace(channel=channel, self_mute=self_mute, self_deaf=self_deaf, mute=False, deaf=False)
+
+
+class TestVoicePresenceParsing:
+    """Test that each state change is parsed once into a typed event."""
+
+    def test_session_lifecycle(self):
+        """Join, move, mute and leave keep one session with consistent durations."""
+        tracker = VoicePresenceTracker()
+        member = _member()
+
+        join = tracker.apply(member, _state(), _state(100), T0)
+        move = tracker.apply(member, _state(100), _state(200), T0 + timedelta(minutes=5))
+        mute = tracker.apply(member, _state(200), _state(200, self_mute=True), T0 + timedelta(minutes=6))
+        leave = tracker.apply(member, _state(200, self_mute=True), _state(), T0 + timedelta(minutes=20))
+
+        assert [e.type for e in (join, move, mute, leave)] == [
+            VoiceEventType.JOIN, VoiceEventType.MOVE, VoiceEventType.MUTE, VoiceEventType.LEAVE
+        ]
+        assert move.previous_channel_id == 100 and move.channel_seconds == 300
+        assert mute.session.self_mute is True
+        assert leave.previous_channel_id == 200
+        assert leave.channel_seconds == 900
+        assert leave.duration_seconds == 1200
+        assert tracker.get(1, 10) is None
+
+    def test_channel_counts_exclude_bots(self):
+        """Per-channel counts track joins, moves and leaves of human members."""
+        tracker = VoicePresenceTracker()
+        tracker.apply(_member(10), _state(), _state(100), T0)
+        tracker.apply(_member(11), _state(), _state(100), T0)
+        tracker.apply(_member(99, bot=True), _state(), _state(100), T0)
+        tracker.apply(_member(11), _state(100), _state(200), T0)
+
+        assert tracker.channel_count(1, 100) == 1
+        assert tracker.channel_count(1, 200) == 1
+        assert tracker.channel_peak(1, 100) == 2
+
+        tracker.apply(_member(10), _state(100), _state(), T0)
+        assert tracker.channel_count(1, 100) == 0
+
+    def test_ignores_stream_only_changes(self):
+        """Changes that are not join/leave/move/mute produce no event."""
+        tracker = VoicePresenceTracker()
+        member = _member()
+        tracker.apply(member, _state(), _state(100), T0)
+
+        assert tracker.apply(member, _state(100), _state(100), T0 + timedelta(seconds=5)) is None
+
+    def test_move_without_known_session(self):
+        """A move for a member already in VC before startup still yields a session."""
+        tracker = VoicePresenceTracker()
+
+        event = tracker.apply(_member(), _state(100), _state(200), T0)
+
+        assert event.type == VoiceEventType.MOVE
+        assert tracker.get(1, 10).channel_id == 200
+
+
+class TestVoicePresencePublishing:
+    """Test fan-out to subscribers."""
+
+    @pytest.mark.asyncio
+    async def test_subscribers_receive_same_event(self):
+        """Every subscriber sees the same parsed event; one failure does not stop others."""
+        tracker = VoicePresenceTracker()
+        received = []
+
+        async def failing(event):
+            raise RuntimeError("boom")
+
+        async def leave_only(event):
+            received.append(("leave_only", event))
+
+        async def everything(event):
+            received.append(("everything", event))
+
+        tracker.subscribe(failing)
+        tracker.subscribe(leave_only, VoiceEventType.LEAVE)
+        tracker.subscribe(everything)
+
+        member = _member()
+        await tracker.on_voice_state_update(member, _state(), _state(100))
+        await tracker.on_voice_state_update(member, _state(100), _state())
+
+        assert [name for name, _ in received] == ["everything", "leave_only", "everything"]
+        assert received[1][1] is received[2][1]
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe(self):
+        """Unsubscribed handlers stop receiving events."""
+        tracker = VoicePresenceTracker()
+        received = []
+
+        async def handler(event):
+            received.append(event)
+
+        tracker.subscribe(handler)
+        tracker.unsubscribe(handler)
+        await tracker.on_voice_state_update(_member(), _state(), _state(100))
+
+        assert received == []
+
+
+class TestVoicePresenceRestore:
+    """Test restart reconciliation through the journal."""
+
+    @pytest.mark.asyncio
+    async def test_restore_publishes_missed_changes(self, tmp_path, monkeypatch):
+        """After a restart, stayers resume silently and missed leaves/joins are published."""
+        path = tmp_path / "restart.jsonl"
+        before_journal = VoiceSessionJournal(path)
+        monkeypatch.setattr(voice_presence_module, "voice_journal", before_journal)
+        before = VoicePresenceTracker()
+        joined_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        before.apply(_member(10), _state(), _state(100), joined_at)
+        before.apply(_member(11), _state(), _state(100), joined_at)
+        before.update_state(before.get(1, 10), rank_counted_from=123.0)
+        before_journal.close()
+
+        monkeypatch.setattr(voice_presence_module, "voice_journal", VoiceSessionJournal(path))
+        channel = SimpleNamespace(id=100, members=[])
+        guild = SimpleNamespace(id=1, voice_channels=[channel])
+        stayer = SimpleNamespace(id=10, bot=False, guild=guild, voice=_state(100))
+        newcomer = SimpleNamespace(id=12, bot=False, guild=guild, voice=_state(100))
+        leaver = SimpleNamespace(id=11, bot=False, guild=guild, voice=None)
+        channel.members = [stayer, newcomer]
+        members = {10: stayer, 11: leaver, 12: newcomer}
+        guild.get_member = members.get
+
+        async def wait_until_ready():
+            return None
+
+        bot = SimpleNamespace(guilds=[guild], wait_until_ready=wait_until_ready)
+        after = VoicePresenceTracker()
+        events = []
+
+        async def handler(event):
+            events.append(event)
+
+        after.subscribe(handler)
+        await after._restore(bot)
+
+        resumed = after.get(1, 10)
+        assert resumed.joined_at == pytest.approx(joined_at, abs=timedelta(seconds=1))
+        assert resumed.state == {"rank_counted_from": 123.0}
+        assert {(e.type, e.user_id, e.restored) for e in events} == {
+            (VoiceEventType.LEAVE, 11, True),
+            (VoiceEventType.JOIN, 12, True),
+        }
+        assert after.get(1, 11) is None
+        assert after.get(1, 12).channel_id == 100
+
+    @pytest.mark.asyncio
+    async def test_restore_closes_sessions_of_members_no_longer_cached(self, tmp_path, monkeypatch):
+        """A member who left the guild during downtime still gets a restored LEAVE."""
+        path = tmp_path / "restart.jsonl"
+        before_journal = VoiceSessionJournal(path)
+        monkeypatch.setattr(voice_presence_module, "voice_journal", before_journal)
+        before = VoicePresenceTracker()
+        joined_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        before.apply(_member(11), _state(), _state(100), joined_at)
+        before.apply(_member(99, bot=True), _state(), _state(100), joined_at)
+        before_journal.close()
+
+        monkeypatch.setattr(voice_presence_module, "voice_journal", VoiceSessionJournal(path))
+        guild = SimpleNamespace(id=1, voice_channels=[], get_member=lambda user_id: None)
+
+        async def wait_until_ready():
+            return None
+
+        after = VoicePresenceTracker()
+        events = []
+
+        async def handler(event):
+            events.append(event)
+
+        after.subscribe(handler, VoiceEventType.LEAVE)
+        await after._restore(SimpleNamespace(guilds=[guild], wait_until_ready=wait_until_ready))
+
+        by_user = {event.user_id: event for event in events}
+        assert set(by_user) == {11, 99}
+        assert by_user[11].member is None
+        assert by_user[11].previous_channel_id == 100
+        assert not by_user[11].is_bot
+        assert by_user[99].is_bot
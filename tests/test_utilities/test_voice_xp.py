@@ -0,0 +1,190 @@
+"""
+Tests for event-driven voice XP accrual.
+"""
+
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from models.rank.voice_activity import VoiceActivityType, VoicePresets
+from utils.participant_index import ParticipantIndex
+from utils.rank import voice_manager as voice_manager_module
+from utils.rank.voice_manager import ActiveSession, VoiceManager
+from utils.voice_journal import VoiceSessionJournal
+
+
+@pytest.fixture(autouse=True)
+def journal(tmp_path, monkeypatch):
+    """Keep the session journal out of the working tree."""
+    journal = VoiceSessionJournal(tmp_path / "sessions.jsonl")
+    monkeypatch.setattr(voice_manager_module, "voice_journal", journal)
+    return journal
+
+
+class TestParticipantIndex:
+    """Test per-channel participant counts and peaks."""
+
+    def test_join_leave_move_counts(self):
+        """Counts follow joins, leaves and moves; empty channels are dropped."""
+        index = ParticipantIndex()
+        index.join(1, 100, 10)
+        index.join(1, 100, 11)
+        index.join(1, 100, 11)
+        index.move(1, 100, 200, 10)
+
+        assert index.count(1, 100) == 1
+        assert index.count(1, 200) == 1
+        assert index.channel_counts(1) == {100: 1, 200: 1}
+
+        index.leave(1, 100, 11)
+        assert index.count(1, 100) == 0
+        assert index.channel_counts(1) == {200: 1}
+
+    def test_peak_since_join(self):
+        """Each participant sees the highest count reached after they joined."""
+        index = ParticipantIndex()
+        first = index.join(1, 100, 10)
+        index.join(1, 100, 11)
+        index.join(1, 100, 12)
+        index.leave(1, 100, 12)
+        index.leave(1, 100, 11)
+        late = index.join(1, 100, 13)
+
+        assert index.peak_since(1, 100, first) == 3
+        assert index.peak_since(1, 100, late) == 2
+        assert index.peak(1, 100) == 3
+        assert index.peak_since(1, 999, first) is None
+
+
+def _manager():
+    manager = VoiceManager()
+    manager.guild_configs[1] = (VoicePresets.get_balanced(), time.time())
+    manager._create_session_in_db = AsyncMock()
+    manager._complete_session_in_db = AsyncMock()
+    return manager
+
+
+def _session(start, activity=VoiceActivityType.LISTENING):
+    return ActiveSession(
+        session_id="s", guild_id=1, user_id=10, channel_id=100,
+        start_time=start, current_activity=activity, last_activity_time=start,
+    )
+
+
+class TestClosedFormXP:
+    """Test XP computed from segment durations."""
+
+    def test_segment_matches_rate(self):
+        """A constant segment earns base rate x multipliers x minutes."""
+        manager = _manager()
+        config = manager.guild_configs[1][0]
+        channel_config = config.get_channel_config(100)
+        start = datetime(2024, 1, 1, 13, 0)
+
+        xp = manager._segment_xp(config, 100, VoiceActivityType.LISTENING, 3, start, start + timedelta(minutes=10))
+
+        expected_rate = (
+            channel_config.base_xp_per_minute
+            * config.get_activity_multiplier(100, VoiceActivityType.LISTENING)
+            * manager._get_participant_multiplier(3, channel_config)
+            * manager._get_time_multiplier(start, channel_config)
+            * config.global_voice_multiplier
+        )
+        assert xp == pytest.approx(min(expected_rate, channel_config.max_xp_per_hour / 60) * 10)
+
+    def test_segment_splits_at_time_band(self):
+        """A segment across 18:00 uses afternoon then evening multipliers."""
+        manager = _manager()
+        config = manager.guild_configs[1][0]
+        start = datetime(2024, 1, 1, 17, 50)
+
+        pieces = manager._split_by_time_band(start, start + timedelta(minutes=20))
+
+        assert [(p.hour, seconds) for p, seconds in pieces] == [(17, 600), (18, 600)]
+        total = manager._segment_xp(config, 100, VoiceActivityType.LISTENING, 3, start, start + timedelta(minutes=20))
+        first = manager._segment_xp(config, 100, VoiceActivityType.LISTENING, 3, start, start + timedelta(minutes=10))
+        second = manager._segment_xp(
+            config, 100, VoiceActivityType.LISTENING, 3,
+            start + timedelta(minutes=10), start + timedelta(minutes=20)
+        )
+        assert total == pytest.approx(first + second)
+
+    def test_remainder_carries_between_segments(self):
+        """Many short segments add up to the same XP as one long one."""
+        manager = _manager()
+        config = manager.guild_configs[1][0]
+        start = datetime(2024, 1, 1, 13, 0)
+
+        chopped = _session(start)
+        for i in range(1, 601):
+            manager._accrue_session(chopped, config, start + timedelta(seconds=i))
+
+        whole = _session(start)
+        manager._accrue_session(whole, config, start + timedelta(seconds=600))
+
+        assert chopped.pending_xp == whole.pending_xp
+        assert chopped.listening_seconds == whole.listening_seconds == 600
+
+
+class TestEventDrivenSessions:
+    """Test timers and settlement driven by session events."""
+
+    @pytest.mark.asyncio
+    async def test_session_arms_afk_timer(self):
+        """Starting a session schedules its AFK deadline; ending cancels it."""
+        manager = _manager()
+        config = manager.guild_configs[1][0]
+
+        await manager.start_voice_session(1, 10, 100)
+        due = manager.timers.due_of("1:10")
+        session = manager.active_sessions["1:10"]
+        assert due == pytest.approx(session.last_activity_time.timestamp() + config.afk_detection_minutes * 60)
+
+        await manager.end_voice_session(1, 10, force_end=True)
+        assert "1:10" not in manager.timers
+        manager.stop_timers()
+
+    @pytest.mark.asyncio
+    async def test_afk_timer_marks_session_afk(self):
+        """An expired AFK timer switches the session to AFK and disarms it."""
+        manager = _manager()
+        await manager.start_voice_session(1, 10, 100)
+
+        await manager._handle_afk_timer("1:10")
+
+        assert manager.active_sessions["1:10"].current_activity == VoiceActivityType.AFK
+        assert "1:10" not in manager.timers
+        manager.stop_timers()
+
+    @pytest.mark.asyncio
+    async def test_join_settles_existing_channel_sessions(self):
+        """A join closes the previous participant-count segment for the channel."""
+        manager = _manager()
+        await manager.start_voice_session(1, 10, 100)
+        first = manager.active_sessions["1:10"]
+        first.last_xp_calculation -= timedelta(minutes=30)
+
+        await manager.start_voice_session(1, 11, 100)
+
+        assert first.pending_xp > 0
+        assert first.listening_seconds >= 1800
+        assert (datetime.now() - first.last_xp_calculation).total_seconds() < 5
+        manager.stop_timers()
+
+    @pytest.mark.asyncio
+    async def test_peak_participants_survive_departures(self):
+        """A completed session records the peak count, not the count at leave time."""
+        manager = _manager()
+        for user_id in (10, 11, 12):
+            await manager.start_voice_session(1, user_id, 100)
+        await manager.end_voice_session(1, 12, force_end=True)
+        await manager.end_voice_session(1, 11, force_end=True)
+
+        assert manager.get_participant_count(1, 100) == 1
+        completed = await manager.end_voice_session(1, 10, force_end=True)
+
+        assert completed.peak_participants == 3
+        assert manager.get_participant_count(1, 100) == 0
+        manager.stop_timers()
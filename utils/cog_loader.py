@@ -0,0 +1,139 @@
+"""
+起動時のCog並列ロード
+
+拡張機能を依存関係グラフに従って並列にロードする。依存先のない拡張機能は
+asyncio.gatherでまとめて読み込むので、各Cogのcog_load（DB初期化など）の待ち時間が
+重なり、起動時間は全Cogの合計ではなく最も遅い依存チェーンで決まる。
+"""
+
+import asyncio
+import pathlib
+import time
+import traceback
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Optional
+
+from discord.ext import commands
+
+from utils.logging import setup_logging
+
+logger = setup_logging("COG_LOADER")
+
+# 自動ロードから除外するディレクトリ（パッケージとして個別にロードするもの）
+PACKAGE_EXTENSIONS = ("cogs.aus", "cogs.stream", "cogs.cp", "cogs.rank")
+EXCLUDED_PARTS = frozenset({"Dev", "aus", "stream", "cp", "rank"})
+
+# 拡張機能 -> 先にロードしておく必要がある拡張機能
+EXTENSION_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    # rank_db.initialize() はCheckpoint DBの接続プールを使う
+    "cogs.rank": ("cogs.cp",),
+}
+
+
+@dataclass
+class ExtensionLoadResult:
+    """拡張機能1つのロード結果"""
+    name: str
+    seconds: float
+    error: Optional[str] = None
+    waited_seconds: float = 0.0  # 依存先のロード待ち
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def discover_extensions(folder_name: str = "cogs", root: pathlib.Path = pathlib.Path(".")) -> list[str]:
+    """自動ロード対象の拡張機能名を列挙"""
+    extensions = []
+    for p in sorted(root.glob(f"{folder_name}/**/*.py")):
+        if p.stem == "__init__":
+            continue
+        if EXCLUDED_PARTS.intersection(p.relative_to(root).parts):
+            continue
+        extensions.append(p.relative_to(root).with_suffix("").as_posix().replace("/", "."))
+    return extensions
+
+
+class CogLoader:
+    """依存関係グラフに沿って拡張機能を並列ロードする"""
+
+    def __init__(self, bot: commands.Bot, dependencies: Optional[dict[str, Iterable[str]]] = None):
+        self.bot = bot
+        self.dependencies = {
+            name: tuple(deps)
+            for name, deps in (EXTENSION_DEPENDENCIES if dependencies is None else dependencies).items()
+        }
+        self.results: dict[str, ExtensionLoadResult] = {}
+
+    def _check_cycles(self, extensions: list[str]):
+        """依存関係の循環を検出"""
+        visiting, done = set(), set()
+
+        def visit(name: str, path: tuple[str, ...]):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"拡張機能の依存関係が循環しています: {' -> '.join((*path, name))}")
+            visiting.add(name)
+            for dep in self.dependencies.get(name, ()):
+                if dep in extensions:
+                    visit(dep, (*path, name))
+            visiting.discard(name)
+            done.add(name)
+
+        for name in extensions:
+            visit(name, ())
+
+    async def load_all(self, extensions: Iterable[str]) -> list[ExtensionLoadResult]:
+        """拡張機能をロード（依存先の完了を待ってから、それ以外は並列に）"""
+        extensions = list(dict.fromkeys(extensions))
+        self._check_cycles(extensions)
+        started = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def load(name: str) -> ExtensionLoadResult:
+            wait_started = time.perf_counter()
+            deps = [tasks[dep] for dep in self.dependencies.get(name, ()) if dep in tasks]
+            if deps:
+                await asyncio.gather(*deps)
+            waited = time.perf_counter() - wait_started
+
+            load_started = time.perf_counter()
+            error = None
+            try:
+                await self.bot.load_extension(name)
+            except commands.ExtensionAlreadyLoaded:
+                pass
+            except commands.ExtensionError as e:
+                traceback.print_exc()
+                error = str(e)
+                logger.error(f"Failed to load extension: {name} | {e}")
+            result = ExtensionLoadResult(name, time.perf_counter() - load_started, error, waited)
+            if result.ok:
+                logger.info(f"Loaded extension: {name} ({result.seconds * 1000:.0f}ms)")
+            self.results[name] = result
+            return result
+
+        for name in extensions:
+            tasks[name] = asyncio.create_task(load(name), name=f"load_extension:{name}")
+        results = list(await asyncio.gather(*tasks.values()))
+
+        self._log_summary(results, time.perf_counter() - started)
+        return results
+
+    def _log_summary(self, results: list[ExtensionLoadResult], wall_seconds: float):
+        total = sum(r.seconds for r in results)
+        failed = [r.name for r in results if not r.ok]
+        slowest = sorted(results, key=lambda r: r.seconds, reverse=True)[:5]
+        logger.info(
+            f"⏱️ 拡張機能 {len(results)}件をロード: {wall_seconds:.2f}s（逐次なら約{total:.2f}s）"
+            f" / 遅い順: " + ", ".join(f"{r.name} {r.seconds:.2f}s" for r in slowest)
+        )
+        if failed:
+            logger.warning(f"⚠️ ロード失敗: {', '.join(failed)}")
+
+    @property
+    def failed(self) -> dict[str, str]:
+        return {name: r.error for name, r in self.results.items() if not r.ok}
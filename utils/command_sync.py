@@ -0,0 +1,104 @@
+"""
+アプリコマンドの差分同期
+
+コマンドツリーをsync時と同じ形式にシリアライズしてハッシュを取り、前回同期した
+ハッシュと比べて変わったスコープ（グローバル / ギルド）だけtree.syncする。
+ハッシュはアプリケーションIDごとにファイルに保存するので、コマンドが変わって
+いない再起動ではsyncのRESTコール（レート制限あり）を一切行わない。
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import discord
+from discord import app_commands
+
+from utils.logging import setup_logging
+
+logger = setup_logging("COMMAND_SYNC")
+
+STATE_PATH = Path("data/command_sync.json")
+
+GLOBAL_SCOPE = "global"
+
+
+async def tree_payload(tree: app_commands.CommandTree, guild_id: Optional[int] = None) -> list[dict[str, Any]]:
+    """tree.syncが送るのと同じペイロード"""
+    guild = discord.Object(id=guild_id) if guild_id is not None else None
+    commands = tree.get_commands(guild=guild)
+    translator = tree.translator
+    if translator:
+        return [await command.get_translated_payload(tree, translator) for command in commands]
+    return [command.to_dict(tree) for command in commands]
+
+
+def payload_hash(payload: list[dict[str, Any]]) -> str:
+    """コマンドの並び順に依存しない安定したハッシュ"""
+    canonical = sorted(json.dumps(command, sort_keys=True, separators=(",", ":")) for command in payload)
+    return hashlib.sha256("\n".join(canonical).encode()).hexdigest()
+
+
+class CommandSyncer:
+    """前回同期したハッシュと比べて必要なスコープだけ同期する"""
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = path
+        self._state: Optional[dict[str, dict[str, str]]] = None
+
+    def _load(self) -> dict[str, dict[str, str]]:
+        if self._state is None:
+            try:
+                self._state = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._state = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"コマンド同期の状態を読めませんでした（全スコープを同期します）: {e}")
+                self._state = {}
+        return self._state
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._state, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _guild_scopes(tree: app_commands.CommandTree) -> set[str]:
+        # ギルド専用コマンドを持つギルド（公開APIがないのでツリーの内部辞書を見る）
+        return {str(guild_id) for guild_id in getattr(tree, "_guild_commands", {})}
+
+    async def sync(self, bot: discord.Client, *, force: bool = False) -> list[str]:
+        """変更のあったスコープを同期して、同期したスコープを返す"""
+        tree = bot.tree
+        app_state = self._load().setdefault(str(bot.application_id), {})
+
+        # 前回コマンドがあったギルドも対象にする（全削除された場合に空で同期するため）
+        guild_scopes = self._guild_scopes(tree) | (set(app_state) - {GLOBAL_SCOPE})
+        synced = []
+        for scope in [GLOBAL_SCOPE, *sorted(guild_scopes)]:
+            guild_id = None if scope == GLOBAL_SCOPE else int(scope)
+            payload = await tree_payload(tree, guild_id)
+            digest = payload_hash(payload)
+            if not force and app_state.get(scope) == digest:
+                continue
+
+            await tree.sync(guild=discord.Object(id=guild_id) if guild_id is not None else None)
+            if guild_id is not None and not payload:
+                app_state.pop(scope, None)  # 空にしたギルドは次回から対象外
+            else:
+                app_state[scope] = digest
+            self._save()
+            synced.append(scope)
+
+        if synced:
+            logger.info(f"🔄 コマンドを同期しました: {', '.join(synced)}{'（強制）' if force else ''}")
+        else:
+            logger.info("コマンドツリーに変更がないため同期をスキップしました")
+        return synced
+
+
+# モジュールレベルのインスタンス
+command_syncer = CommandSyncer()
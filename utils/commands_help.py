@@ -1,7 +1,7 @@
 import json
 import subprocess
+from collections.abc import Callable
 from datetime import datetime
-from typing import Callable
 
 import discord
 import pytz
@@ -5,10 +5,13 @@ PostgreSQLデータベースとの接続を一貫した方法で提供するモ
 """
 import logging
 import os
-from typing import Any, Optional
+from typing import Any, Optional, Union
 
 import asyncpg
 
+from utils.db_pool import pool_registry
+from utils.db_statements import Statement
+
 logger = logging.getLogger('database')
 
 # 接続設定のキャッシュ
@@ -66,8 +69,8 @@ async def get_db_pool() -> asyncpg.Pool:
                 logger.error("DATABASE_PUBLIC_URL環境変数が設定されていません")
                 raise ValueError("DATABASE_PUBLIC_URL環境変数が設定されていません")
 
-            # 接続文字列を直接使用
-            _db_pool = await asyncpg.create_pool(db_url)
+            # DSNごとの共有プールを使用
+            _db_pool = await pool_registry.get(db_url, name="main", owner="database")
             logger.info("DATABASE_PUBLIC_URLを使用してデータベース接続プールを初期化しました")
         except Exception as e:
             logger.error(f"データベース接続に失敗しました: {e}")
@@ -80,16 +83,16 @@ async def close_db_pool():
     global _db_pool
 
     if _db_pool:
-        await _db_pool.close()
+        await pool_registry.release(_db_pool, owner="database")
         _db_pool = None
         logger.info("データベース接続プールを閉じました")
 
-async def execute_query(query: str, *args, fetch_type: str = 'all') -> Any:
+async def execute_query(query: Union[str, Statement], *args, fetch_type: str = 'all') -> Any:
     """
     SQL クエリを実行して結果を返します
 
     Args:
-        query: 実行するSQLクエリ
+        query: 実行するSQLクエリ（または登録済みステートメントのハンドル）
         *args: クエリのパラメータ
         fetch_type: 取得タイプ ('all', 'row', 'val', 'status')
 
@@ -97,6 +100,8 @@ async def execute_query(query: str, *args, fetch_type: str = 'all') -> Any:
         fetch_typeによって異なる結果を返します
     """
     pool = await get_db_pool()
+    if isinstance(query, Statement):
+        query = query.sql
 
     try:
         async with pool.acquire() as conn:
@@ -12,9 +12,8 @@ import re
 import uuid
 from typing import Any
 
-import asyncpg
-
 from config.setting import get_settings
+from utils.db_pool import pool_registry
 
 settings = get_settings()
 
@@ -45,8 +44,7 @@ class DBManager:
                 logger.error("DATABASE_PUBLIC_URL環境変数が設定されていません")
                 raise ValueError("DATABASE_PUBLIC_URL環境変数が設定されていません")
 
-            self.pool = await asyncpg.create_pool(db_url)
-            await self._setup_tables()
+            self.pool = await pool_registry.get(db_url, name="main", owner="db_manager")
             self._initialized = True
             logger.info("DATABASE_PUBLIC_URLを使用してデータベース接続プールを初期化しました")
         except Exception as e:
@@ -56,7 +54,8 @@ class DBManager:
     async def close(self):
         """データベース接続を閉じます"""
         if self.pool:
-            await self.pool.close()
+            await pool_registry.release(self.pool, owner="db_manager")
+            self.pool = None
             self._initialized = False
             logger.info("データベース接続プールを閉じました")
 
@@ -98,106 +97,6 @@ class DBManager:
             logger.error(f"テーブル削除中にエラー: {e}")
             return False
 
-    async def _setup_tables(self):
-        """
-        必要なテーブルをセットアップします（毎回全テーブルをCREATE TABLE IF NOT EXISTSで流す）
-        """
-        tables = [
-            '''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id BIGINT PRIMARY KEY,
-                username VARCHAR(255),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS auth_config (
-                id UUID PRIMARY KEY,
-                label VARCHAR(100) NOT NULL,
-                auth_code VARCHAR(100) NOT NULL,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS members (
-                id BIGINT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                role VARCHAR(100) NOT NULL,
-                avatar TEXT,
-                message TEXT,
-                joined_at DATE,
-                joined_at_jp VARCHAR(50),
-                role_color VARCHAR(10),
-                socials JSONB DEFAULT '{}'::jsonb,
-                type VARCHAR(50) NOT NULL,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS server_stats (
-                id SERIAL PRIMARY KEY,
-                guild_id BIGINT NOT NULL,
-                total_ch_id BIGINT,
-                members_ch_id BIGINT,
-                bot_ch_id BIGINT,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                UNIQUE(guild_id)
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS bump_notice_settings (
-                guild_id BIGINT PRIMARY KEY,
-                channel_id BIGINT,
-                bot_id BIGINT,
-                role_id BIGINT,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS member_emojis (
-                emoji_id BIGINT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                url TEXT NOT NULL,
-                animated BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS role_emoji_mappings (
-                role_id BIGINT PRIMARY KEY,
-                emoji_id BIGINT,
-                emoji_name TEXT,
-                animated BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT NOW(),
-                updated_at TIMESTAMP DEFAULT NOW()
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS note_posts (
-                id SERIAL PRIMARY KEY,
-                post_id TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                link TEXT NOT NULL,
-                author TEXT,
-                published_at TIMESTAMP WITH TIME ZONE,
-                summary TEXT,
-                thumbnail_url TEXT,
-                creator_icon TEXT,
-                notified_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-            '''
-        ]
-        async with self.pool.acquire() as conn:
-            for table_query in tables:
-                await conn.execute(table_query)
-            logger.info("必要なテーブルを確認・作成しました")
-
     # --- JSON移行関連のメソッド ---
 
     async def _clear_existing_tables(self):
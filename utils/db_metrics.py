@@ -0,0 +1,313 @@
+"""
+クエリ計測
+
+プールの接続をInstrumentedConnectionにして、SQLを正規化したフィンガープリントごとに
+呼び出し回数・レイテンシのヒストグラム・返却行数・接続取得の待ち時間を集計する。
+集計は管理APIとPrometheusメトリクスで公開し、閾値を超えたクエリはログに出す。
+"""
+
+import hashlib
+import re
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, Optional
+
+import asyncpg
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from config.setting import get_settings
+from utils.logging import setup_logging
+
+logger = setup_logging("DB_METRICS")
+
+# レイテンシのバケット（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 集計するフィンガープリントの上限（超えた分は1つにまとめる）
+MAX_STATEMENTS = 2000
+OVERFLOW_FINGERPRINT = "<other>"
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:\?|\$\d+)(?:\s*,\s*(?:\?|\$\d+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(query: str) -> str:
+    """リテラル・空白・INリストの違いを吸収した正規化SQL"""
+    normalized = _COMMENT.sub(" ", query)
+    normalized = _STRING.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("(...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip().rstrip(";")
+
+
+def fingerprint_id(statement: str) -> str:
+    """フィンガープリントの短いID（メトリクスのラベル用）"""
+    return hashlib.sha1(statement.encode()).hexdigest()[:12]
+
+
+def _status_rows(status: Any) -> int:
+    """'UPDATE 3' / 'INSERT 0 5' のようなステータスから影響行数を取り出す"""
+    if isinstance(status, str):
+        last = status.rsplit(" ", 1)[-1]
+        if last.isdigit():
+            return int(last)
+    return 0
+
+
+class StatementStats:
+    """1フィンガープリント分の集計"""
+
+    __slots__ = ("pool", "statement", "id", "calls", "errors", "total_time", "max_time",
+                 "rows", "pool_wait", "buckets")
+
+    def __init__(self, pool: str, statement: str):
+        self.pool = pool
+        self.statement = statement
+        self.id = fingerprint_id(statement)
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.pool_wait = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # 最後は+Inf
+
+    def observe(self, seconds: float, rows: int, pool_wait: float, error: bool):
+        self.calls += 1
+        self.errors += int(error)
+        self.total_time += seconds
+        self.max_time = max(self.max_time, seconds)
+        self.rows += rows
+        self.pool_wait += pool_wait
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, q: float) -> float:
+        """ヒストグラムから推定したパーセンタイル（バケット上限、秒）"""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets[:-1]):
+            seen += count
+            if seen >= target:
+                return LATENCY_BUCKETS[index]
+        return self.max_time
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "pool": self.pool,
+            "statement": self.statement,
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_time * 1000, 3),
+            "mean_ms": round(self.total_time / self.calls * 1000, 3) if self.calls else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max_time * 1000, 3),
+            "rows": self.rows,
+            "pool_wait_ms": round(self.pool_wait * 1000, 3),
+            "histogram": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], self.buckets)),
+        }
+
+
+class QueryMetrics:
+    """フィンガープリントごとのクエリ集計とPrometheusメトリクス"""
+
+    SORT_KEYS: dict[str, Callable[[StatementStats], float]] = {
+        "total": lambda s: s.total_time,
+        "calls": lambda s: s.calls,
+        "mean": lambda s: s.total_time / s.calls if s.calls else 0.0,
+        "max": lambda s: s.max_time,
+        "rows": lambda s: s.rows,
+        "pool_wait": lambda s: s.pool_wait,
+        "errors": lambda s: s.errors,
+    }
+
+    def __init__(self, slow_query_ms: Optional[float] = None):
+        self.slow_query_seconds = (
+            slow_query_ms if slow_query_ms is not None else get_settings().db_slow_query_ms
+        ) / 1000
+        self.statements: dict[tuple[str, str], StatementStats] = {}
+        self.started_at = time.time()
+
+        self.registry = CollectorRegistry()
+        self._latency = Histogram(
+            "hfs_db_query_duration_seconds", "SQL実行時間",
+            ["pool", "statement"], buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self._rows = Counter(
+            "hfs_db_query_rows", "SQLが返した・更新した行数", ["pool", "statement"], registry=self.registry,
+        )
+        self._errors = Counter(
+            "hfs_db_query_errors", "SQLのエラー数", ["pool", "statement"], registry=self.registry,
+        )
+        self._pool_wait = Histogram(
+            "hfs_db_pool_acquire_wait_seconds", "接続取得の待ち時間",
+            ["pool"], buckets=LATENCY_BUCKETS, registry=self.registry,
+        )
+        self.registry.register(_PoolCollector())
+
+    def _stats_for(self, pool: str, query: str) -> StatementStats:
+        statement = fingerprint(query)
+        key = (pool, statement)
+        stats = self.statements.get(key)
+        if stats is None:
+            if len(self.statements) >= MAX_STATEMENTS:
+                key = (pool, OVERFLOW_FINGERPRINT)
+                stats = self.statements.get(key)
+                if stats is not None:
+                    return stats
+                statement = OVERFLOW_FINGERPRINT
+            stats = self.statements[key] = StatementStats(pool, statement)
+        return stats
+
+    def record(
+        self,
+        pool: str,
+        query: str,
+        seconds: float,
+        rows: int = 0,
+        pool_wait: float = 0.0,
+        error: bool = False
+    ):
+        """1回のSQL実行を記録"""
+        stats = self._stats_for(pool, query)
+        stats.observe(seconds, rows, pool_wait, error)
+
+        self._latency.labels(pool, stats.id).observe(seconds)
+        if rows:
+            self._rows.labels(pool, stats.id).inc(rows)
+        if error:
+            self._errors.labels(pool, stats.id).inc()
+
+        if seconds >= self.slow_query_seconds:
+            logger.warning(
+                f"🐢 スロークエリ ({pool}, {seconds * 1000:.1f}ms, {rows}行): {stats.statement[:300]}"
+            )
+
+    def record_pool_wait(self, pool: str, seconds: float):
+        """接続取得の待ち時間を記録"""
+        self._pool_wait.labels(pool).observe(seconds)
+
+    def snapshot(self, sort: str = "total", limit: int = 50, pool: Optional[str] = None) -> list[dict[str, Any]]:
+        """集計結果（sortの降順）"""
+        key = self.SORT_KEYS.get(sort, self.SORT_KEYS["total"])
+        statements = [s for s in self.statements.values() if pool is None or s.pool == pool]
+        statements.sort(key=key, reverse=True)
+        return [s.to_dict() for s in statements[:limit]]
+
+    def reset(self):
+        """集計をリセット（Prometheusのカウンタはリセットしない）"""
+        self.statements.clear()
+        self.started_at = time.time()
+
+    def render_prometheus(self) -> bytes:
+        """Prometheusのテキスト形式"""
+        return generate_latest(self.registry)
+
+
+class _PoolCollector:
+    """接続プールのゲージ（スクレイプ時にレジストリから読む）"""
+
+    def collect(self):
+        from utils.db_pool import pool_registry
+
+        connections = GaugeMetricFamily(
+            "hfs_db_pool_connections", "接続プールの接続数", labels=["pool", "state"]
+        )
+        for stats in pool_registry.stats():
+            connections.add_metric([stats["name"], "in_use"], stats["in_use"])
+            connections.add_metric([stats["name"], "idle"], stats["idle"])
+            connections.add_metric([stats["name"], "max"], stats["max_size"])
+        yield connections
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    """実行したSQLをquery_metricsに記録する接続"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_name = "direct"
+        self._pending_wait = 0.0
+        self._resetting = False  # プール返却時のリセットSQLは集計しない
+
+    def note_acquire_wait(self, seconds: float):
+        """プールから取得されたときの待ち時間（次のSQLに計上）"""
+        self._pending_wait = seconds
+        query_metrics.record_pool_wait(self.pool_name, seconds)
+
+    async def reset(self, *, timeout=None):
+        self._resetting = True
+        try:
+            await super().reset(timeout=timeout)
+        finally:
+            self._resetting = False
+
+    async def _measure(self, query: str, call, count_rows: Callable[[Any], int]):
+        if self._resetting:
+            return await call
+        pool_wait, self._pending_wait = self._pending_wait, 0.0
+        started = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            query_metrics.record(self.pool_name, query, time.perf_counter() - started, 0, pool_wait, error=True)
+            raise
+        query_metrics.record(self.pool_name, query, time.perf_counter() - started, count_rows(result), pool_wait)
+        return result
+
+    async def execute(self, query: str, *args, timeout: float = None) -> str:
+        return await self._measure(query, super().execute(query, *args, timeout=timeout), _status_rows)
+
+    async def executemany(self, command: str, args, *, timeout: float = None):
+        args = list(args)
+        return await self._measure(
+            command, super().executemany(command, args, timeout=timeout), lambda _: len(args)
+        )
+
+    async def fetch(self, query, *args, timeout=None, record_class=None) -> list:
+        return await self._measure(
+            query, super().fetch(query, *args, timeout=timeout, record_class=record_class), len
+        )
+
+    async def fetchmany(self, query, args, *, timeout: float = None, record_class=None):
+        return await self._measure(
+            query, super().fetchmany(query, args, timeout=timeout, record_class=record_class), len
+        )
+
+    async def fetchrow(self, query, *args, timeout=None, record_class=None):
+        return await self._measure(
+            query, super().fetchrow(query, *args, timeout=timeout, record_class=record_class),
+            lambda row: int(row is not None)
+        )
+
+    async def fetchval(self, query, *args, column=0, timeout=None):
+        return await self._measure(
+            query, super().fetchval(query, *args, column=column, timeout=timeout),
+            lambda value: int(value is not None)
+        )
+
+
+# モジュールレベルのインスタンス
+query_metrics = QueryMetrics()
+
+PROMETHEUS_CONTENT_TYPE = CONTENT_TYPE_LATEST
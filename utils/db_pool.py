@@ -0,0 +1,274 @@
+"""
+PostgreSQL接続プールレジストリ
+
+DSNごとに1つの共有asyncpgプールを持ち、各モジュールはここからプールを借りる。
+プールのサイズ・ステートメントキャッシュ・アイドル接続の寿命は設定で一括管理し、
+接続取得の待ち時間と使用中接続数をゲージとして公開する。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+import asyncpg
+from asyncpg.pool import Pool, PoolAcquireContext
+
+from config.setting import get_settings
+from utils.db_metrics import InstrumentedConnection
+from utils.logging import setup_logging
+
+logger = setup_logging("DB_POOL")
+
+
+@dataclass(frozen=True)
+class PoolOptions:
+    """プール設定"""
+    min_size: int = 1
+    max_size: int = 10
+    statement_cache_size: int = 100
+    max_inactive_connection_lifetime: float = 300.0
+    command_timeout: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls) -> "PoolOptions":
+        settings = get_settings()
+        return cls(
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            statement_cache_size=settings.db_pool_statement_cache_size,
+            max_inactive_connection_lifetime=settings.db_pool_max_inactive_lifetime,
+        )
+
+
+@dataclass
+class PoolStats:
+    """接続取得の統計"""
+    acquisitions: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    last_wait: float = 0.0
+
+    def record_wait(self, seconds: float):
+        self.acquisitions += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+        self.last_wait = seconds
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.acquisitions if self.acquisitions else 0.0
+
+
+class _TimedAcquireContext(PoolAcquireContext):
+    """接続取得の待ち時間を記録するacquireコンテキスト"""
+
+    __slots__ = ()
+
+    async def _timed_acquire(self):
+        started = time.perf_counter()
+        try:
+            connection = await self.pool._acquire(self.timeout)
+        except asyncio.TimeoutError:
+            self.pool.stats.timeouts += 1
+            raise
+        wait = time.perf_counter() - started
+        self.pool.stats.record_wait(wait)
+        raw_connection = getattr(connection, "_con", connection)
+        if isinstance(raw_connection, InstrumentedConnection):
+            raw_connection.note_acquire_wait(wait)
+        return connection
+
+    async def __aenter__(self):
+        if self.connection is not None or self.done:
+            raise asyncpg.InterfaceError("a connection is already acquired")
+        self.connection = await self._timed_acquire()
+        return self.connection
+
+    def __await__(self):
+        self.done = True
+        return self._timed_acquire().__await__()
+
+
+class RegistryPool(Pool):
+    """レジストリが管理するプール（acquireの待ち時間を記録）"""
+
+    __slots__ = ("name", "names", "dsn", "options", "stats", "_owners")
+
+    def __init__(self, *args, name: str, names: set[str], dsn: str, options: PoolOptions, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = name
+        self.names = names  # 借り手が指定したプール名すべて（接続初期化フックに渡す）
+        self.dsn = dsn
+        self.options = options
+        self.stats = PoolStats()
+        self._owners: set[str] = set()
+
+    def acquire(self, *, timeout=None):
+        return _TimedAcquireContext(self, timeout)
+
+    @property
+    def in_use(self) -> int:
+        """使用中の接続数"""
+        return self.get_size() - self.get_idle_size()
+
+
+def normalize_dsn(dsn: str) -> str:
+    """同じDBを指すDSNを同じキーにする"""
+    dsn = dsn.strip()
+    if dsn.startswith("postgres://"):
+        dsn = dsn.replace("postgres://", "postgresql://", 1)
+    return dsn
+
+
+class PoolRegistry:
+    """DSN -> 共有プールのレジストリ"""
+
+    def __init__(self):
+        self._pools: dict[str, RegistryPool] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._init_hooks: list = []
+        self._connection_class: type[asyncpg.Connection] = InstrumentedConnection
+
+    def add_init_hook(self, hook):
+        """新しい接続ごとに呼ぶコルーチン関数 hook(connection, pool_name) を登録
+
+        同じDSNのプールが複数の名前で借りられている場合は、名前ごとに呼ぶ。
+        """
+        if hook not in self._init_hooks:
+            self._init_hooks.append(hook)
+
+    def set_connection_class(self, connection_class: type[asyncpg.Connection]):
+        """以降に作るプールの接続クラスを差し替える"""
+        self._connection_class = connection_class
+
+    async def get(self, dsn: str, *, name: str, owner: Optional[str] = None, **overrides: Any) -> RegistryPool:
+        """DSNの共有プールを取得（なければ作成）
+
+        Args:
+            dsn: 接続文字列
+            name: プール名。表示名（メトリクス用）には最初に作ったモジュールの名前が使われるが、
+                接続初期化フックには借り手が指定したすべての名前が渡る
+            owner: 借り手の名前。release()で全員が返すとプールを閉じる（省略時はname）
+            **overrides: PoolOptionsの上書き（プール作成時のみ有効。作成済みのプールと
+                食い違う場合は警告する。asyncpgのプールは作成後にサイズを変えられない）
+        """
+        if not dsn:
+            raise ValueError(f"{name}: 接続文字列が設定されていません")
+
+        key = normalize_dsn(dsn)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                options = replace(PoolOptions.from_settings(), **overrides)
+                pool = await self._create_pool(key, name, options)
+                self._pools[key] = pool
+                logger.info(
+                    f"✅ DB接続プール作成: {name} (min={options.min_size}, max={options.max_size})"
+                )
+            else:
+                self._warn_option_mismatch(pool, name, overrides)
+            if name not in pool.names:
+                # 開いている接続は新しい名前で初期化されていないので、返却時に作り直させる
+                pool.names.add(name)
+                await pool.expire_connections()
+            pool._owners.add(owner or name)
+            return pool
+
+    def _warn_option_mismatch(self, pool: RegistryPool, name: str, overrides: dict[str, Any]):
+        """後から借りたモジュールの上書きが作成済みのプールと食い違っていたら警告"""
+        mismatched = {
+            key: (getattr(pool.options, key), value)
+            for key, value in overrides.items()
+            if getattr(pool.options, key) != value
+        }
+        if mismatched:
+            details = ", ".join(f"{key}={actual} (要求 {wanted})" for key, (actual, wanted) in mismatched.items())
+            logger.warning(
+                f"⚠️ {name}: 共有プール {pool.name} は作成済みのため設定の上書きは反映されません: {details}"
+            )
+
+    async def _create_pool(self, dsn: str, name: str, options: PoolOptions) -> RegistryPool:
+        names = {name}
+
+        async def init(connection):
+            if isinstance(connection, InstrumentedConnection):
+                connection.pool_name = name
+            for hook in self._init_hooks:
+                for pool_name in sorted(names):
+                    await hook(connection, pool_name)
+
+        pool = RegistryPool(
+            dsn,
+            name=name,
+            names=names,
+            dsn=dsn,
+            options=options,
+            connection_class=self._connection_class,
+            record_class=asyncpg.Record,
+            min_size=options.min_size,
+            max_size=options.max_size,
+            max_queries=50000,
+            max_inactive_connection_lifetime=options.max_inactive_connection_lifetime,
+            init=init,
+            loop=None,
+            statement_cache_size=options.statement_cache_size,
+            command_timeout=options.command_timeout,
+        )
+        await pool
+        return pool
+
+    async def release(self, pool: Optional[Pool], owner: Optional[str] = None):
+        """プールを返却（借り手がいなくなったら閉じる）"""
+        if not isinstance(pool, RegistryPool):
+            if pool is not None:
+                await pool.close()
+            return
+
+        pool._owners.discard(owner or pool.name)
+        if pool._owners:
+            return
+
+        if self._pools.get(pool.dsn) is pool:
+            del self._pools[pool.dsn]
+        await pool.close()
+        logger.info(f"DB接続プールを閉じました: {pool.name}")
+
+    async def close_all(self):
+        """すべてのプールを閉じる"""
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            try:
+                await pool.close()
+            except Exception as e:
+                logger.error(f"DB接続プールのクローズに失敗: {pool.name} {e}")
+
+    def pools(self) -> list[RegistryPool]:
+        return list(self._pools.values())
+
+    def stats(self) -> list[dict[str, Any]]:
+        """プールごとのゲージ"""
+        return [
+            {
+                "name": pool.name,
+                "owners": sorted(pool._owners),
+                "size": pool.get_size(),
+                "idle": pool.get_idle_size(),
+                "in_use": pool.in_use,
+                "min_size": pool.options.min_size,
+                "max_size": pool.options.max_size,
+                "acquisitions": pool.stats.acquisitions,
+                "acquire_timeouts": pool.stats.timeouts,
+                "acquire_wait_avg_ms": round(pool.stats.avg_wait * 1000, 3),
+                "acquire_wait_max_ms": round(pool.stats.max_wait * 1000, 3),
+                "acquire_wait_last_ms": round(pool.stats.last_wait * 1000, 3),
+            }
+            for pool in self._pools.values()
+        ]
+
+
+# モジュールレベルのインスタンス
+pool_registry = PoolRegistry()
@@ -0,0 +1,98 @@
+"""
+プリペアドステートメントレジストリ
+
+ホットパスのSQLをモジュールごとに名前付きで登録し、プールの接続初期化（init）で
+事前にPREPAREしておく。実行はハンドル（Statement）経由で行い、SQLテキストが
+呼び出しごとに変わらないので、各接続のステートメントキャッシュに常に当たる
+（Parse/計画作成を初回の接続初期化時だけにする）。
+ステートメントは借り手が指定するプール名で登録する。同じDSNを別名で借りた場合も、
+プールレジストリが接続初期化時にすべての名前で呼ぶので両方の分がPREPAREされる。
+"""
+
+from typing import Any, Optional
+
+import asyncpg
+
+from utils.db_pool import pool_registry
+from utils.logging import setup_logging
+
+logger = setup_logging("DB_STATEMENTS")
+
+
+class Statement:
+    """登録済みSQLのハンドル"""
+
+    __slots__ = ("pool", "name", "sql")
+
+    def __init__(self, pool: str, name: str, sql: str):
+        self.pool = pool
+        self.name = name
+        self.sql = sql
+
+    async def fetch(self, connection, *args) -> list:
+        return await connection.fetch(self.sql, *args)
+
+    async def fetchrow(self, connection, *args) -> Optional[asyncpg.Record]:
+        return await connection.fetchrow(self.sql, *args)
+
+    async def fetchval(self, connection, *args) -> Any:
+        return await connection.fetchval(self.sql, *args)
+
+    async def execute(self, connection, *args) -> str:
+        return await connection.execute(self.sql, *args)
+
+    async def executemany(self, connection, args) -> None:
+        await connection.executemany(self.sql, args)
+
+    def __repr__(self) -> str:
+        return f"<Statement {self.pool}:{self.name}>"
+
+
+class StatementRegistry:
+    """プール名 -> 名前付きステートメントのレジストリ"""
+
+    def __init__(self):
+        self._statements: dict[str, dict[str, Statement]] = {}
+
+    def register(self, pool: str, name: str, sql: str) -> Statement:
+        """ステートメントを登録してハンドルを返す（同名の再登録は上書き）"""
+        statement = Statement(pool, name, sql.strip())
+        self._statements.setdefault(pool, {})[name] = statement
+        return statement
+
+    def get(self, pool: str, name: str) -> Optional[Statement]:
+        return self._statements.get(pool, {}).get(name)
+
+    def for_pool(self, pool: str) -> list[Statement]:
+        return list(self._statements.get(pool, {}).values())
+
+    async def prepare_connection(self, connection: asyncpg.Connection, pool: str):
+        """接続初期化時に登録済みステートメントをPREPAREしてキャッシュに載せる
+
+        テーブル作成前などで失敗したステートメントは、初回実行時に通常どおり準備される。
+        """
+        statements = self.for_pool(pool)
+        if not statements:
+            return
+        # 接続のステートメントキャッシュに載せる（connection.prepare()はキャッシュしない）。
+        # 非公開APIなので asyncpg==0.30.0（requirements.txtで固定）で確認済み。
+        # 無くなっていたら事前準備だけを諦め、初回実行時の通常の準備に任せる
+        get_statement = getattr(connection, "_get_statement", None)
+        if get_statement is None:
+            logger.warning("asyncpgにConnection._get_statementが無いため、ステートメントの事前準備をスキップします")
+            return
+
+        prepared = 0
+        for statement in statements:
+            try:
+                await get_statement(statement.sql, None)
+                prepared += 1
+            except asyncpg.PostgresError as e:
+                logger.debug(f"{pool}:{statement.name} の事前準備をスキップ: {e}")
+        if prepared:
+            logger.debug(f"{pool}: {prepared}件のステートメントを事前準備しました")
+
+
+# モジュールレベルのインスタンス
+statements = StatementRegistry()
+pool_registry.add_init_hook(statements.prepare_connection)
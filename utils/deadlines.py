@@ -0,0 +1,87 @@
+"""
+期限のヒープ
+
+キー（チャンネルID・ユーザーキーなど）ごとに1つの期限を持つ最小ヒープ。
+期限の置き換え・削除はヒープを作り直さず、古いエントリを取り出す時に読み飛ばす（遅延削除）ので O(log n)。
+期限は比較できる値なら何でもよい（datetime・UNIX秒）。
+固定メッセージの時間トリガー、音声XPのAFK判定、期限付きジョブのスケジューラで共有する。
+"""
+
+import heapq
+import itertools
+from collections.abc import Hashable
+from typing import Any, Optional
+
+# 無効化済みエントリがこれを超えたらヒープを作り直す（有効なエントリ数に対する倍率）
+COMPACT_RATIO = 2
+
+# これより小さいヒープは作り直さない
+COMPACT_MIN_SIZE = 64
+
+
+class DeadlineHeap:
+    """キーごとの期限を早い順に取り出す"""
+
+    def __init__(self):
+        self._heap: list[tuple[Any, int, Hashable]] = []
+        self._entries: dict[Hashable, tuple[Any, int]] = {}  # キー -> (期限, 有効なエントリの番号)
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def keys(self) -> list[Hashable]:
+        """期限が登録されているキー"""
+        return list(self._entries)
+
+    def due_of(self, key: Hashable) -> Optional[Any]:
+        """キーの期限"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def push(self, key: Hashable, due: Optional[Any]):
+        """期限を登録（既存の期限は置き換え、Noneなら削除。同じ期限なら何もしない）"""
+        if due is None:
+            self._entries.pop(key, None)
+            return
+        if self.due_of(key) == due:
+            return
+        seq = next(self._seq)
+        self._entries[key] = (due, seq)
+        heapq.heappush(self._heap, (due, seq, key))
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        """遠い期限の置き換えが続くと無効化済みエントリが先頭まで来ずに溜まるので作り直す"""
+        if len(self._heap) <= max(COMPACT_MIN_SIZE, len(self._entries) * (COMPACT_RATIO + 1)):
+            return
+        self._heap = [(due, seq, key) for key, (due, seq) in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def _is_current(self, item: tuple[Any, int, Hashable]) -> bool:
+        due, seq, key = item
+        return self._entries.get(key) == (due, seq)
+
+    def _drop_stale(self):
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[Any]:
+        """最も早い期限"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Any) -> list[Hashable]:
+        """期限が来たキーを早い順に取り出す"""
+        due = []
+        while (next_due := self.next_due()) is not None and next_due <= now:
+            _, _, key = heapq.heappop(self._heap)
+            del self._entries[key]
+            due.append(key)
+        return due
@@ -0,0 +1,172 @@
+"""
+構造化イベントログ
+
+Botのイベント（BotReadyなど）を追記専用のJSONLファイルに1行ずつ書く。
+書き込みはバッファに溜めてまとめてスレッドで行うのでイベントループを止めず、
+サイズでローテーションするので小さなファイルが溜まり続けることもない。
+イベント種別ごとの最新イベントとセッションIDはメモリ上に保持し、
+起動時は現在のファイルの末尾だけを読んで復元する。
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Any, Optional
+
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+EVENT_LOG_PATH = Path("data/logging/events.jsonl")
+
+# 起動時にインデックスを復元するために読む末尾のバイト数
+TAIL_BYTES = 64 * 1024
+
+
+class EventLog:
+    """追記専用・ローテーション付きのJSONLイベントログ"""
+
+    def __init__(
+        self,
+        path: Path = EVENT_LOG_PATH,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        flush_interval: float = 1.0,
+        batch_size: int = 100,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._buffer: deque[str] = deque()
+        self._latest: dict[str, dict[str, Any]] = {}
+        self._session_id: Optional[str] = None
+        self._index_loaded = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()  # バッファが溜まった時の即時書き出し
+        self._lock: Optional[asyncio.Lock] = None
+
+    # --- インデックス ---
+
+    def _index(self, event: dict[str, Any]):
+        name = event.get("event")
+        if name:
+            self._latest[name] = event
+        # BotReadyはセッションIDが取れなかった場合もNoneを記録するので、前回の値を引き継がない
+        if "session_id" in event:
+            self._session_id = event["session_id"]
+
+    def _load_index(self):
+        """現在のファイルの末尾からインデックスを復元"""
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - TAIL_BYTES))
+                lines = f.read().decode("utf-8", errors="replace").splitlines()
+        except FileNotFoundError:
+            return
+        if size > TAIL_BYTES:
+            lines = lines[1:]  # 途中から読んだ先頭行は不完全
+        for line in lines:
+            try:
+                self._index(json.loads(line))
+            except ValueError:
+                continue
+
+    def latest(self, event: str) -> Optional[dict[str, Any]]:
+        """種別ごとの最新イベント"""
+        self._load_index()
+        return self._latest.get(event)
+
+    def latest_session_id(self) -> Optional[str]:
+        """最後に記録されたセッションID"""
+        self._load_index()
+        return self._session_id
+
+    # --- 書き込み ---
+
+    def record(self, event: dict[str, Any]):
+        """イベントを記録（バッファに積むだけ。書き込みはまとめて行う）"""
+        self._load_index()
+        self._index(event)
+        self._buffer.append(json.dumps(event, ensure_ascii=False, default=str))
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # イベントループ外（スクリプトなど）ではその場で書く
+            self._write_lines(self._drain())
+            return
+
+        if len(self._buffer) >= self.batch_size:
+            task = loop.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _drain(self) -> list[str]:
+        lines = list(self._buffer)
+        self._buffer.clear()
+        return lines
+
+    async def flush(self):
+        """バッファの内容を書き出す"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            lines = self._drain()
+            if lines:
+                try:
+                    await asyncio.to_thread(self._write_lines, lines)
+                except OSError as e:
+                    logger.error(f"イベントログの書き込みに失敗しました: {e}")
+
+    async def close(self):
+        """保留中のイベントを書き出す"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def _write_lines(self, lines: list[str]):
+        if not lines:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            size = f.tell()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """events.jsonl → events.1.jsonl → ... → events.N.jsonl（最古は削除）"""
+        def backup(index: int) -> Path:
+            return self.path.with_name(f"{self.path.stem}.{index}{self.path.suffix}")
+
+        oldest = backup(self.backup_count)
+        if oldest.exists():
+            oldest.unlink()
+        for index in range(self.backup_count - 1, 0, -1):
+            if backup(index).exists():
+                os.replace(backup(index), backup(index + 1))
+        if self.backup_count > 0:
+            os.replace(self.path, backup(1))
+        else:
+            self.path.unlink()
+
+
+# モジュールレベルのインスタンス
+event_log = EventLog()
@@ -1,10 +1,9 @@
-import json
+import atexit
 import os
-import shutil
-import uuid
+import queue
+import sys
 
 #from discord.ext.prometheus import PrometheusLoggingHandler
-from datetime import datetime
 from logging import (
     CRITICAL,
     DEBUG,
@@ -13,17 +12,25 @@ from logging import (
     WARNING,
     FileHandler,
     Formatter,
+    Logger,
+    LogRecord,
     StreamHandler,
     getLogger,
 )
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
-logger = getLogger(__name__)
-handler = StreamHandler()
-handler.setLevel(DEBUG)
-logger.setLevel(DEBUG)
-logger.addHandler(handler)
-logger.propagate = False
+# すべてのモジュールのロガーはこの配下（hfs.<モジュール名>）に作る
+APP_LOGGER_NAME = "hfs"
+
+LEVEL_ALIASES = {
+    "debug": DEBUG, "d": DEBUG,
+    "info": INFO, "i": INFO,
+    "warning": WARNING, "w": WARNING,
+    "error": ERROR, "e": ERROR,
+    "critical": CRITICAL, "c": CRITICAL,
+    "gf": DEBUG,
+}
 
 # logger_gf = getLogger(__name__)
 # handler_gf = PrometheusLoggingHandler()
@@ -43,100 +50,104 @@ class CustomFormatter(Formatter):
     red = "\x1b[31;20m"
     bold_red = "\x1b[31;1m"
     reset = "\x1b[0m"
-    format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s (%(filename)s:%(lineno)d)"
+    fmt = "%(asctime)s - %(name)s - %(levelname)s - %(message)s (%(filename)s:%(lineno)d)"
 
     FORMATS = {
-        DEBUG: blue + format + reset,
-        INFO: white + format + reset,
-        WARNING: yellow + format + reset,
-        ERROR: red + format + reset,
-        CRITICAL: bold_red + format + reset
+        DEBUG: blue + fmt + reset,
+        INFO: white + fmt + reset,
+        WARNING: yellow + fmt + reset,
+        ERROR: red + fmt + reset,
+        CRITICAL: bold_red + fmt + reset
     }
 
+    def __init__(self):
+        super().__init__(self.fmt)
+        # レベルごとのFormatterは一度だけ作る
+        self._formatters = {level: Formatter(fmt) for level, fmt in self.FORMATS.items()}
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = Formatter(log_fmt)
-        return formatter.format(record)
-
-def save_log(log_data):
-    logger.info('Saving log data...')
-
-    date_str = datetime.now().strftime('%Y-%m-%d')
-    time_str = datetime.now().strftime('%H-%M-%S')
-    base_dir_path = 'data/logging'
-    dir_path = f'{base_dir_path}/{date_str}/{time_str}'
-
-    date_folders = [f for f in os.listdir(base_dir_path) if os.path.isdir(os.path.join(base_dir_path, f))]
-    if len(date_folders) > 10:
-        oldest_folder = sorted(date_folders)[0]
-        archive_path = os.path.join(base_dir_path, 'archive', oldest_folder)
-        shutil.move(os.path.join(base_dir_path, oldest_folder), archive_path)
-        logger.debug(f'Archived oldest folder: {oldest_folder}')
-
-    os.makedirs(dir_path, exist_ok=True)
-
-    file_name = f'{uuid.uuid4()}.json'
-
-    file_path = os.path.join(dir_path, file_name)
-
-    with open(file_path, 'w', encoding='utf-8') as file:
-        json.dump(log_data, file, ensure_ascii=False, indent=4)
-
-    logger.info(f'Log saved to {file_path}')
-
-def setup_logging(mode: Optional[str] = None):
-
-    if logger.hasHandlers():
-        logger.handlers.clear()
-
-    level = INFO
-
-    if mode == "debug" or mode == "D":
-        level = DEBUG
-    elif mode == "info" or mode == "I":
-        level = INFO
-    elif mode == "warning" or mode == "W":
-        level = WARNING
-    elif mode == "error" or mode == "E":
-        level = ERROR
-    elif mode == "critical" or mode == "C":
-        level = CRITICAL
-    elif mode == "gf" or mode == "GF":
-        level = DEBUG
-        # logger_gf.setLevel(DEBUG)
-        # handler_gf.setLevel(DEBUG)
-        # handler_gf.setFormatter(CustomFormatter())
-        # logger_gf.addHandler(handler_gf)
-        # logger_gf.propagate = False
-
-        # return logger
-    elif mode == "api" or mode == "API":
-        path = "data/logging/api"
-        if not os.path.exists(path):
-            os.makedirs(path, exist_ok=True)
-        api_logger = getLogger("API")
-        api_logger.setLevel(DEBUG)
+        return self._formatters.get(record.levelno, super()).format(record)
+
+
+class LoopSafeQueueHandler(QueueHandler):
+    """レコードをキューに積むだけのハンドラ（整形と書き込みはリスナースレッドで行う）"""
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # %引数だけは呼び出し時点の値で確定させる（後から変更されても影響しないように）
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class _Pipeline:
+    """QueueHandler → QueueListener のログパイプライン"""
+
+    def __init__(self):
+        self.listeners: list[QueueListener] = []
+        self.stream_handler = StreamHandler()
+        self.stream_handler.setFormatter(CustomFormatter())
+        self.app_logger = getLogger(APP_LOGGER_NAME)
+        self.app_logger.setLevel(DEBUG)
+        self.app_logger.propagate = False
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self.app_logger.addHandler(self.queue_handler(self.stream_handler))
+        atexit.register(self.stop)
 
-        api_stream_handler = StreamHandler()
-        api_stream_handler.setLevel(DEBUG)
-        api_stream_handler.setFormatter(CustomFormatter())
-        api_logger.addHandler(api_stream_handler)
+    def queue_handler(self, *handlers) -> QueueHandler:
+        """handlersへ書き込むリスナースレッドを起動して、そのキューへのハンドラを返す"""
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        self.listeners.append(listener)
+        return LoopSafeQueueHandler(log_queue)
 
+    def stop(self):
+        """キューに残ったレコードを書き出してリスナーを止める"""
+        for listener in self.listeners:
+            listener.stop()
+        self.listeners.clear()
+
+
+_pipeline = _Pipeline()
+
+
+def _api_logger() -> Logger:
+    """APIのロガー（ストリームに加えてdata/logging/api/api.logにも書く）"""
+    api_logger = getLogger(f"{APP_LOGGER_NAME}.API")
+    if not api_logger.handlers:
+        path = "data/logging/api"
+        os.makedirs(path, exist_ok=True)
         api_file_handler = FileHandler(f'{path}/api.log')
-        api_file_handler.setLevel(DEBUG)
         api_file_handler.setFormatter(CustomFormatter())
-        api_logger.addHandler(api_file_handler)
+        api_logger.addHandler(_pipeline.queue_handler(api_file_handler))
+    api_logger.setLevel(DEBUG)
+    return api_logger
 
-        api_logger.propagate = False
-        return api_logger
-    else:
-        level = INFO
 
-    logger.setLevel(level)
+def setup_logging(mode: Optional[str] = None) -> Logger:
+    """呼び出し元モジュール用のロガーを返す
+
+    mode にレベル（"D" / "info" など）を渡すとそのモジュールのレベルになり、
+    それ以外の文字列はロガー名として使う（レベルはINFO）。
+    出力はキュー経由でリスナースレッドが行うので、イベントループはブロックしない。
+    """
+    _pipeline.start()
 
-    handler = StreamHandler()
-    handler.setLevel(level)
-    handler.setFormatter(CustomFormatter())
-    logger.addHandler(handler)
+    key = (mode or "").lower()
+    if key == "api":
+        return _api_logger()
+
+    if mode is None or key in LEVEL_ALIASES:
+        name = sys._getframe(1).f_globals.get("__name__", "__main__")
+    else:
+        name = mode
 
-    return logger
+    module_logger = getLogger(f"{APP_LOGGER_NAME}.{name}")
+    module_logger.setLevel(LEVEL_ALIASES.get(key, INFO))
+    return module_logger
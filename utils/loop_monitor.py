@@ -0,0 +1,204 @@
+"""
+イベントループ監視
+
+一定間隔でsleepして予定時刻からの遅れ（ループラグ）を記録し、パーセンタイルを出す。
+ループが閾値以上止まっている間は監視スレッドがループのスレッドのスタックを取得するので、
+何がループをブロックしていたか（同期I/Oや重い処理）がそのまま分かる。
+asyncioのデバッグモードが有効な場合は、slow_callback_durationを超えたコールバックの
+警告も同じ記録に取り込む。
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Optional
+
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+# ラグを測る間隔（秒）
+SAMPLE_INTERVAL = 0.5
+
+# これ以上ループが止まったらスタックを記録する（秒）
+SLOW_CALLBACK_SECONDS = 0.25
+
+# 保持するサンプル数（既定の間隔で約10分）
+LAG_SAMPLES = 1200
+
+# 保持する遅いコールバックの記録数
+SLOW_EVENTS = 50
+
+# 記録するスタックの深さ
+STACK_LIMIT = 15
+
+
+class _AsyncioSlowCallbackHandler(logging.Handler):
+    """asyncioのデバッグモードが出す「Executing ... took ...」を記録に取り込む"""
+
+    def __init__(self, monitor: "LoopMonitor"):
+        super().__init__(logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord):
+        if str(record.msg).startswith("Executing"):
+            self.monitor._add_slow_event("asyncio", None, record.getMessage())
+
+
+class LoopMonitor:
+    """イベントループのラグと遅いコールバックの記録"""
+
+    def __init__(
+        self,
+        interval: float = SAMPLE_INTERVAL,
+        slow_threshold: float = SLOW_CALLBACK_SECONDS,
+        max_samples: int = LAG_SAMPLES,
+        max_slow_events: int = SLOW_EVENTS,
+    ):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self.slow_events: deque[dict[str, Any]] = deque(maxlen=max_slow_events)
+        self.slow_count = 0
+        self.max_lag = 0.0
+        self.started_at = time.time()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.monotonic()
+        self._stall_stack: Optional[list[str]] = None
+        self._asyncio_handler: Optional[_AsyncioSlowCallbackHandler] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """実行中のループの監視を開始（二重に呼んでも1回だけ）"""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = loop.create_task(self._sample())
+
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+        if loop.get_debug():
+            loop.slow_callback_duration = self.slow_threshold
+            self._asyncio_handler = _AsyncioSlowCallbackHandler(self)
+            logging.getLogger("asyncio").addHandler(self._asyncio_handler)
+
+        logger.info(f"⏱️ イベントループ監視を開始しました (閾値 {self.slow_threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        """監視を停止"""
+        self._stopped.set()
+        if self._asyncio_handler is not None:
+            logging.getLogger("asyncio").removeHandler(self._asyncio_handler)
+            self._asyncio_handler = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, self.interval + self.slow_threshold)
+            self._watchdog = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.observe(max(0.0, loop.time() - expected))
+            self._last_tick = time.monotonic()
+
+    def observe(self, lag: float):
+        """ラグを1件記録（閾値を超えていれば監視スレッドが取ったスタックと一緒に残す）"""
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        stack, self._stall_stack = self._stall_stack, None
+        if lag >= self.slow_threshold:
+            self._add_slow_event("lag", lag, None, stack)
+
+    def _add_slow_event(
+        self,
+        source: str,
+        lag: Optional[float],
+        message: Optional[str],
+        stack: Optional[list[str]] = None,
+    ):
+        self.slow_count += 1
+        self.slow_events.append({
+            "at": time.time(),
+            "source": source,
+            "lag_ms": round(lag * 1000, 1) if lag is not None else None,
+            "message": message,
+            "stack": stack,
+        })
+        if lag is not None:
+            where = stack[-1].strip().splitlines()[0] if stack else "不明"
+            logger.warning(f"🐢 イベントループが {lag * 1000:.0f}ms ブロックされました ({where})")
+
+    def _watch(self):
+        """監視スレッド: ループが止まっている間にループのスレッドのスタックを取る"""
+        limit = self.interval + self.slow_threshold
+        while not self._stopped.wait(self.slow_threshold / 2):
+            if self._stall_stack is not None:
+                continue  # 今回の停止はすでに取得済み
+            if time.monotonic() - self._last_tick < limit:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._stall_stack = traceback.format_stack(frame, limit=STACK_LIMIT)
+
+    def percentile(self, q: float) -> float:
+        """直近のサンプルから求めたラグのパーセンタイル（秒）"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> dict[str, float]:
+        """ラグのパーセンタイル（ミリ秒）"""
+        return {
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "max_ms": round(self.max_lag * 1000, 1),
+        }
+
+    def snapshot(self, slow_limit: int = 10) -> dict[str, Any]:
+        """API向けの集計（遅いコールバックは新しい順）"""
+        return {
+            "running": self.running,
+            "since": self.started_at,
+            "interval_s": self.interval,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "samples": len(self.samples),
+            "lag": self.summary(),
+            "slow_callbacks": self.slow_count,
+            "recent_slow": list(reversed(self.slow_events))[:slow_limit],
+        }
+
+    def reset(self):
+        """集計をリセット"""
+        self.samples.clear()
+        self.slow_events.clear()
+        self.slow_count = 0
+        self.max_lag = 0.0
+        self.started_at = time.time()
+
+
+# モジュールレベルのインスタンス
+loop_monitor = LoopMonitor()
@@ -0,0 +1,227 @@
+"""
+メッセージパイプライン
+
+on_messageを1か所で受け取り、Bot・DM・ギルドの判定とメンバーのロール集合などを
+1回だけ解析した共有コンテキスト（MessageContext）を作って、登録されたステージ
+（各Cogのメッセージ処理）へ並列に配信する。ステージごとにタイムアウトを設け、
+所要時間を集計するので、どの機能がイベントループを占有しているかが分かる。
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+# ステージのタイムアウト（秒）の既定値
+DEFAULT_STAGE_TIMEOUT = 15.0
+
+# これを超えたステージはログに出す（秒）
+SLOW_STAGE_SECONDS = 1.0
+
+# パーセンタイル計算に使う直近のサンプル数
+LATENCY_SAMPLES = 512
+
+
+@dataclass(slots=True)
+class MessageContext:
+    """1メッセージ分の解析結果（全ステージで共有）"""
+
+    message: Any  # discord.Message
+    guild_id: Optional[int]
+    channel_id: int
+    author_id: int
+    is_bot: bool
+    parent_channel_id: Optional[int] = None  # スレッドの親チャンネル
+    role_ids: frozenset[int] = frozenset()  # 投稿者のロール（DMでは空）
+    _memo: dict[Any, asyncio.Future] = field(default_factory=dict)
+
+    @classmethod
+    def from_message(cls, message) -> "MessageContext":
+        guild = message.guild
+        author = message.author
+        return cls(
+            message=message,
+            guild_id=guild.id if guild is not None else None,
+            channel_id=message.channel.id,
+            author_id=author.id,
+            is_bot=bool(author.bot),
+            parent_channel_id=getattr(message.channel, "parent_id", None),
+            role_ids=frozenset(role.id for role in getattr(author, "roles", ())) if guild is not None else frozenset(),
+        )
+
+    @property
+    def is_dm(self) -> bool:
+        return self.guild_id is None
+
+    @property
+    def content(self) -> str:
+        return self.message.content or ""
+
+    def has_any_role(self, role_ids) -> bool:
+        """指定ロールのいずれかを持っているか"""
+        return not self.role_ids.isdisjoint(role_ids)
+
+    async def memo(self, key: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """このメッセージの処理中は1回だけ実行して結果を共有する（ギルド設定の取得など）"""
+        future = self._memo.get(key)
+        if future is None:
+            future = self._memo[key] = asyncio.ensure_future(factory())
+        return await asyncio.shield(future)
+
+
+MessageHandler = Callable[[MessageContext], Awaitable[None]]
+
+
+class StageStats:
+    """ステージ1つ分の所要時間の集計"""
+
+    __slots__ = ("calls", "errors", "timeouts", "total_time", "max_time", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.samples: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def observe(self, seconds: float):
+        self.calls += 1
+        self.total_time += seconds
+        self.max_time = max(self.max_time, seconds)
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """直近のサンプルから求めたパーセンタイル（秒）"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class Stage:
+    """登録されたメッセージ処理"""
+
+    name: str
+    handler: MessageHandler
+    include_bots: bool = False
+    include_dms: bool = False
+    timeout: Optional[float] = DEFAULT_STAGE_TIMEOUT  # Noneなら打ち切らない
+    stats: StageStats = field(default_factory=StageStats)
+
+    def accepts(self, ctx: MessageContext) -> bool:
+        if ctx.is_bot and not self.include_bots:
+            return False
+        if ctx.is_dm and not self.include_dms:
+            return False
+        return True
+
+
+class MessagePipeline:
+    """on_messageの解析とステージへの配信"""
+
+    def __init__(self):
+        self.stages: dict[str, Stage] = {}
+        self.messages = 0
+        self.started_at = time.time()
+        self._attached_bot = None
+
+    def attach(self, bot):
+        """Botのon_messageに接続（何度呼んでも1回だけ）"""
+        if self._attached_bot is bot:
+            return
+        self._attached_bot = bot
+        bot.add_listener(self.on_message, "on_message")
+
+    def register(
+        self,
+        name: str,
+        handler: MessageHandler,
+        *,
+        include_bots: bool = False,
+        include_dms: bool = False,
+        timeout: Optional[float] = DEFAULT_STAGE_TIMEOUT
+    ):
+        """
+        ステージを登録（既定ではBotのメッセージとDMは渡さない。同名は置き換え）
+
+        途中で打ち切ると状態が中途半端に残る処理（DB更新を挟む長い演出など）は
+        timeout=Noneで登録する。所要時間の集計と遅延ログはそのまま行われる。
+        """
+        stats = self.stages[name].stats if name in self.stages else StageStats()
+        self.stages[name] = Stage(name, handler, include_bots, include_dms, timeout, stats)
+
+    def unregister(self, name: str):
+        """ステージを解除"""
+        self.stages.pop(name, None)
+
+    async def on_message(self, message):
+        stages = list(self.stages.values())
+        if not stages:
+            return
+        ctx = MessageContext.from_message(message)
+        stages = [stage for stage in stages if stage.accepts(ctx)]
+        if not stages:
+            return
+
+        self.messages += 1
+        await asyncio.gather(*(self._run(stage, ctx) for stage in stages))
+
+    async def _run(self, stage: Stage, ctx: MessageContext):
+        """ステージを1つ実行（失敗・タイムアウトは他のステージに影響させない）"""
+        started = time.perf_counter()
+        try:
+            if stage.timeout is None:
+                await stage.handler(ctx)
+            else:
+                await asyncio.wait_for(stage.handler(ctx), timeout=stage.timeout)
+        except asyncio.TimeoutError:
+            stage.stats.timeouts += 1
+            logger.warning(f"⏱️ メッセージ処理がタイムアウトしました ({stage.name}, {stage.timeout:.0f}s)")
+        except Exception as e:
+            stage.stats.errors += 1
+            logger.error(f"メッセージ処理エラー ({stage.name}): {e}", exc_info=True)
+        finally:
+            elapsed = time.perf_counter() - started
+            stage.stats.observe(elapsed)
+            if elapsed >= SLOW_STAGE_SECONDS:
+                logger.warning(f"🐢 遅いメッセージ処理 ({stage.name}, {elapsed * 1000:.0f}ms)")
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """ステージごとの所要時間（合計の降順）"""
+        rows = []
+        for stage in self.stages.values():
+            stats = stage.stats
+            rows.append({
+                "stage": stage.name,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "timeouts": stats.timeouts,
+                "timeout_s": stage.timeout,
+                "total_ms": round(stats.total_time * 1000, 3),
+                "mean_ms": round(stats.total_time / stats.calls * 1000, 3) if stats.calls else 0.0,
+                "p50_ms": round(stats.percentile(0.5) * 1000, 3),
+                "p95_ms": round(stats.percentile(0.95) * 1000, 3),
+                "p99_ms": round(stats.percentile(0.99) * 1000, 3),
+                "max_ms": round(stats.max_time * 1000, 3),
+            })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def reset(self):
+        """集計をリセット"""
+        for stage in self.stages.values():
+            stage.stats = StageStats()
+        self.messages = 0
+        self.started_at = time.time()
+
+
+# モジュールレベルのインスタンス
+message_pipeline = MessagePipeline()
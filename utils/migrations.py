@@ -0,0 +1,148 @@
+"""
+スキーマのマイグレーション
+
+migrations/ の `NNNN_名前.sql` をバージョン順に適用し、適用済みのバージョンと
+チェックサムを schema_migrations テーブルに記録する。未適用のものだけを
+アドバイザリロックの下で1回ずつ流すので、複数インスタンスが同時に起動しても
+二重に適用されない。すべて適用済みなら起動時の問い合わせは1回で済む。
+"""
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import asyncpg
+
+from utils.logging import setup_logging
+
+logger = setup_logging("MIGRATIONS")
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+# pg_advisory_lock のキー（マイグレーション専用）
+MIGRATION_LOCK_ID = 0x4846_5353_4348_4D41
+
+_FILENAME = re.compile(r"^(\d{4})_([\w-]+)\.sql$")
+
+
+class MigrationError(Exception):
+    """マイグレーションの定義・適用に関するエラー"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """マイグレーションファイル1つ"""
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """マイグレーションファイルをバージョン順に読み込む"""
+    migrations: dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME.match(path.name)
+        if not match:
+            raise MigrationError(f"マイグレーションのファイル名が不正です: {path.name}（NNNN_名前.sql）")
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"マイグレーションのバージョンが重複しています: {version:04d}")
+        sql = path.read_text(encoding="utf-8").replace("\r\n", "\n")
+        migrations[version] = Migration(version, match.group(2), sql)
+    return [migrations[v] for v in sorted(migrations)]
+
+
+class MigrationRunner:
+    """未適用のマイグレーションを適用する"""
+
+    def __init__(self, pool: asyncpg.Pool, migrations: Optional[list[Migration]] = None):
+        self.pool = pool
+        self.migrations = load_migrations() if migrations is None else migrations
+
+    async def _applied(self, conn) -> dict[int, str]:
+        """適用済みバージョン -> チェックサム（テーブルがなければ空）"""
+        if not await conn.fetchval("SELECT to_regclass('schema_migrations') IS NOT NULL"):
+            return {}
+        rows = await conn.fetch("SELECT version, checksum FROM schema_migrations")
+        return {row["version"]: row["checksum"] for row in rows}
+
+    def _verify(self, applied: dict[int, str]):
+        """適用済みファイルが書き換えられていないか確認"""
+        for migration in self.migrations:
+            checksum = applied.get(migration.version)
+            if checksum is not None and checksum != migration.checksum:
+                raise MigrationError(
+                    f"適用済みのマイグレーションが変更されています: {migration.version:04d}_{migration.name}"
+                    "（変更は新しいマイグレーションとして追加してください）"
+                )
+
+    def _pending(self, applied: dict[int, str]) -> list[Migration]:
+        return [m for m in self.migrations if m.version not in applied]
+
+    async def run(self) -> list[Migration]:
+        """未適用のマイグレーションを適用して、適用したものを返す"""
+        async with self.pool.acquire() as conn:
+            applied = await self._applied(conn)
+            self._verify(applied)
+            if not self._pending(applied):
+                logger.info(f"スキーマは最新です（{len(applied)}件適用済み）")
+                return []
+
+            await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+            try:
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        checksum TEXT NOT NULL,
+                        execution_ms INTEGER NOT NULL,
+                        applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                    )
+                    """
+                )
+                # ロック待ちの間に他のインスタンスが適用している場合がある
+                applied = await self._applied(conn)
+                self._verify(applied)
+                done = []
+                for migration in self._pending(applied):
+                    await self._apply(conn, migration)
+                    done.append(migration)
+                return done
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+    async def _apply(self, conn, migration: Migration):
+        started = time.perf_counter()
+        try:
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                elapsed_ms = int((time.perf_counter() - started) * 1000)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum, execution_ms) VALUES ($1, $2, $3, $4)",
+                    migration.version, migration.name, migration.checksum, elapsed_ms
+                )
+        except asyncpg.PostgresError as e:
+            raise MigrationError(f"マイグレーションに失敗しました: {migration.version:04d}_{migration.name} | {e}") from e
+        logger.info(f"✅ マイグレーション適用: {migration.version:04d}_{migration.name} ({elapsed_ms}ms)")
+
+    async def status(self) -> list[dict[str, Any]]:
+        """各マイグレーションの適用状況"""
+        async with self.pool.acquire() as conn:
+            applied = await self._applied(conn)
+        return [
+            {
+                "version": m.version,
+                "name": m.name,
+                "applied": m.version in applied,
+                "checksum_ok": applied.get(m.version, m.checksum) == m.checksum,
+            }
+            for m in self.migrations
+        ]
@@ -0,0 +1,122 @@
+"""
+VC参加人数インデックス
+
+チャンネルごとの参加者集合と人数を保持し、参加・退出・移動を O(1) で反映する。
+最大同時参加人数は「参加以降の最大人数」を単調スタック（人数が狭義減少）で保持し、
+セッションの peak_participants を参加者全員を走査せずに求められるようにする。
+"""
+
+from bisect import bisect_left
+from typing import Optional
+
+ChannelKey = tuple[int, int]  # (guild_id, channel_id)
+
+
+class ChannelParticipants:
+    """1チャンネル分の参加者"""
+
+    __slots__ = ("members", "seq", "peak", "_high_seqs", "_high_counts")
+
+    def __init__(self):
+        self.members: set[int] = set()
+        self.seq = 0  # 人数が変わるたびに進む番号
+        self.peak = 0  # チャンネルに人がいる間の最大人数
+        # (seq, 人数) の単調スタック: seqは増加、人数は狭義減少
+        self._high_seqs: list[int] = []
+        self._high_counts: list[int] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.members)
+
+    def _record(self):
+        self.seq += 1
+        count = len(self.members)
+        while self._high_counts and self._high_counts[-1] <= count:
+            self._high_counts.pop()
+            self._high_seqs.pop()
+        self._high_seqs.append(self.seq)
+        self._high_counts.append(count)
+        self.peak = max(self.peak, count)
+
+    def add(self, user_id: int) -> int:
+        """参加者を追加して、このあとの最大人数を問い合わせるためのseqを返す"""
+        if user_id not in self.members:
+            self.members.add(user_id)
+            self._record()
+        return self.seq
+
+    def discard(self, user_id: int):
+        """参加者を削除"""
+        if user_id in self.members:
+            self.members.discard(user_id)
+            self._record()
+
+    def peak_since(self, seq: int) -> int:
+        """seq以降の最大人数"""
+        index = bisect_left(self._high_seqs, seq)
+        if index < len(self._high_counts):
+            return self._high_counts[index]
+        return self.count
+
+
+class ParticipantIndex:
+    """チャンネル -> 参加者のインデックス"""
+
+    def __init__(self):
+        self._channels: dict[ChannelKey, ChannelParticipants] = {}
+
+    def join(self, guild_id: int, channel_id: int, user_id: int) -> int:
+        """参加を記録して、peak_sinceに渡すseqを返す"""
+        key = (guild_id, channel_id)
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = ChannelParticipants()
+        return channel.add(user_id)
+
+    def leave(self, guild_id: int, channel_id: int, user_id: int):
+        """退出を記録（空になったチャンネルは削除）"""
+        key = (guild_id, channel_id)
+        channel = self._channels.get(key)
+        if channel is None:
+            return
+        channel.discard(user_id)
+        if not channel.members:
+            del self._channels[key]
+
+    def move(self, guild_id: int, from_channel_id: int, to_channel_id: int, user_id: int) -> int:
+        """移動を記録"""
+        self.leave(guild_id, from_channel_id, user_id)
+        return self.join(guild_id, to_channel_id, user_id)
+
+    def count(self, guild_id: int, channel_id: int) -> int:
+        """現在の参加人数"""
+        channel = self._channels.get((guild_id, channel_id))
+        return channel.count if channel else 0
+
+    def members(self, guild_id: int, channel_id: int) -> set[int]:
+        """参加者のユーザーID（変更しないこと）"""
+        channel = self._channels.get((guild_id, channel_id))
+        return channel.members if channel else set()
+
+    def peak(self, guild_id: int, channel_id: int) -> int:
+        """チャンネルに人がいる間の最大人数"""
+        channel = self._channels.get((guild_id, channel_id))
+        return channel.peak if channel else 0
+
+    def peak_since(self, guild_id: int, channel_id: int, seq: int) -> Optional[int]:
+        """join()が返したseq以降の最大人数"""
+        channel = self._channels.get((guild_id, channel_id))
+        return channel.peak_since(seq) if channel else None
+
+    def channel_counts(self, guild_id: int) -> dict[int, int]:
+        """ギルドのチャンネルごとの参加人数"""
+        return {
+            channel_id: channel.count
+            for (g, channel_id), channel in self._channels.items()
+            if g == guild_id
+        }
+
+    def total(self, guild_id: int) -> int:
+        """ギルドのVC参加人数の合計"""
+        return sum(self.channel_counts(guild_id).values())
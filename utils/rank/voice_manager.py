@@ -9,7 +9,7 @@ import asyncio
 import time
 import uuid
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 from models.rank.voice_activity import (
@@ -21,10 +21,20 @@ from models.rank.voice_activity import (
     VoiceTrackType,
 )
 from utils.database import execute_query
+from utils.deadlines import DeadlineHeap
 from utils.logging import setup_logging
+from utils.participant_index import ParticipantIndex
+from utils.voice_journal import ReconcileResult, voice_journal
 
 logger = setup_logging("VOICE_MANAGER")
 
+# VCセッションジャーナルの名前空間
+# （在室状況はvoice_presenceが持ち、ここではXP精算用の途中状態だけを記録する）
+JOURNAL_NAMESPACE = "voice_xp"
+
+# 時間帯倍率が切り替わる時刻（時）
+TIME_BAND_HOURS = (6, 12, 18, 22)
+
 @dataclass
 class ActiveSession:
     """アクティブセッション用の軽量データクラス"""
@@ -42,9 +52,11 @@ class ActiveSession:
     afk_seconds: int = 0
 
     # セッション情報
-    current_participants: int = 1
+    peak_participants: int = 1
+    participant_seq: int = 0  # 参加時点のParticipantIndexの番号
     pending_xp: int = 0
-    last_xp_calculation: datetime = None
+    last_xp_calculation: datetime = None  # 未精算区間の開始時刻
+    xp_remainder: float = 0.0  # 整数化で切り捨てたXPの端数
 
     def __post_init__(self):
         if self.last_xp_calculation is None:
@@ -59,18 +71,18 @@ class VoiceManager:
         self.guild_configs: dict[int, tuple[VoiceConfig, float]] = {}
         self.config_cache_ttl = 300  # 5分間キャッシュ
 
-        # XP計算タスク管理
-        self.xp_calculation_tasks: dict[int, asyncio.Task] = {}
+        # AFK判定などの期限付きイベント（user_key -> 期限）
+        self.timers = DeadlineHeap()
+        self._timer_task: Optional[asyncio.Task] = None
+        self._timer_wakeup = asyncio.Event()
 
-        # 参加者数トラッキング
-        self.channel_participants: dict[str, set[int]] = {}
+        # 参加者数トラッキング（参加・退出ごとにO(1)で更新）
+        # 除外ユーザー・除外チャンネルを含まない、XP対象者だけの人数なのでvoice_presenceとは別に持つ
+        self.participants = ParticipantIndex()
 
     def _get_user_key(self, guild_id: int, user_id: int) -> str:
         return f"{guild_id}:{user_id}"
 
-    def _get_channel_key(self, guild_id: int, channel_id: int) -> str:
-        return f"{guild_id}:{channel_id}"
-
     async def get_guild_voice_config(self, guild_id: int) -> VoiceConfig:
         """ギルドの音声XP設定を取得（キャッシュ対応）"""
         current_time = time.time()
@@ -155,20 +167,24 @@ class VoiceManager:
                 current_activity=initial_activity, last_activity_time=current_time
             )
 
+            # 参加者数が変わる前に同じチャンネルの既存セッションを精算
+            self._settle_channel(guild_id, channel_id, config, current_time)
+
             self.active_sessions[user_key] = active_session
 
             # 参加者数更新
-            channel_key = self._get_channel_key(guild_id, channel_id)
-            if channel_key not in self.channel_participants:
-                self.channel_participants[channel_key] = set()
-            self.channel_participants[channel_key].add(user_id)
-            active_session.current_participants = len(self.channel_participants[channel_key])
+            active_session.participant_seq = self.participants.join(guild_id, channel_id, user_id)
+            active_session.peak_participants = self.participants.count(guild_id, channel_id)
 
             # データベースに初期セッション記録を作成
             await self._create_session_in_db(active_session, config)
+            voice_journal.record_join(
+                JOURNAL_NAMESPACE, guild_id, user_id, channel_id, current_time,
+                **self._journal_state(active_session)
+            )
 
-            # XP計算タスクを開始
-            await self._ensure_xp_calculation_task(guild_id, config)
+            # AFK判定タイマーを登録
+            self._schedule_afk_check(active_session, config)
 
             logger.info(f"Guild {guild_id}, User {user_id}: 音声セッション開始")
             return session_id
@@ -177,8 +193,14 @@ class VoiceManager:
             logger.error(f"Guild {guild_id}, User {user_id}: セッション開始エラー {e}")
             return None
 
-    async def end_voice_session(self, guild_id: int, user_id: int, force_end: bool = False) -> Optional[VoiceSession]:
-        """音声セッションを終了"""
+    async def end_voice_session(
+        self,
+        guild_id: int,
+        user_id: int,
+        force_end: bool = False,
+        end_time: Optional[datetime] = None
+    ) -> Optional[VoiceSession]:
+        """音声セッションを終了（end_time指定時はその時刻で終了扱い）"""
         try:
             user_key = self._get_user_key(guild_id, user_id)
 
@@ -186,19 +208,21 @@ class VoiceManager:
                 return None
 
             active_session = self.active_sessions[user_key]
-            current_time = datetime.now()
+            current_time = end_time or datetime.now()
+            voice_journal.record_leave(JOURNAL_NAMESPACE, guild_id, user_id)
+            config = await self.get_guild_voice_config(guild_id)
 
-            # 最終XP計算
-            await self._calculate_session_xp(active_session, current_time)
+            # 最終区間を精算（参加者数が変わるので同じチャンネルの全員）
+            self._settle_channel(guild_id, active_session.channel_id, config, current_time)
+            self.timers.discard(user_key)
 
             # セッション時間計算
             duration_seconds = int((current_time - active_session.start_time).total_seconds())
 
             # 最小セッション時間チェック
-            config = await self.get_guild_voice_config(guild_id)
             if duration_seconds < config.min_voice_session_seconds and not force_end:
                 del self.active_sessions[user_key]
-                self._remove_user_from_channel(guild_id, active_session.channel_id, user_id)
+                self.participants.leave(guild_id, active_session.channel_id, user_id)
                 return None
 
             # VoiceSessionオブジェクト作成
@@ -211,7 +235,7 @@ class VoiceManager:
                 total_afk_seconds=active_session.afk_seconds,
                 base_xp_earned=active_session.pending_xp,
                 total_xp_earned=active_session.pending_xp,
-                peak_participants=active_session.current_participants,
+                peak_participants=self._update_peak_participants(active_session),
                 track_type=self._get_channel_track_type(config, active_session.channel_id),
                 is_completed=True
             )
@@ -221,7 +245,7 @@ class VoiceManager:
 
             # アクティブセッションから削除
             del self.active_sessions[user_key]
-            self._remove_user_from_channel(guild_id, active_session.channel_id, user_id)
+            self.participants.leave(guild_id, active_session.channel_id, user_id)
 
             logger.info(f"Guild {guild_id}, User {user_id}: 音声セッション終了 (時間: {duration_seconds}s, XP: {completed_session.total_xp_earned})")
             return completed_session
@@ -240,74 +264,222 @@ class VoiceManager:
 
             active_session = self.active_sessions[user_key]
             current_time = datetime.now()
+            config = await self.get_guild_voice_config(guild_id)
 
-            # 前回からの経過時間計算
-            time_diff = (current_time - active_session.last_activity_time).total_seconds()
-
-            # 前の活動状態の時間を累積
-            if active_session.current_activity == VoiceActivityType.SPEAKING:
-                active_session.speaking_seconds += int(time_diff)
-            elif active_session.current_activity == VoiceActivityType.LISTENING:
-                active_session.listening_seconds += int(time_diff)
-            elif active_session.current_activity == VoiceActivityType.AFK:
-                active_session.afk_seconds += int(time_diff)
+            # 前の活動状態の区間を精算
+            self._accrue_session(active_session, config, current_time)
 
             # 状態更新
             active_session.current_activity = new_activity
             active_session.last_activity_time = current_time
 
-        except Exception as e:
-            logger.error(f"Guild {guild_id}, User {user_id}: 活動状態更新エラー {e}")
-
-    async def _calculate_session_xp(self, active_session: ActiveSession, current_time: datetime):
-        """セッションのXPを計算して加算"""
-        try:
-            config = await self.get_guild_voice_config(active_session.guild_id)
-
-            # 前回計算からの経過時間
-            time_since_last = (current_time - active_session.last_xp_calculation).total_seconds()
+            # AFK判定タイマーを張り直す
+            self._schedule_afk_check(active_session, config)
 
-            if time_since_last < config.xp_calculation_interval:
-                return
+            voice_journal.record_update(
+                JOURNAL_NAMESPACE, guild_id, user_id, **self._journal_state(active_session)
+            )
 
-            # チャンネル設定取得
-            channel_config = config.get_channel_config(active_session.channel_id)
+        except Exception as e:
+            logger.error(f"Guild {guild_id}, User {user_id}: 活動状態更新エラー {e}")
 
-            # 基本XP計算（分単位）
-            minutes_elapsed = time_since_last / 60.0
-            base_xp = int(channel_config.base_xp_per_minute * minutes_elapsed)
+    async def settle_session(self, guild_id: int, user_id: int) -> Optional[ActiveSession]:
+        """現在時刻までのXPを精算したアクティブセッションを取得（表示用）"""
+        active_session = self.active_sessions.get(self._get_user_key(guild_id, user_id))
+        if active_session is None:
+            return None
 
-            # 活動倍率適用
-            activity_multiplier = config.get_activity_multiplier(active_session.channel_id, active_session.current_activity)
+        config = await self.get_guild_voice_config(guild_id)
+        self._accrue_session(active_session, config, datetime.now())
+        self._update_peak_participants(active_session)
+        return active_session
+
+    def get_participant_count(self, guild_id: int, channel_id: int) -> int:
+        """チャンネルでXP対象になっている参加者数"""
+        return self.participants.count(guild_id, channel_id)
+
+    def _update_peak_participants(self, active_session: ActiveSession) -> int:
+        """参加以降の最大参加者数をインデックスから反映（参加者を走査しない）"""
+        peak = self.participants.peak_since(
+            active_session.guild_id, active_session.channel_id, active_session.participant_seq
+        )
+        if peak is not None:
+            active_session.peak_participants = max(active_session.peak_participants, peak)
+        return active_session.peak_participants
+
+    def _journal_state(self, active_session: ActiveSession) -> dict:
+        """ジャーナルに記録する途中状態（精算済みの累積値と未精算区間の開始時刻）"""
+        return {
+            "session_id": active_session.session_id,
+            "activity": active_session.current_activity.value,
+            "last_activity": active_session.last_activity_time.timestamp(),
+            "last_xp": active_session.last_xp_calculation.timestamp(),
+            "pending_xp": active_session.pending_xp,
+            "xp_remainder": active_session.xp_remainder,
+            "speaking": active_session.speaking_seconds,
+            "listening": active_session.listening_seconds,
+            "afk": active_session.afk_seconds,
+            "peak_participants": self._update_peak_participants(active_session),
+        }
+
+    def _restore_active_session(self, journaled) -> ActiveSession:
+        """ジャーナルの途中状態からアクティブセッションを組み立てて登録"""
+        data = journaled.data
+        start_time = datetime.fromtimestamp(journaled.started_at)
+        active_session = ActiveSession(
+            session_id=data["session_id"], guild_id=journaled.guild_id, user_id=journaled.user_id,
+            channel_id=journaled.channel_id, start_time=start_time,
+            current_activity=VoiceActivityType(data.get("activity", VoiceActivityType.LISTENING.value)),
+            last_activity_time=datetime.fromtimestamp(data.get("last_activity", journaled.started_at)),
+            speaking_seconds=data.get("speaking", 0),
+            listening_seconds=data.get("listening", 0),
+            afk_seconds=data.get("afk", 0),
+            peak_participants=data.get("peak_participants", 1),
+            pending_xp=data.get("pending_xp", 0),
+            last_xp_calculation=datetime.fromtimestamp(data.get("last_xp", journaled.started_at)),
+            xp_remainder=data.get("xp_remainder", 0.0),
+        )
+
+        self.active_sessions[self._get_user_key(journaled.guild_id, journaled.user_id)] = active_session
+        active_session.participant_seq = self.participants.join(
+            journaled.guild_id, journaled.channel_id, journaled.user_id
+        )
+        return active_session
+
+    async def restore_sessions(self, guilds) -> tuple[list[VoiceSession], ReconcileResult]:
+        """再起動前の進行中セッションをジャーナルから復元
+
+        まだ同じVCにいるセッションは累積値を引き継いで継続し、
+        停止中に退出したセッションは最後の記録時刻で完了させる。
+
+        Returns:
+            (停止中に完了したセッション, 突き合わせ結果)。停止中に参加したメンバーは
+            呼び出し側が result.joined から通常の参加処理で開始する。
+        """
+        result = voice_journal.reconcile(JOURNAL_NAMESPACE, guilds)
+        completed = []
+
+        for journaled in result.resumed:
+            if self._get_user_key(journaled.guild_id, journaled.user_id) in self.active_sessions:
+                continue  # 起動後のイベントで既に開始済み
+            try:
+                active_session = self._restore_active_session(journaled)
+                config = await self.get_guild_voice_config(journaled.guild_id)
+                self._schedule_afk_check(active_session, config)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Guild {journaled.guild_id}, User {journaled.user_id}: セッション復元失敗 {e}")
+
+        for journaled in result.ended:
+            if self._get_user_key(journaled.guild_id, journaled.user_id) in self.active_sessions:
+                continue
+            try:
+                self._restore_active_session(journaled)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Guild {journaled.guild_id}, User {journaled.user_id}: セッション復元失敗 {e}")
+                continue
+            completed_session = await self.end_voice_session(
+                journaled.guild_id, journaled.user_id,
+                end_time=datetime.fromtimestamp(result.ended_at(journaled))
+            )
+            if completed_session:
+                completed.append(completed_session)
 
-            # 参加者数ボーナス
-            participant_multiplier = self._get_participant_multiplier(active_session.current_participants, channel_config)
+        logger.info(f"音声セッション復元: 継続 {len(result.resumed)} / 完了 {len(completed)}")
+        return completed, result
 
-            # 時間帯倍率
-            time_multiplier = self._get_time_multiplier(current_time, channel_config)
+    def _accrue_session(self, active_session: ActiveSession, config: VoiceConfig, current_time: datetime):
+        """前回精算から現在までの区間のXPと活動時間を加算
 
-            # トラック倍率
-            track_type = self._get_channel_track_type(config, active_session.channel_id)
-            track_multiplier = config.tracks[track_type].global_multiplier if track_type in config.tracks else 1.0
+        区間内は活動状態・参加者数が一定なので、区間長から閉じた式で計算できる。
+        状態変化（参加・離脱・移動・活動変化・AFK判定）のたびに呼ぶため、
+        定期的なポーリングは不要。
+        """
+        try:
+            segment_start = active_session.last_xp_calculation
+            if current_time <= segment_start:
+                return
 
-            # 最終XP計算
-            total_multiplier = activity_multiplier * participant_multiplier * time_multiplier * track_multiplier * config.global_voice_multiplier
-            calculated_xp = int(base_xp * total_multiplier)
+            elapsed = (current_time - segment_start).total_seconds()
 
-            # 上限チェック
-            max_xp_per_calculation = int((channel_config.max_xp_per_hour * time_since_last) / 3600)
-            calculated_xp = min(calculated_xp, max_xp_per_calculation)
+            # 活動状態ごとの時間を累積
+            if active_session.current_activity == VoiceActivityType.SPEAKING:
+                active_session.speaking_seconds += int(elapsed)
+            elif active_session.current_activity == VoiceActivityType.LISTENING:
+                active_session.listening_seconds += int(elapsed)
+            elif active_session.current_activity == VoiceActivityType.AFK:
+                active_session.afk_seconds += int(elapsed)
 
-            # XP加算
-            if calculated_xp > 0:
-                active_session.pending_xp += calculated_xp
+            participants = self.participants.count(active_session.guild_id, active_session.channel_id) or 1
 
-            # 計算時間更新
+            xp = active_session.xp_remainder + self._segment_xp(
+                config, active_session.channel_id, active_session.current_activity,
+                participants, segment_start, current_time
+            )
+            whole_xp = int(xp + 1e-9)  # 浮動小数点の誤差で1XP取りこぼさないように
+            active_session.pending_xp += whole_xp
+            active_session.xp_remainder = max(0.0, xp - whole_xp)
             active_session.last_xp_calculation = current_time
 
         except Exception as e:
             logger.error(f"XP計算エラー: {e}")
 
+    def _segment_xp(
+        self,
+        config: VoiceConfig,
+        channel_id: int,
+        activity: VoiceActivityType,
+        participants: int,
+        start: datetime,
+        end: datetime
+    ) -> float:
+        """状態が一定の区間[start, end)で獲得するXP（時間帯の境界で分割して計算）"""
+        channel_config = config.get_channel_config(channel_id)
+        track_type = self._get_channel_track_type(config, channel_id)
+        track_multiplier = config.tracks[track_type].global_multiplier if track_type in config.tracks else 1.0
+
+        # 区間内で変わらない倍率
+        constant_multiplier = (
+            config.get_activity_multiplier(channel_id, activity)
+            * self._get_participant_multiplier(participants, channel_config)
+            * track_multiplier
+            * config.global_voice_multiplier
+        )
+        xp_per_second = channel_config.base_xp_per_minute / 60.0 * constant_multiplier
+        max_xp_per_second = channel_config.max_xp_per_hour / 3600.0
+
+        total_xp = 0.0
+        for piece_start, seconds in self._split_by_time_band(start, end):
+            time_multiplier = self._get_time_multiplier(piece_start, channel_config)
+            total_xp += min(xp_per_second * time_multiplier, max_xp_per_second) * seconds
+        return total_xp
+
+    def _split_by_time_band(self, start: datetime, end: datetime) -> list[tuple[datetime, float]]:
+        """区間を時間帯倍率の境界で分割して (開始時刻, 秒数) のリストにする"""
+        pieces = []
+        current = start
+        while current < end:
+            boundary = self._next_time_band_boundary(current)
+            piece_end = min(boundary, end)
+            pieces.append((current, (piece_end - current).total_seconds()))
+            current = piece_end
+        return pieces
+
+    def _next_time_band_boundary(self, current: datetime) -> datetime:
+        """次に時間帯倍率が切り替わる時刻"""
+        day = current.replace(hour=0, minute=0, second=0, microsecond=0)
+        for hour in TIME_BAND_HOURS:
+            boundary = day.replace(hour=hour)
+            if boundary > current:
+                return boundary
+        return day + timedelta(days=1, hours=TIME_BAND_HOURS[0])
+
+    def _settle_channel(self, guild_id: int, channel_id: int, config: VoiceConfig, current_time: datetime):
+        """チャンネル内の全セッションを精算（参加者数が変わる直前に呼ぶ）"""
+        for member_id in self.participants.members(guild_id, channel_id):
+            active_session = self.active_sessions.get(self._get_user_key(guild_id, member_id))
+            if active_session:
+                self._accrue_session(active_session, config, current_time)
+
     def _get_participant_multiplier(self, participant_count: int, channel_config: VoiceChannelConfig) -> float:
         """参加者数に基づく倍率を取得"""
         if participant_count == 1:
@@ -340,14 +512,6 @@ class VoiceManager:
             return VoiceTrackType(config.channels[channel_id].track_type)
         return VoiceTrackType.GENERAL
 
-    def _remove_user_from_channel(self, guild_id: int, channel_id: int, user_id: int):
-        """チャンネルから参加者を削除"""
-        channel_key = self._get_channel_key(guild_id, channel_id)
-        if channel_key in self.channel_participants:
-            self.channel_participants[channel_key].discard(user_id)
-            if not self.channel_participants[channel_key]:
-                del self.channel_participants[channel_key]
-
     async def _create_session_in_db(self, active_session: ActiveSession, config: VoiceConfig):
         """データベースにセッション記録を作成"""
         try:
@@ -360,7 +524,7 @@ class VoiceManager:
 
             await execute_query(query, active_session.session_id, active_session.guild_id, active_session.user_id,
                                active_session.channel_id, active_session.start_time, track_type.value,
-                               active_session.current_participants, fetch_type='status')
+                               active_session.peak_participants, fetch_type='status')
 
         except Exception as e:
             logger.error(f"セッション作成エラー: {e}")
@@ -384,38 +548,61 @@ class VoiceManager:
         except Exception as e:
             logger.error(f"セッション完了エラー: {e}")
 
-    async def _ensure_xp_calculation_task(self, guild_id: int, config: VoiceConfig):
-        """XP計算タスクが動作していることを確認"""
-        if guild_id in self.xp_calculation_tasks:
-            task = self.xp_calculation_tasks[guild_id]
-            if not task.done():
-                return
-
-        # 新しいタスクを開始
-        task = asyncio.create_task(self._xp_calculation_loop(guild_id, config.xp_calculation_interval))
-        self.xp_calculation_tasks[guild_id] = task
-
-    async def _xp_calculation_loop(self, guild_id: int, interval_seconds: int):
-        """XP計算ループ（バックグラウンドタスク）"""
-        try:
-            while True:
-                await asyncio.sleep(interval_seconds)
-
-                # このギルドのアクティブセッションに対してXP計算
-                current_time = datetime.now()
-                guild_sessions = [session for session in self.active_sessions.values() if session.guild_id == guild_id]
-
-                if not guild_sessions:
-                    break
-
-                for session in guild_sessions:
-                    await self._calculate_session_xp(session, current_time)
-
-        except Exception as e:
-            logger.error(f"XP計算ループエラー: {e}")
-        finally:
-            if guild_id in self.xp_calculation_tasks:
-                del self.xp_calculation_tasks[guild_id]
+    def _schedule_afk_check(self, active_session: ActiveSession, config: VoiceConfig):
+        """最後の活動からAFK判定時間後にタイマーを設定"""
+        user_key = self._get_user_key(active_session.guild_id, active_session.user_id)
+
+        if active_session.current_activity == VoiceActivityType.AFK:
+            self.timers.discard(user_key)
+            return
+
+        due = active_session.last_activity_time.timestamp() + config.afk_detection_minutes * 60
+        self.timers.push(user_key, due)
+        self._ensure_timer_task()
+        self._timer_wakeup.set()
+
+    def _ensure_timer_task(self):
+        """タイマータスクが動作していることを確認"""
+        if self._timer_task is None or self._timer_task.done():
+            self._timer_task = asyncio.create_task(self._timer_loop())
+
+    def stop_timers(self):
+        """タイマータスクを停止"""
+        if self._timer_task and not self._timer_task.done():
+            self._timer_task.cancel()
+        self._timer_task = None
+
+    async def _timer_loop(self):
+        """最も早い期限まで眠り、期限切れのタイマーを処理する（全ギルド共通の1タスク）"""
+        while True:
+            try:
+                self._timer_wakeup.clear()
+                next_due = self.timers.next_due()
+                timeout = None if next_due is None else max(0.0, next_due - time.time())
+                try:
+                    await asyncio.wait_for(self._timer_wakeup.wait(), timeout)
+                    continue  # より早い期限が追加された
+                except asyncio.TimeoutError:
+                    pass
+
+                for user_key in self.timers.pop_due(time.time()):
+                    await self._handle_afk_timer(user_key)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"タイマー処理エラー: {e}")
+
+    async def _handle_afk_timer(self, user_key: str):
+        """AFK判定時間が経過したセッションをAFKにする"""
+        active_session = self.active_sessions.get(user_key)
+        if active_session is None or active_session.current_activity == VoiceActivityType.AFK:
+            return
+
+        await self.update_voice_activity(
+            active_session.guild_id, active_session.user_id, VoiceActivityType.AFK
+        )
+        logger.debug(f"Guild {active_session.guild_id}, User {active_session.user_id}: AFK判定")
 
 # モジュールレベルのインスタンス
 voice_manager = VoiceManager()
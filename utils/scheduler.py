@@ -0,0 +1,329 @@
+"""
+期限付きジョブのスケジューラ
+
+リマインダー・スケジュール投稿・ギブアウェイ・自動クローズなどの「ある時刻に1回実行する」
+処理を1か所で扱う。各機能はJobKindを登録し、スケジューラは
+- 起動時にDBから期限を読み込んで最小ヒープに積み、最も早い期限ちょうどに起きる
+- LISTEN/NOTIFYで他プロセス（API・ダッシュボード）からの追加・期限変更を受け取る
+- 期限が来たジョブは種別ごとにまとめて行を取得し、同時実行数を制限して並列に実行する
+- 完了後のDELETE/UPDATEは種別ごとにまとめて1回で行う
+取りこぼし対策として一定間隔で全件を再同期する。
+失敗したジョブは間隔を延ばしながら再試行し、上限回数に達したら次回起動まで再試行しない。
+"""
+
+import asyncio
+import operator
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from utils.database import get_db_pool
+from utils.deadlines import DeadlineHeap
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+# 同時に実行するジョブの上限
+MAX_CONCURRENCY = 8
+
+# DBとの再同期の間隔（秒）
+RESYNC_SECONDS = 300
+
+# 失敗した時の再試行までの時間（秒、ジョブの失敗は回数ごとに倍にする）
+RETRY_SECONDS = 30
+
+# ジョブの再試行間隔の上限（秒）
+MAX_RETRY_SECONDS = 3600
+
+# これだけ続けて失敗したジョブは次回起動まで再試行しない
+MAX_ATTEMPTS = 5
+
+
+class JobNotReady(Exception):
+    """今は実行できないジョブ（チャンネルが見つからないなど）。失敗として再試行するがトレースバックは出さない"""
+
+
+def _aware(dt: datetime) -> datetime:
+    """タイムゾーンなしの時刻はローカル時刻として扱う"""
+    return dt if dt.tzinfo is not None else dt.astimezone()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class JobKind:
+    """スケジューラに登録するジョブの種別"""
+
+    name: str
+    # keys=Noneなら未完了の全件、指定時はそのキーのみの (キー, 期限) を返す
+    load: Callable[[Optional[list[Hashable]]], Awaitable[list[tuple[Hashable, datetime]]]]
+    # 期限が来たキーの行をまとめて取得（キャンセル済みの行は返さない）
+    fetch: Callable[[list[Hashable]], Awaitable[list[Any]]]
+    # 1件実行して結果を返す（例外は失敗として扱い、completeには渡さない）
+    run: Callable[[Any], Awaitable[Any]]
+    # 実行できた (行, 結果) をまとめて後処理（DELETE/UPDATEを1回で行う）
+    complete: Optional[Callable[[list[tuple[Any, Any]]], Awaitable[None]]] = None
+    key_of: Callable[[Any], Hashable] = operator.itemgetter("id")
+    # INSERT/期限変更を通知するNOTIFYチャンネル（migrations/0016_scheduler_notify.sql）
+    notify_channel: Optional[str] = None
+    parse_key: Callable[[str], Hashable] = int
+
+
+class DeadlineScheduler:
+    """期限のヒープと、期限が来たジョブの実行"""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        resync_interval: float = RESYNC_SECONDS,
+        pool_getter: Callable[[], Awaitable[Any]] = get_db_pool,
+        retry_seconds: float = RETRY_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.kinds: dict[str, JobKind] = {}
+        self.deadlines = DeadlineHeap()
+        self.max_concurrency = max_concurrency
+        self.resync_interval = resync_interval
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self._pool_getter = pool_getter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._running: set[tuple[str, Hashable]] = set()  # 実行中（後処理完了まで）
+        self._deferred: dict[tuple[str, Hashable], datetime] = {}  # 実行中に登録された次の期限
+        self._failures: dict[tuple[str, Hashable], int] = {}  # 続けて失敗した回数
+        self._retry_at: dict[tuple[str, Hashable], datetime] = {}  # 失敗したジョブの次の再試行時刻
+        self._batches: set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._bot = None
+        self._pool = None
+        self._listen_conn = None
+        self._next_resync: Optional[datetime] = None
+
+    def attach(self, bot):
+        """Botの準備完了まで実行を待つ（get_channelなどが使えるように）"""
+        self._bot = bot
+
+    # ==================== 登録 ====================
+
+    async def register(self, kind: JobKind):
+        """種別を登録して期限を読み込む（同名は置き換え）"""
+        self.kinds[kind.name] = kind
+        await self.sync(kind.name)
+        if kind.notify_channel:
+            await self._listen()
+        self.start()
+
+    async def unregister(self, name: str):
+        """種別の登録を解除（ヒープからも取り除く）"""
+        kind = self.kinds.pop(name, None)
+        if kind is None:
+            return
+        for entry in self.deadlines.keys():
+            if entry[0] == name:
+                self.deadlines.discard(entry)
+        if kind.notify_channel and self._listen_conn is not None and not self._listen_conn.is_closed():
+            await self._listen_conn.remove_listener(kind.notify_channel, self._on_notify)
+
+    def schedule(self, name: str, key: Hashable, due: datetime):
+        """期限を登録（既存の期限は置き換え。実行中なら完了後に登録する）"""
+        if (name, key) in self._running:
+            self._deferred[(name, key)] = _aware(due)
+            return
+        self._push((name, key), due)
+
+    def cancel(self, name: str, key: Hashable):
+        self.deadlines.discard((name, key))
+        self._deferred.pop((name, key), None)
+        self._failures.pop((name, key), None)
+        self._retry_at.pop((name, key), None)
+
+    def _push(self, entry: tuple[str, Hashable], due: datetime):
+        self.deadlines.push(entry, _aware(due))
+        self._wakeup.set()
+
+    async def sync(self, name: str, keys: Optional[list[Hashable]] = None):
+        """DBの期限をヒープに反映（keys=Noneなら全件。DBから消えたものは取り除く）"""
+        kind = self.kinds[name]
+        loaded = dict(await kind.load(keys))
+        stale = keys if keys is not None else [entry[1] for entry in self.deadlines.keys() if entry[0] == name]
+        for key in stale:
+            if key not in loaded:
+                self.cancel(name, key)
+        for key, due in loaded.items():
+            entry = (name, key)
+            # 実行中のジョブはDB上まだ期限切れのままなので読み飛ばす
+            if entry in self._running:
+                continue
+            # 失敗したジョブは再試行時刻まで待つ（上限に達したものは次回起動まで再試行しない）
+            if self._failures.get(entry, 0) >= self.max_attempts:
+                continue
+            retry_at = self._retry_at.get(entry)
+            self._push(entry, due if retry_at is None else max(_aware(due), retry_at))
+
+    # ==================== LISTEN/NOTIFY ====================
+
+    async def _listen(self):
+        """LISTEN用の接続を用意して全種別のチャンネルを購読（購読済みのチャンネルはそのまま）"""
+        try:
+            if self._listen_conn is None or self._listen_conn.is_closed():
+                self._pool = await self._pool_getter()
+                self._listen_conn = await self._pool.acquire()
+            for kind in self.kinds.values():
+                if kind.notify_channel:
+                    await self._listen_conn.add_listener(kind.notify_channel, self._on_notify)
+        except Exception as e:
+            # 通知が使えなくても再同期で拾える
+            logger.warning(f"⚠️ スケジューラの LISTEN に失敗しました: {e}")
+
+    def _on_notify(self, connection, pid, channel: str, payload: str):
+        for kind in self.kinds.values():
+            if kind.notify_channel == channel:
+                task = asyncio.create_task(self._sync_notified(kind, payload))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+
+    async def _sync_notified(self, kind: JobKind, payload: str):
+        try:
+            await self.sync(kind.name, [kind.parse_key(payload)])
+        except Exception as e:
+            logger.error(f"スケジューラの通知処理エラー ({kind.name}): {e}")
+
+    async def _resync(self):
+        """全種別をDBと再同期（LISTENの接続が切れていれば張り直す）"""
+        if self._listen_conn is not None and self._listen_conn.is_closed():
+            self._listen_conn = None
+            await self._listen()
+        for name in list(self.kinds):
+            try:
+                await self.sync(name)
+            except Exception as e:
+                logger.error(f"スケジューラの再同期エラー ({name}): {e}")
+
+    # ==================== 実行 ====================
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """実行ループを開始（二重に呼んでも1回だけ）"""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """実行ループを止め、実行中のジョブの完了を待つ"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._listen_conn is not None:
+            if not self._listen_conn.is_closed():
+                await self._pool.release(self._listen_conn)
+            self._listen_conn = None
+
+    async def _run(self):
+        if self._bot is not None:
+            await self._bot.wait_until_ready()
+        self._next_resync = _now() + timedelta(seconds=self.resync_interval)
+        while True:
+            self._wakeup.clear()
+            now = _now()
+            if now >= self._next_resync:
+                self._next_resync = now + timedelta(seconds=self.resync_interval)
+                await self._resync()
+
+            due: dict[str, list[Hashable]] = {}
+            for name, key in self.deadlines.pop_due(_now()):
+                if name in self.kinds:
+                    due.setdefault(name, []).append(key)
+            for name, keys in due.items():
+                self._running.update((name, key) for key in keys)
+                batch = asyncio.create_task(self._run_batch(self.kinds[name], keys))
+                self._batches.add(batch)
+                batch.add_done_callback(self._batches.discard)
+
+            wake_at = self._next_resync
+            next_due = self.deadlines.next_due()
+            if next_due is not None:
+                wake_at = min(wake_at, next_due)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, (wake_at - _now()).total_seconds()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_batch(self, kind: JobKind, keys: list[Hashable]):
+        """期限が来た同じ種別のジョブをまとめて実行し、後処理を1回で行う"""
+        try:
+            try:
+                rows = await kind.fetch(keys)
+            except Exception as e:
+                logger.error(f"スケジューラの行取得エラー ({kind.name}): {e}")
+                retry_at = _now() + timedelta(seconds=self.retry_seconds)
+                for key in keys:
+                    self.schedule(kind.name, key, retry_at)
+                return
+
+            results = await asyncio.gather(*(self._run_one(kind, row) for row in rows))
+            done = [(row, result) for row, (ok, result) in zip(rows, results) if ok]
+            for row, (ok, _) in zip(rows, results):
+                entry = (kind.name, kind.key_of(row))
+                if ok:
+                    self._failures.pop(entry, None)
+                    self._retry_at.pop(entry, None)
+                else:
+                    self._record_failure(entry)
+            if done and kind.complete is not None:
+                try:
+                    await kind.complete(done)
+                except Exception as e:
+                    logger.error(f"スケジューラの後処理エラー ({kind.name}): {e}")
+            if rows:
+                logger.info(f"⏰ {kind.name}: {len(done)}/{len(rows)} 件を実行しました")
+        finally:
+            for key in keys:
+                entry = (kind.name, key)
+                self._running.discard(entry)
+                if entry in self._deferred:
+                    self._push(entry, self._deferred.pop(entry))
+
+    def _record_failure(self, entry: tuple[str, Hashable]):
+        """失敗回数を数え、間隔を延ばして再試行を登録（上限に達したら諦める）"""
+        attempts = self._failures.get(entry, 0) + 1
+        self._failures[entry] = attempts
+        if attempts >= self.max_attempts:
+            self._retry_at.pop(entry, None)
+            self._deferred.pop(entry, None)
+            logger.warning(f"⚠️ スケジュールジョブが {attempts} 回失敗したため次回起動まで再試行しません {entry}")
+            return
+        delay = min(self.retry_seconds * 2 ** (attempts - 1), MAX_RETRY_SECONDS)
+        retry_at = _now() + timedelta(seconds=delay)
+        self._retry_at[entry] = retry_at
+        # 実行中なので完了後にヒープへ積まれる（後処理からの再登録があればそちらを優先）
+        self._deferred.setdefault(entry, retry_at)
+
+    async def _run_one(self, kind: JobKind, row: Any) -> tuple[bool, Any]:
+        async with self._semaphore:
+            key = kind.key_of(row)
+            try:
+                return True, await kind.run(row)
+            except JobNotReady as e:
+                logger.info(f"ℹ️ スケジュールジョブを実行できませんでした ({kind.name}, {key}): {e}")
+                return False, None
+            except Exception as e:
+                # トレースバックは初回の失敗だけ出す
+                first = (kind.name, key) not in self._failures
+                logger.error(f"スケジュールジョブの実行エラー ({kind.name}, {key}): {e}", exc_info=first)
+                return False, None
+
+
+# モジュールレベルのインスタンス
+scheduler = DeadlineScheduler()
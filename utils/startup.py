@@ -16,6 +16,7 @@ from discord.ext import commands
 from dotenv import load_dotenv
 
 from config.setting import get_settings
+from utils.event_log import event_log
 from utils.logging import setup_logging
 from utils.startup_create import create_usage_bar
 
@@ -105,37 +106,12 @@ async def startup_send_webhook(bot, guild_id):
     jst_time = datetime.now(pytz.timezone('Asia/Tokyo')).strftime('%Y-%m-%d_%H-%M-%S')
     webhook_name = f"{bot.user.name} | {jst_time}"
 
-    def find_latest_log_file(base_dir='data/logging'):
-        """最新のログファイルのパスを返す関数"""
-        latest_date_dir = max([os.path.join(base_dir, d) for d in os.listdir(base_dir)], key=os.path.getmtime)
-        latest_time_dir = max([os.path.join(latest_date_dir, d) for d in os.listdir(latest_date_dir)], key=os.path.getmtime)
-        log_files = [os.path.join(latest_time_dir, f) for f in os.listdir(latest_time_dir) if f.endswith('.json')]
-        if log_files:
-            return max(log_files, key=os.path.getmtime)
-        return None
-
-    def find_session_id_from_json(log_file_path):
-        """JSON形式のログファイルからセッションIDを検索し、見つかった場合は返す関数"""
-        try:
-            with open(log_file_path) as log_file:
-                log_data = json.load(log_file)
-                return log_data.get('session_id')
-        except FileNotFoundError:
-            logger.warning(f"ログファイルが見つかりません: {log_file_path}")
-        except json.JSONDecodeError:
-            logger.warning(f"ログファイルの形式が正しくありません: {log_file_path}")
-        return None
-
-    latest_log_file = find_latest_log_file()
-    session_id = None
-    if latest_log_file:
-        session_id = find_session_id_from_json(latest_log_file)
-        if session_id:
-            logger.info(f"Found Session ID: {session_id}")
-        else:
-            logger.warning("Session ID not found.")
+    # 最新のセッションIDはイベントログのインデックスから取得
+    session_id = event_log.latest_session_id()
+    if session_id:
+        logger.info(f"Found Session ID: {session_id}")
     else:
-        logger.warning("ログファイルが見つかりませんでした。")
+        logger.warning("Session ID not found.")
 
     failed_cogs = await load_cogs(bot)
 
@@ -9,6 +9,8 @@ from typing import Any, Optional
 
 import asyncpg
 
+from utils.db_pool import pool_registry
+
 logger = logging.getLogger('tag_moderation_db')
 
 # 接続プールのキャッシュ
@@ -37,8 +39,8 @@ async def get_tag_db_pool() -> asyncpg.Pool:
                 logger.error("TAG_MODERATION_DATABASE_URL環境変数が設定されていません")
                 raise ValueError("TAG_MODERATION_DATABASE_URL環境変数が設定されていません")
 
-            # 接続文字列を直接使用
-            _tag_db_pool = await asyncpg.create_pool(db_url)
+            # DSNごとの共有プールを使用
+            _tag_db_pool = await pool_registry.get(db_url, name="tag_moderation")
             logger.info("タグモデレーション専用データベース接続プールを初期化しました")
         except Exception as e:
             logger.error(f"タグモデレーション専用データベース接続に失敗しました: {e}")
@@ -52,7 +54,7 @@ async def close_tag_db_pool():
     global _tag_db_pool
 
     if _tag_db_pool:
-        await _tag_db_pool.close()
+        await pool_registry.release(_tag_db_pool, owner="tag_moderation")
         _tag_db_pool = None
         logger.info("タグモデレーション専用データベース接続プールを閉じました")
 
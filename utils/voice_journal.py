@@ -0,0 +1,357 @@
+"""
+VCセッションジャーナル
+
+VCの参加・退出・状態変化を追記専用のJSONLファイルに記録し、
+再起動後に進行中のセッションを復元する。
+消費者（rank / checkpoint / 音声XP）ごとに名前空間を分けて1ファイルで管理し、
+起動時に開いているセッションだけを残して書き直す（コンパクション）。
+進行中セッションがある間は生存記録を定期的に追記し、停止中に終わったセッションの終了時刻に使う。
+メモリ上の状態はその場で更新し、ファイルへの追記・書き直し・起動時の読み込みはスレッドで
+まとめて行うので、VCイベントのたびにイベントループを止めない。
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from utils.logging import setup_logging
+
+logger = setup_logging(__name__)
+
+JOURNAL_PATH = Path("data/voice/sessions.jsonl")
+
+# 追記行数がこれ（または開いているセッション数の4倍）を超えたら書き直す
+COMPACT_THRESHOLD = 5000
+
+# 進行中セッションがある間、生存記録を追記する間隔（秒）
+HEARTBEAT_SECONDS = 60
+
+# 追記をまとめて書き出すまでの待ち時間（秒）
+FLUSH_SECONDS = 1.0
+
+SessionKey = tuple[str, int, int]  # (namespace, guild_id, user_id)
+
+
+@dataclass
+class JournaledSession:
+    """ジャーナル上の進行中セッション"""
+
+    namespace: str
+    guild_id: int
+    user_id: int
+    channel_id: int
+    started_at: float  # UNIX秒
+    data: dict[str, Any] = field(default_factory=dict)  # 消費者ごとの途中状態
+
+    @property
+    def key(self) -> SessionKey:
+        return (self.namespace, self.guild_id, self.user_id)
+
+
+@dataclass
+class ReconcileResult:
+    """現在のVC状態との突き合わせ結果"""
+
+    resumed: list[JournaledSession] = field(default_factory=list)  # まだ同じVCにいる
+    ended: list[JournaledSession] = field(default_factory=list)  # 停止中に退出・移動した
+    joined: list[tuple[Any, Any]] = field(default_factory=list)  # 停止中に参加した (member, channel)
+    last_seen: Optional[float] = None  # 前回起動時の最終記録時刻（endedの終了時刻に使う）
+
+    def ended_at(self, session: JournaledSession) -> float:
+        """停止中に終わったセッションの終了時刻（不明なら開始時刻）"""
+        return max(self.last_seen or session.started_at, session.started_at)
+
+
+class VoiceSessionJournal:
+    """追記専用のVCセッションジャーナル"""
+
+    def __init__(self, path: Path = JOURNAL_PATH, compact_threshold: int = COMPACT_THRESHOLD):
+        self.path = Path(path)
+        self.compact_threshold = compact_threshold
+        self.sessions: dict[SessionKey, JournaledSession] = {}
+        self.last_seen: Optional[float] = None  # 最後に記録した時刻（Botが動いていた証拠）
+        self.previous_last_seen: Optional[float] = None  # 読み込み時点のlast_seen
+
+        self._lines = 0  # ファイル上の行数（書き出し待ちを除く）
+        self._loaded = False
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+        self._buffer: deque[str] = deque()  # 書き出し待ちの行
+        self._compact_pending = False  # 次の書き出しでファイルを書き直す
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._io_lock = threading.Lock()  # ファイル操作（スレッドと同期のcloseで共有）
+
+    # ==================== 読み込み ====================
+
+    def load(self):
+        """ジャーナルを再生して進行中セッションを復元し、コンパクションする（初回のみ）
+
+        Botでは起動時にload_asyncで読み込むので、ここで同期的に読むのはスクリプト・テストのみ。
+        """
+        if self._loaded:
+            return
+        self._replay(self._read_records())
+
+    async def load_async(self):
+        """ファイルの読み込みをスレッドで行うload（VCイベントが届く前に呼ぶ）"""
+        if self._loaded:
+            return
+        records = await asyncio.to_thread(self._read_records)
+        if not self._loaded:
+            self._replay(records)
+
+    def _read_records(self) -> list[dict]:
+        records = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # 書き込み途中で落ちた最終行などは捨てる
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _replay(self, records: list[dict]):
+        self._loaded = True
+        for record in records:
+            try:
+                self._apply(record)
+            except (KeyError, TypeError):
+                continue
+        if records:
+            logger.info(f"📒 VCセッションジャーナル復元: {len(self.sessions)}件")
+
+        self.previous_last_seen = self.last_seen
+        self.compact()
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        at = record["t"]
+        self.last_seen = max(self.last_seen or at, at)
+        if op == "beat":
+            return
+        key = (record["ns"], record["g"], record["u"])
+
+        if op == "join":
+            self.sessions[key] = JournaledSession(
+                namespace=record["ns"],
+                guild_id=record["g"],
+                user_id=record["u"],
+                channel_id=record["c"],
+                started_at=record.get("s", at),
+                data=record.get("d", {}),
+            )
+        elif op == "update":
+            session = self.sessions.get(key)
+            if session:
+                session.data.update(record.get("d", {}))
+        elif op == "leave":
+            self.sessions.pop(key, None)
+
+    # ==================== 記録 ====================
+
+    def record_join(
+        self,
+        namespace: str,
+        guild_id: int,
+        user_id: int,
+        channel_id: int,
+        started_at: datetime,
+        **data,
+    ):
+        """セッション開始を記録（同じキーの既存セッションは置き換え）"""
+        self.load()
+        record = {
+            "op": "join", "ns": namespace, "g": guild_id, "u": user_id,
+            "c": channel_id, "t": time.time(), "s": started_at.timestamp(),
+        }
+        if data:
+            record["d"] = data
+        self._append(record)
+
+    def record_update(self, namespace: str, guild_id: int, user_id: int, **data):
+        """途中状態（活動状態・累積値など）を記録"""
+        self.load()
+        if (namespace, guild_id, user_id) not in self.sessions:
+            return
+        self._append({
+            "op": "update", "ns": namespace, "g": guild_id, "u": user_id,
+            "t": time.time(), "d": data,
+        })
+
+    def record_leave(self, namespace: str, guild_id: int, user_id: int):
+        """セッション終了を記録"""
+        self.load()
+        if (namespace, guild_id, user_id) not in self.sessions:
+            return
+        self._append({
+            "op": "leave", "ns": namespace, "g": guild_id, "u": user_id, "t": time.time(),
+        })
+
+    def record_heartbeat(self):
+        """Botが動いていることを記録（停止中に終わったセッションの終了時刻になる）"""
+        self.load()
+        if not self.sessions:
+            return
+        self._append({"op": "beat", "t": time.time()})
+
+    def start_heartbeat(self, interval: float = HEARTBEAT_SECONDS):
+        """生存記録の定期追記を開始（二重に呼んでも1回だけ）"""
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop(interval))
+
+    def stop_heartbeat(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _heartbeat_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.record_heartbeat()
+
+    def _append(self, record: dict):
+        """メモリ上の状態に反映し、行を書き出し待ちに積む"""
+        self._apply(record)
+        self._buffer.append(json.dumps(record, separators=(",", ":")))
+        if self._lines + len(self._buffer) > max(self.compact_threshold, len(self.sessions) * 4):
+            self._compact_pending = True
+        self._schedule_flush()
+
+    # ==================== 書き出し ====================
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # イベントループ外（スクリプト・テスト）ではその場で書く
+            self._write(*self._take_pending())
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(FLUSH_SECONDS)
+        await self.flush()
+
+    def _take_pending(self) -> tuple[list[str], Optional[list[str]]]:
+        """書き出し待ちの行と、書き直す場合はその内容（メモリ上の状態から作るので追記行を含む）"""
+        lines = list(self._buffer)
+        self._buffer.clear()
+        if not self._compact_pending:
+            return lines, None
+        self._compact_pending = False
+        return lines, self._snapshot_lines()
+
+    def _snapshot_lines(self) -> list[str]:
+        now = time.time()
+        lines = []
+        for session in self.sessions.values():
+            record = {
+                "op": "join", "ns": session.namespace, "g": session.guild_id,
+                "u": session.user_id, "c": session.channel_id,
+                "t": self.last_seen or now, "s": session.started_at,
+            }
+            if session.data:
+                record["d"] = dict(session.data)
+            lines.append(json.dumps(record, separators=(",", ":")))
+        return lines
+
+    async def flush(self):
+        """書き出し待ちの行をスレッドで書き出す（必要ならファイルを書き直す）"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            lines, snapshot = self._take_pending()
+            if lines or snapshot is not None:
+                await asyncio.to_thread(self._write, lines, snapshot)
+
+    def _write(self, lines: list[str], snapshot: Optional[list[str]] = None):
+        with self._io_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if snapshot is not None:
+                    tmp_path = self.path.with_suffix(".tmp")
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.write("".join(line + "\n" for line in snapshot))
+                    os.replace(tmp_path, self.path)
+                    self._lines = len(snapshot)
+                elif lines:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write("".join(line + "\n" for line in lines))
+                    self._lines += len(lines)
+            except OSError as e:
+                logger.error(f"VCセッションジャーナル書き込みエラー: {e}")
+
+    # ==================== 保守 ====================
+
+    def compact(self):
+        """進行中セッションだけを残してファイルを書き直す（次の書き出しで行う）"""
+        self._compact_pending = True
+        self._schedule_flush()
+
+    def close(self):
+        """書き出し待ちをその場で書き出す（終了時・テスト用。Botではflushを使う）"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        lines, snapshot = self._take_pending()
+        if lines or snapshot is not None:
+            self._write(lines, snapshot)
+
+    # ==================== 復元 ====================
+
+    def open_sessions(self, namespace: str) -> list[JournaledSession]:
+        """名前空間の進行中セッション"""
+        return [s for s in self.sessions.values() if s.namespace == namespace]
+
+    def reconcile(self, namespace: str, guilds) -> ReconcileResult:
+        """ジャーナルの進行中セッションを現在のVC状態（ゲートウェイキャッシュ）と突き合わせる
+
+        - まだ同じチャンネルにいる -> resumed（そのまま継続）
+        - 停止中に退出・移動した -> ended（last_seenで終了扱い、ジャーナルからも削除）
+        - ジャーナルに無いがVCにいる -> joined（今から開始）
+        """
+        self.load()
+        result = ReconcileResult(last_seen=self.previous_last_seen)
+        guilds_by_id = {guild.id: guild for guild in guilds}
+
+        for session in self.open_sessions(namespace):
+            guild = guilds_by_id.get(session.guild_id)
+            member = guild.get_member(session.user_id) if guild else None
+            voice = getattr(member, "voice", None)
+            channel = getattr(voice, "channel", None)
+
+            if channel is not None and channel.id == session.channel_id:
+                result.resumed.append(session)
+            else:
+                result.ended.append(session)
+                self.record_leave(namespace, session.guild_id, session.user_id)
+
+        for guild in guilds:
+            for channel in guild.voice_channels:
+                for member in channel.members:
+                    if member.bot or (namespace, guild.id, member.id) in self.sessions:
+                        continue
+                    result.joined.append((member, channel))
+
+        logger.info(
+            f"📒 VCセッション突き合わせ ({namespace}): "
+            f"継続 {len(result.resumed)} / 終了 {len(result.ended)} / 新規 {len(result.joined)}"
+        )
+        return result
+
+
+# モジュールレベルのインスタンス
+voice_journal = VoiceSessionJournal()
@@ -0,0 +1,380 @@
+"""
+VCプレゼンス管理
+
+on_voice_state_updateを1か所で受け取り、参加・退出・移動・ミュート変化を
+1回だけ解析して型付きイベントとして購読者（rank / checkpoint / 音声XP / イベントログ）に配信する。
+VC滞在中のセッション表（誰がどのVCにいつからいるか）はここが唯一の正とし、
+rank / checkpoint / イベントログは独自の表を持たない。音声XP（utils/rank/voice_manager.py）は
+XP精算用の途中状態と対象者だけの参加人数を別に持つ。
+セッション表はVCセッションジャーナルに記録され、再起動後は現在のVC状態と突き合わせて
+停止中の退出・参加を復元イベント（restored=True）として配信する。
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Optional
+
+from utils.logging import setup_logging
+from utils.participant_index import ParticipantIndex
+from utils.voice_journal import voice_journal
+
+logger = setup_logging(__name__)
+
+# VCセッションジャーナルの名前空間
+JOURNAL_NAMESPACE = "presence"
+
+
+class VoiceEventType(str, Enum):
+    """VCイベントの種類"""
+    JOIN = "join"    # VCに参加
+    LEAVE = "leave"  # VCから退出
+    MOVE = "move"    # 別のVCへ移動
+    MUTE = "mute"    # 同じVC内でミュート・スピーカーオフが変化
+
+
+@dataclass(slots=True)
+class VoicePresence:
+    """VC滞在セッション"""
+
+    guild_id: int
+    user_id: int
+    channel_id: int
+    joined_at: datetime  # セッション開始（移動しても変わらない）
+    channel_joined_at: datetime  # 現在のチャンネルに入った時刻
+    bot: bool = False
+    self_mute: bool = False
+    self_deaf: bool = False
+    mute: bool = False
+    deaf: bool = False
+    state: Optional[dict[str, Any]] = None  # 購読者ごとの付加情報（必要なときだけ作る）
+
+    @property
+    def is_muted(self) -> bool:
+        return self.mute or self.self_mute
+
+    @property
+    def is_deafened(self) -> bool:
+        return self.deaf or self.self_deaf
+
+    def duration_seconds(self, now: datetime) -> int:
+        """セッション開始からの秒数"""
+        return max(0, int((now - self.joined_at).total_seconds()))
+
+
+@dataclass(slots=True)
+class VoicePresenceEvent:
+    """解析済みのVCイベント"""
+
+    type: VoiceEventType
+    member: Any  # discord.Member（復元した退出でメンバーがキャッシュに無い場合はNone）
+    session: VoicePresence
+    at: datetime
+    previous_channel_id: Optional[int] = None  # LEAVE / MOVE の移動元
+    channel_seconds: int = 0  # LEAVE / MOVE で移動元チャンネルに滞在した秒数
+    before: Any = None  # discord.VoiceState（復元イベントではNone）
+    after: Any = None
+    restored: bool = False  # 停止中の変化を再起動後に補完したイベント
+
+    @property
+    def guild_id(self) -> int:
+        return self.session.guild_id
+
+    @property
+    def user_id(self) -> int:
+        return self.session.user_id
+
+    @property
+    def channel_id(self) -> int:
+        return self.session.channel_id
+
+    @property
+    def is_bot(self) -> bool:
+        return self.session.bot
+
+    @property
+    def duration_seconds(self) -> int:
+        """セッション開始からの秒数（LEAVEでは滞在時間の合計）"""
+        return self.session.duration_seconds(self.at)
+
+
+VoiceEventHandler = Callable[[VoicePresenceEvent], Awaitable[None]]
+
+
+class VoicePresenceTracker:
+    """VCセッション表とイベント配信"""
+
+    def __init__(self):
+        self.sessions: dict[tuple[int, int], VoicePresence] = {}  # (guild_id, user_id) -> session
+        self.participants = ParticipantIndex()  # チャンネルごとの参加人数（Bot除く）
+        self._subscribers: dict[VoiceEventType, list[VoiceEventHandler]] = {t: [] for t in VoiceEventType}
+        self._attached_bot = None
+        self._restore_task: Optional[asyncio.Task] = None
+
+    # ==================== 購読 ====================
+
+    def attach(self, bot):
+        """Botのon_voice_state_updateに接続（何度呼んでも1回だけ）"""
+        if self._attached_bot is bot:
+            return
+        self._attached_bot = bot
+        bot.add_listener(self.on_voice_state_update, "on_voice_state_update")
+        self._restore_task = asyncio.create_task(self._restore(bot))
+        voice_journal.start_heartbeat()
+
+    def subscribe(self, handler: VoiceEventHandler, *event_types: VoiceEventType):
+        """イベントを購読（種類省略時はすべて）"""
+        for event_type in event_types or tuple(VoiceEventType):
+            if handler not in self._subscribers[event_type]:
+                self._subscribers[event_type].append(handler)
+
+    def unsubscribe(self, handler: VoiceEventHandler):
+        """購読を解除"""
+        for handlers in self._subscribers.values():
+            if handler in handlers:
+                handlers.remove(handler)
+
+    # ==================== 参照 ====================
+
+    def get(self, guild_id: int, user_id: int) -> Optional[VoicePresence]:
+        """VC滞在中ならセッションを返す"""
+        return self.sessions.get((guild_id, user_id))
+
+    def guild_sessions(self, guild_id: int) -> list[VoicePresence]:
+        """ギルドのVC滞在中セッション"""
+        return [s for s in self.sessions.values() if s.guild_id == guild_id]
+
+    def channel_count(self, guild_id: int, channel_id: int) -> int:
+        """チャンネルの参加人数（Bot除く、channel.membersを走査しない）"""
+        return self.participants.count(guild_id, channel_id)
+
+    def channel_peak(self, guild_id: int, channel_id: int) -> int:
+        """チャンネルに人がいる間の最大参加人数（Bot除く）"""
+        return self.participants.peak(guild_id, channel_id)
+
+    # ==================== 解析 ====================
+
+    async def on_voice_state_update(self, member, before, after):
+        """VC状態変化を解析して配信"""
+        try:
+            event = self.apply(member, before, after, datetime.now(timezone.utc))
+        except Exception as e:
+            logger.error(f"VC状態解析エラー (Guild: {member.guild.id}, User: {member.id}): {e}")
+            return
+        if event:
+            await self.publish(event)
+
+    def apply(self, member, before, after, now: datetime) -> Optional[VoicePresenceEvent]:
+        """状態変化をセッション表に反映してイベントを作る（配信はしない）"""
+        key = (member.guild.id, member.id)
+        before_channel = before.channel
+        after_channel = after.channel
+
+        # VC参加
+        if before_channel is None and after_channel is not None:
+            session = VoicePresence(
+                guild_id=member.guild.id,
+                user_id=member.id,
+                channel_id=after_channel.id,
+                joined_at=now,
+                channel_joined_at=now,
+                bot=member.bot,
+            )
+            self._copy_voice_flags(session, after)
+            self._add_session(session)
+            self._journal(session)
+            return VoicePresenceEvent(VoiceEventType.JOIN, member, session, now, before=before, after=after)
+
+        # VC退出
+        if before_channel is not None and after_channel is None:
+            session = self.sessions.pop(key, None)
+            if session is None:
+                session = self._untracked_session(member, before_channel.id, before, now)
+            elif not session.bot:
+                self.participants.leave(session.guild_id, session.channel_id, session.user_id)
+            voice_journal.record_leave(JOURNAL_NAMESPACE, session.guild_id, session.user_id)
+            return VoicePresenceEvent(
+                VoiceEventType.LEAVE, member, session, now,
+                previous_channel_id=before_channel.id,
+                channel_seconds=self._channel_seconds(session, now),
+                before=before, after=after,
+            )
+
+        if before_channel is None or after_channel is None:
+            return None
+
+        session = self.sessions.get(key)
+        if session is None:
+            # 起動前から滞在していて復元できなかったセッション
+            session = self._untracked_session(member, before_channel.id, before, now)
+            self._add_session(session)
+
+        # チャンネル移動
+        if before_channel.id != after_channel.id:
+            channel_seconds = self._channel_seconds(session, now)
+            if not session.bot:
+                self.participants.move(session.guild_id, session.channel_id, after_channel.id, session.user_id)
+            session.channel_id = after_channel.id
+            session.channel_joined_at = now
+            self._copy_voice_flags(session, after)
+            self._journal(session)
+            return VoicePresenceEvent(
+                VoiceEventType.MOVE, member, session, now,
+                previous_channel_id=before_channel.id,
+                channel_seconds=channel_seconds,
+                before=before, after=after,
+            )
+
+        # 同じチャンネル内のミュート・スピーカーオフ変化（配信・カメラ等は対象外）
+        if (
+            before.self_mute != after.self_mute
+            or before.self_deaf != after.self_deaf
+            or before.mute != after.mute
+            or before.deaf != after.deaf
+        ):
+            self._copy_voice_flags(session, after)
+            return VoicePresenceEvent(VoiceEventType.MUTE, member, session, now, before=before, after=after)
+
+        return None
+
+    def _add_session(self, session: VoicePresence):
+        self.sessions[(session.guild_id, session.user_id)] = session
+        if not session.bot:
+            self.participants.join(session.guild_id, session.channel_id, session.user_id)
+
+    def _untracked_session(self, member, channel_id: int, voice_state, now: datetime) -> VoicePresence:
+        session = VoicePresence(
+            guild_id=member.guild.id,
+            user_id=member.id,
+            channel_id=channel_id,
+            joined_at=now,
+            channel_joined_at=now,
+            bot=member.bot,
+        )
+        self._copy_voice_flags(session, voice_state)
+        return session
+
+    def _copy_voice_flags(self, session: VoicePresence, voice_state):
+        session.self_mute = bool(voice_state.self_mute)
+        session.self_deaf = bool(voice_state.self_deaf)
+        session.mute = bool(voice_state.mute)
+        session.deaf = bool(voice_state.deaf)
+
+    def _channel_seconds(self, session: VoicePresence, now: datetime) -> int:
+        return max(0, int((now - session.channel_joined_at).total_seconds()))
+
+    def _journal(self, session: VoicePresence):
+        # botは退出したメンバーを取得できなくても復元イベントで判定できるように残す
+        voice_journal.record_join(
+            JOURNAL_NAMESPACE, session.guild_id, session.user_id, session.channel_id,
+            session.joined_at, channel_joined=session.channel_joined_at.timestamp(),
+            bot=session.bot, **(session.state or {}),
+        )
+
+    def _journaled_state(self, journaled) -> Optional[dict[str, Any]]:
+        state = {k: v for k, v in journaled.data.items() if k not in ("channel_joined", "bot")}
+        return state or None
+
+    def update_state(self, session: VoicePresence, **values):
+        """購読者の付加情報を更新してジャーナルに記録（値はJSONに書けるもの）"""
+        if session.state is None:
+            session.state = {}
+        session.state.update(values)
+        voice_journal.record_update(JOURNAL_NAMESPACE, session.guild_id, session.user_id, **values)
+
+    # ==================== 配信 ====================
+
+    async def publish(self, event: VoicePresenceEvent):
+        """購読者へ並列に配信（1つの失敗は他に影響させない）"""
+        handlers = list(self._subscribers[event.type])
+        if not handlers:
+            return
+
+        results = await asyncio.gather(*(handler(event) for handler in handlers), return_exceptions=True)
+        for handler, result in zip(handlers, results):
+            if isinstance(result, Exception):
+                logger.error(f"VCイベント処理エラー ({getattr(handler, '__qualname__', handler)}, {event.type.value}): {result}")
+
+    # ==================== 復元 ====================
+
+    async def _restore(self, bot):
+        """ジャーナルと現在のVC状態を突き合わせ、停止中の変化を復元イベントとして配信"""
+        await bot.wait_until_ready()
+        try:
+            result = voice_journal.reconcile(JOURNAL_NAMESPACE, bot.guilds)
+            now = datetime.now(timezone.utc)
+            guilds = {guild.id: guild for guild in bot.guilds}
+
+            # まだ同じVCにいる -> 参加時刻を引き継いで継続（イベントは出さない）
+            for journaled in result.resumed:
+                key = (journaled.guild_id, journaled.user_id)
+                if key in self.sessions:
+                    continue
+                member = guilds[journaled.guild_id].get_member(journaled.user_id)
+                joined_at = datetime.fromtimestamp(journaled.started_at, timezone.utc)
+                session = VoicePresence(
+                    guild_id=journaled.guild_id,
+                    user_id=journaled.user_id,
+                    channel_id=journaled.channel_id,
+                    joined_at=joined_at,
+                    channel_joined_at=datetime.fromtimestamp(
+                        journaled.data.get("channel_joined", journaled.started_at), timezone.utc
+                    ),
+                )
+                session.bot = member.bot
+                session.state = self._journaled_state(journaled)
+                self._copy_voice_flags(session, member.voice)
+                self._add_session(session)
+
+            # 停止中に退出した -> 最後に記録できた時刻での退出として配信
+            # （サーバーを抜けた・キャッシュに無いメンバーもジャーナルのIDだけで閉じる）
+            for journaled in result.ended:
+                guild = guilds.get(journaled.guild_id)
+                member = guild.get_member(journaled.user_id) if guild else None
+                ended_at = datetime.fromtimestamp(result.ended_at(journaled), timezone.utc)
+                session = VoicePresence(
+                    guild_id=journaled.guild_id,
+                    user_id=journaled.user_id,
+                    channel_id=journaled.channel_id,
+                    joined_at=datetime.fromtimestamp(journaled.started_at, timezone.utc),
+                    channel_joined_at=datetime.fromtimestamp(
+                        journaled.data.get("channel_joined", journaled.started_at), timezone.utc
+                    ),
+                    bot=journaled.data.get("bot", bool(getattr(member, "bot", False))),
+                    state=self._journaled_state(journaled),
+                )
+                await self.publish(VoicePresenceEvent(
+                    VoiceEventType.LEAVE, member, session, ended_at,
+                    previous_channel_id=journaled.channel_id,
+                    channel_seconds=self._channel_seconds(session, ended_at),
+                    restored=True,
+                ))
+
+            # 停止中に参加した -> 今からの参加として配信
+            for member, channel in result.joined:
+                key = (member.guild.id, member.id)
+                if key in self.sessions:
+                    continue
+                session = VoicePresence(
+                    guild_id=member.guild.id,
+                    user_id=member.id,
+                    channel_id=channel.id,
+                    joined_at=now,
+                    channel_joined_at=now,
+                    bot=member.bot,
+                )
+                self._copy_voice_flags(session, member.voice)
+                self._add_session(session)
+                self._journal(session)
+                await self.publish(VoicePresenceEvent(
+                    VoiceEventType.JOIN, member, session, now, after=member.voice, restored=True,
+                ))
+
+        except Exception as e:
+            logger.error(f"VCプレゼンス復元エラー: {e}")
+
+
+# モジュールレベルのインスタンス
+voice_presence = VoicePresenceTracker()